@@ -11,6 +11,16 @@
 # You should have received a copy of GPLv2 along with this software; if not,
 # see http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt
 
+import sys
+
+from gettext import gettext as _
+from logging import getLogger
+from Queue import Queue, Empty
+from threading import Thread
+
+
+log = getLogger(__name__)
+
 
 def encode_unicode(path):
     """
@@ -53,3 +63,55 @@ def partial(func, *args, **kwds):
     Python 2.4 doesn't provide functools so provide our own version of the partial method
     """
     return lambda *fargs, **fkwds: func(*(args+fargs), **dict(kwds, **fkwds))
+
+
+def run_concurrently(function, items, threads):
+    """
+    Call the function once for each item using a bounded number of threads.
+    The function is called inline when only one thread is needed.  Every item
+    is processed even when the function raises an exception for some of them.
+    Each exception is logged along with the item that caused it.
+
+    :param function: A callable that accepts a single item.
+    :type function: callable
+    :param items: The items to be processed.
+    :type items: iterable
+    :param threads: The maximum number of threads.
+    :type threads: int
+    :return: The values returned by the function, in item order.
+    :rtype: list
+    :raise Exception: The first exception raised by the function is re-raised
+        after all of the items have been processed.
+    """
+    items = list(items)
+    queue = Queue()
+    for n, item in enumerate(items):
+        queue.put((n, item))
+    results = [None] * len(items)
+    raised = []
+
+    def worker():
+        while True:
+            try:
+                n, item = queue.get_nowait()
+            except Empty:
+                return
+            try:
+                results[n] = function(item)
+            except Exception:
+                log.exception(_('Concurrent call failed for item: %(i)r') % {'i': item})
+                raised.append(sys.exc_info())
+
+    threads = min(threads, len(items))
+    if threads <= 1:
+        worker()
+    else:
+        pool = [Thread(target=worker) for n in range(threads)]
+        for thread in pool:
+            thread.setDaemon(True)
+            thread.start()
+        for thread in pool:
+            thread.join()
+    if raised:
+        raise raised[0][0], raised[0][1], raised[0][2]
+    return results
@@ -12,9 +12,11 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import threading
+import time
 import unittest
 
-from mock import Mock
+from mock import Mock, patch
 
 from pulp.common import util
 
@@ -52,3 +54,85 @@ class TestPartial(unittest.TestCase):
         result_kwargs.update(kwargs)
         result_kwargs.update(additional_kwargs)
         base_func.assert_called_once_with(*result_args, **result_kwargs)
+
+
+class TestRunConcurrently(unittest.TestCase):
+
+    def test_inline(self):
+        threads = []
+
+        def function(n):
+            threads.append(threading.currentThread())
+            return n * 2
+
+        result = util.run_concurrently(function, [1, 2, 3], 1)
+        self.assertEqual(result, [2, 4, 6])
+        self.assertEqual(threads, [threading.currentThread()] * 3)
+
+    def test_threaded(self):
+        threads = set()
+
+        def function(n):
+            threads.add(threading.currentThread())
+            time.sleep(0.01)
+            return n * 2
+
+        result = util.run_concurrently(function, range(10), 3)
+        self.assertEqual(result, [n * 2 for n in range(10)])
+        self.assertEqual(len(threads), 3)
+        self.assertTrue(threading.currentThread() not in threads)
+
+    def test_concurrent(self):
+        running = []
+        lock = threading.Lock()
+        all_running = threading.Event()
+
+        def function(n):
+            lock.acquire()
+            try:
+                running.append(n)
+                if len(running) == 3:
+                    all_running.set()
+            finally:
+                lock.release()
+            all_running.wait(5)
+
+        util.run_concurrently(function, range(3), 3)
+        self.assertTrue(all_running.isSet())
+        self.assertEqual(sorted(running), [0, 1, 2])
+
+    def test_empty(self):
+        self.assertEqual(util.run_concurrently(Mock(), [], 4), [])
+
+    @patch('pulp.common.util.log')
+    def test_raised(self, mock_log):
+        called = []
+
+        def function(n):
+            called.append(n)
+            if n == 2:
+                raise ValueError()
+            return n
+
+        self.assertRaises(ValueError, util.run_concurrently, function, range(5), 2)
+        self.assertEqual(sorted(called), range(5))
+        self.assertEqual(mock_log.exception.call_count, 1)
+        self.assertTrue('2' in mock_log.exception.call_args[0][0])
+
+    @patch('pulp.common.util.log')
+    def test_raised_inline(self, mock_log):
+        called = []
+
+        def function(n):
+            called.append(n)
+            if n in ('a', 'b'):
+                raise ValueError(n)
+
+        try:
+            util.run_concurrently(function, ['a', 'b', 'c'], 1)
+            self.fail('ValueError not raised')
+        except ValueError, e:
+            self.assertEqual(str(e), 'a')
+        self.assertEqual(called, ['a', 'b', 'c'])
+        self.assertEqual(mock_log.exception.call_count, 2)
+        self.assertTrue("'b'" in mock_log.exception.call_args[0][0])
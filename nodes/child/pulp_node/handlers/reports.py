@@ -9,6 +9,8 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+from threading import RLock
+
 from pulp_node.reports import RepositoryReport, RepositoryProgress
 from pulp_node.error import ErrorList
 
@@ -85,6 +87,8 @@ class HandlerProgress(object):
     :type state: str
     :ivar progress: A list of RepositoryProgress reports.
     :type progress: list
+    :ivar lock: Serializes updates reported by concurrent repository synchronizations.
+    :type lock: RLock
     """
 
     PENDING = 'pending'
@@ -99,6 +103,7 @@ class HandlerProgress(object):
         self.conduit = conduit
         self.state = self.PENDING
         self.progress = []
+        self.lock = RLock()
 
     def started(self, bindings):
         """
@@ -153,7 +158,11 @@ class HandlerProgress(object):
         Notification that the report has been updated.
         Reported using the conduit.
         """
-        self.conduit.update_progress(self.dict())
+        self.lock.acquire()
+        try:
+            self.conduit.update_progress(self.dict())
+        finally:
+            self.lock.release()
 
     def dict(self):
         return dict(
@@ -14,6 +14,8 @@ from gettext import gettext as _
 from logging import getLogger
 from operator import itemgetter
 
+from pulp.common.util import run_concurrently
+
 from pulp_node import constants
 from pulp_node.handlers.model import *
 from pulp_node.handlers.validation import Validator
@@ -49,6 +51,8 @@ class Request(object):
     :type scope: str
     :ivar options: synchronization options.
     :type options: dict
+    :ivar concurrency: The number of repositories synchronized concurrently.
+    :type concurrency: int
     """
 
     def __init__(self, conduit, progress, summary, bindings, scope, options):
@@ -72,8 +76,24 @@ class Request(object):
         self.bindings = sorted(bindings, key=itemgetter('repo_id'))
         self.scope = scope
         self.options = options
+        self.concurrency = self._concurrency(options)
         summary.setup(self.bindings)
 
+    @staticmethod
+    def _concurrency(options):
+        """
+        Get the number of repositories to be synchronized concurrently.
+        :param options: synchronization options.
+        :type options: dict
+        :return: The validated number.
+        :rtype: int
+        """
+        concurrency = options.get(constants.MAX_SYNC_CONCURRENCY_KEYWORD)
+        try:
+            return max(int(concurrency), 1)
+        except (TypeError, ValueError):
+            return constants.DEFAULT_SYNC_CONCURRENCY
+
     def cancelled(self):
         """
         Get whether the request has been cancelled.
@@ -147,34 +167,46 @@ class HandlerStrategy(object):
         Add or update repositories based on bindings.
           - Merge repositories found in BOTH parent and child.
           - Add repositories found in the parent but NOT in the child.
+        Up to request.concurrency repositories are merged and synchronized concurrently.
         :param request: A synchronization request.
         :type request: SyncRequest
         """
-        for bind in request.bindings:
-            try:
-                repo_id = bind['repo_id']
-                details = bind['details']
-                if request.cancelled():
-                    request.summary[repo_id].action = RepositoryReport.CANCELLED
-                    continue
-                parent = Repository(repo_id, details)
-                child = Repository.fetch(repo_id)
-                progress = request.progress.find_report(repo_id)
-                progress.begin_merging()
-                if child:
-                    request.summary[repo_id].action = RepositoryReport.MERGED
-                    child.merge(parent)
-                else:
-                    child = Repository(repo_id, parent.details)
-                    request.summary[repo_id].action = RepositoryReport.ADDED
-                    child.add()
-                self._synchronize_repository(request, repo_id)
-            except NodeError, ne:
-                request.summary.errors.append(ne)
-            except Exception, e:
-                log.exception(repo_id)
-                error = CaughtException(e, repo_id)
-                request.summary.errors.append(error)
+        def merge(bind):
+            self._merge_repository(request, bind)
+        run_concurrently(merge, request.bindings, request.concurrency)
+
+    def _merge_repository(self, request, bind):
+        """
+        Add or update a repository based on a binding and synchronize it.
+        :param request: A synchronization request.
+        :type request: SyncRequest
+        :param bind: A binding payload.
+        :type bind: dict
+        """
+        try:
+            repo_id = bind['repo_id']
+            details = bind['details']
+            if request.cancelled():
+                request.summary[repo_id].action = RepositoryReport.CANCELLED
+                return
+            parent = Repository(repo_id, details)
+            child = Repository.fetch(repo_id)
+            progress = request.progress.find_report(repo_id)
+            progress.begin_merging()
+            if child:
+                request.summary[repo_id].action = RepositoryReport.MERGED
+                child.merge(parent)
+            else:
+                child = Repository(repo_id, parent.details)
+                request.summary[repo_id].action = RepositoryReport.ADDED
+                child.add()
+            self._synchronize_repository(request, repo_id)
+        except NodeError, ne:
+            request.summary.errors.append(ne)
+        except Exception, e:
+            log.exception(repo_id)
+            error = CaughtException(e, repo_id)
+            request.summary.errors.append(error)
 
     def _synchronize_repository(self, request, repo_id):
         """
@@ -9,104 +9,267 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import struct
+
+from array import array
+from itertools import izip
+
 from pulp_node import constants
+from pulp_node.manifest import UnitRef, fetch_units, unit_digest
+
+
+# --- constants -------------------------------------------------------------------------
+
+# An inventory entry is the unit digest followed by the position of the unit
+# in the input and the unit's last_updated.  Entries sort by digest and then
+# by position.
+DIGEST_LENGTH = 20
+ENTRY = struct.Struct('!Id')
+
+# The fields kept for units contained only in the child inventory.
+CHILD_UNIT_FIELDS = ('unit_id', 'type_id', 'unit_key', 'owner_type', 'owner_id')
+
+
+# --- utils -----------------------------------------------------------------------------
+
+def _entries(units):
+    """
+    Build the sorted inventory entries for the specified units.
+    When the same unit is listed more than once, the last listing wins.
+    :param units: An iterable of content units.
+    :type units: iterable
+    :return: A sorted list of packed entries.
+    :rtype: list
+    """
+    entries = []
+    for n, unit in enumerate(units):
+        last_updated = unit.get(constants.LAST_UPDATED) or 0
+        entries.append(unit_digest(unit) + ENTRY.pack(n, last_updated))
+    entries.sort()
+    # drop duplicates in place
+    last = -1
+    for entry in entries:
+        if last >= 0 and entries[last][:DIGEST_LENGTH] == entry[:DIGEST_LENGTH]:
+            entries[last] = entry
+        else:
+            last += 1
+            entries[last] = entry
+    del entries[last + 1:]
+    return entries
+
+
+def _merge(parent, child):
+    """
+    Merge the sorted parent and child inventory entries.
+    :param parent: Sorted parent entries.
+    :type parent: list
+    :param child: Sorted child entries.
+    :type child: list
+    :return: A generator of (digest, parent, child) where parent and child are unpacked
+        entries of (position, last_updated).  Either is None when the unit is not
+        contained in that inventory.
+    :rtype: generator
+    """
+    i = 0
+    j = 0
+    while i < len(parent) or j < len(child):
+        p_digest = parent[i][:DIGEST_LENGTH] if i < len(parent) else None
+        c_digest = child[j][:DIGEST_LENGTH] if j < len(child) else None
+        if c_digest is None or (p_digest is not None and p_digest < c_digest):
+            yield p_digest, ENTRY.unpack(parent[i][DIGEST_LENGTH:]), None
+            i += 1
+        elif p_digest is None or c_digest < p_digest:
+            yield c_digest, None, ENTRY.unpack(child[j][DIGEST_LENGTH:])
+            j += 1
+        else:
+            yield p_digest, ENTRY.unpack(parent[i][DIGEST_LENGTH:]), \
+                ENTRY.unpack(child[j][DIGEST_LENGTH:])
+            i += 1
+            j += 1
+
+
+# --- inventory -------------------------------------------------------------------------
+
+
+class RefTable(object):
+    """
+    The unit references for the parent inventory by position.
+    References into a units store are kept as offsets and lengths and
+    re-created on demand.  Any other references are kept as-is.
+    :ivar store: The units store shared by the references.
+    :type store: pulp_node.manifest.UnitStore
+    """
+
+    __slots__ = ('store', 'offsets', 'lengths', 'refs')
 
+    def __init__(self):
+        self.store = None
+        self.offsets = array('L')
+        self.lengths = array('L')
+        self.refs = None
 
-class UniqueKey(object):
+    def add(self, ref):
+        """
+        Add the reference for the next position.
+        :param ref: A unit reference.
+        :type ref: pulp_node.manifest.UnitRef
+        """
+        if self.refs is None:
+            store = getattr(ref, 'store', None)
+            if store is not None and (self.store is None or store is self.store):
+                self.store = store
+                self.offsets.append(ref.offset)
+                self.lengths.append(ref.length)
+                return
+            self.refs = [self[n] for n in xrange(len(self.offsets))]
+            self.offsets = None
+            self.lengths = None
+        self.refs.append(ref)
+
+    def __getitem__(self, n):
+        if self.refs is not None:
+            return self.refs[n]
+        return UnitRef(self.store.path, self.offsets[n], self.lengths[n], self.store)
+
+
+class ChildUnits(object):
+    """
+    The content units in the child node associated with a repository.
+    The units are queried when the listing is created and queried again
+    each time the listing is iterated after the first.
+    """
+
+    def __init__(self, conduit, repo_id):
+        """
+        :param conduit: The conduit used to query the units.
+        :type conduit: pulp_node.conduit.NodesConduit
+        :param repo_id: The repository ID.
+        :type repo_id: str
+        """
+        self.conduit = conduit
+        self.repo_id = repo_id
+        self._units = conduit.get_units(repo_id)
+
+    def __iter__(self):
+        units = self._units
+        self._units = None
+        if units is None:
+            units = self.conduit.get_units(self.repo_id)
+        return iter(units)
+
+
+class UnitListing(object):
     """
-    A unique unit key consisting of a unit's type_id & unit_key.
-    The unit key is sorted to ensure consistency.
-    :ivar uid: The unique ID.
-    :type uid: A tuple of: (type_id, unit_key)
+    A listing of parent units selected from the inventory.
+    Iterating the listing fetches the units in batches using their
+    references so the units are not all held in memory.
     """
 
-    def __init__(self, unit):
+    def __init__(self, refs, positions):
         """
-        :param unit: A content unit.
-        :type unit: dict
+        :param refs: The parent unit references.
+        :type refs: RefTable
+        :param positions: The positions of the selected units.
+        :type positions: array.array
         """
-        type_id = unit['type_id']
-        unit_key = tuple(sorted(unit['unit_key'].items()))
-        self.uid = (type_id, unit_key)
+        self._refs = refs
+        self._positions = positions
 
-    def __hash__(self):
-        return hash(self.uid)
+    def refs(self):
+        """
+        :return: A generator of references to the selected units.
+        :rtype: generator
+        """
+        for n in self._positions:
+            yield self._refs[n]
 
-    def __eq__(self, other):
-        return self.uid == other.uid
+    def __iter__(self):
+        """
+        :return: A generator of (unit, ref) for the selected units.
+        :rtype: generator
+        """
+        for unit, ref in izip(fetch_units(self.refs()), self.refs()):
+            yield unit, ref
 
-    def __ne__(self, other):
-        return self.uid != other.uid
+    def __len__(self):
+        return len(self._positions)
 
 
 class UnitInventory(object):
     """
     The unit inventory contains both the parent and child inventory
-    of content units associated with a specific repository.  Each is contained
-    within a dictionary keyed by {UnitKey} to ensure uniqueness.
+    of content units associated with a specific repository.  Only a digest
+    of each unit's type_id & unit_key, the last_updated and where to find the
+    unit are kept.  The units on the parent only, the units on the child only
+    and the updated units are found by merging the sorted digests.  The fields
+    kept for the units on the child only are read in a second pass.
     """
 
-    @staticmethod
-    def _import_parent_units(units):
-        _units = {}
-        for unit, ref in units:
-            unit.pop('metadata', None)
-            key = UniqueKey(unit)
-            _units[key] = (unit, ref)
-        return _units
-
-    @staticmethod
-    def _import_child_units(units):
-        _units = {}
-        for unit in units:
-            unit.pop('metadata', None)
-            key = UniqueKey(unit)
-            _units[key] = unit
-        return _units
-
     def __init__(self, base_URL, parent_units, child_units):
         """
         :param base_URL: The base URL for downloading parent units.
         :param parent_units: The content units in the parent node.
-        :type parent_units: iterable
-        :param child_units: The content units in the child node.
+        :type parent_units: iterable of (unit, ref)
+        :param child_units: The content units in the child node.  The units are
+            iterated twice so a re-iterable such as ChildUnits or a list is required.
         :type child_units: iterable
         """
         self.base_URL = base_URL
-        self.parent_units = self._import_parent_units(parent_units)
-        self.child_units = self._import_child_units(child_units)
+        self._parent_refs = RefTable()
+        self._parent_only = array('L')
+        self._updated = array('L')
+        self._child_only = []
+        child_only = set()
+
+        def parent(units):
+            for unit, ref in units:
+                self._parent_refs.add(ref)
+                yield unit
+
+        merged = _merge(_entries(parent(parent_units)), _entries(child_units))
+        for digest, p, c in merged:
+            if c is None:
+                self._parent_only.append(p[0])
+            elif p is None:
+                child_only.add(digest)
+            elif p[1] > c[1]:
+                self._updated.append(p[0])
+        # listed in units file order
+        self._parent_only = array('L', sorted(self._parent_only))
+        self._updated = array('L', sorted(self._updated))
+        # read the units on the child only
+        if not child_only:
+            return
+        records = {}
+        for unit in child_units:
+            digest = unit_digest(unit)
+            if digest in child_only:
+                records[digest] = dict((k, unit[k]) for k in CHILD_UNIT_FIELDS if k in unit)
+        self._child_only = records.values()
 
     def units_on_parent_only(self):
         """
         Listing of units contained in the parent inventory
         but not contained in the child inventory.
-        :return: List of (unit, ref).
-        :rtype: list
+        :return: Listing of (unit, ref).
+        :rtype: UnitListing
         """
-        return [r for k, r in self.parent_units.items() if k not in self.child_units]
+        return UnitListing(self._parent_refs, self._parent_only)
 
     def units_on_child_only(self):
         """
         Listing of units contained in the child inventory
         but not contained in the parent inventory.
+        Only the fields in CHILD_UNIT_FIELDS are included.
         :return: List of units that need to be purged.
         :rtype: list
         """
-        return [u for k, u in self.child_units.items() if k not in self.parent_units]
+        return list(self._child_only)
 
     def updated_units(self):
         """
         Listing of units updated on the parent.
-        :return: List of (unit, ref).
-        :rtype: list
+        :return: Listing of (unit, ref).
+        :rtype: UnitListing
         """
-        updated = []
-        for key, (unit, ref) in self.parent_units.items():
-            child_unit = self.child_units.get(key)
-            if child_unit is None:
-                continue
-            parent_last_updated = unit.get(constants.LAST_UPDATED, 0)
-            child_last_updated = child_unit.get(constants.LAST_UPDATED, 0)
-            if parent_last_updated > child_last_updated:
-                updated.append((unit, ref))
-        return updated
\ No newline at end of file
+        return UnitListing(self._parent_refs, self._updated)
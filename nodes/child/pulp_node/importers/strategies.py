@@ -18,7 +18,7 @@ from pulp_node import constants
 from pulp_node import pathlib
 from pulp_node.conduit import NodesConduit
 from pulp_node.manifest import Manifest, RemoteManifest
-from pulp_node.importers.inventory import UnitInventory
+from pulp_node.importers.inventory import ChildUnits, UnitInventory
 from pulp_node.importers.download import ContentDownloadListener
 from pulp_node.error import (NodeError, GetChildUnitsError, GetParentUnitsError, AddUnitError,
                              DeleteUnitError, InvalidManifestError, CaughtException)
@@ -160,8 +160,7 @@ class ImporterStrategy(object):
         """
         # fetch child units
         try:
-            conduit = NodesConduit()
-            child_units = conduit.get_units(request.repo_id)
+            child_units = ChildUnits(NodesConduit(), request.repo_id)
         except NodeError:
             raise
         except Exception:
@@ -185,8 +184,10 @@ class ImporterStrategy(object):
             fetched_manifest.fetch()
             if manifest != fetched_manifest or \
                     not manifest.is_valid() or not manifest.has_valid_units():
-                fetched_manifest.write()
-                fetched_manifest.fetch_units()
+                # fall back to the full units file when the deltas can't be used
+                if not fetched_manifest.fetch_deltas(manifest):
+                    fetched_manifest.write()
+                    fetched_manifest.fetch_units()
                 manifest = fetched_manifest
             if not manifest.is_valid():
                 raise InvalidManifestError()
@@ -247,7 +248,7 @@ class ImporterStrategy(object):
             self._reset_storage_path(unit)
             if not self._needs_download(unit):
                 # unit has no file associated
-                self.add_unit(request, unit_ref.fetch())
+                self.add_unit(request, unit)
                 continue
             unit_path, destination = self._path_and_destination(unit)
             unit_URL = pathlib.url_join(unit_inventory.base_URL, unit_path)
@@ -270,7 +271,6 @@ class ImporterStrategy(object):
         :type unit_inventory: UnitInventory
         """
         for unit, ref in unit_inventory.updated_units():
-            unit = ref.fetch()
             self.add_unit(request, unit)
 
     def _path_and_destination(self, unit):
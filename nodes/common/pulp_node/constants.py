@@ -41,9 +41,12 @@ PURGE_ORPHANS_KEYWORD = 'purge_orphans'
 
 MAX_DOWNLOAD_BANDWIDTH_KEYWORD = 'max_download_bandwidth'
 MAX_DOWNLOAD_CONCURRENCY_KEYWORD = 'max_download_concurrency'
+MAX_SYNC_CONCURRENCY_KEYWORD = 'max_sync_concurrency'
 
 SKIP_CONTENT_UPDATE_KEYWORD = 'skip_content_update'
 
+MAX_DELTAS_KEYWORD = 'max_deltas'
+
 
 # --- unit/publishing --------------------------------------------------------
 
@@ -66,6 +69,7 @@ STRATEGY_NOTE_KEY = '_node-update-strategy'
 # --- settings ---------------------------------------------------------------
 
 DEFAULT_DOWNLOAD_CONCURRENCY = 20
+DEFAULT_SYNC_CONCURRENCY = 1
 
 
 # --- profiling --------------------------------------------------------------
@@ -14,17 +14,25 @@ Provides classes for managing the content unit manifest.
 The manifest is a json encoded file that defines content units
 associated with repository.  The units themselves are stored in a separate
 json encoded file.  For performance reasons, the unit files are compressed.
+The manifest also lists the deltas between the last few manifests published
+for the repository.  Each delta is a compressed json encoded file of the units
+added, updated and removed since the previous manifest.
 """
 
 import os
 import gzip
+import mmap
 import errno
+import shutil
 
+from array import array
+from hashlib import sha1
 from logging import getLogger
 
 from nectar.request import DownloadRequest
 from nectar.listener import AggregatingEventListener
 
+from pulp.plugins.util.parallel_gzip import open_gzip
 from pulp.server.compat import json
 
 from pulp_node import pathlib
@@ -49,6 +57,23 @@ UNITS_PATH = 'path'
 UNITS_TOTAL = 'total'
 UNITS_SIZE = 'size'
 
+DELTAS = 'deltas'
+
+# The number of units fetched at a time by fetch_units()
+FETCH_BATCH_SIZE = 1000
+DELTA_DIR = 'deltas'
+DELTA_FROM = 'from'
+DELTA_TO = 'to'
+DELTA_PATH = 'path'
+DELTA_TOTAL = 'total'
+DELTA_SIZE = 'size'
+
+DELTA_ACTION = 'action'
+DELTA_UNIT = 'unit'
+UNIT_ADDED = 'added'
+UNIT_UPDATED = 'updated'
+UNIT_REMOVED = 'removed'
+
 
 # --- utils -----------------------------------------------------------------------------
 
@@ -63,9 +88,10 @@ def unzip(path, destination, bfrlen=65535):
     :type bfrlen: int
     :raise IOError: on any i/o error.
     """
+    tmp_path = destination + '.tmp'
     fp_in = gzip.open(path)
     try:
-        with open(destination, 'w+') as fp_out:
+        with open(tmp_path, 'w+') as fp_out:
             while True:
                 bfr = fp_in.read(bfrlen)
                 if bfr:
@@ -74,6 +100,166 @@ def unzip(path, destination, bfrlen=65535):
                     break
     finally:
         fp_in.close()
+    # replaced by rename so that units files already mapped by a UnitStore are not truncated
+    os.rename(tmp_path, destination)
+
+
+def unit_digest(unit):
+    """
+    Get a stable digest of a unit's type_id & unit_key.
+    :param unit: A content unit.
+    :type unit: dict
+    :return: The SHA-1 digest.
+    :rtype: str
+    """
+    key = json.dumps([unit['type_id'], unit['unit_key']], sort_keys=True)
+    return sha1(key).digest()
+
+
+def read_units(path):
+    """
+    Read the json encoded units in the (optionally compressed) units file.
+    :param path: The path to a units file.
+    :type path: str
+    :return: A generator of units.
+    :rtype: generator
+    :raise IOError: on I/O errors.
+    :raise ValueError: json decoding errors
+    """
+    if path.endswith('.gz'):
+        fp = gzip.open(path)
+    else:
+        fp = open(path)
+    try:
+        for json_unit in fp:
+            yield json.loads(json_unit)
+    finally:
+        fp.close()
+
+
+def write_delta(previous_path, path, delta_path):
+    """
+    Write the delta between two units files.
+    Units are matched by type_id & unit_key and a unit is updated when any
+    of its published fields differ.
+    :param previous_path: The path to the previously published units file.
+    :type previous_path: str
+    :param path: The path to the units file being published.
+    :type path: str
+    :param delta_path: The path to the delta file to be written.
+    :type delta_path: str
+    :return: The writer used to write the delta.
+    :rtype: UnitWriter
+    :raise IOError: on I/O errors.
+    :raise ValueError: json decoding errors
+    """
+    previous = {}
+    for unit in read_units(previous_path):
+        previous[unit_digest(unit)] = sha1(json.dumps(unit, sort_keys=True)).digest()
+    with UnitWriter(delta_path) as writer:
+        for unit in read_units(path):
+            digest = previous.pop(unit_digest(unit), None)
+            if digest is None:
+                writer.add({DELTA_ACTION: UNIT_ADDED, DELTA_UNIT: unit})
+                continue
+            if digest != sha1(json.dumps(unit, sort_keys=True)).digest():
+                writer.add({DELTA_ACTION: UNIT_UPDATED, DELTA_UNIT: unit})
+        if previous:
+            for unit in read_units(previous_path):
+                if unit_digest(unit) in previous:
+                    unit = dict(type_id=unit['type_id'], unit_key=unit['unit_key'])
+                    writer.add({DELTA_ACTION: UNIT_REMOVED, DELTA_UNIT: unit})
+    return writer
+
+
+def apply_deltas(path, delta_paths, destination):
+    """
+    Apply a chain of deltas to a units file.
+    The units file written at the destination is not compressed.
+    :param path: The path to a units file.
+    :type path: str
+    :param delta_paths: The paths to delta files in the order they are applied.
+    :type delta_paths: list
+    :param destination: The path to the units file to be written.
+    :type destination: str
+    :return: The number of units written.
+    :rtype: int
+    :raise IOError: on I/O errors.
+    :raise ValueError: json decoding errors
+    """
+    changed = {}
+    for delta_path in delta_paths:
+        for entry in read_units(delta_path):
+            unit = entry[DELTA_UNIT]
+            if entry[DELTA_ACTION] == UNIT_REMOVED:
+                changed[unit_digest(unit)] = None
+            else:
+                changed[unit_digest(unit)] = unit
+    total = 0
+    tmp_path = destination + '.tmp'
+    with open(tmp_path, 'w+') as fp:
+        for unit in read_units(path):
+            if unit_digest(unit) in changed:
+                continue
+            fp.write(json.dumps(unit))
+            fp.write('\n')
+            total += 1
+        for unit in changed.itervalues():
+            if unit is None:
+                continue
+            fp.write(json.dumps(unit))
+            fp.write('\n')
+            total += 1
+    os.rename(tmp_path, destination)
+    return total
+
+
+def fetch_units(refs, batch_size=FETCH_BATCH_SIZE):
+    """
+    Fetch the content units referenced by unit references.
+    The references are fetched in batches of batch_size and references
+    into the same units file are fetched together in file order.  Only
+    one batch of units is held in memory at a time.
+    :param refs: An iterable of unit references.
+    :type refs: iterable
+    :param batch_size: The number of units fetched at a time.
+    :type batch_size: int
+    :return: A generator of json decoded units in the same order as the references.
+    :rtype: generator
+    :raise ValueError: json decoding errors
+    """
+    batch = []
+    for ref in refs:
+        batch.append(ref)
+        if len(batch) >= batch_size:
+            for unit in _fetch_batch(batch):
+                yield unit
+            batch = []
+    for unit in _fetch_batch(batch):
+        yield unit
+
+
+def _fetch_batch(refs):
+    """
+    Fetch the content units for a list of unit references.
+    :param refs: A list of unit references.
+    :type refs: list
+    :return: The json decoded units in the same order as the references.
+    :rtype: list
+    :raise ValueError: json decoding errors
+    """
+    units = [None] * len(refs)
+    batches = {}
+    for i, ref in enumerate(refs):
+        store = getattr(ref, 'store', None)
+        if store is None:
+            units[i] = ref.fetch()
+        else:
+            batches.setdefault(id(store), (store, []))[1].append(i)
+    for store, indexes in batches.values():
+        for i, unit in zip(indexes, store.fetch_all([refs[i] for i in indexes])):
+            units[i] = unit
+    return units
 
 
 # --- manifest --------------------------------------------------------------------------
@@ -90,6 +276,8 @@ class Manifest(object):
     :type total_units: int
     :param publishing_details: Details of how units have been published.
     :type publishing_details: dict
+    :ivar deltas: The deltas leading to this manifest, oldest first.
+    :type deltas: list
     """
 
     def __init__(self, path, manifest_id=None):
@@ -104,6 +292,7 @@ class Manifest(object):
         self.version = MANIFEST_VERSION
         self.units = {UNITS_PATH: None, UNITS_TOTAL: 0, UNITS_SIZE: 0}
         self.publishing_details = {}
+        self.deltas = []
         if os.path.isdir(path):
             path = pathlib.join(path, MANIFEST_FILE_NAME)
         self.path = path
@@ -118,7 +307,8 @@ class Manifest(object):
             ID: self.id,
             VERSION: self.version,
             UNITS: self.units,
-            PUBLISHING_DETAILS: self.publishing_details
+            PUBLISHING_DETAILS: self.publishing_details,
+            DELTAS: self.deltas
         }
         with open(self.path, 'w+') as fp:
             json.dump(state, fp, indent=2)
@@ -138,6 +328,7 @@ class Manifest(object):
         self.version = d.get(VERSION, 0)
         self.units = d.get(UNITS, {UNITS_PATH: None, UNITS_TOTAL: 0, UNITS_SIZE: 0})
         self.publishing_details = d.get(PUBLISHING_DETAILS, {})
+        self.deltas = d.get(DELTAS, [])
 
     def get_units(self):
         """
@@ -164,6 +355,48 @@ class Manifest(object):
         self.units[UNITS_TOTAL] = unit_writer.total_units
         self.units[UNITS_SIZE] = unit_writer.bytes_written
 
+    def delta_published(self, previous, delta_writer, max_deltas):
+        """
+        Update the manifest with the delta from the previous manifest.
+        :param previous: The previously published manifest.
+        :type previous: Manifest
+        :param delta_writer: A writer used to publish the delta.
+        :type delta_writer: UnitWriter
+        :param max_deltas: The maximum number of deltas listed.
+        :type max_deltas: int
+        """
+        delta = {
+            DELTA_FROM: previous.id,
+            DELTA_TO: self.id,
+            DELTA_PATH: pathlib.join(DELTA_DIR, os.path.basename(delta_writer.path)),
+            DELTA_TOTAL: delta_writer.total_units,
+            DELTA_SIZE: delta_writer.bytes_written,
+        }
+        deltas = previous.deltas + [delta]
+        self.deltas = deltas[-max_deltas:]
+
+    def delta_chain(self, manifest_id):
+        """
+        Get the chain of deltas leading from the specified manifest to this manifest.
+        :param manifest_id: The ID of a previous manifest.
+        :type manifest_id: str
+        :return: The deltas in the order they are applied or None when
+            the chain is not complete.
+        :rtype: list
+        """
+        for n, delta in enumerate(self.deltas):
+            if delta[DELTA_FROM] == manifest_id:
+                chain = self.deltas[n:]
+                break
+        else:
+            return None
+        for delta, next_delta in zip(chain, chain[1:]):
+            if delta[DELTA_TO] != next_delta[DELTA_FROM]:
+                return None
+        if chain[-1][DELTA_TO] != self.id:
+            return None
+        return chain
+
     def published(self, details):
         """
         Update the publishing details.
@@ -292,6 +525,59 @@ class RemoteManifest(Manifest):
             report = listener.failed_reports[0]
             raise ManifestDownloadError(self.url, report.error_msg)
 
+    def fetch_deltas(self, manifest):
+        """
+        Update the units file referenced by a previous manifest
+        using the deltas leading to this manifest.
+        The manifest is written when the units are successfully updated.
+        :param manifest: The previous manifest.
+        :type manifest: Manifest
+        :return: True if updated.  False when the previous units file is not valid,
+            the chain of deltas is broken or the deltas cannot be fetched or applied.
+        :rtype: bool
+        """
+        if not manifest.is_valid() or not manifest.has_valid_units():
+            return False
+        chain = self.delta_chain(manifest.id)
+        if not chain:
+            return False
+        base_url = self.url.rsplit('/', 1)[0]
+        delta_dir = pathlib.join(os.path.dirname(self.path), DELTA_DIR)
+        requests = []
+        for delta in chain:
+            url = pathlib.url_join(base_url, delta[DELTA_PATH])
+            destination = pathlib.join(delta_dir, os.path.basename(delta[DELTA_PATH]))
+            requests.append(DownloadRequest(str(url), destination))
+        try:
+            pathlib.mkdir(delta_dir)
+            listener = AggregatingEventListener()
+            self.downloader.event_listener = listener
+            self.downloader.download(requests)
+            if listener.failed_reports:
+                report = listener.failed_reports[0]
+                log.info('delta not fetched: %s %s', report.url, report.error_msg)
+                return False
+            paths = [r.destination for r in requests]
+            path = pathlib.join(delta_dir, UNITS_FILE_NAME[:-3])
+            total = apply_deltas(manifest.units_path(), paths, path)
+            if total != self.units[UNITS_TOTAL]:
+                log.info('deltas produced %d units instead of %d', total, self.units[UNITS_TOTAL])
+                return False
+            destination = pathlib.join(os.path.dirname(self.path), UNITS_FILE_NAME[:-3])
+            os.rename(path, destination)
+        except Exception:
+            log.exception(self.url)
+            return False
+        finally:
+            shutil.rmtree(delta_dir, ignore_errors=True)
+        self.units = {
+            UNITS_PATH: destination,
+            UNITS_TOTAL: total,
+            UNITS_SIZE: os.path.getsize(destination)
+        }
+        self.write()
+        return True
+
 
 class UnitWriter(object):
     """
@@ -308,17 +594,20 @@ class UnitWriter(object):
     :type bytes_written: int
     """
 
-    def __init__(self, path):
+    def __init__(self, path, compression_workers=None):
         """
         :param path: The absolute path to a file or directory.
             When a directory is specified, the standard file name is appended.
         :type path: str
+        :param compression_workers: The number of threads compressing the file.
+            Defaults to the compression_workers server setting.
+        :type compression_workers: int
         :raise IOError: on I/O errors
         """
         if os.path.isdir(path):
             path = pathlib.join(path, UNITS_FILE_NAME)
         self.path = path
-        self.fp = gzip.open(path, 'wb')
+        self.fp = open_gzip(path, workers=compression_workers)
         self.total_units = 0
         self.bytes_written = 0
 
@@ -369,6 +658,126 @@ class UnitWriter(object):
         return False
 
 
+class UnitStore(object):
+    """
+    Provides access to the content units in a decompressed units file.
+    The file is memory mapped once and shared by all of the unit references
+    handed out by the store so that fetching a unit is a slice of the mapping
+    rather than an open(), seek() and read() of the file.
+    :ivar path: The absolute path to the units file.
+    :type path: str
+    :ivar data: The mapped file content.
+    :type data: mmap.mmap
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The absolute path to the units file.
+        :type path: str
+        :raise IOError: on I/O errors.
+        """
+        self.path = path
+        self._offsets = None
+        with open(path) as fp:
+            size = os.fstat(fp.fileno()).st_size
+            if size:
+                self.data = mmap.mmap(fp.fileno(), size, access=mmap.ACCESS_READ)
+            else:
+                # empty files cannot be mapped
+                self.data = ''
+
+    def _lines(self):
+        """
+        Generate the (offset, length) of each json encoded unit.
+        """
+        data = self.data
+        size = len(data)
+        begin = 0
+        while begin < size:
+            end = data.find('\n', begin)
+            if end < 0:
+                end = size
+            else:
+                end += 1
+            yield begin, end - begin
+            begin = end
+
+    def __iter__(self):
+        """
+        Iterate the units in the file, building the offset index as a side effect.
+        :return: A generator of (unit, UnitRef).
+        :rtype: generator
+        """
+        offsets = array('L')
+        for offset, length in self._lines():
+            offsets.append(offset)
+            yield self.fetch(offset, length), UnitRef(self.path, offset, length, self)
+        self._offsets = offsets
+
+    def offsets(self):
+        """
+        Get the index of unit offsets within the file.
+        The index is built by scanning the file unless already built while iterating.
+        :return: The offset of each unit, in file order.
+        :rtype: array.array
+        """
+        if self._offsets is None:
+            self._offsets = array('L', [offset for offset, length in self._lines()])
+        return self._offsets
+
+    def ref(self, n):
+        """
+        Get a reference to the unit at the specified position within the file.
+        :param n: The position of the unit.
+        :type n: int
+        :return: A reference to the unit.
+        :rtype: UnitRef
+        :raise IndexError: when no unit exists at the position.
+        """
+        offsets = self.offsets()
+        offset = offsets[n]
+        if n + 1 < len(offsets):
+            length = offsets[n + 1] - offset
+        else:
+            length = len(self.data) - offset
+        return UnitRef(self.path, offset, length, self)
+
+    def buffer(self, offset, length):
+        """
+        Get the json encoded unit at the specified offset without copying it.
+        :return: A read-only view of the mapped file.
+        :rtype: buffer
+        """
+        return buffer(self.data, offset, length)
+
+    def fetch(self, offset, length):
+        """
+        Fetch the unit at the specified offset.
+        :return: The json decoded unit.
+        :rtype: dict
+        :raise ValueError: json decoding errors
+        """
+        return json.loads(self.data[offset:offset + length])
+
+    def fetch_all(self, refs):
+        """
+        Fetch the units for a list of references into this file.
+        The units are read in file order to keep access to the mapping sequential.
+        :param refs: A list of unit references.
+        :type refs: list
+        :return: The json decoded units in the same order as the references.
+        :rtype: list
+        :raise ValueError: json decoding errors
+        """
+        units = [None] * len(refs)
+        for i in sorted(xrange(len(refs)), key=lambda i: refs[i].offset):
+            units[i] = self.fetch(refs[i].offset, refs[i].length)
+        return units
+
+    def __len__(self):
+        return len(self.offsets())
+
+
 class UnitIterator:
     """
     Used to iterate content units inventory file associated with a manifest.
@@ -378,18 +787,7 @@ class UnitIterator:
 
     @staticmethod
     def get_units(path):
-        with open(path) as fp:
-            while True:
-                begin = fp.tell()
-                json_unit = fp.readline()
-                end = fp.tell()
-                if json_unit:
-                    unit = json.loads(json_unit)
-                    length = (end - begin)
-                    ref = UnitRef(path, begin, length)
-                    yield (unit, ref)
-                else:
-                    break
+        return iter(UnitStore(path))
 
     def __init__(self, path, total_units):
         """
@@ -420,9 +818,13 @@ class UnitRef(object):
     :type offset: int
     :ivar length: The length of a specific unit within the file.
     :type length: int
+    :ivar store: The store used to fetch the unit.
+    :type store: UnitStore
     """
 
-    def __init__(self, path, offset, length):
+    __slots__ = ('path', 'offset', 'length', 'store')
+
+    def __init__(self, path, offset, length, store=None):
         """
         :param path: The absolute path to the units file.
         :type path: str
@@ -430,10 +832,24 @@ class UnitRef(object):
         :type offset: int
         :param length: The length of a specific unit within the file.
         :type length: int
+        :param store: An optional store for the units file.
+        :type store: UnitStore
         """
         self.path = path
         self.offset = offset
         self.length = length
+        self.store = store
+
+    def buffer(self):
+        """
+        Get the json encoded unit without copying it out of the units file.
+        :return: A read-only view of the mapped units file.
+        :rtype: buffer
+        :raise IOError: on I/O errors.
+        """
+        if self.store is None:
+            self.store = UnitStore(self.path)
+        return self.store.buffer(self.offset, self.length)
 
     def fetch(self):
         """
@@ -443,7 +859,6 @@ class UnitRef(object):
         :raise IOError: on I/O errors.
         :raise ValueError: json decoding errors
         """
-        with open(self.path) as fp:
-            fp.seek(self.offset)
-            json_unit = fp.read(self.length)
-            return json.loads(json_unit)
+        if self.store is None:
+            self.store = UnitStore(self.path)
+        return self.store.fetch(self.offset, self.length)
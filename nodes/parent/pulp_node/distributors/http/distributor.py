@@ -23,6 +23,7 @@ from pulp_node import constants
 from pulp_node import pathlib
 from pulp_node.conduit import NodesConduit
 from pulp_node.distributors.http.publisher import HttpPublisher
+from pulp_node.distributors.publisher import MAX_DELTAS
 
 
 _LOG = getLogger(__name__)
@@ -80,7 +81,8 @@ class NodesHttpDistributor(Distributor):
                 client_cert : <path>
                 verify : <bool>
               }
-            }
+            },
+            max_deltas (optional) : <int>
           }
         """
         key = constants.PROTOCOL_KEYWORD
@@ -98,6 +100,14 @@ class NodesHttpDistributor(Distributor):
             alias = section.get(key[1])
             if not alias:
                 return (False, PROPERTY_MISSING % {'p':'.'.join(key)})
+        key = constants.MAX_DELTAS_KEYWORD
+        max_deltas = config.get(key)
+        if max_deltas is not None:
+            try:
+                if int(max_deltas) < 0:
+                    raise ValueError()
+            except (TypeError, ValueError):
+                return (False, PROPERTY_INVALID % {'p':key, 'v':_('a non-negative integer')})
         return (True, None)
 
     def publish_repo(self, repo, conduit, config):
@@ -142,7 +152,8 @@ class NodesHttpDistributor(Distributor):
         section = config.get(protocol)
         alias = section.get('alias')
         base_url = '://'.join((protocol, host))
-        return HttpPublisher(base_url, alias, repo.id)
+        max_deltas = int(config.get(constants.MAX_DELTAS_KEYWORD, MAX_DELTAS))
+        return HttpPublisher(base_url, alias, repo.id, max_deltas)
 
     def cancel_publish_repo(self, call_report, call_request):
         pass
@@ -11,7 +11,7 @@
 
 from pulp_node import constants
 from pulp_node import pathlib
-from pulp_node.distributors.publisher import FilePublisher
+from pulp_node.distributors.publisher import FilePublisher, MAX_DELTAS, STAGING_CONCURRENCY
 from pulp_node.manifest import Manifest, MANIFEST_FILE_NAME
 
 
@@ -24,7 +24,8 @@ class HttpPublisher(FilePublisher):
     :type alias: tuple(2)
     """
 
-    def __init__(self, base_url, alias, repo_id):
+    def __init__(self, base_url, alias, repo_id, max_deltas=MAX_DELTAS,
+                 concurrency=STAGING_CONCURRENCY):
         """
         :param base_url: The base URL.
         :type base_url: str
@@ -32,10 +33,14 @@ class HttpPublisher(FilePublisher):
         :type alias: tuple(2)
         :param repo_id: A repository ID.
         :type repo_id: str
+        :param max_deltas: The number of manifest deltas kept.
+        :type max_deltas: int
+        :param concurrency: The number of threads used to stage unit files.
+        :type concurrency: int
         """
         self.base_url = base_url
         self.alias = alias
-        FilePublisher.__init__(self, alias[1], repo_id)
+        FilePublisher.__init__(self, alias[1], repo_id, max_deltas, concurrency)
 
     def publish(self, units):
         """
@@ -10,20 +10,37 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 import os
+import sys
+import shutil
 import tarfile
 
+from collections import deque
+from Queue import Queue
+from threading import Thread, Event
 from uuid import uuid4
 from tempfile import mkdtemp
 from logging import getLogger
 
 from pulp_node import constants
 from pulp_node import pathlib
-from pulp_node.manifest import Manifest, UnitWriter
+from pulp_node.manifest import Manifest, UnitWriter, DELTA_DIR, DELTA_PATH, write_delta
 
 
 log = getLogger(__name__)
 
 
+# --- constants ----------------------------------------------------
+
+# The default number of manifest deltas kept.
+MAX_DELTAS = 10
+
+# The default number of threads used to stage unit files.
+STAGING_CONCURRENCY = 4
+
+# The prefix of directories containing published trees waiting to be deleted.
+RETIRED_PREFIX = '.retired-'
+
+
 # --- utils --------------------------------------------------------
 
 def tar_path(path):
@@ -57,6 +74,167 @@ def tar_dir(dir_path, tar_path, bufsize=65535):
         tb.close()
 
 
+def retire(path, dir_path, prefix=RETIRED_PREFIX):
+    """
+    Retire a published tree.  The tree is atomically moved aside into a
+    directory created within dir_path.  The tree can be restored using
+    restore() until the directory is deleted.
+    :param path: The absolute path to a published tree.
+    :type path: str
+    :param dir_path: The directory in which the tree is moved aside.
+    :type dir_path: str
+    :param prefix: The prefix of the created directory.
+    :type prefix: str
+    :return: The directory containing the retired tree or None when nothing is published.
+    :rtype: str
+    """
+    if not os.path.lexists(path):
+        return None
+    retired_dir = mkdtemp(prefix=prefix, dir=dir_path)
+    os.rename(path, pathlib.join(retired_dir, os.path.basename(path)))
+    return retired_dir
+
+
+def restore(retired_dir, path):
+    """
+    Restore a tree retired using retire().
+    :param retired_dir: The directory containing the retired tree.
+    :type retired_dir: str
+    :param path: The absolute path to the published tree.
+    :type path: str
+    """
+    os.rename(pathlib.join(retired_dir, os.path.basename(path)), path)
+    os.rmdir(retired_dir)
+
+
+def delete_retired(paths):
+    """
+    Delete retired trees in a background thread.
+    :param paths: The absolute paths to directories containing retired trees.
+    :type paths: list
+    :return: The thread deleting the trees or None when there are none.
+    :rtype: threading.Thread
+    """
+    if not paths:
+        return None
+
+    def delete():
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+
+    thread = Thread(target=delete)
+    thread.start()
+    return thread
+
+
+# --- staging ------------------------------------------------------
+
+
+class StagingJob(object):
+    """
+    A unit being staged.
+    :ivar unit: A content unit.
+    :type unit: dict
+    :ivar done: Set when the unit has been staged.
+    :type done: threading.Event
+    :ivar error: The exc_info of an exception raised while staging.
+    :type error: tuple
+    """
+
+    __slots__ = ('unit', 'done', 'error')
+
+    def __init__(self, unit):
+        self.unit = unit
+        self.done = Event()
+        self.error = None
+
+
+class StagingPipeline(object):
+    """
+    Stages units using a bounded pool of threads.  Units are yielded
+    in the order they are consumed after they have been staged so the
+    units file is written in order.  At most backlog units are consumed
+    but not yet yielded.
+    :ivar function: Called in a worker thread to stage each unit.
+    :type function: callable
+    :ivar concurrency: The number of worker threads.
+    :type concurrency: int
+    :ivar backlog: The maximum number of units in the pipeline.
+    :type backlog: int
+    """
+
+    def __init__(self, function, concurrency, backlog=None):
+        """
+        :param function: Called in a worker thread to stage each unit.
+        :type function: callable
+        :param concurrency: The number of worker threads.
+        :type concurrency: int
+        :param backlog: The maximum number of units in the pipeline.
+            Defaults to 16 units for each thread.
+        :type backlog: int
+        """
+        self.function = function
+        self.concurrency = concurrency
+        self.backlog = backlog or concurrency * 16
+
+    def stage(self, units):
+        """
+        Stage the specified units.
+        An exception raised while staging a unit is raised here when
+        that unit is next in order.
+        :param units: The units to be staged.
+        :type units: iterable
+        :return: A generator of staged units.
+        :rtype: generator
+        """
+        if self.concurrency <= 1:
+            for unit in units:
+                self.function(unit)
+                yield unit
+            return
+        queue = Queue(self.backlog)
+        pool = [Thread(target=self._worker, args=(queue,)) for n in range(self.concurrency)]
+        for thread in pool:
+            thread.setDaemon(True)
+            thread.start()
+        pending = deque()
+        try:
+            for unit in units:
+                job = StagingJob(unit)
+                queue.put(job)
+                pending.append(job)
+                while len(pending) >= self.backlog or (pending and pending[0].done.isSet()):
+                    yield self._finished(pending.popleft())
+            while pending:
+                yield self._finished(pending.popleft())
+        finally:
+            for job in pending:
+                job.unit = None
+            for thread in pool:
+                queue.put(None)
+            for thread in pool:
+                thread.join()
+
+    def _worker(self, queue):
+        while True:
+            job = queue.get()
+            if job is None:
+                return
+            try:
+                if job.unit is not None:
+                    self.function(job.unit)
+            except Exception:
+                job.error = sys.exc_info()
+            job.done.set()
+
+    @staticmethod
+    def _finished(job):
+        job.done.wait()
+        if job.error:
+            raise job.error[0], job.error[1], job.error[2]
+        return job.unit
+
+
 # --- publisher ----------------------------------------------------
 
 
@@ -96,26 +274,41 @@ class FilePublisher(Publisher):
     :type tmp_dir: str
     :ivar staged: A flag indicating that publishing has been staged and needs commit.
     :type staged: bool
+    :ivar max_deltas: The number of manifest deltas kept.
+    :type max_deltas: int
+    :ivar concurrency: The number of threads used to stage unit files.
+    :type concurrency: int
+    :ivar retiring: The thread deleting the retired trees.
+    :type retiring: threading.Thread
     """
 
-    def __init__(self, publish_dir, repo_id):
+    def __init__(self, publish_dir, repo_id, max_deltas=MAX_DELTAS,
+                 concurrency=STAGING_CONCURRENCY):
         """
         :param publish_dir: The publishing root directory.
         :type publish_dir: str
         :param repo_id: A repository ID.
         :type repo_id: str
+        :param max_deltas: The number of manifest deltas kept.
+        :type max_deltas: int
+        :param concurrency: The number of threads used to stage unit files.
+        :type concurrency: int
         """
         self.publish_dir = publish_dir
         self.repo_id = repo_id
         self.tmp_dir = None
         self.staged = False
+        self.max_deltas = max_deltas
+        self.concurrency = concurrency
+        self.retiring = None
 
     def publish(self, units):
         """
         Publish the specified units.
         Writes the units.json file and symlinks each of the files associated
         to the unit.storage_path.  Publishing is staged in a temporary directory and
-        must use commit() to make the publishing permanent.
+        must use commit() to make the publishing permanent.  The unit files are
+        staged concurrently and the units are written in the order listed.
         :param units: A list of units to publish.
         :type units: iterable
         :return: The absolute path to the manifest.
@@ -123,17 +316,58 @@ class FilePublisher(Publisher):
         """
         pathlib.mkdir(self.publish_dir)
         self.tmp_dir = mkdtemp(dir=self.publish_dir)
+        pipeline = StagingPipeline(self.publish_unit, self.concurrency)
         with UnitWriter(self.tmp_dir) as writer:
-            for unit in units:
-                self.publish_unit(unit)
+            for unit in pipeline.stage(units):
                 writer.add(unit)
         manifest_id = str(uuid4())
         manifest = Manifest(self.tmp_dir, manifest_id)
         manifest.units_published(writer)
+        self.publish_deltas(manifest, writer.path)
         manifest.write()
         self.staged = True
         return manifest.path
 
+    def publish_deltas(self, manifest, units_path):
+        """
+        Publish the delta between the currently published units and the units
+        being published.  The deltas listed in the currently published manifest
+        are carried forward, up to max_deltas in all.  Deltas are not published
+        when there is no valid published manifest.
+        :param manifest: The manifest being published.
+        :type manifest: Manifest
+        :param units_path: The path to the units file being published.
+        :type units_path: str
+        """
+        if self.max_deltas < 1:
+            return
+        published_dir = pathlib.join(self.publish_dir, self.repo_id)
+        previous = Manifest(published_dir)
+        try:
+            previous.read()
+            if not previous.is_valid() or not previous.has_valid_units():
+                return
+            delta_dir = pathlib.join(self.tmp_dir, DELTA_DIR)
+            pathlib.mkdir(delta_dir)
+            delta_path = pathlib.join(delta_dir, '%s.json.gz' % previous.id)
+            writer = write_delta(previous.units_path(), units_path, delta_path)
+            manifest.delta_published(previous, writer, self.max_deltas)
+            deltas = manifest.deltas[:-1]
+            for n in range(len(deltas) - 1, -1, -1):
+                path = deltas[n][DELTA_PATH]
+                try:
+                    os.link(pathlib.join(published_dir, path), pathlib.join(self.tmp_dir, path))
+                except OSError:
+                    # the chain is broken before here
+                    manifest.deltas = manifest.deltas[n + 1:]
+                    break
+        except IOError:
+            # nothing published
+            manifest.deltas = []
+        except Exception:
+            log.exception(self.repo_id)
+            manifest.deltas = []
+
     def publish_unit(self, unit):
         """
         Publish the file associated with the unit into the publish directory.
@@ -157,21 +391,38 @@ class FilePublisher(Publisher):
     def commit(self):
         """
         Commit publishing.
-        Move the tmp_dir to the publish_dir.
+        Move the tmp_dir to the publish_dir.  The previously published
+        tree is moved aside and, once the tmp_dir is in place, deleted in the
+        background along with any retired trees of the repository left behind
+        by earlier commits.  The previously published tree is restored when
+        the tmp_dir cannot be moved into place.
         """
         if not self.staged:
             # nothing to commit
             return
         dir_path = pathlib.join(self.publish_dir, self.repo_id)
-        os.system('rm -rf %s' % dir_path)
-        os.rename(self.tmp_dir, dir_path)
+        prefix = RETIRED_PREFIX + self.repo_id + '-'
+        # trees left behind by earlier commits that did not finish deleting them
+        retired = [pathlib.join(self.publish_dir, name)
+                   for name in os.listdir(self.publish_dir) if name.startswith(prefix)]
+        retired_dir = retire(dir_path, self.publish_dir, prefix)
+        try:
+            os.rename(self.tmp_dir, dir_path)
+        except Exception:
+            if retired_dir:
+                restore(retired_dir, dir_path)
+            raise
         self.staged = False
+        if retired_dir:
+            retired.append(retired_dir)
+        self.retiring = delete_retired(retired)
 
     def unstage(self):
         """
         Un-stage publishing.
         """
-        os.system('rm -rf %s' % self.tmp_dir)
+        if self.tmp_dir:
+            shutil.rmtree(self.tmp_dir, ignore_errors=True)
         self.staged = False
 
     def __enter__(self):
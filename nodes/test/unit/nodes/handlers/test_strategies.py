@@ -1,10 +1,12 @@
 
+import threading
+
 from unittest import TestCase
 
 from mock import Mock, patch
 
-from pulp_node.handlers.strategies import HandlerStrategy
-from pulp_node.handlers.reports import SummaryReport
+from pulp_node.handlers.strategies import HandlerStrategy, Request
+from pulp_node.handlers.reports import SummaryReport, HandlerProgress
 from pulp_node.reports import RepositoryReport
 from pulp_node import constants
 
@@ -60,4 +62,79 @@ class TestStrategy(TestCase):
                 }
             ]}
 
-        self.assertEqual(fake_request.summary.dict(), expected)
\ No newline at end of file
+        self.assertEqual(fake_request.summary.dict(), expected)
+
+    def request(self, repo_ids, options, cancel=False):
+        conduit = Mock()
+        conduit.cancelled.return_value = cancel
+        return Request(
+            conduit=conduit,
+            progress=HandlerProgress(conduit),
+            summary=SummaryReport(),
+            bindings=[dict(repo_id=repo_id, details={}) for repo_id in repo_ids],
+            scope=constants.NODE_SCOPE,
+            options=options)
+
+    def test_concurrency_option(self):
+        for value, expected in ((None, 1), (4, 4), ('3', 3), (0, 1), ('x', 1)):
+            options = {constants.MAX_SYNC_CONCURRENCY_KEYWORD: value}
+            self.assertEqual(self.request([], options).concurrency, expected)
+        self.assertEqual(self.request([], {}).concurrency, constants.DEFAULT_SYNC_CONCURRENCY)
+
+    @patch('pulp_node.handlers.strategies.HandlerStrategy._synchronize_repository')
+    @patch('pulp_node.handlers.model.Repository.add')
+    @patch('pulp_node.handlers.model.Repository.fetch', return_value=None)
+    def test_merge_repositories_concurrently(self, fake_fetch, fake_add, fake_synchronize):
+        repo_ids = ['repo-%d' % n for n in range(8)]
+        options = {constants.MAX_SYNC_CONCURRENCY_KEYWORD: 4}
+        request = self.request(repo_ids, options)
+        request.started()
+        threads = set()
+        fake_synchronize.side_effect = \
+            lambda request, repo_id: threads.add(threading.current_thread().ident)
+
+        # test
+        strategy = HandlerStrategy()
+        strategy._merge_repositories(request)
+
+        # validation
+        synchronized = sorted(c[0][1] for c in fake_synchronize.call_args_list)
+        self.assertEqual(synchronized, repo_ids)
+        self.assertFalse(threading.current_thread().ident in threads)
+        self.assertEqual(len(request.summary.errors), 0)
+        for repo_id in repo_ids:
+            self.assertEqual(request.summary[repo_id].action, RepositoryReport.ADDED)
+        expected = [dict(repo_id=repo_id, action=RepositoryReport.ADDED,
+                         units=dict(added=0, updated=0, removed=0), sources={})
+                    for repo_id in repo_ids]
+        repositories = sorted(request.summary.dict()['repositories'], key=lambda r: r['repo_id'])
+        self.assertEqual(repositories, expected)
+
+    @patch('pulp_node.handlers.strategies.HandlerStrategy._synchronize_repository')
+    @patch('pulp_node.handlers.model.Repository.fetch', side_effect=ValueError())
+    def test_merge_repositories_concurrently_errors(self, *unused):
+        repo_ids = ['repo-%d' % n for n in range(5)]
+        options = {constants.MAX_SYNC_CONCURRENCY_KEYWORD: 3}
+        request = self.request(repo_ids, options)
+
+        # test
+        strategy = HandlerStrategy()
+        strategy._merge_repositories(request)
+
+        # validation
+        self.assertEqual(len(request.summary.errors), 5)
+
+    @patch('pulp_node.handlers.model.Repository.fetch')
+    def test_merge_repositories_concurrently_cancelled(self, fake_fetch):
+        repo_ids = ['repo-%d' % n for n in range(5)]
+        options = {constants.MAX_SYNC_CONCURRENCY_KEYWORD: 3}
+        request = self.request(repo_ids, options, cancel=True)
+
+        # test
+        strategy = HandlerStrategy()
+        strategy._merge_repositories(request)
+
+        # validation
+        self.assertFalse(fake_fetch.called)
+        for repo_id in repo_ids:
+            self.assertEqual(request.summary[repo_id].action, RepositoryReport.CANCELLED)
@@ -0,0 +1,190 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from pulp_node import constants
+from pulp_node.importers.inventory import ChildUnits, UnitInventory, UnitListing, unit_digest
+from pulp_node.manifest import UnitStore, UnitWriter, fetch_units, unzip
+
+
+class Ref(object):
+
+    def __init__(self, unit):
+        self.unit = unit
+
+    def fetch(self):
+        return dict(self.unit)
+
+
+def unit(n, last_updated=0, **other):
+    _unit = dict(
+        unit_id='unit-%d' % n,
+        type_id='T',
+        unit_key={'name': 'u%d' % n, 'version': n},
+        metadata={'n': n},
+        owner_type='node',
+        owner_id='parent')
+    _unit[constants.LAST_UPDATED] = last_updated
+    _unit.update(other)
+    return _unit
+
+
+class TestUnitDigest(TestCase):
+
+    def test_stable(self):
+        a = dict(type_id='T', unit_key={'a': 1, 'b': 'x'}, metadata={})
+        b = dict(type_id=u'T', unit_key={u'b': u'x', u'a': 1})
+        self.assertEqual(unit_digest(a), unit_digest(b))
+        self.assertEqual(len(unit_digest(a)), 20)
+
+    def test_different(self):
+        a = dict(type_id='T', unit_key={'a': 1})
+        self.assertNotEqual(unit_digest(a), unit_digest(dict(type_id='T', unit_key={'a': 2})))
+        self.assertNotEqual(unit_digest(a), unit_digest(dict(type_id='X', unit_key={'a': 1})))
+
+
+class TestUnitInventory(TestCase):
+
+    def test_set_operations(self):
+        parent = [unit(n, last_updated=10) for n in range(6)]
+        child = [unit(n, last_updated=5 if n == 3 else 10) for n in range(2, 9)]
+
+        # test
+        inventory = UnitInventory('http://base', [(u, Ref(u)) for u in parent], child)
+
+        # validation
+        parent_only = inventory.units_on_parent_only()
+        self.assertTrue(isinstance(parent_only, UnitListing))
+        self.assertEqual(len(parent_only), 2)
+        self.assertEqual([u['unit_id'] for u, r in parent_only], ['unit-0', 'unit-1'])
+        child_only = inventory.units_on_child_only()
+        self.assertEqual(sorted(u['unit_key']['version'] for u in child_only), [6, 7, 8])
+        for u in child_only:
+            self.assertEqual(u['type_id'], 'T')
+            self.assertEqual(u['owner_type'], 'node')
+            self.assertEqual(u['owner_id'], 'parent')
+        updated = inventory.updated_units()
+        self.assertEqual([u for u, r in updated], [parent[3]])
+        self.assertEqual(inventory.base_URL, 'http://base')
+
+    def test_duplicates(self):
+        parent = [unit(1, last_updated=1), unit(1, last_updated=20)]
+        child = [unit(1, last_updated=10)]
+
+        # test
+        inventory = UnitInventory('', [(u, Ref(u)) for u in parent], child)
+
+        # validation
+        self.assertEqual(len(inventory.units_on_parent_only()), 0)
+        self.assertEqual(inventory.units_on_child_only(), [])
+        self.assertEqual([u[constants.LAST_UPDATED] for u, r in inventory.updated_units()], [20])
+
+    def test_missing_last_updated(self):
+        parent = [unit(1, last_updated=None)]
+        child = [unit(1)]
+        del child[0][constants.LAST_UPDATED]
+
+        # test
+        inventory = UnitInventory('', [(u, Ref(u)) for u in parent], child)
+
+        # validation
+        self.assertEqual(len(inventory.updated_units()), 0)
+
+    def test_child_units_read_twice(self):
+        parent = [unit(n) for n in range(3)]
+        child = [unit(n) for n in range(1, 5)]
+        child_units = Mock()
+        child_units.__iter__ = Mock(side_effect=lambda: iter(child))
+
+        # test
+        inventory = UnitInventory('', [(u, Ref(u)) for u in parent], child_units)
+
+        # validation
+        self.assertEqual(len(child_units.__iter__.mock_calls), 2)
+        child_only = inventory.units_on_child_only()
+        self.assertEqual(sorted(u['unit_id'] for u in child_only), ['unit-3', 'unit-4'])
+        for u in child_only:
+            self.assertFalse('metadata' in u)
+
+    def test_empty(self):
+        inventory = UnitInventory('', [], [])
+        self.assertEqual(len(inventory.units_on_parent_only()), 0)
+        self.assertEqual(inventory.units_on_child_only(), [])
+        self.assertEqual(len(inventory.updated_units()), 0)
+
+
+class TestStoreInventory(TestCase):
+
+    NUM_UNITS = 20
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.units = [unit(n, last_updated=10) for n in range(self.NUM_UNITS)]
+        path = os.path.join(self.tmp_dir, 'units.json.gz')
+        writer = UnitWriter(path)
+        for u in self.units:
+            writer.add(u)
+        writer.close()
+        self.path = path[:-3]
+        unzip(path, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_store_refs(self):
+        child = [unit(n, last_updated=1) for n in range(10)]
+
+        # test
+        inventory = UnitInventory('', UnitStore(self.path), child)
+
+        # validation
+        parent_only = inventory.units_on_parent_only()
+        refs = list(parent_only.refs())
+        self.assertEqual([r.offset for r in refs], sorted(r.offset for r in refs))
+        self.assertEqual([u for u, r in parent_only], self.units[10:])
+        self.assertEqual([u for u, r in inventory.updated_units()], self.units[:10])
+
+    @patch('pulp_node.importers.inventory.fetch_units', wraps=fetch_units)
+    @patch('pulp_node.manifest.UnitRef.fetch')
+    def test_listing_fetched_once(self, mock_fetch, mock_fetch_units):
+        inventory = UnitInventory('', UnitStore(self.path), [])
+
+        # test
+        units = [u for u, r in inventory.units_on_parent_only()]
+
+        # validation
+        self.assertEqual(units, self.units)
+        self.assertEqual(mock_fetch_units.call_count, 1)
+        self.assertFalse(mock_fetch.called)
+
+    def test_mixed_refs(self):
+        pairs = list(UnitStore(self.path))
+        extra = unit(self.NUM_UNITS)
+        pairs.append((extra, Ref(extra)))
+
+        # test
+        inventory = UnitInventory('', pairs, [])
+
+        # validation
+        self.assertEqual([u for u, r in inventory.units_on_parent_only()], self.units + [extra])
+
+
+class TestChildUnits(TestCase):
+
+    def test_iter(self):
+        conduit = Mock()
+        conduit.get_units.side_effect = lambda repo_id: iter([unit(1)])
+
+        # test
+        child_units = ChildUnits(conduit, 'repo-1')
+
+        # validation
+        conduit.get_units.assert_called_once_with('repo-1')
+        self.assertEqual(list(child_units), [unit(1)])
+        self.assertEqual(conduit.get_units.call_count, 1)
+        self.assertEqual(list(child_units), [unit(1)])
+        self.assertEqual(conduit.get_units.call_count, 2)
@@ -253,6 +253,40 @@ class TestBase(TestCase):
         self.assertEqual(request.cancel_event.call_count, 2)
         self.assertFalse(mock_download.called)
 
+    @patch('pulp.server.content.sources.container.ContentContainer.download')
+    @patch('pulp_node.importers.strategies.ImporterStrategy.add_unit')
+    def test_cancel_adds_units_without_files(self, mock_add_unit, mock_download):
+        # Setup
+        request = self.request(2)
+        units = [dict(unit_id=n, type_id='T', unit_key={'n': n}, metadata={}) for n in range(3)]
+        manifest = TestManifest(units)
+        inventory = UnitInventory(BASE_URL, manifest.get_units(), [])
+        # Test
+        strategy = ImporterStrategy()
+        strategy._add_units(request, inventory)
+        # Verify
+        self.assertEqual(request.cancel_event.call_count, 2)
+        self.assertEqual(mock_add_unit.call_count, 1)
+        self.assertEqual(mock_add_unit.call_args[0][1], units[0])
+        self.assertFalse(mock_download.called)
+
+    @patch('pulp.server.content.sources.container.ContentContainer.download')
+    @patch('pulp_node.importers.strategies.ImporterStrategy.add_unit')
+    def test_cancel_before_downloading_adds_units_without_files(self, mock_add_unit,
+                                                                mock_download):
+        # Setup
+        request = self.request(2)
+        unit = dict(unit_id='abc', type_id='T', unit_key={}, metadata={})
+        manifest = TestManifest([unit])
+        inventory = UnitInventory(BASE_URL, manifest.get_units(), [])
+        # Test
+        strategy = ImporterStrategy()
+        strategy._add_units(request, inventory)
+        # Verify
+        self.assertEqual(request.cancel_event.call_count, 2)
+        mock_add_unit.assert_called_once_with(request, unit)
+        self.assertFalse(mock_download.called)
+
     def test_needs_update(self):
         # Setup
         path = os.path.join(self.tmp_dir, 'unit_1')
@@ -14,9 +14,11 @@ import tempfile
 import shutil
 import gzip
 import json
+from types import GeneratorType
 
 from unittest import TestCase
 
+from mock import Mock
 from nectar.downloaders.local import LocalFileDownloader
 from nectar.config import DownloaderConfig
 
@@ -88,6 +90,18 @@ class TestManifest(TestCase):
         fp.close()
         self.verify(units, units_in)
 
+    def test_parallel_compression(self):
+        units = [dict(unit_id=i, type_id='T', unit_key={}) for i in range(0, self.NUM_UNITS)]
+        units_path = os.path.join(self.tmp_dir, UNITS_FILE_NAME)
+        writer = UnitWriter(units_path, compression_workers=2)
+        writer.fp.block_size = 16
+        for u in units:
+            writer.add(u)
+        self.assertEqual(writer.close(), self.NUM_UNITS)
+        self.assertTrue(writer.closed)
+        self.assertEqual(writer.bytes_written, os.path.getsize(units_path))
+        self.verify(units, list(read_units(units_path)))
+
     def test_round_trip(self):
         # Setup
         units = []
@@ -131,4 +145,303 @@ class TestManifest(TestCase):
             units_in.append(unit)
             _unit = ref.fetch()
             self.assertEqual(unit, _unit)
-        self.verify(units, units_in)
\ No newline at end of file
+        self.verify(units, units_in)
+
+class TestUnitStore(TestCase):
+
+    NUM_UNITS = 10
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.units = [dict(unit_id=i, type_id='T', unit_key={'n': i})
+                      for i in range(self.NUM_UNITS)]
+        units_path = os.path.join(self.tmp_dir, UNITS_FILE_NAME)
+        writer = UnitWriter(units_path)
+        for u in self.units:
+            writer.add(u)
+        writer.close()
+        self.path = units_path[:-3]
+        unzip(units_path, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_iteration(self):
+        store = UnitStore(self.path)
+        units_in = []
+        for unit, ref in store:
+            units_in.append(unit)
+            self.assertTrue(ref.store is store)
+            self.assertEqual(ref.path, self.path)
+            self.assertEqual(json.loads(str(ref.buffer())), unit)
+            self.assertEqual(ref.fetch(), unit)
+        self.assertEqual(units_in, self.units)
+        self.assertEqual(len(store), self.NUM_UNITS)
+
+    def test_offsets(self):
+        store = UnitStore(self.path)
+        offsets = store.offsets()
+        self.assertEqual(len(offsets), self.NUM_UNITS)
+        self.assertEqual(list(offsets), [ref.offset for unit, ref in UnitStore(self.path)])
+        self.assertEqual(store.ref(3).fetch(), self.units[3])
+        self.assertEqual(store.ref(self.NUM_UNITS - 1).fetch(), self.units[-1])
+        self.assertRaises(IndexError, store.ref, self.NUM_UNITS)
+
+    def test_fetch_all(self):
+        store = UnitStore(self.path)
+        refs = [ref for unit, ref in store]
+        refs.reverse()
+        self.assertEqual(store.fetch_all(refs), list(reversed(self.units)))
+
+    def test_fetch_units(self):
+        refs = [ref for unit, ref in UnitStore(self.path)]
+        refs.append(UnitRef(self.path, refs[0].offset, refs[0].length))
+        units = fetch_units(refs)
+        self.assertTrue(isinstance(units, GeneratorType))
+        self.assertEqual(list(units), self.units + [self.units[0]])
+
+    def test_fetch_units_batches(self):
+        refs = [ref for unit, ref in UnitStore(self.path)]
+        refs.reverse()
+        units = fetch_units(iter(refs), batch_size=3)
+        self.assertEqual(list(units), list(reversed(self.units)))
+
+    def test_ref_without_store(self):
+        refs = [ref for unit, ref in UnitStore(self.path)]
+        ref = UnitRef(self.path, refs[2].offset, refs[2].length)
+        self.assertEqual(ref.fetch(), self.units[2])
+
+    def test_empty(self):
+        path = os.path.join(self.tmp_dir, 'empty')
+        open(path, 'w').close()
+        store = UnitStore(path)
+        self.assertEqual(list(store), [])
+        self.assertEqual(len(store), 0)
+
+    def test_unzip_keeps_mapped_file(self):
+        store = UnitStore(self.path)
+        refs = [ref for unit, ref in store]
+        writer = UnitWriter(os.path.join(self.tmp_dir, UNITS_FILE_NAME))
+        writer.add(dict(unit_id='x', type_id='T', unit_key={}))
+        writer.close()
+        unzip(writer.path, self.path)
+        self.assertEqual(store.fetch_all(refs), self.units)
+        self.assertEqual(len(UnitStore(self.path)), 1)
+
+
+class CopyingDownloader(object):
+
+    def __init__(self, fail=False):
+        self.event_listener = None
+        self.fail = fail
+        self.urls = []
+
+    def download(self, requests):
+        for request in requests:
+            self.urls.append(request.url)
+            if self.fail:
+                self.event_listener.download_failed(Mock(url=request.url, error_msg='failed'))
+                continue
+            shutil.copy(request.url.split('://', 1)[1], request.destination)
+
+
+class TestDeltas(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def unit(self, n, **other):
+        unit = dict(type_id='T', unit_key={'n': n}, unit_id=str(n), metadata={'m': n})
+        unit.update(other)
+        return unit
+
+    def write_units(self, path, units):
+        with UnitWriter(path) as writer:
+            for u in units:
+                writer.add(u)
+        return writer
+
+    def publish(self, dir_name, manifest_id, units, previous=None):
+        pub_dir = os.path.join(self.tmp_dir, dir_name)
+        os.makedirs(os.path.join(pub_dir, DELTA_DIR))
+        units_path = os.path.join(pub_dir, UNITS_FILE_NAME)
+        writer = self.write_units(units_path, units)
+        manifest = Manifest(pub_dir, manifest_id)
+        manifest.units_published(writer)
+        if previous is not None:
+            delta_path = os.path.join(pub_dir, DELTA_DIR, '%s.json.gz' % previous.id)
+            delta_writer = write_delta(previous.units_path(), units_path, delta_path)
+            manifest.delta_published(previous, delta_writer, 10)
+            for delta in previous.deltas:
+                shutil.copy(
+                    os.path.join(os.path.dirname(previous.path), delta[DELTA_PATH]),
+                    os.path.join(pub_dir, delta[DELTA_PATH]))
+        manifest.write()
+        return manifest
+
+    def test_write_delta(self):
+        previous = [self.unit(1), self.unit(2), self.unit(3)]
+        units = [self.unit(1), self.unit(2, metadata={'m': 'new'}), self.unit(4)]
+        previous_path = os.path.join(self.tmp_dir, 'previous.json.gz')
+        path = os.path.join(self.tmp_dir, 'units.json.gz')
+        delta_path = os.path.join(self.tmp_dir, 'delta.json.gz')
+        self.write_units(previous_path, previous)
+        self.write_units(path, units)
+
+        # test
+        writer = write_delta(previous_path, path, delta_path)
+
+        # validation
+        entries = list(read_units(delta_path))
+        self.assertEqual(writer.total_units, 3)
+        self.assertEqual(writer.bytes_written, os.path.getsize(delta_path))
+        self.assertEqual(entries[0], {DELTA_ACTION: UNIT_UPDATED, DELTA_UNIT: units[1]})
+        self.assertEqual(entries[1], {DELTA_ACTION: UNIT_ADDED, DELTA_UNIT: units[2]})
+        self.assertEqual(entries[2], {DELTA_ACTION: UNIT_REMOVED,
+                                      DELTA_UNIT: dict(type_id='T', unit_key={'n': 3})})
+
+    def test_apply_deltas(self):
+        units = [self.unit(n) for n in range(5)]
+        path = os.path.join(self.tmp_dir, 'units.json')
+        with open(path, 'w') as fp:
+            for u in units:
+                fp.write(json.dumps(u) + '\n')
+        delta_1 = os.path.join(self.tmp_dir, 'delta_1.json.gz')
+        delta_2 = os.path.join(self.tmp_dir, 'delta_2.json.gz')
+        self.write_units(delta_1, [
+            {DELTA_ACTION: UNIT_ADDED, DELTA_UNIT: self.unit(5)},
+            {DELTA_ACTION: UNIT_REMOVED, DELTA_UNIT: dict(type_id='T', unit_key={'n': 0})},
+            {DELTA_ACTION: UNIT_UPDATED, DELTA_UNIT: self.unit(1, unit_id='x')},
+        ])
+        self.write_units(delta_2, [
+            {DELTA_ACTION: UNIT_REMOVED, DELTA_UNIT: dict(type_id='T', unit_key={'n': 5})},
+            {DELTA_ACTION: UNIT_UPDATED, DELTA_UNIT: self.unit(1, unit_id='y')},
+        ])
+
+        # test
+        total = apply_deltas(path, [delta_1, delta_2], path)
+
+        # validation
+        units_in = list(read_units(path))
+        self.assertEqual(total, 4)
+        self.assertEqual(sorted(u['unit_id'] for u in units_in), ['2', '3', '4', 'y'])
+        self.assertFalse(os.path.exists(path + '.tmp'))
+
+    def test_delta_chain(self):
+        manifest = Manifest(self.tmp_dir, 'C')
+        manifest.deltas = [
+            {DELTA_FROM: 'A', DELTA_TO: 'B'},
+            {DELTA_FROM: 'B', DELTA_TO: 'C'},
+        ]
+        self.assertEqual(manifest.delta_chain('A'), manifest.deltas)
+        self.assertEqual(manifest.delta_chain('B'), manifest.deltas[1:])
+        self.assertEqual(manifest.delta_chain('X'), None)
+        manifest.deltas[0][DELTA_TO] = 'X'
+        self.assertEqual(manifest.delta_chain('A'), None)
+        manifest.id = 'D'
+        self.assertEqual(manifest.delta_chain('B'), None)
+
+    def test_delta_published(self):
+        previous = Manifest(self.tmp_dir, 'A')
+        previous.deltas = [{DELTA_FROM: str(n), DELTA_TO: str(n + 1)} for n in range(3)]
+        manifest = Manifest(self.tmp_dir, 'B')
+        writer = Mock(path='/tmp/deltas/A.json.gz', total_units=10, bytes_written=100)
+
+        # test
+        manifest.delta_published(previous, writer, 3)
+
+        # validation
+        self.assertEqual(len(manifest.deltas), 3)
+        self.assertEqual(manifest.deltas[0][DELTA_FROM], '1')
+        self.assertEqual(manifest.deltas[-1], {
+            DELTA_FROM: 'A', DELTA_TO: 'B', DELTA_PATH: 'deltas/A.json.gz',
+            DELTA_TOTAL: 10, DELTA_SIZE: 100})
+
+    def child(self, published):
+        working_dir = os.path.join(self.tmp_dir, 'child')
+        os.makedirs(working_dir)
+        manifest = Manifest(working_dir, published.id)
+        manifest.units = dict(published.units)
+        manifest.units[UNITS_PATH] = None
+        manifest.write()
+        shutil.copy(published.units_path(), manifest.units_path())
+        list(manifest.get_units())
+        return manifest
+
+    def test_fetch_deltas(self):
+        units_1 = [self.unit(n) for n in range(10)]
+        units_2 = units_1[1:] + [self.unit(10)]
+        units_3 = [self.unit(n, unit_id='x') if n == 5 else self.unit(n) for n in range(2, 12)]
+        manifest_1 = self.publish('1', 'one', units_1)
+        manifest_2 = self.publish('2', 'two', units_2, manifest_1)
+        manifest_3 = self.publish('3', 'three', units_3, manifest_2)
+        child = self.child(manifest_1)
+        downloader = CopyingDownloader()
+        remote = RemoteManifest('file://%s' % manifest_3.path, downloader, child.path)
+        remote.read(manifest_3.path)
+
+        # test
+        updated = remote.fetch_deltas(child)
+
+        # validation
+        self.assertTrue(updated)
+        self.assertEqual(len(downloader.urls), 2)
+        self.assertTrue(remote.has_valid_units())
+        self.assertFalse(os.path.exists(os.path.join(os.path.dirname(child.path), DELTA_DIR)))
+        units_in = sorted([u for u, r in remote.get_units()], key=lambda u: u['unit_key']['n'])
+        self.assertEqual(units_in, units_3)
+        written = Manifest(child.path)
+        written.read()
+        self.assertEqual(written.id, 'three')
+
+    def test_fetch_deltas_chain_broken(self):
+        units = [self.unit(n) for n in range(3)]
+        manifest_1 = self.publish('1', 'one', units)
+        manifest_2 = self.publish('2', 'two', units, manifest_1)
+        child = self.child(manifest_1)
+        downloader = CopyingDownloader()
+        remote = RemoteManifest('file://%s' % manifest_2.path, downloader, child.path)
+        remote.read(manifest_2.path)
+        remote.deltas[0][DELTA_FROM] = 'zero'
+
+        # test
+        updated = remote.fetch_deltas(child)
+
+        # validation
+        self.assertFalse(updated)
+        self.assertEqual(downloader.urls, [])
+
+    def test_fetch_deltas_failed(self):
+        units = [self.unit(n) for n in range(3)]
+        manifest_1 = self.publish('1', 'one', units)
+        manifest_2 = self.publish('2', 'two', units[1:], manifest_1)
+        child = self.child(manifest_1)
+        remote = RemoteManifest('file://%s' % manifest_2.path, CopyingDownloader(True), child.path)
+        remote.read(manifest_2.path)
+
+        # test
+        updated = remote.fetch_deltas(child)
+
+        # validation
+        self.assertFalse(updated)
+        self.assertTrue(child.has_valid_units())
+        self.assertEqual(len(list(child.get_units())), 3)
+
+    def test_fetch_deltas_total_mismatch(self):
+        units = [self.unit(n) for n in range(3)]
+        manifest_1 = self.publish('1', 'one', units)
+        manifest_2 = self.publish('2', 'two', units[1:], manifest_1)
+        child = self.child(manifest_1)
+        remote = RemoteManifest('file://%s' % manifest_2.path, CopyingDownloader(), child.path)
+        remote.read(manifest_2.path)
+        remote.units[UNITS_TOTAL] += 1
+
+        # test
+        updated = remote.fetch_deltas(child)
+
+        # validation
+        self.assertFalse(updated)
+        self.assertEqual(len(list(child.get_units())), 3)
@@ -502,6 +502,21 @@ class TestDistributor(PluginTestBase):
         self.assertFalse(report[0])
         self.assertFalse(report[1] is None)
 
+    def test_config_invalid_max_deltas(self):
+        dist = NodesHttpDistributor()
+        repo = plugin_model.Repository(self.REPO_ID)
+        for max_deltas in (5, '5', 0):
+            conf = deepcopy(self.VALID_CONFIGURATION)
+            conf[constants.MAX_DELTAS_KEYWORD] = max_deltas
+            report = dist.validate_config(repo, conf, [])
+            self.assertTrue(report[0])
+        for max_deltas in (-1, 'abc', []):
+            conf = deepcopy(self.VALID_CONFIGURATION)
+            conf[constants.MAX_DELTAS_KEYWORD] = max_deltas
+            report = dist.validate_config(repo, conf, [])
+            self.assertFalse(report[0])
+            self.assertFalse(report[1] is None)
+
     def test_payload(self):
         # Setup
         self.populate()
@@ -10,18 +10,25 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 import os
+import random
 import shutil
 import tempfile
 import tarfile
+import time
 
 from unittest import TestCase
+
+from mock import patch
 from nectar.downloaders.local import LocalFileDownloader
 from nectar.config import DownloaderConfig
 
 from pulp_node import constants
 from pulp_node import pathlib
 from pulp_node.distributors.http.publisher import HttpPublisher
-from pulp_node.manifest import RemoteManifest
+from pulp_node.distributors.publisher import FilePublisher, StagingPipeline, RETIRED_PREFIX
+from pulp_node.manifest import (
+    Manifest, RemoteManifest, read_units, DELTA_FROM, DELTA_TO, DELTA_PATH, DELTA_TOTAL,
+    DELTA_ACTION, DELTA_UNIT, UNIT_ADDED, UNIT_REMOVED)
 
 
 class TestHttp(TestCase):
@@ -154,3 +161,235 @@ class TestHttp(TestCase):
             p.publish(units)
         # verify
         self.assertFalse(os.path.exists(p.tmp_dir))
+
+
+class TestDeltas(TestCase):
+
+    REPO_ID = 'test_repo'
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.publish_dir = os.path.join(self.tmp_dir, 'nodes/repos')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def publish(self, units, max_deltas=10):
+        with FilePublisher(self.publish_dir, self.REPO_ID, max_deltas) as p:
+            p.publish([dict(u) for u in units])
+            p.commit()
+        if p.retiring:
+            p.retiring.join()
+        manifest = Manifest(os.path.join(self.publish_dir, self.REPO_ID))
+        manifest.read()
+        return manifest
+
+    def units(self, numbers):
+        return [dict(type_id='T', unit_key={'n': n}) for n in numbers]
+
+    def test_first_publish(self):
+        manifest = self.publish(self.units(range(3)))
+        self.assertEqual(manifest.deltas, [])
+
+    def test_deltas(self):
+        manifest_1 = self.publish(self.units(range(3)))
+        manifest_2 = self.publish(self.units(range(1, 4)))
+        manifest_3 = self.publish(self.units(range(1, 5)))
+
+        # validation
+        self.assertEqual(len(manifest_3.deltas), 2)
+        self.assertEqual(manifest_3.delta_chain(manifest_1.id), manifest_3.deltas)
+        self.assertEqual(manifest_3.deltas[0][DELTA_FROM], manifest_1.id)
+        self.assertEqual(manifest_3.deltas[0][DELTA_TO], manifest_2.id)
+        published_dir = os.path.join(self.publish_dir, self.REPO_ID)
+        for delta in manifest_3.deltas:
+            self.assertTrue(os.path.isfile(os.path.join(published_dir, delta[DELTA_PATH])))
+            self.assertEqual(delta[DELTA_TOTAL], 2 if delta is manifest_3.deltas[0] else 1)
+        entries = list(read_units(os.path.join(published_dir, manifest_3.deltas[0][DELTA_PATH])))
+        self.assertEqual(entries, [
+            {DELTA_ACTION: UNIT_ADDED, DELTA_UNIT: dict(type_id='T', unit_key={'n': 3})},
+            {DELTA_ACTION: UNIT_REMOVED, DELTA_UNIT: dict(type_id='T', unit_key={'n': 0})},
+        ])
+
+    def test_max_deltas(self):
+        for n in range(4):
+            manifest = self.publish(self.units(range(n + 1)), max_deltas=2)
+        self.assertEqual(len(manifest.deltas), 2)
+        self.assertEqual(manifest.delta_chain(manifest.deltas[0][DELTA_FROM]), manifest.deltas)
+        published_dir = os.path.join(self.publish_dir, self.REPO_ID)
+        self.assertEqual(len(os.listdir(os.path.join(published_dir, 'deltas'))), 2)
+
+    def test_disabled(self):
+        self.publish(self.units(range(3)), max_deltas=0)
+        manifest = self.publish(self.units(range(4)), max_deltas=0)
+        self.assertEqual(manifest.deltas, [])
+
+    def test_missing_delta(self):
+        self.publish(self.units(range(1)))
+        manifest = self.publish(self.units(range(2)))
+        os.unlink(os.path.join(self.publish_dir, self.REPO_ID, manifest.deltas[0][DELTA_PATH]))
+        manifest = self.publish(self.units(range(3)))
+        self.assertEqual(len(manifest.deltas), 1)
+
+
+class TestStaging(TestCase):
+
+    def staged(self, unit):
+        time.sleep(random.random() / 1000)
+        unit['staged'] = True
+
+    def test_ordered(self):
+        units = [dict(n=n) for n in range(200)]
+
+        # test
+        pipeline = StagingPipeline(self.staged, 4, backlog=8)
+        staged = list(pipeline.stage(iter(units)))
+
+        # validation
+        self.assertEqual([u['n'] for u in staged], range(200))
+        self.assertTrue(all(u['staged'] for u in staged))
+
+    def test_inline(self):
+        units = [dict(n=n) for n in range(10)]
+        pipeline = StagingPipeline(self.staged, 1)
+        staged = list(pipeline.stage(units))
+        self.assertEqual(staged, units)
+        self.assertTrue(all(u['staged'] for u in staged))
+
+    def test_error(self):
+        def function(unit):
+            if unit['n'] == 50:
+                raise ValueError(unit['n'])
+            self.staged(unit)
+
+        # test
+        staged = []
+        pipeline = StagingPipeline(function, 4)
+        try:
+            for unit in pipeline.stage(dict(n=n) for n in range(200)):
+                staged.append(unit)
+            self.fail('ValueError expected')
+        except ValueError:
+            pass
+
+        # validation
+        self.assertEqual([u['n'] for u in staged], range(50))
+
+
+class TestCommit(TestCase):
+
+    REPO_ID = 'test_repo'
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.publish_dir = os.path.join(self.tmp_dir, 'nodes/repos')
+        self.content_dir = os.path.join(self.tmp_dir, 'content')
+        for n in range(20):
+            path = os.path.join(self.content_dir, 'unit_%d' % n)
+            os.makedirs(path)
+            with open(os.path.join(path, 'file'), 'w') as fp:
+                fp.write('unit %d' % n)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def units(self):
+        units = []
+        for n in range(20):
+            path = os.path.join(self.content_dir, 'unit_%d' % n)
+            if n % 2:
+                path = os.path.join(path, 'file')
+            units.append({
+                'type_id': 'T',
+                'unit_key': {'n': n},
+                constants.STORAGE_PATH: path,
+                constants.RELATIVE_PATH: os.path.relpath(path, self.content_dir),
+            })
+        return units
+
+    def publish(self):
+        p = FilePublisher(self.publish_dir, self.REPO_ID)
+        p.publish(self.units())
+        p.commit()
+        return p
+
+    def test_staged(self):
+        # test
+        self.publish()
+
+        # validation
+        manifest = Manifest(os.path.join(self.publish_dir, self.REPO_ID))
+        manifest.read()
+        published = list(read_units(manifest.units_path()))
+        self.assertEqual([u['unit_key']['n'] for u in published], range(20))
+        for unit in published:
+            if unit['unit_key']['n'] % 2:
+                path = os.path.join(manifest.units_path(), '..', unit[constants.RELATIVE_PATH])
+                self.assertTrue(os.path.islink(os.path.normpath(path)))
+            else:
+                path = os.path.join(self.publish_dir, self.REPO_ID, unit[constants.TARBALL_PATH])
+                self.assertTrue(tarfile.is_tarfile(path))
+
+    def test_retired(self):
+        first = self.publish()
+        self.assertEqual(first.retiring, None)
+        published_dir = os.path.join(self.publish_dir, self.REPO_ID)
+        marker = os.path.join(published_dir, 'marker')
+        open(marker, 'w').close()
+
+        # test
+        second = self.publish()
+        second.retiring.join()
+
+        # validation
+        self.assertFalse(os.path.exists(marker))
+        self.assertTrue(os.path.exists(os.path.join(published_dir, 'units.json.gz')))
+        remaining = [n for n in os.listdir(self.publish_dir) if n.startswith(RETIRED_PREFIX)]
+        self.assertEqual(remaining, [])
+        self.assertEqual(os.listdir(self.publish_dir), [self.REPO_ID])
+
+    def test_retired_left_behind(self):
+        self.publish()
+        leftover = tempfile.mkdtemp(prefix=RETIRED_PREFIX + self.REPO_ID + '-',
+                                    dir=self.publish_dir)
+        open(os.path.join(leftover, 'marker'), 'w').close()
+        other = tempfile.mkdtemp(prefix=RETIRED_PREFIX + 'other_repo-', dir=self.publish_dir)
+
+        # test
+        second = self.publish()
+        second.retiring.join()
+
+        # validation
+        self.assertFalse(os.path.exists(leftover))
+        self.assertTrue(os.path.exists(other))
+
+    def test_restored_when_commit_fails(self):
+        self.publish()
+        published_dir = os.path.join(self.publish_dir, self.REPO_ID)
+        marker = os.path.join(published_dir, 'marker')
+        open(marker, 'w').close()
+        p = FilePublisher(self.publish_dir, self.REPO_ID)
+        p.publish(self.units())
+
+        # test
+        with patch('os.rename', side_effect=self.rename_failing_at(2)):
+            self.assertRaises(OSError, p.commit)
+
+        # validation
+        self.assertTrue(os.path.exists(marker))
+        self.assertTrue(p.staged)
+        self.assertEqual(p.retiring, None)
+        self.assertEqual(sorted(os.listdir(self.publish_dir)),
+                         sorted([self.REPO_ID, os.path.basename(p.tmp_dir)]))
+
+    @staticmethod
+    def rename_failing_at(call):
+        rename = os.rename
+        calls = []
+
+        def function(src, dst):
+            calls.append((src, dst))
+            if len(calls) == call:
+                raise OSError()
+            rename(src, dst)
+        return function
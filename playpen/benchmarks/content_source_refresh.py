@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Compare a serial content source refresh against the concurrent refresh done
+by the ContentContainer. Each content source is a local HTTP server that
+answers every request after a fixed latency, standing in for a slow mirror.
+
+    python content_source_refresh.py --sources 12 --paths 3 --latency 2
+    python content_source_refresh.py --sources 4 --entries 20000 --max-concurrent 4
+"""
+
+import shutil
+import tempfile
+import time
+import urllib2
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from optparse import OptionParser
+from threading import Event, Thread
+
+from pulp.server.content.sources import constants
+from pulp.server.content.sources.container import ContentContainer
+from pulp.server.content.sources.descriptor import DEFAULT
+from pulp.server.content.sources.model import ContentSource
+from pulp.server.db import connection
+from pulp.server.managers.content.catalog import ContentCatalogManager
+
+
+TYPE_ID = 'benchmark_catalog_unit'
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Answers every GET with a listing of file names after a fixed latency.
+    """
+
+    latency = 0
+    entries = 0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = '\n'.join('%s-%d.rpm' % (self.path.strip('/'), n) for n in xrange(self.entries))
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *unused):
+        pass
+
+
+class Cataloger(object):
+    """
+    Stand-in cataloger plugin that catalogs every file named in the listing.
+    """
+
+    def refresh(self, conduit, config, url):
+        listing = urllib2.urlopen(url).read()
+        entries = ((TYPE_ID, {'name': name}, url + name) for name in listing.splitlines())
+        conduit.add_entries(entries)
+
+
+def serve(num_sources, latency, entries):
+    Handler.latency = latency
+    Handler.entries = entries
+    servers = []
+    for n in xrange(num_sources):
+        server = Server(('127.0.0.1', 0), Handler)
+        thread = Thread(target=server.serve_forever)
+        thread.setDaemon(True)
+        thread.start()
+        servers.append(server)
+    return servers
+
+
+def build_sources(servers, num_paths, max_concurrent):
+    sources = {}
+    for n, server in enumerate(servers):
+        descriptor = dict(DEFAULT)
+        descriptor.update({
+            constants.NAME: 'benchmark-%d' % n,
+            constants.BASE_URL: 'http://127.0.0.1:%d/' % server.server_address[1],
+            constants.PATHS: ' '.join('path-%d' % p for p in xrange(num_paths)),
+            constants.MAX_CONCURRENT: str(max_concurrent),
+        })
+        source = ContentSource('benchmark-source-%d' % n, descriptor)
+        source.get_cataloger = Cataloger
+        sources[source.id] = source
+    return sources
+
+
+def timed(label, container, threads):
+    start = time.time()
+    reports = container.refresh(Event(), force=True, threads=threads)
+    added = sum(r.added_count for r in reports)
+    failed = len([r for r in reports if not r.succeeded])
+    print '%-12s %8d entries %4d failed in %8.2fs' % (label, added, failed, time.time() - start)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--sources', type='int', default=12)
+    parser.add_option('--paths', type='int', default=3, help='urls per content source')
+    parser.add_option('--entries', type='int', default=1000, help='entries per url')
+    parser.add_option('--latency', type='float', default=1.0,
+                      help='seconds each stand-in mirror waits before answering')
+    parser.add_option('--threads', type='int', default=4,
+                      help='content sources refreshed concurrently')
+    parser.add_option('--max-concurrent', type='int', default=2,
+                      help='urls refreshed concurrently per content source')
+    options, args = parser.parse_args()
+
+    connection.initialize()
+    servers = serve(options.sources, options.latency, options.entries)
+    conf_d = tempfile.mkdtemp()
+    manager = ContentCatalogManager()
+    try:
+        container = ContentContainer(conf_d)
+        container.sources = build_sources(servers, options.paths, 1)
+        timed('serial', container, 1)
+        container.sources = build_sources(servers, options.paths, options.max_concurrent)
+        timed('concurrent', container, options.threads)
+    finally:
+        for server in servers:
+            server.shutdown()
+        for n in xrange(options.sources):
+            manager.purge('benchmark-source-%d' % n)
+        shutil.rmtree(conf_d)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Compare the peak memory and time used by a child node to build the unit
+inventory for a repository. The original inventory kept every parent unit and
+child unit in dictionaries; the current inventory keeps only digests, offsets
+and last_updated. Each case runs in a forked process and the peak anonymous
+memory is sampled from /proc so that pages of the mapped units file are not
+counted. Everything is written to a temporary directory.
+
+    python node_inventory.py --units 500000
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from optparse import OptionParser
+
+from pulp_node import constants
+from pulp_node.importers.inventory import UniqueKey, UnitInventory
+from pulp_node.manifest import UnitStore, UnitWriter, unzip
+
+
+def unit(n, last_updated):
+    metadata = dict(('field_%d' % f, 'value %d of unit %d' % (f, n)) for f in range(20))
+    _unit = dict(
+        unit_id='unit-%d' % n,
+        type_id='rpm',
+        unit_key=dict(name='package-%d' % n, epoch='0', version='1.%d' % n, release='1',
+                      arch='x86_64', checksumtype='sha256', checksum='%064x' % n),
+        storage_path='/var/lib/pulp/content/rpm/package-%d.rpm' % n,
+        relative_path='content/rpm/package-%d.rpm' % n,
+        file_size=1024,
+        owner_type='node',
+        owner_id='parent',
+        metadata=metadata)
+    _unit[constants.LAST_UPDATED] = last_updated
+    return _unit
+
+
+def write_units(working_dir, num_units):
+    path = os.path.join(working_dir, 'units.json.gz')
+    writer = UnitWriter(path)
+    for n in xrange(num_units):
+        writer.add(unit(n, 10))
+    writer.close()
+    unzip(path, path[:-3])
+    return path[:-3]
+
+
+def child_units(num_units):
+    # a tenth of the parent units are missing, a tenth are stale and a twentieth
+    # of the units are no longer on the parent
+    for n in xrange(num_units / 10, num_units + num_units / 20):
+        yield unit(n, 5 if n % 10 == 0 else 10)
+
+
+def original(path, num_units):
+    """
+    The inventory built by UnitInventory before it was made compact.
+    """
+    parent = {}
+    for _unit, ref in UnitStore(path):
+        _unit.pop('metadata', None)
+        parent[UniqueKey(_unit)] = (_unit, ref)
+    child = {}
+    for _unit in child_units(num_units):
+        _unit.pop('metadata', None)
+        child[UniqueKey(_unit)] = _unit
+    parent_only = [r for k, r in parent.items() if k not in child]
+    child_only = [u for k, u in child.items() if k not in parent]
+    updated = [(u, r) for k, (u, r) in parent.items()
+               if k in child and u[constants.LAST_UPDATED] > child[k][constants.LAST_UPDATED]]
+    return len(parent_only), len(child_only), len(updated)
+
+
+def current(path, num_units):
+    inventory = UnitInventory('', UnitStore(path), child_units(num_units))
+    return (len(inventory.units_on_parent_only()),
+            len(inventory.units_on_child_only()),
+            len(inventory.updated_units()))
+
+
+def anonymous_memory():
+    with open('/proc/self/status') as fp:
+        for line in fp:
+            if line.startswith('RssAnon:'):
+                return int(line.split()[1])
+    return 0
+
+
+class Sampler(threading.Thread):
+
+    def __init__(self):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.peak = anonymous_memory()
+
+    def run(self):
+        while True:
+            self.peak = max(self.peak, anonymous_memory())
+            time.sleep(0.01)
+
+
+def measured(label, function, path, num_units):
+    pid = os.fork()
+    if pid == 0:
+        base = anonymous_memory()
+        sampler = Sampler()
+        sampler.start()
+        start = time.time()
+        counts = function(path, num_units)
+        elapsed = time.time() - start
+        print '%-10s %8.1f MB peak %8.1f sec  (parent only, child only, updated) = %s' % \
+            (label, (sampler.peak - base) / 1024.0, elapsed, counts)
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--units', type='int', default=500000, help='number of parent units')
+    options, args = parser.parse_args()
+
+    working_dir = tempfile.mkdtemp()
+    try:
+        path = write_units(working_dir, options.units)
+        measured('original', original, path, options.units)
+        measured('current', current, path, options.units)
+    finally:
+        shutil.rmtree(working_dir)
+
+
+if __name__ == '__main__':
+    main()
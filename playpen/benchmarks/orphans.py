@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Compare the old one-query-per-unit orphan detection against the paged
+anti-join done by the OrphanManager.
+
+    python orphans.py --units 100000 --associated 0.5
+    python orphans.py --units 1000000 --associated 0.9
+"""
+
+import time
+import uuid
+from optparse import OptionParser
+
+from pulp.plugins.types import database as content_types_db
+from pulp.plugins.types.model import TypeDefinition
+from pulp.server.db import connection
+from pulp.server.db.model.content import ContentType
+from pulp.server.db.model.repository import RepoContentUnit
+from pulp.server.managers.content.orphan import OrphanManager
+
+
+TYPE_ID = 'benchmark_orphan_unit'
+REPO_ID = 'benchmark-orphan-repo'
+INSERT_PAGE_SIZE = 5000
+
+
+def populate(num_units, associated_ratio):
+    units = content_types_db.type_units_collection(TYPE_ID)
+    associations = RepoContentUnit.get_collection()
+    every = int(1 / associated_ratio) if associated_ratio else 0
+    unit_page = []
+    association_page = []
+    for i in xrange(num_units):
+        unit_id = str(uuid.uuid4())
+        unit_page.append({'_id': unit_id, 'name': 'unit-%d' % i, '_content_type_id': TYPE_ID})
+        if every and i % every == 0:
+            association_page.append(RepoContentUnit(REPO_ID, unit_id, TYPE_ID,
+                                                    RepoContentUnit.OWNER_TYPE_USER, 'benchmark'))
+        if len(unit_page) >= INSERT_PAGE_SIZE:
+            units.insert(unit_page, safe=True)
+            unit_page = []
+        if len(association_page) >= INSERT_PAGE_SIZE:
+            associations.insert(association_page, safe=True)
+            association_page = []
+    if unit_page:
+        units.insert(unit_page, safe=True)
+    if association_page:
+        associations.insert(association_page, safe=True)
+
+
+def count_orphans_per_unit():
+    """
+    The orphan detection used before paging; one count query per content unit.
+    """
+    units = content_types_db.type_units_collection(TYPE_ID)
+    associations = RepoContentUnit.get_collection()
+    count = 0
+    for unit in units.find({}, fields=['_id']):
+        if associations.find({'unit_id': unit['_id']}).count() == 0:
+            count += 1
+    return count
+
+
+def timed(label, function):
+    start = time.time()
+    result = function()
+    print '%-12s %8d orphans in %8.2fs' % (label, result, time.time() - start)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--units', type='int', default=100000)
+    parser.add_option('--associated', type='float', default=0.5,
+                      help='fraction of units associated with a repository')
+    parser.add_option('--skip-per-unit', action='store_true', default=False,
+                      help='skip the (slow) per-unit baseline')
+    options, args = parser.parse_args()
+
+    connection.initialize()
+    content_types_db.update_database([TypeDefinition(TYPE_ID, TYPE_ID, None, 'name', [], [])])
+    try:
+        populate(options.units, options.associated)
+        if not options.skip_per_unit:
+            timed('per-unit', count_orphans_per_unit)
+        timed('paged', lambda: OrphanManager().orphans_count_by_type(TYPE_ID))
+    finally:
+        RepoContentUnit.get_collection().remove({'repo_id': REPO_ID}, safe=True)
+        content_types_db.type_units_collection(TYPE_ID).drop()
+        ContentType.get_collection().remove({'id': TYPE_ID}, safe=True)
+
+
+if __name__ == '__main__':
+    main()
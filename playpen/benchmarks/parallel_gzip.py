@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Compare the time taken to gzip a large metadata file with gzip.GzipFile and
+with a ParallelGzipFile using different numbers of compression threads. The
+XML written resembles primary.xml and is generated once, uncompressed, in a
+temporary directory. Each gzipped copy is decompressed and checked against it.
+
+    python parallel_gzip.py --size 500 --workers 1,2,4,8,16,32
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import time
+from hashlib import sha256
+from optparse import OptionParser
+
+from pulp.plugins.util.parallel_gzip import ParallelGzipFile
+
+BUFFER_SIZE = 64 * 1024
+
+
+def package(n):
+    return (
+        '<package type="rpm"><name>package-%(n)d</name><arch>x86_64</arch>'
+        '<version epoch="0" ver="1.%(n)d" rel="%(r)d.el7"/>'
+        '<checksum type="sha256" pkgid="YES">%(c)064x</checksum>'
+        '<summary>Package number %(n)d</summary>'
+        '<description>The package number %(n)d, release %(r)d.</description>'
+        '<location href="Packages/p/package-%(n)d-1.%(n)d-%(r)d.el7.x86_64.rpm"/>'
+        '</package>\n' % {'n': n, 'r': n % 17, 'c': n * 7919})
+
+
+def write_metadata(path, size):
+    with open(path, 'wb') as fp:
+        fp.write('<?xml version="1.0" encoding="UTF-8"?>\n<metadata>\n')
+        n = 0
+        while fp.tell() < size:
+            fp.write(''.join(package(n + i) for i in xrange(1000)))
+            n += 1000
+        fp.write('</metadata>\n')
+
+
+def digest(fp):
+    checksum = sha256()
+    while True:
+        bfr = fp.read(BUFFER_SIZE)
+        if not bfr:
+            return checksum.hexdigest()
+        checksum.update(bfr)
+
+
+def compress(source, gzip_file):
+    start = time.time()
+    with open(source, 'rb') as fp:
+        while True:
+            bfr = fp.read(BUFFER_SIZE)
+            if not bfr:
+                break
+            gzip_file.write(bfr)
+    gzip_file.close()
+    return time.time() - start
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--size', type='int', default=500, help='metadata file size in MB')
+    parser.add_option('--workers', default='1,2,4,8',
+                      help='comma separated numbers of compression threads')
+    parser.add_option('--level', type='int', default=9, help='compression level')
+    options, args = parser.parse_args()
+
+    working_dir = tempfile.mkdtemp()
+    try:
+        source = os.path.join(working_dir, 'primary.xml')
+        write_metadata(source, options.size * 1024 * 1024)
+        with open(source, 'rb') as fp:
+            expected = digest(fp)
+        size = os.path.getsize(source) / 1024.0 / 1024.0
+        print 'metadata: %.1f MB' % size
+
+        path = os.path.join(working_dir, 'primary.xml.gz')
+        cases = [('GzipFile', lambda: gzip.GzipFile(path, 'wb', options.level))]
+        for workers in [int(w) for w in options.workers.split(',')]:
+            cases.append(('parallel %d' % workers,
+                          lambda w=workers: ParallelGzipFile(path, compresslevel=options.level,
+                                                             workers=w)))
+        for label, factory in cases:
+            elapsed = compress(source, factory())
+            fp = gzip.open(path)
+            try:
+                valid = digest(fp) == expected
+            finally:
+                fp.close()
+            print '%-12s %8.1f sec %8.1f MB/sec %8.1f MB compressed  valid=%s' % \
+                (label, elapsed, size / elapsed, os.path.getsize(path) / 1024.0 / 1024.0, valid)
+            os.unlink(path)
+    finally:
+        shutil.rmtree(working_dir)
+
+
+if __name__ == '__main__':
+    main()
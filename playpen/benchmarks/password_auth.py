@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Compare how many password authenticated requests per second a single process
+can verify with the original iterated HMAC loop, the current implementation of
+the same scheme, PBKDF2 and a remembered verification. No database is needed.
+
+    python password_auth.py --seconds 5
+"""
+
+import time
+from hmac import HMAC
+from optparse import OptionParser
+
+from pulp.server.compat import digestmod
+from pulp.server.managers.auth import password
+from pulp.server.managers.auth.password import PasswordManager
+
+
+PASSWORD = 'benchmark password'
+
+
+def original_pbkdf_sha256(plain_password, salt, iterations):
+    result = plain_password
+    for i in xrange(iterations):
+        result = HMAC(result, salt, digestmod).digest()
+    return result
+
+
+def original_check_password(saved_password_entry, plain_password):
+    salt, hashed_password = saved_password_entry.split(",")
+    derived = original_pbkdf_sha256(plain_password, salt.decode("base64"),
+                                    password.NUM_ITERATIONS)
+    return hashed_password.decode("base64") == derived
+
+
+def timed(label, check, seconds):
+    count = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        assert check()
+        count += 1
+    elapsed = time.time() - start
+    print '%-20s %10.1f requests/sec' % (label, count / elapsed)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--seconds', type='float', default=3.0, help='seconds spent on each case')
+    options, args = parser.parse_args()
+
+    manager = PasswordManager()
+    salt = manager.random_bytes(8)
+    legacy = salt.encode("base64").strip() + "," + \
+        original_pbkdf_sha256(PASSWORD, salt, password.NUM_ITERATIONS).encode("base64").strip()
+
+    timed('original hmac loop', lambda: original_check_password(legacy, PASSWORD),
+          options.seconds)
+    timed('inlined hmac loop', lambda: manager.check_password(legacy, PASSWORD), options.seconds)
+    if manager.needs_upgrade(legacy):
+        upgraded = manager.hash_password(PASSWORD)
+        timed('pbkdf2_hmac', lambda: manager.check_password(upgraded, PASSWORD), options.seconds)
+    else:
+        upgraded = legacy
+        print 'hashlib.pbkdf2_hmac is not available'
+    timed('remembered', lambda: manager.check_password(upgraded, PASSWORD, 'benchmark'),
+          options.seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Compare how many requests per second repo auth can map to their protected repo
+and CA bundles, the part of OidValidator.is_valid that runs before any
+certificate checks. The original code re-read the listing file and bundles and
+scanned every listing on each request; the current code uses the in-process
+caches and the protected repo index. Everything is written to a temporary
+directory.
+
+    python repoauth_validation.py --repos 5000 --seconds 5
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+from ConfigParser import SafeConfigParser
+from optparse import OptionParser
+
+from pulp.repoauth.oid_validation import OidValidator
+from pulp.repoauth.protected_repo_utils import ProtectedRepoListingFile
+from pulp.repoauth.repo_cert_utils import GLOBAL_BUNDLE_PREFIX
+
+
+PREFIX = '/pulp/repos'
+CA = '-----BEGIN CERTIFICATE-----\n%s\n-----END CERTIFICATE-----\n' % ('A' * 1200)
+
+
+def setup(working_dir, num_repos):
+    config = SafeConfigParser()
+    config.add_section('main')
+    config.add_section('repos')
+    config.set('main', 'repo_url_prefixes', PREFIX)
+    config.set('repos', 'protected_repo_listing_file', os.path.join(working_dir, 'listings'))
+    config.set('repos', 'cert_location', os.path.join(working_dir, 'repos'))
+    config.set('repos', 'global_cert_location', os.path.join(working_dir, 'global'))
+
+    listing_file = ProtectedRepoListingFile(config.get('repos', 'protected_repo_listing_file'))
+    for n in xrange(num_repos):
+        repo_id = 'repo-%d' % n
+        listing_file.add_protected_repo_path('content/product-%d/os/x86_64' % n, repo_id)
+        repo_dir = os.path.join(config.get('repos', 'cert_location'), repo_id)
+        os.makedirs(repo_dir)
+        write(os.path.join(repo_dir, 'consumer-%s.ca' % repo_id), CA)
+    listing_file.save()
+    global_dir = config.get('repos', 'global_cert_location')
+    os.makedirs(global_dir)
+    write(os.path.join(global_dir, '%s.ca' % GLOBAL_BUNDLE_PREFIX), CA)
+    return config
+
+
+def write(path, contents):
+    f = open(path, 'w')
+    f.write(contents)
+    f.close()
+
+
+def read(path):
+    if not os.path.exists(path):
+        return None
+    f = open(path)
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+
+def original(config, dest):
+    """
+    The lookups done by OidValidator.is_valid before the caches were added.
+    """
+    listing_file = ProtectedRepoListingFile(config.get('repos', 'protected_repo_listing_file'))
+    listing_file.load()
+    repo_url = dest[dest.find(PREFIX) + len(PREFIX):]
+    repo_bundle = None
+    for relative_repo_url, repo_id in listing_file.listings.items():
+        if repo_url.find(relative_repo_url) != -1:
+            repo_dir = os.path.join(config.get('repos', 'cert_location'), repo_id)
+            repo_bundle = read(os.path.join(repo_dir, 'consumer-%s.ca' % repo_id))
+            break
+    global_dir = config.get('repos', 'global_cert_location')
+    global_bundle = read(os.path.join(global_dir, '%s.ca' % GLOBAL_BUNDLE_PREFIX))
+    return repo_bundle, global_bundle
+
+
+def current(config, dest):
+    validator = OidValidator(config)
+    repo_bundle = validator._matching_repo_bundle(dest, validator.repo_url_prefixes)
+    global_bundle = validator.repo_cert_utils.read_global_cert_bundle(pieces=['ca'])
+    return repo_bundle['ca'], global_bundle['ca']
+
+
+def timed(label, function, config, requests, seconds):
+    count = 0
+    start = time.time()
+    while time.time() - start < seconds:
+        repo_bundle, global_bundle = function(config, requests[count % len(requests)])
+        assert repo_bundle is not None and global_bundle is not None
+        count += 1
+    elapsed = time.time() - start
+    print '%-10s %10.1f validations/sec' % (label, count / elapsed)
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--repos', type='int', default=5000, help='number of protected repos')
+    parser.add_option('--seconds', type='float', default=3.0, help='seconds spent on each case')
+    options, args = parser.parse_args()
+
+    working_dir = tempfile.mkdtemp()
+    try:
+        config = setup(working_dir, options.repos)
+        requests = ['%s/content/product-%d/os/x86_64/Packages/p-%d.rpm' %
+                    (PREFIX, random.randrange(options.repos), n) for n in xrange(1000)]
+        timed('original', original, config, requests, options.seconds)
+        timed('current', current, config, requests, options.seconds)
+    finally:
+        shutil.rmtree(working_dir)
+
+
+if __name__ == '__main__':
+    main()
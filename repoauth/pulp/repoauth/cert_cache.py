@@ -0,0 +1,255 @@
+'''
+In-process cache of parsed client entitlement certificates. Clients present
+the same certificate on every request, so the X.509 parse, the walk over the
+entitlement extensions and the CA verification are done once per certificate
+rather than once per request.
+
+Certificates are keyed by a SHA-256 fingerprint of the PEM sent by the client.
+'''
+
+import hashlib
+import posixpath
+import re
+from datetime import datetime
+from threading import Lock
+
+from M2Crypto import X509
+from rhsm import certificate
+
+# -- constants ----------------------------------------------------------------------
+
+DEFAULT_MAX_ENTRIES = 5000
+
+# Entitlement download URLs in v1 certificates: 1.3.6.1.4.1.2312.9.2.*.1.6
+DOWNLOAD_URL_OID_PREFIX = '2.'
+DOWNLOAD_URL_OID_SUFFIX = '.1.6'
+
+PEM_CERTIFICATE = re.compile(
+    '-----BEGIN CERTIFICATE-----.+?-----END CERTIFICATE-----', re.DOTALL)
+
+
+def fingerprint(pem):
+    '''
+    @return: hex SHA-256 digest of the PEM encoded certificate or CA bundle
+    @rtype:  str
+    '''
+    return hashlib.sha256(pem).hexdigest()
+
+
+def ca_validity(ca_pem):
+    '''
+    @param ca_pem: PEM encoded CA certificates
+    @type  ca_pem: str
+
+    @return: the (start, end) window in which every certificate of the CA
+             bundle is valid, or None if a certificate can't be parsed
+    @rtype:  tuple
+    '''
+    start = end = None
+    try:
+        for pem in PEM_CERTIFICATE.findall(ca_pem):
+            x509 = X509.load_cert_string(pem)
+            not_before = x509.get_not_before().get_datetime()
+            not_after = x509.get_not_after().get_datetime()
+            if start is None:
+                start, end = not_before, not_after
+            else:
+                start, end = max(start, not_before), min(end, not_after)
+    except Exception:
+        return None
+    if start is None:
+        return None
+    return start, end
+
+
+def _now():
+    return datetime.utcnow().replace(tzinfo=certificate.GMT())
+
+
+class CachedCertificate:
+    '''
+    A parsed client certificate along with what has been learned about it.
+    '''
+
+    def __init__(self, cert):
+        '''
+        @param cert: parsed certificate
+        @type  cert: rhsm.certificate2.Certificate
+        '''
+        self.cert = cert
+        self.start = getattr(cert, 'start', None)
+        self.end = getattr(cert, 'end', None)
+        # mapping of CA bundle fingerprint to (verification result, CA start, CA end)
+        self.verified = {}
+        self._match = self._compile_matcher(cert)
+
+    def is_current(self, now=None):
+        '''
+        Verification results are only reused within the certificate's validity
+        window, since verification also checks the dates.
+
+        @rtype: bool
+        '''
+        if self.start is None or self.end is None:
+            return False
+        if now is None:
+            now = _now()
+        return self.start <= now <= self.end
+
+    def get_verified(self, ca_fingerprint, now=None):
+        '''
+        Returns the remembered outcome of verifying the certificate against a
+        CA bundle. It is only reused while both the certificate and the CA
+        certificates are within their validity windows.
+
+        @param ca_fingerprint: fingerprint of the CA bundle
+        @type  ca_fingerprint: str
+
+        @return: the verification result, or None if it must be verified
+        @rtype:  bool
+        '''
+        entry = self.verified.get(ca_fingerprint)
+        if entry is None:
+            return None
+        if now is None:
+            now = _now()
+        result, ca_start, ca_end = entry
+        if not self.is_current(now) or not ca_start <= now <= ca_end:
+            return None
+        return result
+
+    def set_verified(self, ca_fingerprint, ca_pem, result):
+        '''
+        Remembers the outcome of verifying the certificate against a CA bundle
+        along with the validity window of the CA certificates. Nothing is
+        remembered if the CA certificates can't be parsed.
+
+        @param ca_fingerprint: fingerprint of the CA bundle
+        @type  ca_fingerprint: str
+        @param ca_pem: PEM encoded CA certificates
+        @type  ca_pem: str
+        @param result: the verification result
+        @type  result: bool
+        '''
+        window = ca_validity(ca_pem)
+        if window is None:
+            return
+        self.verified[ca_fingerprint] = (result, window[0], window[1])
+
+    def check_path(self, path):
+        '''
+        Checks the path against the entitled content paths.
+
+        @return: True iff the certificate entitles access to the path
+        @rtype:  bool
+
+        @raise AttributeError: if this is not an entitlement certificate
+        '''
+        if self._match is None:
+            raise AttributeError('check_path')
+        return self._match(path)
+
+    @staticmethod
+    def _compile_matcher(cert):
+        '''
+        Returns a callable that checks a path against the entitled paths. v3
+        certificates carry a path tree that the certificate builds once and
+        keeps; the download URLs of v1 certificates are compiled to regular
+        expressions here rather than on every check. Paths are normalized with
+        posixpath.normpath before they are matched, as rhsm does.
+        '''
+        check_path = getattr(cert, 'check_path', None)
+        if check_path is None:
+            return None
+        version = getattr(getattr(cert, 'version', None), 'major', None)
+        extensions = getattr(cert, 'extensions', None)
+        if version is None or version >= 3 or extensions is None:
+            return check_path
+
+        oid_prefix = certificate.OID(DOWNLOAD_URL_OID_PREFIX)
+        oid_suffix = certificate.OID(DOWNLOAD_URL_OID_SUFFIX)
+        patterns = []
+        for ext_oid, oid_url in extensions.items():
+            if ext_oid.match(oid_prefix) and ext_oid.match(oid_suffix):
+                # same expression as rhsm builds for each v1 path check
+                oid_url = oid_url.decode('utf-8')
+                patterns.append(re.compile(re.sub(r'\$[^/]+(/|$)', '[^/]+/', oid_url.strip('/'))))
+
+        def match(path):
+            # rhsm's EntitlementCertificate.check_path normalizes the path before
+            # the v1 check, squashing '//' and resolving '..', and so must this
+            path = posixpath.normpath(path).strip('/')
+            for pattern in patterns:
+                if pattern.match(path) is not None:
+                    return True
+            return False
+        return match
+
+
+class CertificateCache:
+    '''
+    Bounded cache of CachedCertificate by certificate fingerprint. Entries
+    move between a recent and an older generation; when the recent generation
+    is full the older one is discarded, which approximates least recently
+    used eviction at constant cost.
+    '''
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._recent = {}
+        self._older = {}
+        self._lock = Lock()
+
+    def get(self, cert_pem):
+        '''
+        Returns the cached certificate, parsing it if it is not cached.
+
+        @param cert_pem: PEM encoded client certificate
+        @type  cert_pem: str
+
+        @rtype: CachedCertificate
+
+        @raise Exception: whatever rhsm raises for a certificate it can't parse
+        '''
+        key = fingerprint(cert_pem)
+        self._lock.acquire()
+        try:
+            entry = self._recent.get(key)
+            if entry is None:
+                entry = self._older.pop(key, None)
+                if entry is not None:
+                    self._add(key, entry)
+        finally:
+            self._lock.release()
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        entry = CachedCertificate(certificate.create_from_pem(cert_pem))
+        self._lock.acquire()
+        try:
+            self._add(key, entry)
+        finally:
+            self._lock.release()
+        return entry
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._recent = {}
+            self._older = {}
+        finally:
+            self._lock.release()
+
+    def __len__(self):
+        return len(self._recent) + len(self._older)
+
+    def _add(self, key, entry):
+        # called with the lock held
+        if len(self._recent) >= max(self.max_entries / 2, 1):
+            self._older = self._recent
+            self._recent = {}
+        self._recent[key] = entry
@@ -0,0 +1,92 @@
+'''
+In-process cache of small files read on every request, such as the protected
+repo listings and the repo auth CA certificates. A cached copy is used for as
+long as the file's modification time, size and inode are unchanged, so each
+read costs a single stat() instead of an open() and read().
+'''
+
+import errno
+import os
+from threading import Lock
+
+# -- constants ----------------------------------------------------------------------
+
+DEFAULT_MAX_ENTRIES = 20000
+
+
+class FileCache:
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        '''
+        @param max_entries: number of files to remember; the cache is emptied
+                            when it grows past this
+        @type  max_entries: int
+        '''
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # mapping of filename to (stat signature, parsed contents)
+        self._lock = Lock()
+
+    def read(self, filename, parse=None):
+        '''
+        Returns the contents of the file, reading it only if it changed since
+        it was last read.
+
+        @param filename: absolute path to the file
+        @type  filename: str
+
+        @param parse: called with the file contents when the file is read; its
+                      result is cached and returned instead of the contents
+        @type  parse: callable
+
+        @return: file contents, or the result of parse; None if the file does not exist
+        '''
+        try:
+            st = os.stat(filename)
+        except OSError, e:
+            if e.errno != errno.ENOENT:
+                raise
+            self.invalidate(filename)
+            return None
+
+        signature = (st.st_mtime, st.st_size, st.st_ino)
+        entry = self._entries.get(filename)
+        if entry is not None and entry[0] == signature:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        f = open(filename, 'r')
+        try:
+            contents = f.read()
+        finally:
+            f.close()
+        if parse is not None:
+            contents = parse(contents)
+
+        self._lock.acquire()
+        try:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[filename] = (signature, contents)
+        finally:
+            self._lock.release()
+        return contents
+
+    def invalidate(self, filename):
+        '''
+        Forgets the cached copy of a file. Writers in this process call this so
+        a change is seen even if the file's stat signature did not change.
+        '''
+        self._lock.acquire()
+        try:
+            self._entries.pop(filename, None)
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._entries.clear()
+        finally:
+            self._lock.release()
@@ -15,8 +15,7 @@ The * represents the product ID and is not used as part of this calculation.
 
 from ConfigParser import NoOptionError, SafeConfigParser
 
-from rhsm import certificate
-
+from pulp.repoauth.cert_cache import CertificateCache, fingerprint
 from pulp.repoauth.protected_repo_utils import ProtectedRepoUtils
 from pulp.repoauth.repo_cert_utils import RepoCertUtils
 
@@ -24,6 +23,9 @@ from pulp.repoauth.repo_cert_utils import RepoCertUtils
 # separate config file for repo auth purposes is used.
 CONFIG_FILENAME = '/etc/pulp/repo_auth.conf'
 
+# Client certificates parsed in this process
+CERT_CACHE = CertificateCache()
+
 
 def authenticate(environ, config=None):
     '''
@@ -91,8 +93,7 @@ class OidValidator:
                     return False
 
                 # Make sure the client cert is signed by the correct CA
-                is_valid = self.repo_cert_utils.validate_certificate_pem(
-                    cert_pem, repo_bundle['ca'], log_func=log_func)
+                is_valid = self._validate_certificate(cert_pem, repo_bundle['ca'], log_func)
                 if not is_valid:
                     log_func('Client certificate did not match the repo consumer CA certificate')
                     return False
@@ -108,8 +109,7 @@ class OidValidator:
                     return False
 
                 # Make sure the client cert is signed by the correct CA
-                is_valid = self.repo_cert_utils.validate_certificate_pem(
-                    cert_pem, global_bundle['ca'], log_func=log_func)
+                is_valid = self._validate_certificate(cert_pem, global_bundle['ca'], log_func)
                 if not is_valid:
                     log_func('Client certificate did not match the global repo auth CA certificate')
                     return False
@@ -124,8 +124,8 @@ class OidValidator:
 
     def _matching_repo_bundle(self, dest, repo_url_prefixes):
 
-        # Load the path -> repo ID mappings
-        prot_repos = self.protected_repo_utils.read_protected_repo_listings()
+        # Load the index of protected relative path -> repo ID mappings
+        prot_repos = self.protected_repo_utils.read_protected_repo_index()
 
         repo_id = None
         for prefix in repo_url_prefixes:
@@ -134,16 +134,11 @@ class OidValidator:
             #   Repo Portion: /my-repo/pulp/fedora-13/i386/repodata/repomd.xml
             repo_url = dest[dest.find(prefix) + len(prefix):]
 
-            # If the repo portion of the URL starts with any of the protected relative URLs,
-            # it is considered to be a request against that protected repo
-            for relative_repo_url in prot_repos.keys():
-
-                # Relative URL is inconsistent in Pulp, so a simple "startswith" tends to
-                # break. Changing this to a find helps remove issues where the leading /
-                # is missing, present, or duplicated.
-                if repo_url.find(relative_repo_url) != -1:
-                    repo_id = prot_repos[relative_repo_url]
-                    break
+            # If the repo portion of the URL contains any of the protected relative URLs,
+            # it is considered to be a request against that protected repo. Relative URL
+            # is inconsistent in Pulp, so the index matches on path segments, which
+            # tolerates the leading / being missing, present, or duplicated.
+            repo_id = prot_repos.find_repo_id(repo_url)
 
             # break out of checking URLs once we find a matching repo id
             if repo_id:
@@ -155,6 +150,38 @@ class OidValidator:
         bundle = self.repo_cert_utils.read_consumer_cert_bundle(repo_id, ['ca'])
         return bundle
 
+    def _validate_certificate(self, cert_pem, ca_pem, log_func):
+        """
+        Checks the client certificate was signed by the CA. The outcome is
+        remembered with the cached certificate and reused while the certificate
+        and the CA certificates are within their validity windows.
+
+        :param cert_pem: client certificate as PEM
+        :type  cert_pem: str
+        :param ca_pem: CA certificates as PEM
+        :type  ca_pem: str
+        :param log_func: function used for logging
+        :type  log_func: callable taking 1 argument of type basestring
+        :return: true if the certificate was signed by the CA
+        :rtype:  bool
+        """
+        try:
+            cached = CERT_CACHE.get(cert_pem)
+        except Exception:
+            # leave reporting a certificate that can't be parsed to the verification
+            cached = None
+        if cached is None:
+            return self.repo_cert_utils.validate_certificate_pem(cert_pem, ca_pem,
+                                                                 log_func=log_func)
+
+        ca_fingerprint = fingerprint(ca_pem)
+        is_valid = cached.get_verified(ca_fingerprint)
+        if is_valid is None:
+            is_valid = self.repo_cert_utils.validate_certificate_pem(cert_pem, ca_pem,
+                                                                     log_func=log_func)
+            cached.set_verified(ca_fingerprint, ca_pem, is_valid)
+        return is_valid
+
     def _check_extensions(self, cert_pem, dest, log_func, repo_url_prefixes):
         """
         Checks the requested destination path against the entitlement cert.
@@ -170,7 +197,7 @@ class OidValidator:
         :return: True iff request is authorized, else False
         :rtype:  bool
         """
-        cert = certificate.create_from_pem(cert_pem)
+        cert = CERT_CACHE.get(cert_pem)
 
         valid = False
         for prefix in repo_url_prefixes:
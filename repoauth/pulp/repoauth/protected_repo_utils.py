@@ -4,12 +4,20 @@ repo information.
 '''
 
 import os
-from threading import RLock
+from threading import Lock, RLock
+
+from pulp.repoauth.file_cache import FileCache
 
 # -- constants ----------------------------------------------------------------------
 
 WRITE_LOCK = RLock()
 
+# Parsed listing files, shared by every ProtectedRepoUtils in the process
+LISTINGS_CACHE = FileCache()
+
+_INDEX_LOCK = Lock()
+_INDEX = [None, None]  # listings the index was built from, index
+
 
 class ProtectedRepoUtils:
     def __init__(self, config):
@@ -74,9 +82,46 @@ class ProtectedRepoUtils:
         @return: mapping of relative path URL to repo ID
         @rtype:  dict {str, str}
         '''
-        f = ProtectedRepoListingFile(self.config.get('repos', 'protected_repo_listing_file'))
-        f.load()
-        return f.listings
+        filename = self.config.get('repos', 'protected_repo_listing_file')
+        listings = LISTINGS_CACHE.read(filename, parse_listings)
+        if listings is None:
+            return {}
+        return listings
+
+    def read_protected_repo_index(self):
+        '''
+        Returns an index of the protected repo listings for finding the repo
+        that protects a request path. The index is rebuilt only when the
+        listings change.
+
+        @rtype: ProtectedRepoIndex
+        '''
+        listings = self.read_protected_repo_listings()
+        _INDEX_LOCK.acquire()
+        try:
+            if _INDEX[0] is not listings:
+                _INDEX[:] = [listings, ProtectedRepoIndex(listings)]
+            return _INDEX[1]
+        finally:
+            _INDEX_LOCK.release()
+
+
+def parse_listings(contents):
+    '''
+    Parses the contents of a protected repo listing file.
+
+    @param contents: lines of "relative path,repo ID"
+    @type  contents: str
+
+    @return: mapping of relative path URL to repo ID
+    @rtype:  dict {str, str}
+    '''
+    listings = {}
+    for line in contents.split('\n'):
+        pieces = line.split(',')
+        if len(pieces) == 2:
+            listings[pieces[0]] = pieces[1]
+    return listings
 
 
 # -- classes -------------------------------------------------------------------------
@@ -105,6 +150,7 @@ class ProtectedRepoListingFile:
         '''
         if os.path.exists(self.filename):
             os.unlink(self.filename)
+        LISTINGS_CACHE.invalidate(self.filename)
 
     def load(self, allow_missing=True):
         '''
@@ -124,10 +170,7 @@ class ProtectedRepoListingFile:
         f.close()
 
         # Parse into data structure
-        for line in contents.split('\n'):
-            pieces = line.split(',')
-            if len(pieces) == 2:
-                self.listings[pieces[0]] = pieces[1]
+        self.listings.update(parse_listings(contents))
 
     def save(self):
         '''
@@ -146,6 +189,7 @@ class ProtectedRepoListingFile:
             f.write('%s,%s\n' % (url, self.listings[url]))
 
         f.close()
+        LISTINGS_CACHE.invalidate(self.filename)
 
     # -- contents manipulation ------------------------------------------------------------
 
@@ -173,3 +217,59 @@ class ProtectedRepoListingFile:
         @type  relative_path_url: str
         '''
         self.listings.pop(relative_path_url, None)  # will not error if key isn't present
+
+
+class ProtectedRepoIndex:
+    '''
+    Index of protected relative paths by path segment, used to find the repo
+    protecting a request path without scanning every listing.
+
+    Relative paths are stored inconsistently (the leading / may be missing,
+    present or duplicated), so paths are compared segment by segment with empty
+    segments ignored. A listing matches when its segments appear, in order and
+    contiguously, anywhere in the request path; the longest match wins.
+    '''
+
+    def __init__(self, listings):
+        '''
+        @param listings: mapping of relative path URL to repo ID
+        @type  listings: dict {str, str}
+        '''
+        self.root = {}
+        for relative_path, repo_id in listings.items():
+            segments = _segments(relative_path)
+            if not segments:
+                continue
+            node = self.root
+            for segment in segments:
+                node = node.setdefault(segment, {})
+            node[None] = repo_id
+
+    def find_repo_id(self, path):
+        '''
+        Returns the ID of the repo whose relative path matches the most segments
+        of the given path.
+
+        @param path: request path with the repo URL prefix removed
+        @type  path: str
+
+        @return: repo ID; None if the path is not protected
+        @rtype:  str or None
+        '''
+        segments = _segments(path)
+        repo_id = None
+        longest = 0
+        for start in xrange(len(segments)):
+            node = self.root
+            for end in xrange(start, len(segments)):
+                node = node.get(segments[end])
+                if node is None:
+                    break
+                if None in node and end - start + 1 > longest:
+                    longest = end - start + 1
+                    repo_id = node[None]
+        return repo_id
+
+
+def _segments(path):
+    return [s for s in path.split('/') if s]
@@ -38,6 +38,7 @@ import os
 
 from M2Crypto import X509, BIO
 from pulp.common.util import encode_unicode
+from pulp.repoauth.file_cache import FileCache
 from pulp.server.common.openssl import Certificate
 
 
@@ -55,6 +56,10 @@ WRITE_LOCK = RLock()
 
 GLOBAL_BUNDLE_PREFIX = 'pulp-global-repo'
 
+# Contents of the bundle files read while validating requests, shared by every
+# RepoCertUtils in the process
+BUNDLE_CACHE = FileCache()
+
 
 class RepoCertUtils:
     def __init__(self, config):
@@ -123,10 +128,8 @@ class RepoCertUtils:
         for suffix in pieces:
             filename = os.path.join(cert_dir, '%s.%s' % (GLOBAL_BUNDLE_PREFIX, suffix))
 
-            if os.path.exists(filename):
-                f = open(filename, 'r')
-                contents = f.read()
-                f.close()
+            contents = BUNDLE_CACHE.read(filename)
+            if contents is not None:
                 result = result or {}
                 result[suffix] = contents
             elif self.log_failed_cert_verbose and log_func:
@@ -176,10 +179,8 @@ class RepoCertUtils:
         for suffix in pieces:
             filename = os.path.join(cert_dir, 'consumer-%s.%s' % (repo_id, suffix))
 
-            if os.path.exists(filename):
-                f = open(filename, 'r')
-                contents = f.read()
-                f.close()
+            contents = BUNDLE_CACHE.read(filename)
+            if contents is not None:
                 result = result or {}
                 result[suffix] = contents
 
@@ -488,6 +489,7 @@ class RepoCertUtils:
                         f.write(value)
                         f.close()
                         cert_files[key] = str(filename)
+                    BUNDLE_CACHE.invalidate(filename)
                 except:
                     LOG.exception('Error storing certificate file [%s]' % filename)
                     raise Exception('Error storing certificate file [%s]' % filename)
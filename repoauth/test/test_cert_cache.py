@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+import os
+import unittest
+
+from M2Crypto import X509
+import mock
+from rhsm.certificate import GMT, OID
+from rhsm.certificate2 import EntitlementCertificate
+
+from pulp.repoauth import cert_cache
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+
+class TestCachedCertificate(unittest.TestCase):
+
+    def _v1_cert(self):
+        # extension OIDs are relative to the Red Hat entitlement namespace
+        cert = EntitlementCertificate.__new__(EntitlementCertificate)
+        cert.version = mock.Mock(major=1)
+        cert.extensions = {
+            OID('2.1000.1.6'): 'content/dist/rhel/server/$version/$basearch/os',
+            OID('2.1001.1.6'): '/content/beta/rhel/server/6/x86_64/os/',
+            OID('2.1000.1.1'): 'content/dist/not/a/download/url',
+        }
+        return cert
+
+    def test_check_path_v1(self):
+        cached = cert_cache.CachedCertificate(self._v1_cert())
+
+        self.assertTrue(cached.check_path('/content/dist/rhel/server/6/x86_64/os/Packages/a.rpm'))
+        self.assertTrue(cached.check_path('content//beta/rhel/server/6/x86_64/os/repodata/'))
+        self.assertFalse(cached.check_path('/content/dist/rhel/server/6/x86_64/debug/'))
+        self.assertFalse(cached.check_path('/content/dist/not/a/download/url/'))
+
+    def test_check_path_v1_same_as_rhsm(self):
+        cert = self._v1_cert()
+        cached = cert_cache.CachedCertificate(cert)
+        paths = ['/content/dist/rhel/server/6/x86_64/os/a.rpm', '/content/dist/rhel/server/6/',
+                 '/content/beta/rhel/server/6/x86_64/os', '/other/',
+                 # paths are normalized before they are matched
+                 '/content//beta/rhel/server/6/x86_64/os/',
+                 '/content/dist/rhel/server/6/x86_64/os/../../debug/',
+                 '/content/dist/rhel/server/6/x86_64/debug/../os/']
+
+        for path in paths:
+            self.assertEqual(cached.check_path(path), cert.check_path(path))
+
+    def test_check_path_v3(self):
+        cert = mock.Mock(spec=['check_path', 'version', 'extensions'])
+        cert.version.major = 3
+        cached = cert_cache.CachedCertificate(cert)
+
+        result = cached.check_path('/content/dist/')
+
+        cert.check_path.assert_called_once_with('/content/dist/')
+        self.assertTrue(result is cert.check_path.return_value)
+
+    def test_check_path_not_entitlement(self):
+        cached = cert_cache.CachedCertificate(mock.Mock(spec=['version']))
+
+        self.assertRaises(AttributeError, cached.check_path, '/content/dist/')
+
+    def test_is_current(self):
+        now = datetime.utcnow().replace(tzinfo=GMT())
+        cert = mock.Mock(start=now - timedelta(days=1), end=now + timedelta(days=1))
+        cached = cert_cache.CachedCertificate(cert)
+
+        self.assertTrue(cached.is_current())
+        self.assertFalse(cached.is_current(now + timedelta(days=2)))
+        self.assertFalse(cached.is_current(now - timedelta(days=2)))
+
+    @mock.patch('pulp.repoauth.cert_cache.ca_validity')
+    def test_verified(self, mock_ca_validity):
+        now = datetime.utcnow().replace(tzinfo=GMT())
+        cert = mock.Mock(start=now - timedelta(days=10), end=now + timedelta(days=10))
+        cached = cert_cache.CachedCertificate(cert)
+        mock_ca_validity.return_value = (now - timedelta(days=5), now + timedelta(days=1))
+
+        self.assertTrue(cached.get_verified('ca-1') is None)
+        cached.set_verified('ca-1', 'ca-pem', True)
+
+        mock_ca_validity.assert_called_once_with('ca-pem')
+        self.assertEqual(cached.get_verified('ca-1', now), True)
+        self.assertTrue(cached.get_verified('ca-2', now) is None)
+        # not reused once the CA has expired, or outside the certificate's validity window
+        self.assertTrue(cached.get_verified('ca-1', now + timedelta(days=2)) is None)
+        self.assertTrue(cached.get_verified('ca-1', now - timedelta(days=6)) is None)
+        self.assertTrue(cached.get_verified('ca-1', now + timedelta(days=11)) is None)
+
+    @mock.patch('pulp.repoauth.cert_cache.ca_validity', return_value=None)
+    def test_verified_ca_not_parsed(self, mock_ca_validity):
+        cached = cert_cache.CachedCertificate(mock.Mock())
+
+        cached.set_verified('ca-1', 'ca-pem', True)
+
+        self.assertEqual(cached.verified, {})
+
+
+class TestCaValidity(unittest.TestCase):
+
+    def test_bundle(self):
+        with open(os.path.join(DATA_DIR, 'valid_ca.crt')) as f:
+            ca_pem = f.read()
+        x509 = X509.load_cert_string(ca_pem)
+
+        window = cert_cache.ca_validity(ca_pem + ca_pem)
+
+        self.assertEqual(window, (x509.get_not_before().get_datetime(),
+                                  x509.get_not_after().get_datetime()))
+
+    def test_not_parsed(self):
+        self.assertTrue(cert_cache.ca_validity('') is None)
+        self.assertTrue(cert_cache.ca_validity(
+            '-----BEGIN CERTIFICATE-----\nfoo\n-----END CERTIFICATE-----') is None)
+
+
+@mock.patch('rhsm.certificate.create_from_pem')
+class TestCertificateCache(unittest.TestCase):
+
+    def test_get(self, mock_create):
+        cache = cert_cache.CertificateCache()
+
+        first = cache.get('pem-1')
+        second = cache.get('pem-1')
+        other = cache.get('pem-2')
+
+        self.assertTrue(first is second)
+        self.assertFalse(first is other)
+        self.assertEqual(mock_create.call_count, 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_evict(self, mock_create):
+        cache = cert_cache.CertificateCache(max_entries=4)
+        for n in range(4):
+            cache.get('pem-%d' % n)
+        # keep pem-0 recently used
+        cache.get('pem-0')
+
+        cache.get('pem-4')
+        cache.get('pem-5')
+
+        self.assertTrue(len(cache) <= 4)
+        mock_create.reset_mock()
+        cache.get('pem-0')
+        self.assertEqual(mock_create.call_count, 0)
+        cache.get('pem-1')
+        self.assertEqual(mock_create.call_count, 1)
+
+    def test_parse_error(self, mock_create):
+        mock_create.side_effect = ValueError()
+        cache = cert_cache.CertificateCache()
+
+        self.assertRaises(ValueError, cache.get, 'pem-1')
+        self.assertEqual(len(cache), 0)
+
+    def test_clear(self, mock_create):
+        cache = cert_cache.CertificateCache()
+        cache.get('pem-1')
+
+        cache.clear()
+        cache.get('pem-1')
+
+        self.assertEqual(mock_create.call_count, 2)
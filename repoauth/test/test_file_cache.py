@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pulp.repoauth.file_cache import FileCache
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.working_dir, 'ca.crt')
+        self.cache = FileCache()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def _write(self, contents):
+        f = open(self.filename, 'w')
+        f.write(contents)
+        f.close()
+
+    def test_read_missing(self):
+        self.assertEqual(self.cache.read(self.filename), None)
+
+    def test_read_cached(self):
+        self._write('abc')
+
+        self.assertEqual(self.cache.read(self.filename), 'abc')
+        self.assertEqual(self.cache.read(self.filename), 'abc')
+
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_read_changed(self):
+        self._write('abc')
+        self.cache.read(self.filename)
+
+        self._write('abcdef')
+
+        self.assertEqual(self.cache.read(self.filename), 'abcdef')
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_read_deleted(self):
+        self._write('abc')
+        self.cache.read(self.filename)
+
+        os.remove(self.filename)
+
+        self.assertEqual(self.cache.read(self.filename), None)
+
+    def test_parse(self):
+        self._write('abc')
+
+        parsed = self.cache.read(self.filename, parse=list)
+
+        self.assertEqual(parsed, ['a', 'b', 'c'])
+        self.assertTrue(self.cache.read(self.filename, parse=list) is parsed)
+
+    def test_invalidate(self):
+        self._write('abc')
+        self.cache.read(self.filename)
+
+        self.cache.invalidate(self.filename)
+        self.cache.read(self.filename)
+
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_max_entries(self):
+        self.cache = FileCache(max_entries=1)
+        other = os.path.join(self.working_dir, 'other.crt')
+        self._write('abc')
+        shutil.copy(self.filename, other)
+
+        self.cache.read(self.filename)
+        self.cache.read(other)
+        self.cache.read(self.filename)
+
+        self.assertEqual(self.cache.misses, 3)
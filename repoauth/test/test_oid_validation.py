@@ -8,6 +8,7 @@
 #
 
 from ConfigParser import SafeConfigParser, NoOptionError
+from datetime import datetime, timedelta
 import shutil
 import os
 import unittest
@@ -15,7 +16,9 @@ import urlparse
 
 from M2Crypto import X509
 import mock
+from rhsm.certificate import GMT
 
+from pulp.repoauth.cert_cache import CachedCertificate
 import pulp.repoauth.oid_validation as oid_validation
 from pulp.repoauth.repo_cert_utils import RepoCertUtils
 
@@ -51,6 +54,7 @@ class TestOidValidation(unittest.TestCase):
     def setUp(self):
         self.config = SafeConfigParser()
         self.config.read(CONFIG_FILENAME)
+        oid_validation.CERT_CACHE.clear()
 
     def print_debug(self):
         valid_ca = X509.load_cert_string(VALID_CA)
@@ -144,6 +148,50 @@ class TestOidValidation(unittest.TestCase):
         # _check_extensions shouldn't have been called
         self.assertEqual(_check_extensions.call_count, 0)
 
+    @mock.patch('pulp.repoauth.oid_validation.OidValidator._check_extensions',
+                return_value=True)
+    @mock.patch('pulp.repoauth.oid_validation.RepoCertUtils.validate_certificate_pem',
+                return_value=True)
+    @mock.patch(
+        'pulp.repoauth.protected_repo_utils.ProtectedRepoUtils.read_protected_repo_listings')
+    @mock.patch('pulp.repoauth.repo_cert_utils.RepoCertUtils.read_consumer_cert_bundle')
+    @mock.patch('pulp.repoauth.oid_validation.CERT_CACHE')
+    @mock.patch('pulp.repoauth.cert_cache.ca_validity')
+    @mock.patch('pulp.repoauth.cert_cache._now')
+    def test_is_valid_verification_cached(self, mock_now, mock_ca_validity, mock_cache,
+                                          mock_read_bundle, mock_read_listings,
+                                          validate_certificate_pem, _check_extensions):
+        """
+        Test the CA verification is done once per client certificate.
+        """
+        self.config.set('main', 'verify_ssl', 'true')
+        now = datetime.utcnow().replace(tzinfo=GMT())
+        mock_now.return_value = now
+        cert = mock.Mock(start=now - timedelta(days=1), end=now + timedelta(days=10))
+        mock_cache.get.return_value = CachedCertificate(cert)
+        mock_ca_validity.return_value = (now - timedelta(days=1), now + timedelta(days=1))
+        mock_read_listings.return_value = {'/pulp/pulp/fedora-14/x86_64': 'repo-x'}
+        mock_read_bundle.return_value = {'ca': VALID_CA, 'key': ANYKEY, 'cert': ANYCERT, }
+        request_x = mock_environ(FULL_CLIENT_CERT,
+                                 'https://localhost/pulp/repos/repos/pulp/pulp/fedora-14/x86_64/')
+
+        self.assertTrue(oid_validation.authenticate(request_x, config=self.config))
+        self.assertTrue(oid_validation.authenticate(request_x, config=self.config))
+
+        self.assertEqual(validate_certificate_pem.call_count, 1)
+        self.assertEqual(_check_extensions.call_count, 2)
+
+        # not reused once the CA has expired
+        mock_now.return_value = now + timedelta(days=2)
+        self.assertTrue(oid_validation.authenticate(request_x, config=self.config))
+        self.assertEqual(validate_certificate_pem.call_count, 2)
+
+        # nor outside the certificate's validity window
+        mock_now.return_value = now
+        mock_cache.get.return_value.end = now - timedelta(days=1)
+        self.assertTrue(oid_validation.authenticate(request_x, config=self.config))
+        self.assertEqual(validate_certificate_pem.call_count, 3)
+
     def test_basic_validate(self):
         repo_cert_utils = RepoCertUtils(config=self.config)
 
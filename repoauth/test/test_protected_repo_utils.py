@@ -5,7 +5,8 @@ import os
 import shutil
 import unittest
 
-from pulp.repoauth.protected_repo_utils import ProtectedRepoListingFile, ProtectedRepoUtils
+from pulp.repoauth.protected_repo_utils import (
+    ProtectedRepoIndex, ProtectedRepoListingFile, ProtectedRepoUtils)
 
 
 # -- constants -----------------------------------------------------------------------
@@ -16,17 +17,22 @@ DATA_DIR = os.path.abspath(os.path.dirname(__file__)) + '/data'
 CONFIG = SafeConfigParser()
 CONFIG.read([os.path.join(DATA_DIR, 'test-override-pulp.conf'),
              os.path.join(DATA_DIR, 'test-override-repoauth.conf')])
+LISTING_FILE = CONFIG.get('repos', 'protected_repo_listing_file')
 
 
 class TestProtectedRepoUtils(unittest.TestCase):
     def setUp(self):
         if os.path.exists(TEST_FILE):
             os.remove(TEST_FILE)
+        if os.path.exists(LISTING_FILE):
+            os.remove(LISTING_FILE)
         self.utils = ProtectedRepoUtils(CONFIG)
 
     def tearDown(self):
         if os.path.exists(TEST_FILE):
             os.remove(TEST_FILE)
+        if os.path.exists(LISTING_FILE):
+            os.remove(LISTING_FILE)
         global_cert_location = CONFIG.get('repos', 'global_cert_location')
         if os.path.exists(global_cert_location):
             shutil.rmtree(global_cert_location)
@@ -68,6 +74,40 @@ class TestProtectedRepoUtils(unittest.TestCase):
 
         self.assertEqual(0, len(listings))
 
+    def test_read_listings_cached(self):
+        """
+        Tests the listing file is only parsed again after it changes.
+        """
+        self.utils.add_protected_repo('path-1', 'repo-1')
+        first = self.utils.read_protected_repo_listings()
+        second = self.utils.read_protected_repo_listings()
+        self.assertTrue(first is second)
+
+        self.utils.add_protected_repo('path-2', 'repo-2')
+        third = self.utils.read_protected_repo_listings()
+        self.assertEqual(third, {'path-1': 'repo-1', 'path-2': 'repo-2'})
+
+    def test_read_listings_changed_by_other_process(self):
+        self.utils.add_protected_repo('path-1', 'repo-1')
+        self.utils.read_protected_repo_listings()
+
+        f = open(LISTING_FILE, 'a')
+        f.write('path-22,repo-22\n')
+        f.close()
+
+        self.assertEqual(self.utils.read_protected_repo_listings(),
+                         {'path-1': 'repo-1', 'path-22': 'repo-22'})
+
+    def test_read_protected_repo_index(self):
+        self.utils.add_protected_repo('path-1', 'repo-1')
+        index = self.utils.read_protected_repo_index()
+        self.assertTrue(index is self.utils.read_protected_repo_index())
+        self.assertEqual(index.find_repo_id('/path-1/repodata/repomd.xml'), 'repo-1')
+
+        self.utils.delete_protected_repo('path-1')
+        index = self.utils.read_protected_repo_index()
+        self.assertEqual(index.find_repo_id('/path-1/repodata/repomd.xml'), None)
+
 
 class TestProtectedRepoListingFile(unittest.TestCase):
     def setUp(self):
@@ -166,3 +206,26 @@ class TestProtectedRepoListingFile(unittest.TestCase):
 
         # Verify
         self.assertEqual(1, len(f.listings))
+
+
+class TestProtectedRepoIndex(unittest.TestCase):
+
+    def test_find_repo_id(self):
+        index = ProtectedRepoIndex({'/pulp/fedora-14/x86_64': 'repo-x',
+                                    'pulp/fedora-14': 'repo-y',
+                                    'zoo/': 'repo-z'})
+
+        self.assertEqual(index.find_repo_id('/pulp/fedora-14/x86_64/Packages/a.rpm'), 'repo-x')
+        self.assertEqual(index.find_repo_id('//pulp/fedora-14//x86_64/'), 'repo-x')
+        self.assertEqual(index.find_repo_id('/pulp/fedora-14/i386/'), 'repo-y')
+        self.assertEqual(index.find_repo_id('zoo/repodata/repomd.xml'), 'repo-z')
+        # listings may appear after other leading segments
+        self.assertEqual(index.find_repo_id('/repos/pulp/fedora-14/x86_64/'), 'repo-x')
+
+    def test_no_match(self):
+        index = ProtectedRepoIndex({'/pulp/fedora-14': 'repo-x', '': 'repo-empty'})
+
+        self.assertEqual(index.find_repo_id('/pulp/fedora-15/'), None)
+        # only whole path segments match
+        self.assertEqual(index.find_repo_id('/pulp/fedora-14-updates/'), None)
+        self.assertEqual(index.find_repo_id('/'), None)
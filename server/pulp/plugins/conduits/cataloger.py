@@ -18,16 +18,19 @@ class CatalogerConduit(object):
     Provides access to pulp platform API.
     """
 
-    def __init__(self, source_id, expires):
+    def __init__(self, source_id, expires, generation=None):
         """
         :param source_id: The content source ID.
         :type source_id: str
         :param expires: The content expiration in seconds.
         :type expires: int
+        :param generation: The (optional) refresh generation used to tag added entries.
+        :type generation: str
         :return:
         """
         self.source_id = source_id
         self.expires = expires
+        self.generation = generation
         self.added_count = 0
         self.deleted_count = 0
 
@@ -42,9 +45,22 @@ class CatalogerConduit(object):
         :type url: str
         """
         manager = managers.content_catalog_manager()
-        manager.add_entry(self.source_id, self.expires, type_id, unit_key, url)
+        manager.add_entry(self.source_id, self.expires, type_id, unit_key, url, self.generation)
         self.added_count += 1
 
+    def add_entries(self, entries):
+        """
+        Add many entries to the content catalog.
+        This is the bulk equivalent of add_entry() and should be preferred when
+        cataloging a large number of units.  The entries may be a generator and
+        are written to the catalog in batches as they are consumed.
+        :param entries: An iterable of: (type_id, unit_key, url).
+        :type entries: iterable
+        """
+        manager = managers.content_catalog_manager()
+        added = manager.add_entries(self.source_id, self.expires, entries, self.generation)
+        self.added_count += added
+
     def delete_entry(self, type_id, unit_key):
         """
         Delete an entry from the content catalog.
@@ -57,6 +73,16 @@ class CatalogerConduit(object):
         manager.delete_entry(self.source_id, type_id, unit_key)
         self.deleted_count += 1
 
+    def purge_stale(self):
+        """
+        Purge entries contributed by the content source that were not added
+        as part of this conduit's refresh generation.
+        :return: The number of entries purged.
+        :rtype: int
+        """
+        manager = managers.content_catalog_manager()
+        return manager.purge_stale(self.source_id, self.generation)
+
     def reset(self):
         """
         Reset statistics.
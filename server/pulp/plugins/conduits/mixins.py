@@ -12,6 +12,7 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 from gettext import gettext as _
+import copy
 import logging
 import sys
 
@@ -20,6 +21,7 @@ from pymongo.errors import DuplicateKeyError
 import pulp.plugins.conduits._common as common_utils
 from pulp.plugins.model import Unit, PublishReport
 from pulp.plugins.types import database as types_db
+from pulp.plugins.util.misc import paginate
 from pulp.server.async.tasks import get_current_task_id
 from pulp.server.db.model.dispatch import TaskStatus
 from pulp.server.exceptions import MissingResource
@@ -33,6 +35,9 @@ from pulp.server.db.model.criteria import UnitAssociationCriteria, Criteria
 
 logger = logging.getLogger(__name__)
 
+# Number of units written with a single set of database calls by save_units
+SAVE_UNITS_PAGE_SIZE = 1000
+
 # -- exceptions ---------------------------------------------------------------
 
 class ImporterConduitException(Exception):
@@ -516,6 +521,93 @@ class AddUnitMixin(object):
             logger.exception(_('Content unit association failed [%s]' % str(unit)))
             raise ImporterConduitException(e), None, sys.exc_info()[2]
 
+    def save_units(self, units):
+        """
+        Bulk equivalent of save_unit, intended for importers saving a large number
+        of units.
+
+        The units are consumed a page at a time. For each page, existing units are
+        looked up by unit key with a single query, new units are inserted with a
+        single database call and the units are associated with the repository in
+        bulk. Since units are written as the iterable is consumed, a generator may
+        be passed in to avoid holding every unit in memory.
+
+        When this call returns, every unit's id field is populated and the added
+        and updated unit counters reflect the saved units.
+
+        :param units: unit objects returned from the init_unit call
+        :type  units: iterable of Unit
+
+        :return: object references to the provided units, their state updated from the call
+        :rtype:  list of Unit
+        """
+        saved_units = []
+        try:
+            for page in paginate(units, SAVE_UNITS_PAGE_SIZE):
+                units_by_type = {}
+                for unit in page:
+                    units_by_type.setdefault(unit.type_id, []).append(unit)
+                for type_id, type_units in units_by_type.items():
+                    self._save_units_of_type(type_id, type_units)
+                saved_units.extend(page)
+            return saved_units
+        except Exception, e:
+            logger.exception(_('Content unit bulk save failed'))
+            raise ImporterConduitException(e), None, sys.exc_info()[2]
+
+    def _save_units_of_type(self, type_id, units):
+        """
+        Create or update the given units, all of the same type, and associate them
+        with the repository.
+
+        :param type_id: type of every unit in the list
+        :type  type_id: str
+        :param units:   units to save
+        :type  units:   list of pulp.plugins.model.Unit
+        """
+        content_query_manager = manager_factory.content_query_manager()
+        content_manager = manager_factory.content_manager()
+        association_manager = manager_factory.repo_unit_association_manager()
+
+        key_fields = sorted(units[0].unit_key)
+        existing_units = content_query_manager.get_multiple_units_by_keys_dicts(
+            type_id, [unit.unit_key for unit in units], model_fields=['_id'] + key_fields)
+        existing_ids = dict((tuple(u.get(f) for f in key_fields), u['_id'])
+                            for u in existing_units)
+
+        new_units = []
+        new_keys = set()
+        repeated_units = []
+        for unit in units:
+            key = tuple(unit.unit_key.get(f) for f in key_fields)
+            pulp_unit = common_utils.to_pulp_unit(unit)
+            if key in existing_ids:
+                unit.id = existing_ids[key]
+                content_manager.update_content_unit(type_id, unit.id, pulp_unit)
+                self._updated_count += 1
+            elif key in new_keys:
+                # saved once the first occurrence of the unit has been added
+                repeated_units.append((unit, pulp_unit))
+            else:
+                new_keys.add(key)
+                new_units.append((unit, pulp_unit))
+
+        unit_ids = content_manager.add_content_units(type_id, [p for u, p in new_units])
+        for (unit, pulp_unit), unit_id in zip(new_units, unit_ids):
+            if unit_id is None:
+                # another workflow added the unit since it was looked up
+                unit.id = self._update_unit(unit, pulp_unit)
+            else:
+                unit.id = unit_id
+                self._added_count += 1
+
+        for unit, pulp_unit in repeated_units:
+            unit.id = self._update_unit(unit, pulp_unit)
+
+        association_manager.associate_all_by_ids(self.repo_id, type_id, [u.id for u in units],
+                                                 self.association_owner_type,
+                                                 self.association_owner_id)
+
     def _update_unit(self, unit, pulp_unit):
         """
         Update a unit. If it is not found, add it.
@@ -622,9 +714,23 @@ class StatusMixin(object):
             # not running within a task
             return
 
+        # Callers frequently report the same status many times over; only write changes
+        if self.report_id in self.progress_report and \
+                self.progress_report[self.report_id] == status:
+            return
+
         try:
-            self.progress_report[self.report_id] = status
-            TaskStatus.objects(task_id=self.task_id).update_one(set__progress_report=self.progress_report)
+            # Keep a copy so that callers mutating the status in place are still
+            # detected as changes on their next call
+            self.progress_report[self.report_id] = copy.deepcopy(status)
+            if self._report_id_is_field_name():
+                # Only this conduit's sub-report is replaced; reports written to the same
+                # task by other conduits are left alone
+                update = {'set__progress_report__%s' % self.report_id: status}
+            else:
+                # The report id cannot be used in a field path, so the whole report is written
+                update = {'set__progress_report': self.progress_report}
+            TaskStatus.objects(task_id=self.task_id).update_one(**update)
         except Exception, e:
             logger.exception('Exception from server setting progress for report [%s]' % self.report_id)
             try:
@@ -635,6 +741,19 @@ class StatusMixin(object):
                 pass
             raise self.exception_class(e), None, sys.exc_info()[2]
 
+    def _report_id_is_field_name(self):
+        """
+        Determine if the report id can be used as a single field name in an update path. Dots
+        would nest the report in sub-documents, double underscores are field separators in
+        mongoengine update keywords and leading dollar signs denote operators.
+
+        :return: True if the report id can be used in an update path
+        :rtype:  bool
+        """
+        report_id = self.report_id
+        return bool(report_id) and '.' not in report_id and '__' not in report_id and \
+            not report_id.startswith('$')
+
 
 class PublishReportMixin(object):
 
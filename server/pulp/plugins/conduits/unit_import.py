@@ -110,6 +110,36 @@ class ImportUnitConduit(ImporterScratchPadMixin, RepoScratchPadMixin,
             _LOG.exception(_('Content unit association failed [%s]' % str(unit)))
             raise ImporterConduitException(e), None, sys.exc_info()[2]
 
+    def associate_units(self, units):
+        """
+        Associates the given units with the destination repository for the import.
+
+        This is the bulk equivalent of associate_unit and should be preferred when
+        importing many units; the associations are created in batches rather than
+        with several database calls per unit. This call is idempotent.
+
+        :param units: unit objects returned from the init_unit or get_source_units calls
+        :type  units: list of pulp.plugins.model.Unit
+
+        :return: object references to the provided units
+        :rtype:  list of pulp.plugins.model.Unit
+        """
+
+        unit_ids_by_type = {}
+        for unit in units:
+            unit_ids_by_type.setdefault(unit.type_id, []).append(unit.id)
+
+        try:
+            for unit_type_id, unit_ids in unit_ids_by_type.items():
+                self.__association_manager.associate_all_by_ids(self.dest_repo_id, unit_type_id,
+                                                                unit_ids,
+                                                                self.association_owner_type,
+                                                                self.association_owner_id)
+            return units
+        except Exception, e:
+            _LOG.exception(_('Content unit association failed'))
+            raise ImporterConduitException(e), None, sys.exc_info()[2]
+
     def get_source_units(self, criteria=None):
         """
         Returns the collection of content units associated with the source
@@ -196,7 +196,9 @@ class Importer(object):
 
         The APIs for both approaches are similar to those in the sync conduit.
         In the case of a simple association, the init_unit step can be skipped
-        and save_unit simply called on each specified unit.
+        and save_unit simply called on each specified unit. When associating
+        many units, the conduit's associate_units call creates the associations
+        in bulk and is considerably faster than associating them one at a time.
 
         The units argument is optional. If None, all units in the source
         repository should be imported. The conduit is used to query for those
@@ -4,7 +4,10 @@ This module covers both the ContentType collection itself as well as any
 type-specific collections that exist to suit the type needs.
 """
 
+import copy
 import logging
+import threading
+import time
 
 from pymongo import ASCENDING
 
@@ -14,6 +17,10 @@ import pulp.server.db.connection as pulp_db
 
 TYPE_COLLECTION_PREFIX = 'units_'
 
+# The minimum number of seconds between reloads of the type definitions caused by lookups of
+# unknown types
+MISS_RELOAD_INTERVAL = 10
+
 _logger = logging.getLogger(__name__)
 
 
@@ -48,6 +55,138 @@ class MissingDefinitions(Exception):
         return 'MissingDefinitions [%s]' % ', '.join(self.missing_type_ids)
 
 
+class TypeDefinitionCache(object):
+    """
+    Holds the content type definitions for this process, along with the flattened unit key
+    fields of each type and the handles of the type collections. Type definitions only change
+    when plugins are installed, which updates the database through update_database() and is
+    followed by a restart of the server processes. The definitions are therefore loaded once,
+    and reloaded only when the cache is cleared or a type that is not known is looked up. An
+    unknown type causes a reload at most once every MISS_RELOAD_INTERVAL seconds, so repeated
+    lookups of a type that does not exist do not each load all of the definitions.
+
+    A lookup is a hit when the type is found in the loaded definitions and a miss when the
+    definitions have to be loaded.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self._loaded_at = None
+        self._definitions = None
+        self._type_ids = []
+        self._unit_key_fields = {}
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Load the type definitions from the database, replacing those held.
+        """
+        definitions = {}
+        type_ids = []
+        unit_key_fields = {}
+        for type_def in ContentType.get_collection().find():
+            type_id = type_def['id']
+            definitions[type_id] = type_def
+            type_ids.append(type_id)
+            fields = []
+            _flatten_keys(fields, type_def.get('unit_key'))
+            unit_key_fields[type_id] = tuple(fields)
+        self._lock.acquire()
+        try:
+            self._unit_key_fields = unit_key_fields
+            self._type_ids = type_ids
+            self._definitions = definitions
+            self._loaded_at = time.time()
+            self.loads += 1
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        """
+        Drop the type definitions and collection handles held. They are loaded on the next lookup.
+        """
+        self._lock.acquire()
+        try:
+            self._definitions = None
+            self._loaded_at = None
+            self._type_ids = []
+            self._unit_key_fields = {}
+            self._collections = {}
+        finally:
+            self._lock.release()
+
+    def definitions(self):
+        """
+        :return: type definitions keyed by type ID, loaded if not held
+        :rtype:  dict
+        """
+        definitions = self._definitions
+        if definitions is None:
+            self.misses += 1
+            self.load()
+            definitions = self._definitions
+        return definitions
+
+    def type_ids(self):
+        """
+        :return: IDs of all types, in the order they are stored in the database
+        :rtype:  list of str
+        """
+        self.definitions()
+        return list(self._type_ids)
+
+    def definition(self, type_id):
+        """
+        :param type_id: unique type ID
+        :type  type_id: str
+        :return: the type definition, None if not found. It must not be modified.
+        :rtype:  dict or None
+        """
+        definitions, loaded_at = self._definitions, self._loaded_at
+        if definitions is not None and type_id in definitions:
+            self.hits += 1
+            return definitions[type_id]
+        self.misses += 1
+        if loaded_at is not None and time.time() - loaded_at < MISS_RELOAD_INTERVAL:
+            # not found in definitions loaded moments ago
+            return None
+        # the type may have been added since the definitions were loaded
+        self.load()
+        return self._definitions.get(type_id)
+
+    def unit_key_fields(self, type_id):
+        """
+        :param type_id: unique type ID
+        :type  type_id: str
+        :return: the fields of the type's unit key with any nesting flattened out, None if the
+                 type is not found
+        :rtype:  tuple of str or None
+        """
+        if self.definition(type_id) is None:
+            return None
+        return self._unit_key_fields[type_id]
+
+    def collection(self, type_id):
+        """
+        :param type_id: unique type ID
+        :type  type_id: str
+        :return: the collection holding units of the given type, reused while the database
+                 connection is the same
+        :rtype:  pymongo.collection.Collection
+        """
+        collection = self._collections.get(type_id)
+        if collection is None or collection.database is not pulp_db.get_database():
+            collection = pulp_db.get_collection(unit_collection_name(type_id), create=False)
+            self._collections[type_id] = collection
+        return collection
+
+
+cache = TypeDefinitionCache()
+
+
 def update_database(definitions, error_on_missing_definitions=False):
     """
     Brings the database up to date with the types defined in the given
@@ -114,6 +253,9 @@ def update_database(definitions, error_on_missing_definitions=False):
             error_defs.append(type_def)
             continue
 
+    # the definitions held by this process are loaded again on the next lookup
+    cache.clear()
+
     if len(error_defs) > 0:
         raise UpdateFailed(error_defs)
 
@@ -139,6 +281,7 @@ def clean():
     # Purge the types collection of all entries
     type_collection = ContentType.get_collection()
     type_collection.remove(safe=True)
+    cache.clear()
 
 
 def type_units_collection(type_id):
@@ -151,9 +294,7 @@ def type_units_collection(type_id):
     @return: database collection holding units of the given type
     @rtype:  L{pymongo.collection.Collection}
     """
-    collection_name = unit_collection_name(type_id)
-    collection = pulp_db.get_collection(collection_name, create=False)
-    return collection
+    return cache.collection(type_id)
 
 
 def all_type_ids():
@@ -163,11 +304,7 @@ def all_type_ids():
     @rtype:  list of str
     """
 
-    collection = ContentType.get_collection()
-    type_id_son = list(collection.find(fields={'id': 1}))
-    type_ids = [t['id'] for t in type_id_son]
-
-    return type_ids
+    return cache.type_ids()
 
 
 def all_type_collection_names():
@@ -192,9 +329,8 @@ def all_type_definitions():
     @rtype:  list of dict
     """
 
-    coll = ContentType.get_collection()
-    types = list(coll.find())
-    return types
+    definitions = cache.definitions()
+    return [copy.deepcopy(definitions[type_id]) for type_id in cache.type_ids()]
 
 
 def type_definition(type_id):
@@ -205,9 +341,7 @@ def type_definition(type_id):
     @return: corresponding type definition, None if not found
     @rtype: SON or None
     """
-    collection = ContentType.get_collection()
-    type_ = collection.find_one({'id': type_id})
-    return type_
+    return copy.deepcopy(cache.definition(type_id))
 
 
 def unit_collection_name(type_id):
@@ -234,11 +368,25 @@ def type_units_unit_key(type_id):
              content type collection
     @rtype: list of str or None
     """
-    collection = ContentType.get_collection()
-    type_def = collection.find_one({'id': type_id})
+    type_def = cache.definition(type_id)
     if type_def is None:
         return None
-    return type_def['unit_key']
+    return copy.deepcopy(type_def['unit_key'])
+
+
+def type_units_unit_key_fields(type_id):
+    """
+    Get the fields of the unit key for a given content type, with any nesting
+    of the unit key flattened out. If no type definition is found for the
+    given ID, None is returned
+
+    @param type_id: unique content type identifier
+    @type type_id: str
+    @return: fields that together uniquely identify a document in the content
+             type collection
+    @rtype: tuple of str or None
+    """
+    return cache.unit_key_fields(type_id)
 
 
 def _create_or_update_type(type_def):
@@ -270,6 +418,7 @@ def _create_or_update_type(type_def):
         content_type._id = existing_type['_id']
     # XXX this still causes a potential race condition when 2 users are updating the same type
     content_type_collection.save(content_type, safe=True)
+    cache.clear()
 
 
 def _update_indexes(type_def, unique):
@@ -333,3 +482,22 @@ def _create_index_keypair(index):
 
     mongo_index = [(k, ASCENDING) for k in index]
     return mongo_index
+
+
+def _flatten_keys(flat_keys, nested_keys):
+    """
+    Take a key or a list of keys and (possibly) nested sub-lists and flatten
+    it out into an un-nested list of keys.
+
+    @param flat_keys: the flat list to store all of the keys in
+    @type flat_keys: list
+    @param nested_keys: key or possibly nested list of keys
+    @type nested_keys: str or list
+    """
+    if not nested_keys:
+        return
+    if isinstance(nested_keys, basestring):
+        flat_keys.append(nested_keys)
+        return
+    for key in nested_keys:
+        _flatten_keys(flat_keys, key)
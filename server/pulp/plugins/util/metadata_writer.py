@@ -11,18 +11,82 @@ from xml.sax.saxutils import XMLGenerator
 
 from pulp.common import error_codes
 from pulp.server.exceptions import PulpCodedValidationException, PulpCodedException
+from parallel_gzip import open_gzip
 from verification import CHECKSUM_FUNCTIONS
 
 _LOG = logging.getLogger(__name__)
 BUFFER_SIZE = 1024
 
 
+class HashingFileWrapper(object):
+    """
+    Wraps a file object opened for writing and updates checksums of the bytes as they are written,
+    so that the checksums of the file are known when it is closed without reading it back.
+    """
+
+    def __init__(self, file_object, checksum_types):
+        """
+        :param file_object: the file object to write to
+        :type  file_object: file
+        :param checksum_types: the checksum types to compute; each must be a key of
+                               CHECKSUM_FUNCTIONS
+        :type  checksum_types: list of str
+        """
+        self.file_object = file_object
+        self.hashers = dict((checksum_type, CHECKSUM_FUNCTIONS[checksum_type]())
+                            for checksum_type in checksum_types)
+
+    @property
+    def name(self):
+        return self.file_object.name
+
+    @property
+    def closed(self):
+        return self.file_object.closed
+
+    def write(self, data):
+        """
+        Write data to the file and update the checksums with it.
+
+        :param data: the bytes to write
+        :type  data: str
+        """
+        self.file_object.write(data)
+        for hasher in self.hashers.itervalues():
+            hasher.update(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def tell(self):
+        return self.file_object.tell()
+
+    def fileno(self):
+        return self.file_object.fileno()
+
+    def flush(self):
+        self.file_object.flush()
+
+    def close(self):
+        self.file_object.close()
+
+    def hexdigests(self):
+        """
+        :return: the hex digest of everything written so far, keyed by checksum type
+        :rtype:  dict
+        """
+        return dict((checksum_type, hasher.hexdigest())
+                    for checksum_type, hasher in self.hashers.iteritems())
+
+
 class MetadataFileContext(object):
     """
     Context manager class for metadata file generation.
     """
 
-    def __init__(self, metadata_file_path, checksum_type=None):
+    def __init__(self, metadata_file_path, checksum_type=None, checksum_types=None,
+                 compression_workers=None):
         """
         :param metadata_file_path: full path to metadata file to be generated
         :type  metadata_file_path: str
@@ -30,18 +94,32 @@ class MetadataFileContext(object):
                               to the file names of files. If checksum_type is None,
                               no checksum is added to the filename
         :type checksum_type: str or None
+        :param checksum_types: additional checksum types to be computed for the file. The
+                               checksums of all types are available in the checksums attribute
+                               once the file has been finalized.
+        :type checksum_types: list of str or None
+        :param compression_workers: the number of threads compressing a gzipped metadata file.
+                                    Defaults to the compression_workers server setting.
+        :type compression_workers: int or None
         """
 
         self.metadata_file_path = metadata_file_path
         self.metadata_file_handle = None
         self.checksum_type = checksum_type
         self.checksum = None
-        if self.checksum_type is not None:
-            checksum_function = CHECKSUM_FUNCTIONS.get(checksum_type)
-            if not checksum_function:
+        self.checksums = {}
+        self.checksum_types = []
+        self.hashing_file_handle = None
+        self.compression_workers = compression_workers
+        for a_type in [checksum_type] + list(checksum_types or []):
+            if a_type is None or a_type in self.checksum_types:
+                continue
+            if not CHECKSUM_FUNCTIONS.get(a_type):
                 raise PulpCodedValidationException(
-                    [PulpCodedException(error_codes.PLP1005, checksum_type=checksum_type)])
-            self.checksum_constructor = checksum_function
+                    [PulpCodedException(error_codes.PLP1005, checksum_type=a_type)])
+            self.checksum_types.append(a_type)
+        if self.checksum_type is not None:
+            self.checksum_constructor = CHECKSUM_FUNCTIONS[checksum_type]
 
     def __enter__(self):
 
@@ -93,12 +171,17 @@ class MetadataFileContext(object):
         except Exception, e:
             _LOG.exception(e)
 
+        if self.checksum_types:
+            if self.hashing_file_handle is not None:
+                self.checksums = self.hashing_file_handle.hexdigests()
+            else:
+                # the file handle was not opened by this context, so the bytes were not seen
+                self.checksums = self._read_checksums()
+
         # Add calculated checksum to the filename
         file_name = os.path.basename(self.metadata_file_path)
         if self.checksum_type is not None:
-            with open(self.metadata_file_path, 'rb') as file_handle:
-                content = file_handle.read()
-                checksum = self.checksum_constructor(content).hexdigest()
+            checksum = self.checksums[self.checksum_type]
 
             self.checksum = checksum
             file_name_with_checksum = checksum + '-' + file_name
@@ -109,6 +192,23 @@ class MetadataFileContext(object):
 
         # Set the metadata_file_handle to None so we don't double call finalize
         self.metadata_file_handle = None
+        self.hashing_file_handle = None
+
+    def _read_checksums(self):
+        """
+        Compute the checksums of the metadata file by reading it.
+
+        :return: the hex digest of the file, keyed by checksum type
+        :rtype:  dict
+        """
+        hashers = dict((a_type, CHECKSUM_FUNCTIONS[a_type]()) for a_type in self.checksum_types)
+        with open(self.metadata_file_path, 'rb') as file_handle:
+            content = file_handle.read(BUFFER_SIZE)
+            while content:
+                for hasher in hashers.itervalues():
+                    hasher.update(content)
+                content = file_handle.read(BUFFER_SIZE)
+        return dict((a_type, hasher.hexdigest()) for a_type, hasher in hashers.iteritems())
 
     def _open_metadata_file_handle(self):
         """
@@ -142,11 +242,19 @@ class MetadataFileContext(object):
         msg = _('Opening metadata file handle for [%(p)s]')
         _LOG.debug(msg % {'p': self.metadata_file_path})
 
+        file_handle = open(self.metadata_file_path, 'wb')
+        if self.checksum_types:
+            # checksums are computed over the bytes as they are written to the disk, which
+            # are the compressed bytes when the file is gzipped
+            file_handle = self.hashing_file_handle = HashingFileWrapper(file_handle,
+                                                                        self.checksum_types)
+
         if self.metadata_file_path.endswith('.gz'):
-            self.metadata_file_handle = gzip.open(self.metadata_file_path, 'w')
+            self.metadata_file_handle = open_gzip(self.metadata_file_path, fileobj=file_handle,
+                                                  workers=self.compression_workers)
 
         else:
-            self.metadata_file_handle = open(self.metadata_file_path, 'w')
+            self.metadata_file_handle = file_handle
 
     def _write_file_header(self):
         """
@@ -0,0 +1,284 @@
+"""
+Gzip compression of written files using a pool of threads.
+
+ParallelGzipFile splits the data written to it into blocks and deflates the blocks concurrently,
+in the manner of pigz. Each block is deflated independently and ends on a byte boundary, so the
+compressed blocks are concatenated in order into a single gzip member that can be read by any
+gzip reader. zlib releases the GIL while it deflates, so the blocks are compressed in parallel by
+threads without copying them to other processes.
+"""
+
+from collections import deque
+from gettext import gettext as _
+from Queue import Queue
+from threading import Event, Thread
+import gzip
+import os
+import struct
+import sys
+import time
+import zlib
+
+from pulp.server.config import config
+
+
+# The number of bytes of written data deflated by a thread at a time
+BLOCK_SIZE = 1024 * 1024
+
+# gzip header flag indicating that the original file name follows the header
+FNAME = 0x08
+
+
+def compression_workers():
+    """
+    :return: the number of threads used to compress gzip files, as configured by
+             compression_workers in the [tasks] section of the server configuration
+    :rtype:  int
+    """
+    return max(config.getint('tasks', 'compression_workers'), 1)
+
+
+def open_gzip(path, fileobj=None, workers=None):
+    """
+    Open a gzip file for writing. A ParallelGzipFile is used when more than one worker is
+    requested, and a gzip.GzipFile otherwise.
+
+    :param path: the path of the file. It is also recorded in the gzip header.
+    :type  path: str
+    :param fileobj: the file object the compressed data is written to. The file at path is
+                    opened when it is None, and the file object is closed with the gzip file.
+    :type  fileobj: file
+    :param workers: the number of compression threads. Defaults to compression_workers().
+    :type  workers: int
+    :return: the gzip file opened for writing
+    :rtype:  gzip.GzipFile or ParallelGzipFile
+    """
+    if workers is None:
+        workers = compression_workers()
+    if workers > 1:
+        gzip_file = ParallelGzipFile(path, fileobj=fileobj, workers=workers)
+    else:
+        gzip_file = gzip.GzipFile(path, 'wb', fileobj=fileobj)
+    if fileobj is not None:
+        # close the file object along with the gzip stream, as gzip.open() does
+        gzip_file.myfileobj = fileobj
+    return gzip_file
+
+
+class CompressionJob(object):
+    """
+    A block of data to be deflated by a worker thread.
+
+    :ivar data: the uncompressed data
+    :type data: str
+    :ivar compressed: the deflated data, once done is set
+    :type compressed: str
+    :ivar done: set when the block has been deflated
+    :type done: threading.Event
+    :ivar error: the exc_info of an error raised deflating the block
+    :type error: tuple
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.compressed = None
+        self.done = Event()
+        self.error = None
+
+
+class ParallelGzipFile(object):
+    """
+    A write only gzip file that deflates blocks of the written data in a pool of threads. The
+    compressed data is written in order as the blocks are finished. At most two blocks for each
+    thread are held in memory.
+
+    :ivar name: the path of the file
+    :type name: str
+    :ivar fileobj: the file object the compressed data is written to; None once closed
+    :type fileobj: file
+    :ivar myfileobj: the file object closed along with this file
+    :type myfileobj: file
+    :ivar compresslevel: the zlib compression level
+    :type compresslevel: int
+    :ivar workers: the number of compression threads
+    :type workers: int
+    :ivar block_size: the number of bytes deflated at a time by a thread
+    :type block_size: int
+    :ivar size: the number of uncompressed bytes written
+    :type size: int
+    :ivar crc: the CRC-32 of the uncompressed bytes written
+    :type crc: int
+    """
+
+    def __init__(self, filename, mode='wb', compresslevel=9, fileobj=None, workers=2,
+                 block_size=BLOCK_SIZE):
+        """
+        :param filename: the path of the file. It is also recorded in the gzip header.
+        :type  filename: str
+        :param mode: the file mode; only writing is supported
+        :type  mode: str
+        :param compresslevel: the zlib compression level, from 1 to 9
+        :type  compresslevel: int
+        :param fileobj: the file object the compressed data is written to. The file is opened
+                        when it is None.
+        :type  fileobj: file
+        :param workers: the number of compression threads
+        :type  workers: int
+        :param block_size: the number of bytes deflated at a time by a thread
+        :type  block_size: int
+        :raise ValueError: if the mode is not a write mode
+        """
+        if 'r' in mode or 'a' in mode:
+            raise ValueError(_('Parallel gzip files can only be opened for writing'))
+        self.name = filename
+        self.myfileobj = None
+        if fileobj is None:
+            fileobj = self.myfileobj = open(filename, 'wb')
+        self.fileobj = fileobj
+        self.compresslevel = compresslevel
+        self.workers = workers
+        self.block_size = block_size
+        self.size = 0
+        self.crc = zlib.crc32('') & 0xffffffffL
+        self._buffer = []
+        self._buffered = 0
+        self._pending = deque()
+        self._queue = None
+        self._threads = []
+        self._write_header()
+
+    @property
+    def closed(self):
+        return self.fileobj is None
+
+    def write(self, data):
+        """
+        Write data to the file. The data is compressed once a block of data has been written.
+
+        :param data: the uncompressed data
+        :type  data: str
+        :raise IOError: if the file is closed
+        """
+        if self.fileobj is None:
+            raise IOError(_('Write to a closed gzip file'))
+        if not data:
+            return
+        self.size += len(data)
+        self.crc = zlib.crc32(data, self.crc) & 0xffffffffL
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.block_size:
+            self._submit()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        """
+        Compress the data written so far and write it to the file object.
+        """
+        if self.fileobj is None:
+            return
+        self._submit()
+        while self._pending:
+            self._write_block(self._pending.popleft())
+        self.fileobj.flush()
+
+    def close(self):
+        """
+        Compress the remaining data, write the gzip trailer and close the file. This method is
+        idempotent.
+        """
+        if self.fileobj is None:
+            return
+        try:
+            self.flush()
+            self.fileobj.write(zlib.compressobj(self.compresslevel, zlib.DEFLATED,
+                                                -zlib.MAX_WBITS).flush(zlib.Z_FINISH))
+            self.fileobj.write(struct.pack('<LL', self.crc, self.size & 0xffffffffL))
+        finally:
+            self._stop()
+            self.fileobj = None
+            self._pending.clear()
+            myfileobj = self.myfileobj
+            if myfileobj is not None:
+                self.myfileobj = None
+                myfileobj.close()
+
+    def _write_header(self):
+        """
+        Write the gzip member header, recording the file name as gzip.GzipFile does.
+        """
+        file_name = os.path.basename(self.name)
+        if file_name.endswith('.gz'):
+            file_name = file_name[:-3]
+        flags = FNAME if file_name else 0
+        self.fileobj.write('\037\213\010' + chr(flags))
+        self.fileobj.write(struct.pack('<L', long(time.time())))
+        self.fileobj.write('\002\377')
+        if file_name:
+            self.fileobj.write(file_name + '\000')
+
+    def _submit(self):
+        """
+        Queue the buffered data to be deflated, writing finished blocks in order.
+        """
+        if not self._buffered:
+            return
+        job = CompressionJob(''.join(self._buffer))
+        self._buffer = []
+        self._buffered = 0
+        if self.workers <= 1:
+            self._compress(job)
+        else:
+            self._start()
+            self._queue.put(job)
+        self._pending.append(job)
+        while len(self._pending) > self.workers * 2 or \
+                (self._pending and self._pending[0].done.isSet()):
+            self._write_block(self._pending.popleft())
+
+    def _write_block(self, job):
+        job.done.wait()
+        if job.error:
+            raise job.error[0], job.error[1], job.error[2]
+        self.fileobj.write(job.compressed)
+
+    def _compress(self, job):
+        """
+        Deflate a block ending on a byte boundary so the next block can follow it directly.
+
+        :param job: the block to deflate
+        :type  job: CompressionJob
+        """
+        try:
+            compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -zlib.MAX_WBITS)
+            job.compressed = compressor.compress(job.data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        except Exception:
+            job.error = sys.exc_info()
+        job.data = None
+        job.done.set()
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._compress(job)
+
+    def _start(self):
+        if self._threads:
+            return
+        self._queue = Queue()
+        self._threads = [Thread(target=self._worker) for n in range(self.workers)]
+        for thread in self._threads:
+            thread.setDaemon(True)
+            thread.start()
+
+    def _stop(self):
+        for thread in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
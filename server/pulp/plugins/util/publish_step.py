@@ -28,6 +28,9 @@ from nectar.downloaders.threaded import HTTPThreadedDownloader
 
 _LOG = logging.getLogger(__name__)
 
+# Minimum number of seconds between progress report writes that were not forced
+DEFAULT_PROGRESS_REPORT_INTERVAL = 1.0
+
 
 def _post_order(step):
     """
@@ -70,6 +73,9 @@ class Step(object):
         self.children = []
         self.last_report_time = 0
         self.last_reported_state = self.state
+        self.progress_report_interval = DEFAULT_PROGRESS_REPORT_INTERVAL
+        self.progress_reports_written = 0
+        self.progress_reports_suppressed = 0
         self.timestamp = str(time.time())
         self.non_halting_exceptions = non_halting_exceptions
         self.exceptions = []
@@ -127,6 +133,9 @@ class Step(object):
                 step.process()
         finally:
             self.report_progress(force=True)
+            _LOG.debug(_('Step [%(s)s] wrote %(w)d progress reports, suppressed %(p)d') %
+                       {'s': self.step_id, 'w': self.progress_reports_written,
+                        'p': self.progress_reports_suppressed})
 
     def is_skipped(self):
         """
@@ -260,6 +269,11 @@ class Step(object):
         """
         Bubble up that something has changed where progress should be reported.
         It is up to the parent to determine what actions should be taken.
+
+        Only the root of the step tree writes to the database. Updates from any step in
+        the tree are coalesced into at most one write per progress_report_interval
+        seconds, unless the write is forced or a step's state has changed.
+
         :param force: Whether or not a write to the database should be forced
         :type force: bool
         """
@@ -270,14 +284,13 @@ class Step(object):
         if self.parent:
             self.parent.report_progress(force)
         else:
-            if force:
+            current_time = time.time()
+            if force or current_time - self.last_report_time >= self.progress_report_interval:
                 self.get_status_conduit().set_progress(self.get_progress_report())
+                self.last_report_time = current_time
+                self.progress_reports_written += 1
             else:
-                current_time = time.time()
-                if current_time != self.last_report_time:
-                    # Update at most once a second
-                    self.get_status_conduit().set_progress(self.get_progress_report())
-                    self.last_report_time = current_time
+                self.progress_reports_suppressed += 1
 
     def get_progress_report(self):
         """
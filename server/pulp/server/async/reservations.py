@@ -0,0 +1,270 @@
+"""
+Dispatching of reserved tasks by the resource manager.
+
+The resource manager keeps an in-memory view of the workers and their resource reservations
+rather than loading them from the database each time it looks for a worker. Reservations are
+released, and workers come and go, in other processes. Those processes announce each change on
+the RESOURCE_EVENTS_QUEUE broker queue, and a resource manager waiting for a worker is woken by the
+announcement as soon as capacity frees up. A change that cannot be announced is recorded as a
+ReloadRequest in the database instead. The view is also reloaded every RELOAD_INTERVAL seconds, so
+a worker that came or went unannounced is noticed.
+"""
+from gettext import gettext as _
+import logging
+from Queue import Empty
+import time
+
+from pulp.server.async.celery_instance import celery
+from pulp.server.managers import resources
+
+
+_logger = logging.getLogger(__name__)
+
+
+# The broker queue on which reservation and worker changes are announced
+RESOURCE_EVENTS_QUEUE = 'resource_manager.events'
+
+# Event announced when a reservation has been released. The name is the task_id.
+RESERVATION_RELEASED = 'reservation-released'
+
+# Event announced when a worker has been added or removed. The name is the worker name.
+WORKERS_CHANGED = 'workers-changed'
+
+# Seconds a waiting resource manager waits for an event before reloading the view from the
+# database, in case an announcement was missed
+WAIT_TIMEOUT = 5.0
+
+# Seconds after which the view is reloaded from the database before finding a worker, even though
+# no change was announced
+RELOAD_INTERVAL = 10.0
+
+
+def notify(event, name):
+    """
+    Announce a change in reservations or workers to the resource manager. When the change cannot
+    be announced on the broker, a ReloadRequest is saved so that the resource manager reloads its
+    view from the database before it next finds a worker. Errors are logged and not raised.
+
+    :param event: RESERVATION_RELEASED or WORKERS_CHANGED
+    :type  event: basestring
+    :param name:  The task_id of the released reservation or the name of the worker
+    :type  name:  basestring
+    """
+    if celery.conf.CELERY_ALWAYS_EAGER:
+        # tasks run in the calling process and there is no resource manager to notify
+        return
+    try:
+        with celery.pool.acquire(block=True) as connection:
+            queue = connection.SimpleQueue(RESOURCE_EVENTS_QUEUE)
+            try:
+                queue.put({'event': event, 'name': name})
+            finally:
+                queue.close()
+    except Exception:
+        _logger.exception(_('Failed to notify the resource manager of %(event)s: %(name)s') %
+                          {'event': event, 'name': name})
+        try:
+            resources.request_reload(event, name)
+        except Exception:
+            _logger.exception(_('Failed to request a reload of the resource manager'))
+
+
+class WaitStats(object):
+    """
+    Instrumentation of the time reserved tasks wait in the resource manager for a worker.
+
+    :ivar dispatched: The number of tasks given a worker
+    :type dispatched: int
+    :ivar waited:     The number of tasks that waited for a reservation to be released
+    :type waited:     int
+    :ivar total_wait: The total seconds waited
+    :type total_wait: float
+    :ivar max_wait:   The longest wait in seconds
+    :type max_wait:   float
+    """
+
+    def __init__(self):
+        self.dispatched = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def add(self, wait, waited):
+        """
+        Record the wait of a dispatched task.
+
+        :param wait:   Seconds spent finding a worker
+        :type  wait:   float
+        :param waited: True if the task had to wait for a reservation to be released
+        :type  waited: bool
+        """
+        self.dispatched += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if waited:
+            self.waited += 1
+
+    def dict(self):
+        average = self.total_wait / self.dispatched if self.dispatched else 0.0
+        return {'dispatched': self.dispatched, 'waited': self.waited,
+                'average_wait': average, 'max_wait': self.max_wait}
+
+
+class ReservationDispatcher(object):
+    """
+    Finds workers for reserved tasks in the resource manager. Reserved tasks are handled one at a
+    time in the order they were queued, so tasks reserving the same resource keep their order and
+    a task waiting for capacity is not overtaken by later tasks.
+
+    :ivar table:  The in-memory view of workers and reservations
+    :type table:  pulp.server.managers.resources.ReservationTable
+    :ivar stats:  Queue wait instrumentation
+    :type stats:  WaitStats
+    """
+
+    def __init__(self):
+        self.table = resources.ReservationTable()
+        self.stats = WaitStats()
+        self._connection = None
+        self._queue = None
+
+    def find_worker(self, resource_id):
+        """
+        Find the worker for a task reserving resource_id, waiting until one is available.
+
+        :param resource_id: The resource to be reserved
+        :type  resource_id: basestring
+        :return:            The worker
+        :rtype:             pulp.server.db.model.resources.Worker
+        """
+        started = time.time()
+        self._process_events(self._drain())
+        if self.table.expired(RELOAD_INTERVAL) or self.table.reload_requested():
+            self.table.loaded = False
+        waited = False
+        while True:
+            if not self.table.loaded:
+                self.table.load()
+            worker = self.table.find_worker(resource_id)
+            if worker is not None:
+                break
+            waited = True
+            events = self._wait(WAIT_TIMEOUT)
+            if events:
+                self._process_events(events)
+            else:
+                self.table.loaded = False
+        wait = time.time() - started
+        self.stats.add(wait, waited)
+        if waited:
+            msg = _('Reservation of %(resource)s waited %(wait).3f seconds for %(worker)s; '
+                    '%(stats)s')
+            _logger.debug(msg % {'resource': resource_id, 'wait': wait, 'worker': worker.name,
+                                 'stats': self.stats.dict()})
+        return worker
+
+    def reserved(self, task_id, worker_name, resource_id):
+        """
+        Record a reservation created by the resource manager.
+
+        :param task_id:     The UUID of the task holding the reservation
+        :type  task_id:     basestring
+        :param worker_name: The name of the worker holding the reservation
+        :type  worker_name: basestring
+        :param resource_id: The reserved resource
+        :type  resource_id: basestring
+        """
+        self.table.reserved(task_id, worker_name, resource_id)
+
+    def _process_events(self, events):
+        """
+        Apply announced changes to the view.
+
+        :param events: Events as announced by notify()
+        :type  events: list
+        """
+        for event in events:
+            if event.get('event') == RESERVATION_RELEASED:
+                self.table.released(event.get('name'))
+            else:
+                self.table.loaded = False
+
+    def _wait(self, timeout):
+        """
+        Wait for announced changes.
+
+        :param timeout: The maximum seconds to wait
+        :type  timeout: float
+        :return:        The announced events; empty if none were announced within the timeout
+        :rtype:         list
+        """
+        try:
+            queue = self._get_queue()
+            events = [self._receive(queue.get(block=True, timeout=timeout))]
+        except Empty:
+            return []
+        except Exception:
+            _logger.exception(_('Failed to wait for resource manager events'))
+            self._reset()
+            time.sleep(timeout)
+            return []
+        return events + self._drain()
+
+    def _drain(self):
+        """
+        :return: The events announced so far, without waiting.
+        :rtype:  list
+        """
+        events = []
+        if celery.conf.CELERY_ALWAYS_EAGER:
+            # nothing is announced when tasks run in the calling process
+            self.table.loaded = False
+            return events
+        try:
+            queue = self._get_queue()
+            while True:
+                events.append(self._receive(queue.get_nowait()))
+        except Empty:
+            pass
+        except Exception:
+            _logger.exception(_('Failed to read resource manager events'))
+            self._reset()
+            # changes may have been missed
+            self.table.loaded = False
+        return events
+
+    @staticmethod
+    def _receive(message):
+        message.ack()
+        return message.payload
+
+    def _get_queue(self):
+        if self._queue is None:
+            self._connection = celery.connection()
+            self._queue = self._connection.SimpleQueue(RESOURCE_EVENTS_QUEUE)
+        return self._queue
+
+    def _reset(self):
+        try:
+            if self._queue is not None:
+                self._queue.close()
+            if self._connection is not None:
+                self._connection.release()
+        except Exception:
+            pass
+        self._queue = None
+        self._connection = None
+
+
+_dispatcher = None
+
+
+def get_dispatcher():
+    """
+    :return: The dispatcher of the running resource manager process.
+    :rtype:  ReservationDispatcher
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = ReservationDispatcher()
+    return _dispatcher
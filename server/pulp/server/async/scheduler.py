@@ -1,6 +1,8 @@
 from collections import namedtuple
 from datetime import datetime, timedelta
 from gettext import gettext as _
+import hashlib
+import heapq
 import itertools
 import logging
 import platform
@@ -14,6 +16,7 @@ from pulp.common.constants import SCHEDULER_WORKER_NAME
 from pulp.server.async import worker_watcher
 from pulp.server.async.celery_instance import celery as app
 from pulp.server.async.tasks import _delete_worker
+from pulp.server.config import config
 from pulp.server.db import connection as db_connection
 from pulp.server.db.connection import retry_decorator
 from pulp.server.db.model.criteria import Criteria
@@ -238,6 +241,40 @@ class WorkerTimeoutMonitor(threading.Thread):
             _delete_worker(worker.name)
 
 
+class ScheduleLag(object):
+    """
+    Instrumentation of how late scheduled tasks are dispatched, measured from the time each was
+    due. Jitter, the dispatch limit and the scheduler falling behind all add to the lag.
+
+    :ivar dispatched: The number of scheduled tasks dispatched
+    :type dispatched: int
+    :ivar total_lag:  The total seconds of lag
+    :type total_lag:  float
+    :ivar max_lag:    The largest lag in seconds
+    :type max_lag:    float
+    """
+
+    def __init__(self):
+        self.dispatched = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    def add(self, lag):
+        """
+        Record the lag of a dispatched task.
+
+        :param lag: Seconds between the time the task was due and its dispatch
+        :type  lag: float
+        """
+        self.dispatched += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+
+    def dict(self):
+        average = self.total_lag / self.dispatched if self.dispatched else 0.0
+        return {'dispatched': self.dispatched, 'average_lag': average, 'max_lag': self.max_lag}
+
+
 class Scheduler(beat.Scheduler):
     """
     This is a custom Scheduler object to be used by celery beat.
@@ -263,6 +300,10 @@ class Scheduler(beat.Scheduler):
     # allows mongo initialization to occur exactly once during the first call to setup_schedule()
     _mongo_initialized = False
 
+    # the number of seconds after which tasks that were due, but not dispatched because of the
+    # dispatch limit, are dispatched
+    spill_interval = 1
+
     def __init__(self, *args, **kwargs):
         """
         Initialize the Scheduler object.
@@ -274,6 +315,15 @@ class Scheduler(beat.Scheduler):
         self._schedule = None
         self._failure_watcher = FailureWatcher()
         self._loaded_from_db_count = 0
+        self._enabled_ids = set()
+        self._most_recent_timestamp = 0
+        self._heap = []
+        self._due = {}
+        self._pending = {}
+        self._dispatched = 0
+        self.lag = ScheduleLag()
+        self.jitter = config.getint('tasks', 'schedule_jitter')
+        self.max_dispatch_per_tick = config.getint('tasks', 'max_dispatch_per_tick')
 
         # Force the use of the Pulp celery_instance when this custom Scheduler is used.
         kwargs['app'] = app
@@ -309,17 +359,56 @@ class Scheduler(beat.Scheduler):
 
     def tick(self):
         """
-        Superclass runs a tick, that is one iteration of the scheduler. Executes
-        all due tasks.
+        Run a tick, that is one iteration of the scheduler. Executes all due tasks.
+
+        Unlike the superclass, this does not ask every entry whether it is due. Entries are
+        kept in a heap ordered by the time each is next expected to be due, and only the entries
+        at the top of the heap whose time has come are checked. At most max_dispatch_per_tick
+        tasks are dispatched; the remaining entries stay at the top of the heap and are checked
+        spill_interval seconds later.
 
-        This method adds a call to trim the failure watcher and updates the
-        last heartbeat time of the scheduler. We do not actually send a
-        heartbeat message since it would just get read again by this class.
+        This method also trims the failure watcher and updates the last heartbeat time of the
+        scheduler. We do not actually send a heartbeat message since it would just get read
+        again by this class.
 
         :return:    number of seconds before the next tick should run
         :rtype:     float
         """
-        ret = super(Scheduler, self).tick()
+        # applies changes made in the database
+        schedule = self.schedule
+        now = time.time()
+        self._dispatched = 0
+        spilled = False
+        while self._heap and self._heap[0][0] <= now:
+            if self.max_dispatch_per_tick and self._dispatched >= self.max_dispatch_per_tick:
+                spilled = True
+                break
+            due_at, name = heapq.heappop(self._heap)
+            if self._due.get(name) != due_at:
+                # the entry was removed or rescheduled after this item was pushed
+                continue
+            del self._due[name]
+            # the time the entry is found to be due, if it is
+            self._pending.setdefault(name, due_at)
+            next_time_to_run = None
+            try:
+                next_time_to_run = self.maybe_due(schedule[name], self.publisher)
+            finally:
+                # the entry is removed if its schedule ran out of runs
+                if name in self._schedule:
+                    if not next_time_to_run > 0:
+                        next_time_to_run = self.max_interval
+                    self._push(name, now + next_time_to_run)
+        if spilled:
+            ret = self.spill_interval
+        elif self._heap:
+            ret = max(min(self._heap[0][0] - time.time(), self.max_interval), 0)
+        else:
+            ret = self.max_interval
+        if self._dispatched:
+            _logger.debug(_('dispatched %(count)d scheduled tasks; schedule lag: %(lag)s') %
+                          {'count': self._dispatched, 'lag': self.lag.dict()})
+
         self._failure_watcher.trim()
 
         # this is not an event that gets sent anywhere. We process it
@@ -341,51 +430,119 @@ class Scheduler(beat.Scheduler):
             Scheduler._mongo_initialized = True
         _logger.debug(_('loading schedules from app'))
         self._schedule = {}
+        self._heap = []
+        self._due = {}
         for key, value in self.app.conf.CELERYBEAT_SCHEDULE.iteritems():
-            self._schedule[key] = beat.ScheduleEntry(**dict(value, name=key))
+            self._set_entry(key, beat.ScheduleEntry(**dict(value, name=key)))
 
-        # include a "0" as the default in case there are no schedules to load
-        update_timestamps = [0]
+        # "0" is the default in case there are no schedules to load
+        self._most_recent_timestamp = 0
+        self._enabled_ids = set()
+        self._loaded_from_db_count = 0
 
         _logger.debug(_('loading schedules from DB'))
-        ignored_db_count = 0
-        self._loaded_from_db_count = 0
-        for call in itertools.imap(ScheduledCall.from_db, utils.get_enabled()):
+        self._update_calls(itertools.imap(ScheduledCall.from_db, utils.get_enabled()))
+
+        _logger.debug('loaded %(count)d schedules' % {'count': self._loaded_from_db_count})
+
+    @retry_decorator()
+    def update_schedule(self):
+        """
+        Applies the changes made to enabled schedules in the database since they were loaded.
+        Only the schedules updated since the most recent update timestamp are loaded, and their
+        entries are replaced in place. Schedules that were deleted or disabled are found by
+        comparing the number of enabled schedules, and then their IDs, with those loaded.
+
+        Indexing should make this very fast.
+
+        :return:    number of schedules added, replaced or removed
+        :rtype:     int
+        """
+        changed = self._update_calls(
+            itertools.imap(ScheduledCall.from_db,
+                           utils.get_updated_since(self._most_recent_timestamp)))
+
+        if utils.get_enabled().count() != len(self._enabled_ids):
+            enabled_ids = utils.get_enabled_ids()
+            for schedule_id in self._enabled_ids - enabled_ids:
+                _logger.debug(_('removing schedule %(id)s') % {'id': schedule_id})
+                self._enabled_ids.discard(schedule_id)
+                self._remove_entry(schedule_id)
+                changed += 1
+            # enabled without their update timestamp moving past the most recent one
+            missing_ids = enabled_ids - self._enabled_ids
+            if missing_ids:
+                changed += self._update_calls(utils.get(list(missing_ids)))
+
+        if changed:
+            _logger.debug(_('applied %(count)d changed schedules') % {'count': changed})
+        return changed
+
+    def _update_calls(self, calls):
+        """
+        Adds or replaces the entries of enabled scheduled calls.
+
+        :param calls:   enabled scheduled calls
+        :type  calls:   iterable of pulp.server.db.model.dispatch.ScheduledCall
+        :return:        number of calls
+        :rtype:         int
+        """
+        count = 0
+        for call in calls:
+            count += 1
+            self._enabled_ids.add(call.id)
+            self._most_recent_timestamp = max(self._most_recent_timestamp, call.last_updated)
             if call.remaining_runs == 0:
                 _logger.debug(
                     _('ignoring schedule with 0 remaining runs: %(id)s') % {'id': call.id})
-                ignored_db_count += 1
+                self._remove_entry(call.id)
             else:
-                self._schedule[call.id] = call.as_schedule_entry()
-                update_timestamps.append(call.last_updated)
-                self._loaded_from_db_count += 1
+                self._set_entry(call.id, call.as_schedule_entry())
+        return count
 
-        _logger.debug('loaded %(count)d schedules' % {'count': self._loaded_from_db_count})
-
-        self._most_recent_timestamp = max(update_timestamps)
+    def _set_entry(self, name, entry):
+        """
+        Adds or replaces a schedule entry. It is checked on the next tick.
 
-    @property
-    @retry_decorator()
-    def schedule_changed(self):
+        :param name:    name of the entry
+        :type  name:    basestring
+        :param entry:   the schedule entry
+        :type  entry:   celery.beat.ScheduleEntry
         """
-        Looks at the update timestamps in the database to determine if there
-        are new or modified schedules.
+        if isinstance(entry, ScheduleEntry) and name not in self._schedule:
+            self._loaded_from_db_count += 1
+        self._schedule[name] = entry
+        self._push(name, time.time())
 
-        Indexing should make this very fast.
+    def _remove_entry(self, name):
+        """
+        Removes a schedule entry, if present.
 
-        :return:    True iff the set of enabled scheduled calls has changed
-                    in the database.
-        :rtype:     bool
+        :param name:    name of the entry
+        :type  name:    basestring
         """
-        if utils.get_enabled().count() != self._loaded_from_db_count:
-            logging.debug(_('number of enabled schedules has changed'))
-            return True
+        entry = self._schedule.pop(name, None)
+        if isinstance(entry, ScheduleEntry):
+            self._loaded_from_db_count -= 1
+        self._due.pop(name, None)
+        self._pending.pop(name, None)
 
-        if utils.get_updated_since(self._most_recent_timestamp).count() > 0:
-            logging.debug(_('one or more enabled schedules has been updated'))
-            return True
+    def _push(self, name, due_at):
+        """
+        Records when an entry should next be checked. Items in the heap for entries that have
+        since been removed or rescheduled are skipped when popped, and dropped when they
+        outnumber the live items.
 
-        return False
+        :param name:    name of the entry
+        :type  name:    basestring
+        :param due_at:  seconds since the epoch
+        :type  due_at:  float
+        """
+        self._due[name] = due_at
+        heapq.heappush(self._heap, (due_at, name))
+        if len(self._heap) > 2 * len(self._due) + 100:
+            self._heap = [(t, n) for n, t in self._due.iteritems()]
+            heapq.heapify(self._heap)
 
     @property
     def schedule(self):
@@ -398,11 +555,87 @@ class Scheduler(beat.Scheduler):
         if self._schedule is None:
             return self.get_schedule()
 
-        if self.schedule_changed:
-            self.setup_schedule()
+        self.update_schedule()
 
         return self._schedule
 
+    def jitter_for(self, entry):
+        """
+        Determines how many seconds the dispatch of an entry is delayed past the time it is due.
+        The delay is derived from the entry's name, which is the schedule ID for schedules from
+        the database, so it is the same each time the schedule runs and schedules sharing a start
+        time and interval are spread evenly over the jitter. Celery's own entries are not delayed.
+
+        :param entry:   schedule entry
+        :type  entry:   celery.beat.ScheduleEntry
+        :return:        seconds of delay
+        :rtype:         float
+        """
+        if not isinstance(entry, ScheduleEntry):
+            return 0
+        jitter = entry._scheduled_call.jitter
+        if jitter is None:
+            jitter = self.jitter
+        if not jitter:
+            return 0
+        fraction = int(hashlib.md5(entry.name).hexdigest()[:8], 16) / float(0xffffffff)
+        return fraction * jitter
+
+    def maybe_due(self, entry, publisher=None):
+        """
+        Dispatches the entry's task if it is due and its jitter has elapsed, and records the
+        schedule lag. The time the entry was found to be due is kept until it is dispatched, so
+        that an entry delayed by jitter, or by the dispatch limit, is not delayed again.
+
+        :param entry:       schedule entry to check
+        :type  entry:       celery.beat.ScheduleEntry
+        :param publisher:   unknown. used by celery but not documented
+        :return:            number of seconds before the entry should be checked again
+        :rtype:             float
+        """
+        is_due, next_time_to_run = entry.is_due()
+        if not is_due:
+            self._pending.pop(entry.name, None)
+            return next_time_to_run
+
+        now = time.time()
+        due_at = self._pending.setdefault(entry.name, now)
+        dispatch_at = due_at + self.jitter_for(entry)
+        if dispatch_at > now:
+            return dispatch_at - now
+
+        del self._pending[entry.name]
+        self._dispatched += 1
+        self.lag.add(now - due_at)
+        _logger.info(_('Scheduler: Sending due task %(name)s (%(task)s)') %
+                     {'name': entry.name, 'task': entry.task})
+        try:
+            result = self.apply_async(entry, publisher=publisher)
+        except Exception, e:
+            _logger.exception(_('Message Error: %(e)s') % {'e': e})
+        else:
+            _logger.debug('%(task)s sent. id->%(id)s' % {'task': entry.task, 'id': result.id})
+        return next_time_to_run
+
+    def reserve(self, entry):
+        """
+        The superclass replaces the entry with its next instance through the "schedule"
+        property. This does so without looking for changes in the database, and removes the
+        entry if its schedule was disabled because it has no remaining runs.
+
+        :param entry:   schedule entry whose task is being queued
+        :type  entry:   celery.beat.ScheduleEntry
+        :return:        the next instance of the entry
+        :rtype:         celery.beat.ScheduleEntry
+        """
+        new_entry = next(entry)
+        if isinstance(new_entry, ScheduleEntry) and not new_entry._scheduled_call.enabled:
+            self._enabled_ids.discard(entry.name)
+            self._remove_entry(entry.name)
+        else:
+            self._schedule[entry.name] = new_entry
+        return new_entry
+
     def add(self, **kwargs):
         """
         This class does not support adding entries in-place. You must add new
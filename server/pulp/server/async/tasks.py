@@ -2,7 +2,6 @@ from datetime import datetime
 from gettext import gettext as _
 import logging
 import signal
-import time
 import uuid
 
 from celery import task, Task as CeleryTask, current_task
@@ -12,13 +11,13 @@ from celery.signals import worker_init
 from mongoengine.queryset import DoesNotExist
 
 from pulp.common import constants, dateutils
+from pulp.server.async import reservations
 from pulp.server.async.celery_instance import celery, RESOURCE_MANAGER_QUEUE, \
     DEDICATED_QUEUE_EXCHANGE
 from pulp.server.exceptions import PulpException, MissingResource
 from pulp.server.db.model.criteria import Criteria
 from pulp.server.db.model.dispatch import TaskStatus
 from pulp.server.db.model.resources import ReservedResource, Worker
-from pulp.server.exceptions import NoWorkers
 from pulp.server.managers import resources
 
 
@@ -37,7 +36,8 @@ def _queue_reserved_task(name, task_id, resource_id, inner_args, inner_kwargs):
 
     The inner task is dispatched into a dedicated queue for a worker that is decided at dispatch
     time. The logic deciding which queue receives a task is controlled through the
-    find_worker function.
+    find_worker method of the resource manager's ReservationDispatcher, which waits for a
+    worker to become available without polling the database.
 
     :param name:          The name of the task to be called
     :type name:           basestring
@@ -52,25 +52,11 @@ def _queue_reserved_task(name, task_id, resource_id, inner_args, inner_kwargs):
 
     :return: None
     """
-    while True:
-        try:
-            worker = resources.get_worker_for_reservation(resource_id)
-        except NoWorkers:
-            pass
-        else:
-            break
-
-        try:
-            worker = resources.get_unreserved_worker()
-        except NoWorkers:
-            pass
-        else:
-            break
-
-        # No worker is ready for this work, so we need to wait
-        time.sleep(0.25)
+    dispatcher = reservations.get_dispatcher()
+    worker = dispatcher.find_worker(resource_id)
 
     ReservedResource(task_id, worker['name'], resource_id).save()
+    dispatcher.reserved(task_id, worker['name'], resource_id)
 
     inner_kwargs['routing_key'] = worker.name
     inner_kwargs['exchange'] = DEDICATED_QUEUE_EXCHANGE
@@ -115,6 +101,8 @@ def _delete_worker(name, normal_shutdown=False):
     # Delete all reserved_resource documents for the worker
     ReservedResource.get_collection().remove({'worker_name': name})
 
+    reservations.notify(reservations.WORKERS_CHANGED, name)
+
     # Cancel all of the tasks that were assigned to this worker's queue
     worker = Worker.from_bson({'_id': name})
     for task_status in TaskStatus.objects(worker_name=worker.name,
@@ -129,12 +117,14 @@ def _release_resource(task_id):
     the _queue_reserved_task task.
 
     When a resource-reserving task is complete, this method releases the resource by removing the
-    ReservedResource object by UUID.
+    ReservedResource object by UUID, and lets the resource manager know that the reservation has
+    been released.
 
     :param task_id: The UUID of the task that requested the reservation
     :type  task_id: basestring
     """
     ReservedResource.get_collection().remove({'_id': task_id})
+    reservations.notify(reservations.RESERVATION_RELEASED, task_id)
 
 
 class TaskResult(object):
@@ -17,6 +17,7 @@ from datetime import datetime
 from gettext import gettext as _
 import logging
 
+from pulp.server.async import reservations
 from pulp.server.async.tasks import _delete_worker
 from pulp.server.db.model.criteria import Criteria
 from pulp.server.db.model.resources import Worker
@@ -91,6 +92,7 @@ def handle_worker_heartbeat(event):
         msg = _("New worker '%(worker_name)s' discovered") % event_info
         _logger.info(msg)
         new_worker.save()
+        reservations.notify(reservations.WORKERS_CHANGED, event_info['worker_name'])
 
 
 def handle_worker_offline(event):
@@ -84,6 +84,13 @@ _default_values = {
         'cacert': '/etc/pki/pulp/qpid/ca.crt',
         'keyfile': '/etc/pki/pulp/qpid/client.crt',
         'certfile': '/etc/pki/pulp/qpid/client.crt',
+        'applicability_chunk_size': '0',
+        'worker_selection': 'least-queued',
+        'max_reservations_per_worker': '1',
+        'worker_weights': '',
+        'schedule_jitter': '0',
+        'max_dispatch_per_tick': '0',
+        'compression_workers': '1',
     },
 }
 
@@ -7,14 +7,24 @@ from nectar.listener import DownloadEventListener
 from nectar.report import DownloadReport as NectarDownloadReport
 from nectar.request import DownloadRequest
 
+from pulp.common.util import run_concurrently
+from pulp.plugins.util.misc import paginate
 from pulp.server.content.sources.model import ContentSource, PrimarySource, \
-    DownloadReport, DownloadDetails, RefreshReport
+    DownloadReport, DownloadDetails, RefreshReport, Request
 from pulp.server.managers import factory as managers
 
 
 log = getLogger(__name__)
 
 
+# The number of requests for which content sources are found together.
+FIND_SOURCES_PAGE_SIZE = 500
+
+# The maximum number of content sources refreshed concurrently.
+# Each source refreshes its URLs using up to max_concurrent threads.
+REFRESH_THREADS = 4
+
+
 class ContentContainer(object):
     """
     The content container represents a virtual collection of content that is
@@ -56,30 +66,39 @@ class ContentContainer(object):
         report = batch.download()
         return report
 
-    def refresh(self, canceled, force=False):
+    def refresh(self, canceled, force=False, threads=REFRESH_THREADS):
         """
         Refresh the content catalog using available content sources.
+        Content sources are refreshed concurrently.
         :param canceled: An event that indicates the refresh has been canceled.
+            Content sources for which the refresh has not started are skipped.
         :type canceled: threading.Event
         :param force: Force refresh of content sources with unexpired catalog entries.
         :type force: bool
+        :param threads: The maximum number of content sources refreshed concurrently.
+        :type threads: int
         :return: A list of refresh reports.
         :rtype: list of: pulp.server.content.sources.model.RefreshReport
         """
         reports = []
         catalog = managers.content_catalog_manager()
-        for source_id, source in self.sources.items():
+
+        def refresh(item):
+            source_id, source = item
             if canceled.is_set():
-                break
-            if force or not catalog.has_entries(source_id):
-                try:
-                    report = source.refresh(canceled)
-                    reports.extend(report)
-                except Exception, e:
-                    log.error('refresh %s, failed: %s', source_id, e)
-                    report = RefreshReport(source_id, '')
-                    report.errors.append(str(e))
-                    reports.append(report)
+                return []
+            if not force and catalog.has_entries(source_id):
+                return []
+            try:
+                return list(source.refresh(canceled))
+            except Exception, e:
+                log.error('refresh %s, failed: %s', source_id, e)
+                report = RefreshReport(source_id, '')
+                report.errors.append(str(e))
+                return [report]
+
+        for source_reports in run_concurrently(refresh, self.sources.items(), threads):
+            reports.extend(source_reports)
         catalog.purge_expired()
         return reports
 
@@ -351,12 +370,15 @@ class Batch(object):
         report.total_sources = len(self.sources)
 
         try:
-            for request in self.requests:
+            for page in paginate(self.requests, FIND_SOURCES_PAGE_SIZE):
                 if self.is_canceled:
                     break
-                request.find_sources(self.primary, self.sources)
-                self.dispatch(request)
-                count += 1
+                Request.find_all_sources(page, self.primary, self.sources)
+                for request in page:
+                    if self.is_canceled:
+                        break
+                    self.dispatch(request)
+                    count += 1
         except Exception:
             self.canceled.set()
             raise
@@ -15,9 +15,11 @@ import re
 
 from urlparse import urljoin
 from logging import getLogger
+from uuid import uuid4
 from ConfigParser import ConfigParser
 
 from pulp.common.constants import PRIMARY_ID
+from pulp.common.util import run_concurrently
 from pulp.plugins.conduits.cataloger import CatalogerConduit
 from pulp.plugins.loader import api as plugins
 from pulp.server.content.sources import constants
@@ -34,6 +36,7 @@ PATHS_REGEX = re.compile(r'\s+')
 REFRESHING = 'Refreshing [%s] url:%s'
 REFRESH_SUCCEEDED = 'Refresh [%s] succeeded.  Added: %d, Deleted: %d'
 REFRESH_FAILED = 'Refresh [%s] url: %s, failed: %s'
+STALE_PURGED = 'Refresh [%s] completed.  Purged: %d stale entries'
 
 
 class Request(object):
@@ -80,6 +83,24 @@ class Request(object):
         self.errors = []
         self.data = None
 
+    @staticmethod
+    def find_all_sources(requests, primary, alternates):
+        """
+        Find and set the list of content sources for each of the specified
+        requests.  The result is the same as calling find_sources() on each
+        request but the content catalog is searched in bulk.
+        :param requests: A list of requests.
+        :type requests: list of: Request
+        :param primary: The primary content source.
+        :type primary: ContentSource
+        :param alternates: A list of alternative sources.
+        :type list of: ContentSource
+        """
+        catalog = managers.content_catalog_manager()
+        entries = catalog.find_all([(r.type_id, r.unit_key) for r in requests])
+        for request, matched in zip(requests, entries):
+            request.set_sources(primary, alternates, matched)
+
     def find_sources(self, primary, alternates):
         """
         Find and set the list of content sources in the order they are to
@@ -90,9 +111,24 @@ class Request(object):
         :param alternates: A list of alternative sources.
         :type list of: ContentSource
         """
-        resolved = [(primary, self.url)]
         catalog = managers.content_catalog_manager()
-        for entry in catalog.find(self.type_id, self.unit_key):
+        self.set_sources(primary, alternates, catalog.find(self.type_id, self.unit_key))
+
+    def set_sources(self, primary, alternates, entries):
+        """
+        Set the list of content sources in the order they are to be used to
+        satisfy the request using content catalog entries matching the request.
+        The alternate sources are ordered by priority.  The primary content
+        source is always last.
+        :param primary: The primary content source.
+        :type primary: ContentSource
+        :param alternates: A list of alternative sources.
+        :type list of: ContentSource
+        :param entries: The content catalog entries matching the request.
+        :type entries: list
+        """
+        resolved = [(primary, self.url)]
+        for entry in entries:
             source_id = entry[constants.SOURCE_ID]
             source = alternates.get(source_id)
             if source is None:
@@ -224,7 +260,8 @@ class ContentSource(object):
         :return: The download concurrency.
         :rtype: int
         """
-        return int(self.descriptor[constants.MAX_CONCURRENT])
+        max_concurrent = self.descriptor.get(constants.MAX_CONCURRENT)
+        return int(max_concurrent or DEFAULT[constants.MAX_CONCURRENT])
 
     @property
     def urls(self):
@@ -250,13 +287,15 @@ class ContentSource(object):
             url_list.append(url)
         return url_list
 
-    def get_conduit(self):
+    def get_conduit(self, generation=None):
         """
         Get a plugin conduit.
+        :param generation: The (optional) refresh generation.
+        :type generation: str
         :return: A plugin conduit.
         :rtype CatalogerConduit
         """
-        return CatalogerConduit(self.id, self.expires)
+        return CatalogerConduit(self.id, self.expires, generation)
 
     def get_cataloger(self):
         """
@@ -284,33 +323,58 @@ class ContentSource(object):
         """
         Refresh the content catalog using the cataloger plugin as
         defined by the "type" descriptor property.
+        The URLs are refreshed concurrently using up to max_concurrent threads.
+        Entries are added under a new refresh generation.  Entries contributed
+        by earlier refreshes are purged only after all of the URLs have been
+        refreshed successfully so the catalog is never partially populated.
         :param cancel_event: An event that indicates the refresh has been canceled.
+            URLs for which the refresh has not started are skipped.
         :type cancel_event: threading.Event
         :return: The list of refresh reports.
         :rtype: list of: RefreshReport
         """
-        reports = []
-        conduit = self.get_conduit()
-        plugin = self.get_cataloger()
-        for url in self.urls:
+        generation = uuid4().hex
+
+        def refresh(url):
             if cancel_event.isSet():
-                break
-            conduit.reset()
-            report = RefreshReport(self.id, url)
-            log.info(REFRESHING, self.id, url)
-            try:
-                plugin.refresh(conduit, self.descriptor, url)
-                log.info(REFRESH_SUCCEEDED, self.id, conduit.added_count, conduit.deleted_count)
-                report.succeeded = True
-                report.added_count = conduit.added_count
-                report.deleted_count = conduit.deleted_count
-            except Exception, e:
-                log.error(REFRESH_FAILED, self.id, url, e)
-                report.errors.append(str(e))
-            finally:
-                reports.append(report)
+                return
+            return self._refresh(url, generation)
+
+        urls = self.urls
+        reports = [r for r in run_concurrently(refresh, urls, self.max_concurrent) if r]
+        if reports and len(reports) == len(urls) and all(r.succeeded for r in reports):
+            conduit = self.get_conduit(generation)
+            purged = conduit.purge_stale()
+            log.info(STALE_PURGED, self.id, purged)
         return reports
 
+    def _refresh(self, url, generation):
+        """
+        Refresh the content catalog using the specified URL.
+        Each URL is refreshed using its own plugin instance and conduit so
+        that URLs may be refreshed concurrently.
+        :param url: The URL for the content source.
+        :type url: str
+        :param generation: The refresh generation.
+        :type generation: str
+        :return: The refresh report.
+        :rtype: RefreshReport
+        """
+        report = RefreshReport(self.id, url)
+        log.info(REFRESHING, self.id, url)
+        try:
+            conduit = self.get_conduit(generation)
+            plugin = self.get_cataloger()
+            plugin.refresh(conduit, self.descriptor, url)
+            log.info(REFRESH_SUCCEEDED, self.id, conduit.added_count, conduit.deleted_count)
+            report.succeeded = True
+            report.added_count = conduit.added_count
+            report.deleted_count = conduit.deleted_count
+        except Exception, e:
+            log.error(REFRESH_FAILED, self.id, url, e)
+            report.errors.append(str(e))
+        return report
+
     def dict(self):
         """
         Dictionary representation.
@@ -96,3 +96,39 @@ class Permission(Model):
 
         self.resource = resource
         self.users = users or []
+
+
+class AuthorizationVersion(Model):
+    """
+    Counter that changes whenever users, roles or permissions change. Processes
+    that cache authorization data compare it against the version they loaded.
+    The collection holds a single document and is never instantiated.
+
+    @ivar version: incremented on every change
+    @type version: int
+    """
+
+    collection_name = 'authorization_version'
+    unique_indices = ()
+
+    DOCUMENT_ID = 'authorization'
+
+    @classmethod
+    def bump(cls):
+        """
+        Invalidate cached authorization data in every process. Call this after
+        the change has been written.
+        """
+        cls.get_collection().update({'_id': cls.DOCUMENT_ID}, {'$inc': {'version': 1}},
+                                    upsert=True, safe=True)
+
+    @classmethod
+    def current(cls):
+        """
+        @return: the current version
+        @rtype:  int
+        """
+        document = cls.get_collection().find_one({'_id': cls.DOCUMENT_ID})
+        if document is None:
+            return 0
+        return document['version']
@@ -75,7 +75,7 @@ class ScheduledCall(Model):
     Serialized scheduled call request
     """
     USER_UPDATE_FIELDS = frozenset(['iso_schedule', 'args', 'kwargs', 'enabled',
-                                    'failure_threshold'])
+                                    'failure_threshold', 'jitter'])
 
     collection_name = 'scheduled_calls'
     unique_indices = ()
@@ -85,7 +85,7 @@ class ScheduledCall(Model):
                  schedule=None, args=None, kwargs=None, principal=None, last_updated=None,
                  consecutive_failures=0, enabled=True, failure_threshold=None,
                  last_run_at=None, first_run=None, remaining_runs=None, id=None,
-                 tags=None, name=None, options=None, resource=None):
+                 tags=None, name=None, options=None, resource=None, jitter=None):
         """
         :param iso_schedule:        string representing the schedule in ISO8601 format
         :type  iso_schedule:        basestring
@@ -153,6 +153,10 @@ class ScheduledCall(Model):
                                     repo, and this collection will be searched for that resource
                                     string.
         :type  resource:            basestring
+        :param jitter:              maximum number of seconds by which the scheduler may delay
+                                    running this schedule past the time it is due. If None, the
+                                    [tasks] schedule_jitter server setting is used.
+        :type  jitter:              int or NoneType
         """
         if id is None:
             # this creates self._id and self.id
@@ -179,6 +183,7 @@ class ScheduledCall(Model):
         self.enabled = enabled
         self.failure_threshold = failure_threshold
         self.iso_schedule = iso_schedule
+        self.jitter = jitter
         self.kwargs = kwargs or {}
         self.last_run_at = last_run_at
         self.last_updated = last_updated or time.time()
@@ -260,6 +265,7 @@ class ScheduledCall(Model):
             'first_run': self.first_run,
             'kwargs': self.kwargs,
             'iso_schedule': self.iso_schedule,
+            'jitter': self.jitter,
             'last_run_at': self.last_run_at,
             'last_updated': self.last_updated,
             'next_run': self.calculate_next_run(),
@@ -131,3 +131,39 @@ class ReservedResource(Model):
         self.get_collection().save(
             {'_id': self.task_id, 'resource_id': self.resource_id, 'worker_name': self.worker_name},
             safe=True)
+
+
+class ReloadRequest(Model):
+    """
+    Instances of this class ask the resource manager to reload its view of the workers and their
+    reservations from the database. One is saved when a change in reservations or workers could
+    not be announced to the resource manager on the broker.
+
+    :ivar event:    The change that was not announced
+    :type event:    basestring
+    :ivar name:     The task_id of the released reservation or the name of the worker
+    :type name:     basestring
+    """
+    collection_name = 'resource_manager_reloads'
+    unique_indices = tuple()
+
+    def __init__(self, event, name):
+        """
+        :param event:   The change that was not announced
+        :type  event:   basestring
+        :param name:    The task_id of the released reservation or the name of the worker
+        :type  name:    basestring
+        """
+        super(ReloadRequest, self).__init__()
+
+        self.event = event
+        self.name = name
+
+        # We don't need this
+        del self['id']
+
+    def save(self):
+        """
+        Save this ReloadRequest to the database.
+        """
+        self.get_collection().save(self, safe=True)
@@ -4,6 +4,7 @@ from gettext import gettext as _
 import logging
 
 from pulp.plugins.loader import api as plugin_api
+from pulp.plugins.types import database as types_database
 from pulp.server.db import connection as db_connection
 from pulp.server.managers import factory as manager_factory
 
@@ -26,6 +27,9 @@ def initialize():
 
     db_connection.initialize()
 
+    # Load the content type definitions once rather than on every lookup
+    types_database.cache.load()
+
     # This is here temporarily, so that we can run the monkey patches for qpid and stuff
     import kombu.transport.qpid
 
@@ -5,6 +5,7 @@ import oauth2
 
 from pulp.server.auth import ldap_connection
 from pulp.server.config import config
+from pulp.server.db.model.auth import User
 from pulp.server.db.model.consumer import Consumer
 from pulp.server.exceptions import PulpException
 from pulp.server.managers import factory
@@ -43,12 +44,32 @@ class AuthenticationManager(object):
             return None
 
         if password is not None:
-            if not factory.password_manager().check_password(user['password'], password):
+            password_manager = factory.password_manager()
+            if not password_manager.check_password(user['password'], password, username):
                 _logger.debug('Password for user [%s] was incorrect' % username)
                 return None
+            if password_manager.needs_upgrade(user['password']):
+                self._upgrade_password(user, password)
 
         return user
 
+    def _upgrade_password(self, user, password):
+        """
+        Re-hash a password stored in an older format now that the plain text
+        password is known. The entry is only replaced if it has not been
+        changed since it was read.
+
+        :param user: user whose password was just verified
+        :type  user: L{pulp.server.db.model.auth.User}
+        :param password: the verified password
+        :type  password: str
+        """
+        hashed = factory.password_manager().hash_password(password)
+        User.get_collection().update({'login': user['login'], 'password': user['password']},
+                                     {'$set': {'password': hashed}}, safe=True)
+        user['password'] = hashed
+        _logger.debug('Upgraded the password hash for user [%s]' % user['login'])
+
     def _check_username_password_ldap(self, username, password=None):
         """
         Check a username and password against the ldap server.
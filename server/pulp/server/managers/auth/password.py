@@ -5,13 +5,136 @@ Functions taken from stackoverflow.com : http://tinyurl.com/2f6gx7s
 """
 
 from hmac import HMAC
+import hashlib
+import os
 import random
+import threading
+import time
 
 from pulp.server.compat import digestmod
 
 
 NUM_ITERATIONS = 5000
 
+# Passwords hashed with the C-backed PBKDF2 are stored as
+# "pbkdf2_sha256$<iterations>$<salt>$<hash>"; entries without the prefix are
+# "<salt>,<hash>" as produced by the original iterated HMAC.
+PBKDF2_PREFIX = 'pbkdf2_sha256'
+PBKDF2_ITERATIONS = NUM_ITERATIONS
+
+# hashlib.pbkdf2_hmac is only available in python 2.7.8 and later
+_pbkdf2_hmac = getattr(hashlib, 'pbkdf2_hmac', None)
+
+# Successful verifications are remembered for a short time so that clients
+# sending basic auth on every request don't pay for the key derivation each time.
+VERIFICATION_CACHE_TTL = 30
+VERIFICATION_CACHE_SIZE = 1024
+
+_BLOCK_SIZE = digestmod().block_size
+_TRANS_5C = ''.join(chr(x ^ 0x5C) for x in xrange(256))
+_TRANS_36 = ''.join(chr(x ^ 0x36) for x in xrange(256))
+
+
+class VerificationCache(object):
+    """
+    Bounded, thread-safe cache of successful password verifications. Entries
+    expire after the TTL and the least recently used entry is evicted when the
+    cache is full.
+
+    Plain text passwords are never stored; entries are keyed by the login and
+    an HMAC of the password under a key that exists only in this process. Each
+    entry remembers the stored password entry it was verified against, so a
+    password changed by another process is never matched.
+    """
+
+    def __init__(self, ttl=VERIFICATION_CACHE_TTL, size=VERIFICATION_CACHE_SIZE):
+        """
+        :param ttl: seconds a verification is remembered
+        :type  ttl: int
+        :param size: maximum number of verifications remembered
+        :type  size: int
+        """
+        self.ttl = ttl
+        self.size = size
+        self._key = os.urandom(32)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _digest(self, plain_password):
+        if isinstance(plain_password, unicode):
+            plain_password = plain_password.encode('utf-8')
+        return HMAC(self._key, plain_password, digestmod).digest()
+
+    def contains(self, login, saved_password_entry, plain_password):
+        """
+        :return: True if the password was recently verified against the stored entry
+        :rtype:  bool
+        """
+        key = (login, self._digest(plain_password))
+        now = time.time()
+        self._lock.acquire()
+        try:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry[1] <= now or entry[0] != saved_password_entry:
+                del self._entries[key]
+                return False
+            entry[2] = now
+            return True
+        finally:
+            self._lock.release()
+
+    def add(self, login, saved_password_entry, plain_password):
+        """
+        Remember a successful verification.
+        """
+        if self.size <= 0 or self.ttl <= 0:
+            return
+        key = (login, self._digest(plain_password))
+        now = time.time()
+        self._lock.acquire()
+        try:
+            if key not in self._entries and len(self._entries) >= self.size:
+                self._evict(now)
+            self._entries[key] = [saved_password_entry, now + self.ttl, now]
+        finally:
+            self._lock.release()
+
+    def invalidate(self, login):
+        """
+        Forget all verifications for the given login.
+        """
+        self._lock.acquire()
+        try:
+            for key in [k for k in self._entries if k[0] == login]:
+                del self._entries[key]
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._entries.clear()
+        finally:
+            self._lock.release()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, now):
+        # called with the lock held; drop expired entries first and fall back
+        # to the least recently used one
+        expired = [k for k, v in self._entries.iteritems() if v[1] <= now]
+        for key in expired:
+            del self._entries[key]
+        if len(self._entries) >= self.size:
+            oldest = min(self._entries, key=lambda k: self._entries[k][2])
+            del self._entries[oldest]
+
+
+_verified = VerificationCache()
+
 
 class PasswordManager(object):
     """
@@ -21,20 +144,83 @@ class PasswordManager(object):
         return "".join(chr(random.randrange(256)) for i in xrange(num_bytes))
 
     def pbkdf_sha256(self, password, salt, iterations):
-        result = password
-        for i in xrange(iterations):
-            result = HMAC(result, salt, digestmod).digest()  # use HMAC to apply the salt
+        """
+        Repeatedly apply HMAC-SHA256 to the salt, keyed with the previous result.
+        This is the scheme used by the "<salt>,<hash>" entries.
+
+        After the first round the key is always a digest, which is shorter than
+        the block size, so the HMAC pads are computed inline rather than through
+        an HMAC object each round. The result is identical to HMAC(result, salt).
+        """
+        if iterations <= 0:
+            return password
+        result = HMAC(password, salt, digestmod).digest()
+        padding = '\x00' * (_BLOCK_SIZE - len(result))
+        for i in xrange(iterations - 1):
+            key = result + padding
+            inner = digestmod(key.translate(_TRANS_36) + salt).digest()
+            result = digestmod(key.translate(_TRANS_5C) + inner).digest()
         return result
 
+    def pbkdf2_sha256(self, password, salt, iterations):
+        """
+        Derive a key with PBKDF2-HMAC-SHA256.
+        """
+        if isinstance(password, unicode):
+            password = password.encode('utf-8')
+        return _pbkdf2_hmac('sha256', password, salt, iterations)
+
     def hash_password(self, plain_password):
         salt = self.random_bytes(8)  # 64 bits
-        hashed_password = self.pbkdf_sha256(str(plain_password), salt, NUM_ITERATIONS)
-        # return the salt and hashed password, encoded in base64 and split with ","
-        return salt.encode("base64").strip() + "," + hashed_password.encode("base64").strip()
-
-    def check_password(self, saved_password_entry, plain_password):
-        salt, hashed_password = saved_password_entry.split(",")
-        salt = salt.decode("base64")
-        hashed_password = hashed_password.decode("base64")
-        pbkdbf = self.pbkdf_sha256(plain_password, salt, NUM_ITERATIONS)
-        return hashed_password == pbkdbf
+        if _pbkdf2_hmac is None:
+            hashed_password = self.pbkdf_sha256(str(plain_password), salt, NUM_ITERATIONS)
+            # return the salt and hashed password, encoded in base64 and split with ","
+            return salt.encode("base64").strip() + "," + hashed_password.encode("base64").strip()
+        hashed_password = self.pbkdf2_sha256(plain_password, salt, PBKDF2_ITERATIONS)
+        return '$'.join((PBKDF2_PREFIX, str(PBKDF2_ITERATIONS),
+                         salt.encode("base64").strip(), hashed_password.encode("base64").strip()))
+
+    def check_password(self, saved_password_entry, plain_password, login=None):
+        """
+        Check a password against a stored password entry in either format.
+
+        :param saved_password_entry: password entry stored for the user
+        :type  saved_password_entry: str
+        :param plain_password: password to check
+        :type  plain_password: str
+        :param login: when given, successful verifications for the user are
+                      remembered for a short time and checked first
+        :type  login: str
+
+        :return: True if the password matches
+        :rtype:  bool
+        """
+        if login is not None and _verified.contains(login, saved_password_entry, plain_password):
+            return True
+        if saved_password_entry.startswith(PBKDF2_PREFIX + '$'):
+            if _pbkdf2_hmac is None:
+                return False
+            prefix, iterations, salt, hashed_password = saved_password_entry.split('$')
+            derived = self.pbkdf2_sha256(plain_password, salt.decode('base64'), int(iterations))
+        else:
+            salt, hashed_password = saved_password_entry.split(",")
+            derived = self.pbkdf_sha256(plain_password, salt.decode('base64'), NUM_ITERATIONS)
+        matched = hashed_password.decode('base64') == derived
+        if matched and login is not None:
+            _verified.add(login, saved_password_entry, plain_password)
+        return matched
+
+    def needs_upgrade(self, saved_password_entry):
+        """
+        :return: True if the entry should be re-hashed with hash_password()
+                 the next time the plain text password is available
+        :rtype:  bool
+        """
+        return _pbkdf2_hmac is not None and not saved_password_entry.startswith(PBKDF2_PREFIX + '$')
+
+    def invalidate(self, login):
+        """
+        Forget the remembered verifications for a user. Call this when the
+        user's password changes or the user is deleted.
+        """
+        _verified.invalidate(login)
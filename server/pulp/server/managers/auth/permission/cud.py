@@ -22,7 +22,7 @@ from celery import task
 
 from pulp.server.async.tasks import Task
 from pulp.server.auth import authorization
-from pulp.server.db.model.auth import Permission, User
+from pulp.server.db.model.auth import AuthorizationVersion, Permission, User
 from pulp.server.exceptions import (
     DuplicateResource, InvalidValue, MissingResource, PulpDataException,
     PulpExecutionException)
@@ -53,6 +53,7 @@ class PermissionManager(object):
         # Creation
         create_me = Permission(resource=resource_uri)
         Permission.get_collection().save(create_me, safe=True)
+        AuthorizationVersion.bump()
 
         # Retrieve the permission to return the SON object
         created = Permission.get_collection().find_one({'resource': resource_uri})
@@ -88,6 +89,7 @@ class PermissionManager(object):
             raise PulpDataException(_("Update Keyword [%s] is not supported" % key))
 
         Permission.get_collection().save(found, safe=True)
+        AuthorizationVersion.bump()
 
     @staticmethod
     def delete_permission(resource_uri):
@@ -110,6 +112,7 @@ class PermissionManager(object):
             raise MissingResource(resource_uri)
 
         Permission.get_collection().remove({'resource': resource_uri}, safe=True)
+        AuthorizationVersion.bump()
 
     @staticmethod
     def grant(resource, login, operations):
@@ -149,6 +152,7 @@ class PermissionManager(object):
             current_ops.append(o)
 
         Permission.get_collection().save(permission, safe=True)
+        AuthorizationVersion.bump()
 
     @staticmethod
     def revoke(resource, login, operations):
@@ -194,6 +198,7 @@ class PermissionManager(object):
             return
 
         Permission.get_collection().save(permission, safe=True)
+        AuthorizationVersion.bump()
 
     def grant_automatic_permissions_for_resource(self, resource):
         """
@@ -262,6 +267,7 @@ class PermissionManager(object):
             else:
                 # Delete entire permission if there are no more users
                 Permission.get_collection().remove({'resource': permission['resource']}, safe=True)
+        AuthorizationVersion.bump()
 
     def operation_name_to_value(self, name):
         """
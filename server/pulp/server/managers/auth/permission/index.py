@@ -0,0 +1,182 @@
+"""
+Contains the per-process index used to answer authorization checks without
+querying the permissions collection for every prefix of a resource path.
+
+The index is rebuilt whenever the authorization version stored in the
+database changes; see pulp.server.db.model.auth.AuthorizationVersion.
+"""
+
+from gettext import gettext as _
+import logging
+import threading
+
+from pulp.server.db.model.auth import AuthorizationVersion, Permission, User
+from pulp.server.exceptions import MissingResource
+from pulp.server.managers.auth.role.cud import SUPER_USER_ROLE
+
+
+_logger = logging.getLogger(__name__)
+
+# Indexes covering more resources than this are not built; authorization falls
+# back to querying the database for each resource prefix.
+MAX_RESOURCES = 50000
+
+
+class _Node(object):
+    """
+    Node in the resource prefix tree; one node per path segment.
+    """
+
+    __slots__ = ('children', 'users')
+
+    def __init__(self):
+        self.children = {}
+        self.users = None
+
+
+class PermissionIndex(object):
+    """
+    Prefix tree of resource path segments to the operations each user is
+    granted on that resource, along with the known users and super users.
+    Operations granted through roles are stored in the permissions collection
+    as well, so the index is built from the users and permissions collections.
+    """
+
+    def __init__(self, version, users, permissions):
+        """
+        :param version: authorization version the documents were read at
+        :type  version: int
+        :param users: user documents with the login and roles fields
+        :type  users: iterable of dict
+        :param permissions: permission documents
+        :type  permissions: iterable of dict
+        """
+        self.version = version
+        self.logins = set()
+        self.super_users = set()
+        self.resource_count = 0
+        self.root = _Node()
+        for user in users:
+            self.logins.add(user['login'])
+            if SUPER_USER_ROLE in user.get('roles', []):
+                self.super_users.add(user['login'])
+        for permission in permissions:
+            parts = self._split(permission['resource'])
+            # only resources in the form the lookups use can ever match
+            if permission['resource'] != ('/%s/' % '/'.join(parts) if parts else '/'):
+                continue
+            node = self.root
+            for part in parts:
+                node = node.children.setdefault(part, _Node())
+            node.users = dict((u['username'], frozenset(u['permissions']))
+                              for u in permission['users'])
+            self.resource_count += 1
+
+    @staticmethod
+    def _split(resource):
+        return [p for p in resource.split('/') if p]
+
+    def is_superuser(self, login):
+        """
+        :raise MissingResource: if the user does not exist
+        """
+        if login not in self.logins:
+            raise MissingResource(login)
+        return login in self.super_users
+
+    def is_authorized(self, resource, login, operation):
+        """
+        :return: True if the operation is granted to the user on the resource
+                 or on any of its parent resources
+        :rtype:  bool
+        """
+        node = self.root
+        if node.users is not None and operation in node.users.get(login, ()):
+            return True
+        for part in self._split(resource):
+            node = node.children.get(part)
+            if node is None:
+                return False
+            if node.users is not None and operation in node.users.get(login, ()):
+                return True
+        return False
+
+
+class PermissionCache(object):
+    """
+    Holds the permission index for this process and keeps hit rate statistics.
+    A lookup is a hit when the index is current and a miss when it has to be
+    rebuilt or the database is queried instead.
+    """
+
+    def __init__(self, max_resources=MAX_RESOURCES):
+        self.max_resources = max_resources
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self._version = None
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        :return: an index matching the current authorization version, or None
+                 if the permissions exceed the size cap
+        :rtype:  PermissionIndex or None
+        """
+        version = AuthorizationVersion.current()
+        if self._version == version and self._index is not None:
+            self.hits += 1
+            return self._index
+        self.misses += 1
+        self._lock.acquire()
+        try:
+            if self._version != version:
+                self._index = self._build(version)
+                self._version = version
+            return self._index
+        finally:
+            self._lock.release()
+
+    def _build(self, version):
+        permissions = Permission.get_collection()
+        count = permissions.count()
+        if count > self.max_resources:
+            _logger.debug(_('Not indexing %(n)d permissions; the limit is %(m)d') %
+                          {'n': count, 'm': self.max_resources})
+            return None
+        users = User.get_collection().find(fields=['login', 'roles'])
+        index = PermissionIndex(version, users, permissions.find())
+        self.rebuilds += 1
+        _logger.debug(_('Indexed %(n)d permissions at version %(v)d; hit rate %(r).2f') %
+                      {'n': index.resource_count, 'v': version, 'r': self.hit_rate()})
+        return index
+
+    def hit_rate(self):
+        """
+        :return: fraction of lookups answered by a current index
+        :rtype:  float
+        """
+        total = self.hits + self.misses
+        if total == 0:
+            return 0.0
+        return float(self.hits) / total
+
+    def stats(self):
+        """
+        :return: lookup statistics for this process
+        :rtype:  dict
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'rebuilds': self.rebuilds,
+                'hit_rate': self.hit_rate()}
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._version = None
+            self._index = None
+        finally:
+            self._lock.release()
+
+
+cache = PermissionCache()
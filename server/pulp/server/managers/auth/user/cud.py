@@ -10,7 +10,7 @@ from celery import task
 
 from pulp.server import config
 from pulp.server.async.tasks import Task
-from pulp.server.db.model.auth import User
+from pulp.server.db.model.auth import AuthorizationVersion, User
 from pulp.server.exceptions import (PulpDataException, DuplicateResource, InvalidValue,
                                     MissingResource)
 from pulp.server.managers import factory
@@ -74,6 +74,7 @@ class UserManager(object):
         # Creation
         create_me = User(login=login, password=hashed_password, name=name, roles=roles)
         User.get_collection().save(create_me, safe=True)
+        AuthorizationVersion.bump()
 
         # Grant permissions
         permission_manager = factory.permission_manager()
@@ -142,6 +143,8 @@ class UserManager(object):
             raise InvalidValue(invalid_values)
 
         User.get_collection().save(user, safe=True)
+        if 'password' in delta:
+            factory.password_manager().invalidate(login)
 
         # Retrieve the user to return the SON object
         updated = User.get_collection().find_one({'login': login})
@@ -179,6 +182,8 @@ class UserManager(object):
         permission_manager.revoke_all_permissions_from_user(login)
 
         User.get_collection().remove({'login': login}, safe=True)
+        AuthorizationVersion.bump()
+        factory.password_manager().invalidate(login)
 
     def ensure_admin(self):
         """
@@ -7,6 +7,7 @@ from gettext import gettext as _
 from pulp.server.db.model.auth import User, Permission, Role
 from pulp.server.exceptions import PulpDataException, MissingResource
 from pulp.server.managers import factory
+from pulp.server.managers.auth.permission import index as permission_index
 from pulp.server.managers.auth.role.cud import SUPER_USER_ROLE
 
 
@@ -95,7 +96,9 @@ class UserQueryManager(object):
 
     def is_authorized(self, resource, login, operation):
         """
-        Check to see if a user is authorized to perform an operation on a resource
+        Check to see if a user is authorized to perform an operation on a resource.
+        The check is answered from this process's permission index unless there
+        are too many permissions to index.
 
         @type resource: str
         @param resource: pulp resource path
@@ -110,6 +113,11 @@ class UserQueryManager(object):
         @return: True if the user is authorized for the operation on the resource,
                  False otherwise
         """
+        index = permission_index.cache.get()
+        if index is not None:
+            return (index.is_superuser(login) or
+                    index.is_authorized(resource, login, operation))
+
         if self.is_superuser(login):
             return True
 
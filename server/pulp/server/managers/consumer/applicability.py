@@ -4,14 +4,19 @@ Contains content applicability management classes
 
 from gettext import gettext as _
 from logging import getLogger
+import time
 
-from celery import task
+from celery import chord, task
+from pymongo.errors import DuplicateKeyError
 
 from pulp.plugins.conduits.profiler import ProfilerConduit
 from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.loader import api as plugin_api, exceptions as plugin_exceptions
 from pulp.plugins.profiler import Profiler
-from pulp.server.async.tasks import Task
+from pulp.plugins.util.misc import paginate
+from pulp.server.async.tasks import Task, TaskResult
+from pulp.server.compat import BSON
+from pulp.server.config import config
 from pulp.server.db.model.consumer import Bind, RepoProfileApplicability, UnitProfile
 from pulp.server.db.model.criteria import Criteria
 from pulp.server.db.model.repository import Repo
@@ -22,15 +27,34 @@ from pulp.server.managers.consumer.query import ConsumerQueryManager
 _logger = getLogger(__name__)
 
 
+# The number of keys included in each query, and the number of documents included
+# in each insert, made while regenerating applicability.
+REGENERATION_PAGE_SIZE = 1000
+
+# The maximum encoded size in bytes of the documents included in each insert made while
+# regenerating applicability. Every document carries an entire profile, and pymongo
+# versions before 2.6 do not split an insert that exceeds the 16MB message limit.
+REGENERATION_BATCH_BYTES = 4 * 1024 * 1024
+
+
 class ApplicabilityRegenerationManager(object):
     @staticmethod
     def regenerate_applicability_for_consumers(consumer_criteria):
         """
         Regenerate and save applicability data for given updated consumers.
 
+        Regeneration is done in phases. The existing applicability for all of the affected
+        (repo_id, profile_hash) pairs is found in one pass, the repository content types and
+        unit profiles needed for the missing pairs are loaded once, and the newly calculated
+        applicability is written in batches. The time spent in each phase is logged.
+
         :param consumer_criteria: The consumer selection criteria
         :type consumer_criteria: dict
+
+        :return: The time in seconds spent in each phase, keyed by phase name
+        :rtype:  dict
         """
+        timer = _PhaseTimer()
         consumer_criteria = Criteria.from_dict(consumer_criteria)
         consumer_query_manager = managers.consumer_query_manager()
         bind_manager = managers.consumer_bind_manager()
@@ -89,28 +113,63 @@ class ApplicabilityRegenerationManager(object):
                 if consumer_id in consumer_unit_profiles_map:
                     for unit_profile_tuple in consumer_unit_profiles_map[consumer_id]:
                         repo_profile_hashes.add((repo_id, unit_profile_tuple))
-
-        # Iterate through each tuple in repo_profile_hashes set and regenerate applicability,
-        # if it doesn't exist. These are all guaranteed to be unique tuples because of the logic
-        # used to create maps and sets above, eliminating multiple unnecessary queries
-        # to check for existing applicability for same profiles.
-        manager = managers.applicability_regeneration_manager()
-        for repo_id, (profile_hash, content_type) in repo_profile_hashes:
-            # Check if applicability for given profile_hash and repo_id already exists
-            if ApplicabilityRegenerationManager._is_existing_applicability(repo_id, profile_hash):
+        timer.phase('consumers')
+
+        # Find the existing applicability for all of the tuples in repo_profile_hashes at once
+        # and keep only the tuples for which applicability is missing. These are all guaranteed
+        # to be unique tuples because of the logic used to create maps and sets above.
+        existing = ApplicabilityRegenerationManager._get_existing_applicability_keys(
+            [(r_id, p_hash) for r_id, (p_hash, c_type) in repo_profile_hashes])
+        missing = [(r_id, p_hash, c_type) for r_id, (p_hash, c_type) in repo_profile_hashes
+                   if (r_id, p_hash) not in existing]
+        timer.phase('existing')
+
+        # Load the profilers, repository content types and profiles needed to calculate the
+        # missing applicability. Each is loaded once per regeneration rather than once per tuple.
+        profilers = ApplicabilityRegenerationManager._get_applicability_profilers(
+            set(c_type for r_id, p_hash, c_type in missing))
+        missing = [m for m in missing if m[2] in profilers]
+        repo_content_types = ApplicabilityRegenerationManager._get_existing_repo_content_types_map(
+            set(r_id for r_id, p_hash, c_type in missing))
+        missing = [(r_id, p_hash, c_type) for r_id, p_hash, c_type in missing
+                   if set(repo_content_types[r_id]) & profilers[c_type].types]
+        profiles = ApplicabilityRegenerationManager._get_profiles(
+            set(profile_hash_profile_id_map[p_hash] for r_id, p_hash, c_type in missing))
+        timer.phase('load')
+
+        # Calculate the missing applicability and save it in batches
+        writer = _ApplicabilityWriter()
+        for repo_id, profile_hash, content_type in missing:
+            profile = profiles.get(profile_hash_profile_id_map[profile_hash])
+            if profile is None:
+                # The profile was removed since the profile hashes were collected above.
+                continue
+            applicability = profilers[content_type].calculate(content_type, profile, repo_id)
+            if applicability is None:
                 continue
-            # If applicability does not exist, generate applicability data for given profile
-            # and repo id.
-            profile_id = profile_hash_profile_id_map[profile_hash]
-            manager.regenerate_applicability(profile_hash, content_type, profile_id, repo_id)
+            writer.add(profile_hash, repo_id, profile, applicability)
+        writer.flush()
+        timer.phase('regenerate')
+
+        _logger.debug(_('Applicability regenerated for [%(n)d] of [%(t)d] repo profiles: %(p)s') %
+                      {'n': writer.count, 't': len(repo_profile_hashes), 'p': timer})
+        return timer.timings
 
     @staticmethod
     def regenerate_applicability_for_repos(repo_criteria):
         """
         Regenerate and save applicability data affected by given updated repositories.
 
+        When the applicability_chunk_size in the [tasks] section of the server configuration is
+        greater than zero, the existing applicability is partitioned into chunks of at most that
+        many profiles per repository. Each chunk is regenerated by its own unreserved task so that
+        the work is spread across all of the workers, and a final task aggregates the results.
+
         :param repo_criteria: The repo selection criteria
         :type repo_criteria: dict
+
+        :return: When partitioned, a TaskResult listing the aggregating task as spawned
+        :rtype:  pulp.server.async.tasks.TaskResult
         """
         repo_criteria = Criteria.from_dict(repo_criteria)
         repo_query_manager = managers.repo_query_manager()
@@ -119,31 +178,132 @@ class ApplicabilityRegenerationManager(object):
         repo_criteria.fields = ['id']
         repo_ids = [r['id'] for r in repo_query_manager.find_by_criteria(repo_criteria)]
 
+        chunk_size = config.getint('tasks', 'applicability_chunk_size')
+        if chunk_size > 0:
+            return ApplicabilityRegenerationManager._queue_regenerate_applicability_for_repos(
+                repo_ids, chunk_size)
+
         for repo_id in repo_ids:
             # Find all existing applicabilities for given repo_id
             existing_applicabilities = RepoProfileApplicability.get_collection().find(
                 {'repo_id': repo_id})
-            for existing_applicability in existing_applicabilities:
-                # Convert cursor to RepoProfileApplicability object
-                existing_applicability = RepoProfileApplicability(**dict(existing_applicability))
+            ApplicabilityRegenerationManager._regenerate_existing_applicability(
+                repo_id, existing_applicabilities)
+
+    @staticmethod
+    def regenerate_applicability_for_repo_chunk(repo_id, profile_hashes):
+        """
+        Regenerate and save the existing applicability data for a repository and the given
+        profile hashes. This is one chunk of a partitioned regeneration for repositories.
+
+        :param repo_id:        The repo id
+        :type  repo_id:        basestring
+        :param profile_hashes: The hashes of the unit profiles in the chunk
+        :type  profile_hashes: list
+
+        :return: The number of applicabilities regenerated
+        :rtype:  int
+        """
+        query = {'repo_id': repo_id, 'profile_hash': {'$in': profile_hashes}}
+        existing_applicabilities = RepoProfileApplicability.get_collection().find(query)
+        return ApplicabilityRegenerationManager._regenerate_existing_applicability(
+            repo_id, existing_applicabilities)
+
+    @staticmethod
+    def aggregate_applicability_regeneration(chunk_results):
+        """
+        Aggregate the results of the chunks of a partitioned regeneration for repositories.
+
+        :param chunk_results: The values returned by regenerate_applicability_for_repo_chunk
+        :type  chunk_results: list
+
+        :return: The number of chunks and the number of applicabilities regenerated
+        :rtype:  dict
+        """
+        summary = {'chunks': len(chunk_results), 'regenerated': sum(chunk_results)}
+        _logger.info(_('Applicability regenerated for [%(regenerated)d] repo profiles in '
+                       '[%(chunks)d] chunks') % summary)
+        return summary
+
+    @staticmethod
+    def _queue_regenerate_applicability_for_repos(repo_ids, chunk_size):
+        """
+        Partition the existing applicability for the given repositories into chunks and queue
+        a task for each chunk, followed by a task that aggregates the results. Applicability is
+        unique per repository and profile hash, so each is included in exactly one chunk no matter
+        how many consumers share the profile.
+
+        The chunk tasks do not reserve a resource, so that they are not all routed to the worker
+        holding one reservation and run by any available worker. The regeneration is queued by a
+        task holding the repository profile applicability reservation.
+
+        :param repo_ids:   The repo ids
+        :type  repo_ids:   list
+        :param chunk_size: The maximum number of profile hashes in each chunk
+        :type  chunk_size: int
+
+        :return: A TaskResult listing the aggregating task as spawned, or None if there
+                 is no applicability to regenerate
+        :rtype:  pulp.server.async.tasks.TaskResult
+        """
+        collection = RepoProfileApplicability.get_collection()
+        header = []
+        for repo_id in repo_ids:
+            existing_applicabilities = collection.find({'repo_id': repo_id},
+                                                       fields=['profile_hash'])
+            profile_hashes = (a['profile_hash'] for a in existing_applicabilities)
+            for chunk in paginate(profile_hashes, chunk_size):
+                header.append(regenerate_applicability_for_repo_chunk.s(repo_id, list(chunk)))
+        if not header:
+            return
+        async_result = chord(header)(aggregate_applicability_regeneration.s())
+        return TaskResult(spawned_tasks=[async_result])
+
+    @staticmethod
+    def _regenerate_existing_applicability(repo_id, existing_applicabilities):
+        """
+        Regenerate and save the given existing applicability data for a repository.
+
+        :param repo_id:                  The repo id
+        :type  repo_id:                  basestring
+        :param existing_applicabilities: RepoProfileApplicability documents for the repo
+        :type  existing_applicabilities: iterable
+
+        :return: The number of applicabilities regenerated
+        :rtype:  int
+        """
+        regenerated = 0
+        # The repo content types are the same for every applicability in the repo
+        repo_content_types = ApplicabilityRegenerationManager._get_existing_repo_content_types(
+            repo_id)
+        for page in paginate(existing_applicabilities, REGENERATION_PAGE_SIZE):
+            # Convert cursor to RepoProfileApplicability objects
+            page = [RepoProfileApplicability(**dict(a)) for a in page]
+            # Find the unit profiles for the whole page at once
+            unit_profiles = ApplicabilityRegenerationManager._get_unit_profiles_by_hash(
+                set(a['profile_hash'] for a in page))
+            for existing_applicability in page:
                 profile_hash = existing_applicability['profile_hash']
-                unit_profile = UnitProfile.get_collection().find_one({'profile_hash': profile_hash},
-                                                                     fields=['id', 'content_type'])
+                unit_profile = unit_profiles.get(profile_hash)
                 if unit_profile is None:
-                    # Unit profiles change whenever packages are installed or removed on consumers,
-                    # and it is possible that existing_applicability references a UnitProfile
-                    # that no longer exists. This is harmless, as Pulp has a monthly cleanup task
-                    # that will identify these dangling references and remove them.
+                    # Unit profiles change whenever packages are installed or removed on
+                    # consumers, and it is possible that existing_applicability references a
+                    # UnitProfile that no longer exists. This is harmless, as Pulp has a
+                    # monthly cleanup task that will identify these dangling references and
+                    # remove them.
                     continue
 
                 # Regenerate applicability data for given unit_profile and repo id
                 ApplicabilityRegenerationManager.regenerate_applicability(
                     profile_hash, unit_profile['content_type'], unit_profile['id'], repo_id,
-                    existing_applicability)
+                    existing_applicability, repo_content_types)
+                regenerated += 1
+        return regenerated
 
     @staticmethod
     def regenerate_applicability(profile_hash, content_type, profile_id,
-                                 bound_repo_id, existing_applicability=None):
+                                 bound_repo_id, existing_applicability=None,
+                                 repo_content_types=None):
         """
         Regenerate and save applicability data for given profile and bound repo id.
         If existing_applicability is not None, replace it with the new applicability data.
@@ -163,23 +323,25 @@ class ApplicabilityRegenerationManager(object):
 
         :param existing_applicability: existing RepoProfileApplicability object to be replaced
         :type existing_applicability: pulp.server.db.model.consumer.RepoProfileApplicability
+
+        :param repo_content_types: the content types with units in the bound repo, looked up
+                                   when not specified
+        :type repo_content_types: list
         """
-        profiler_conduit = ProfilerConduit()
         # Get the profiler for content_type of given unit_profile
-        profiler, profiler_cfg = ApplicabilityRegenerationManager._profiler(content_type)
+        profiler = _ApplicabilityProfiler.get(content_type)
 
         # Check if the profiler supports applicability, else return
-        if profiler.calculate_applicable_units == Profiler.calculate_applicable_units:
-            # If base class calculate_applicable_units method is called,
-            # skip applicability regeneration
+        if profiler is None:
             return
 
         # Find out which content types have unit counts greater than zero in the bound repo
-        repo_content_types = ApplicabilityRegenerationManager._get_existing_repo_content_types(
-            bound_repo_id)
+        if repo_content_types is None:
+            repo_content_types = ApplicabilityRegenerationManager._get_existing_repo_content_types(
+                bound_repo_id)
         # Get the intersection of existing types in the repo and the types that the profiler
         # handles. If the intersection is not empty, regenerate applicability
-        if (set(repo_content_types) & set(profiler.metadata()['types'])):
+        if set(repo_content_types) & profiler.types:
             # Get the actual profile for existing_applicability or lookup using profile_id
             if existing_applicability:
                 profile = existing_applicability.profile
@@ -187,16 +349,8 @@ class ApplicabilityRegenerationManager(object):
                 unit_profile = UnitProfile.get_collection().find_one({'id': profile_id},
                                                                      fields=['profile'])
                 profile = unit_profile['profile']
-            call_config = PluginCallConfiguration(plugin_config=profiler_cfg,
-                                                  repo_plugin_config=None)
-            try:
-                applicability = profiler.calculate_applicable_units(profile,
-                                                                    bound_repo_id,
-                                                                    call_config,
-                                                                    profiler_conduit)
-            except NotImplementedError:
-                msg = "Profiler for content type [%s] does not support applicability" % content_type
-                _logger.debug(msg)
+            applicability = profiler.calculate(content_type, profile, bound_repo_id)
+            if applicability is None:
                 return
 
             if existing_applicability:
@@ -207,7 +361,7 @@ class ApplicabilityRegenerationManager(object):
                 # Create a new RepoProfileApplicability object and save it in the db
                 RepoProfileApplicability.objects.create(profile_hash,
                                                         bound_repo_id,
-                                                        unit_profile['profile'],
+                                                        profile,
                                                         applicability)
 
     @staticmethod
@@ -231,21 +385,105 @@ class ApplicabilityRegenerationManager(object):
         return repo_content_types_with_non_zero_unit_count
 
     @staticmethod
-    def _is_existing_applicability(repo_id, profile_hash):
+    def _get_existing_repo_content_types_map(repo_ids):
+        """
+        For each of the given repo_ids, find the content_type_ids that have content unit counts
+        greater than 0. Each repository is looked up only once, however many profiles are
+        bound to it.
+
+        :param repo_ids: The repo_ids for the repositories that we wish to know the unit types
+                         contained therein
+        :type  repo_ids: iterable
+        :return:         A dict of lists of content type ids that have unit counts greater than 0,
+                         keyed by repo_id
+        :rtype:          dict
+        """
+        repo_content_types = {}
+        for repo_id in repo_ids:
+            repo_content_types[repo_id] = \
+                ApplicabilityRegenerationManager._get_existing_repo_content_types(repo_id)
+        return repo_content_types
+
+    @staticmethod
+    def _get_existing_applicability_keys(repo_profile_hashes):
+        """
+        Find which of the given (repo_id, profile_hash) pairs already have applicability
+        calculated. The (profile_hash, repo_id) index is queried once per page of profile
+        hashes rather than once per pair.
+
+        :param repo_profile_hashes: A list of (repo_id, profile_hash) tuples
+        :type  repo_profile_hashes: list
+        :return:                    The subset of the given tuples for which applicability exists
+        :rtype:                     set
+        """
+        wanted = set(repo_profile_hashes)
+        repo_ids = list(set(repo_id for repo_id, _ in wanted))
+        profile_hashes = set(profile_hash for _, profile_hash in wanted)
+        existing = set()
+        collection = RepoProfileApplicability.get_collection()
+        for page in paginate(profile_hashes, REGENERATION_PAGE_SIZE):
+            query = {'profile_hash': {'$in': list(page)}, 'repo_id': {'$in': repo_ids}}
+            for applicability in collection.find(query, fields=['repo_id', 'profile_hash']):
+                key = (applicability['repo_id'], applicability['profile_hash'])
+                if key in wanted:
+                    existing.add(key)
+        return existing
+
+    @staticmethod
+    def _get_profiles(profile_ids):
+        """
+        Get the profiles for the given unit profile ids.
+
+        :param profile_ids: unique ids of unit profiles
+        :type  profile_ids: iterable
+        :return:            The profiles keyed by unit profile id
+        :rtype:             dict
+        """
+        profiles = {}
+        collection = UnitProfile.get_collection()
+        for page in paginate(profile_ids, REGENERATION_PAGE_SIZE):
+            for unit_profile in collection.find({'id': {'$in': list(page)}},
+                                                fields=['id', 'profile']):
+                profiles[unit_profile['id']] = unit_profile['profile']
+        return profiles
+
+    @staticmethod
+    def _get_unit_profiles_by_hash(profile_hashes):
         """
-        Check if applicability for given repo and profle hash is already calculated.
+        Get one unit profile for each of the given profile hashes.
 
-        :param repo_id:      repo id
-        :type repo_id:       basestring
-        :param profile_hash: unit profile hash
-        :type profile_hash:  basestring
-        :return:             true if applicability exists, false otherwise
-        :type:               boolean
+        :param profile_hashes: unit profile hashes
+        :type  profile_hashes: iterable
+        :return:               Unit profiles with the id and content_type fields, keyed by
+                               profile hash
+        :rtype:                dict
         """
-        query_params = {'repo_id': repo_id, 'profile_hash': profile_hash}
-        if RepoProfileApplicability.get_collection().find_one(query_params, fields=['_id']):
-            return True
-        return False
+        unit_profiles = {}
+        collection = UnitProfile.get_collection()
+        for page in paginate(profile_hashes, REGENERATION_PAGE_SIZE):
+            query = {'profile_hash': {'$in': list(page)}}
+            for unit_profile in collection.find(query,
+                                                fields=['id', 'content_type', 'profile_hash']):
+                unit_profiles.setdefault(unit_profile['profile_hash'], unit_profile)
+        return unit_profiles
+
+    @staticmethod
+    def _get_applicability_profilers(content_types):
+        """
+        Get the profilers that support applicability for the given content types.
+
+        :param content_types: The content type IDs.
+        :type  content_types: iterable
+        :return:              The profilers keyed by content type. Content types with no
+                              profiler supporting applicability are omitted.
+        :rtype:               dict
+        """
+        profilers = {}
+        for content_type in content_types:
+            profiler = _ApplicabilityProfiler.get(content_type)
+            if profiler is not None:
+                profilers[content_type] = profiler
+        return profilers
 
     @staticmethod
     def _profiler(type_id):
@@ -267,12 +505,162 @@ class ApplicabilityRegenerationManager(object):
         return plugin, cfg
 
 
+class _ApplicabilityProfiler(object):
+    """
+    A profiler that supports applicability, together with its configuration.
+
+    :ivar profiler: The profiler plugin.
+    :type profiler: pulp.plugins.profiler.Profiler
+    :ivar config:   The call configuration passed to the profiler.
+    :type config:   pulp.plugins.config.PluginCallConfiguration
+    :ivar types:    The content types handled by the profiler.
+    :type types:    set
+    """
+
+    @staticmethod
+    def get(content_type):
+        """
+        Get the profiler for the given content type.
+
+        :param content_type: The content type ID.
+        :type  content_type: str
+        :return:             The profiler, or None if the profiler does not support applicability
+        :rtype:              _ApplicabilityProfiler
+        """
+        profiler, profiler_cfg = ApplicabilityRegenerationManager._profiler(content_type)
+        if profiler.calculate_applicable_units == Profiler.calculate_applicable_units:
+            # The base class calculate_applicable_units method does not calculate applicability
+            return None
+        return _ApplicabilityProfiler(profiler, profiler_cfg)
+
+    def __init__(self, profiler, profiler_cfg):
+        """
+        :param profiler:     The profiler plugin.
+        :type  profiler:     pulp.plugins.profiler.Profiler
+        :param profiler_cfg: The profiler plugin configuration.
+        :type  profiler_cfg: dict
+        """
+        self.profiler = profiler
+        self.config = PluginCallConfiguration(plugin_config=profiler_cfg, repo_plugin_config=None)
+        self.types = set(profiler.metadata()['types'])
+
+    def calculate(self, content_type, profile, repo_id):
+        """
+        Calculate the applicability of the units in the given repository to the given profile.
+
+        :param content_type: The profile (unit) type ID.
+        :type  content_type: str
+        :param profile:      The unit profile.
+        :type  profile:      object
+        :param repo_id:      The repo id to calculate applicability against.
+        :type  repo_id:      str
+        :return:             The applicability, or None if the profiler does not support it
+        :rtype:              dict
+        """
+        try:
+            return self.profiler.calculate_applicable_units(profile, repo_id, self.config,
+                                                            ProfilerConduit())
+        except NotImplementedError:
+            msg = "Profiler for content type [%s] does not support applicability" % content_type
+            _logger.debug(msg)
+
+
+class _ApplicabilityWriter(object):
+    """
+    Saves new RepoProfileApplicability documents in batches.
+
+    :ivar count: The number of documents added.
+    :type count: int
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._pending = []
+        self._pending_bytes = 0
+
+    def add(self, profile_hash, repo_id, profile, applicability):
+        """
+        Add a new RepoProfileApplicability document. Documents are saved in batches of
+        at most REGENERATION_PAGE_SIZE documents and REGENERATION_BATCH_BYTES encoded bytes.
+
+        :param profile_hash:  The hash of the profile
+        :type  profile_hash:  basestring
+        :param repo_id:       The repo ID that this applicability data is for
+        :type  repo_id:       basestring
+        :param profile:       The entire profile that resulted in the profile_hash
+        :type  profile:       object
+        :param applicability: A dictionary mapping content_type_ids to lists of applicable
+                              Unit IDs.
+        :type  applicability: dict
+        """
+        document = {'profile_hash': profile_hash, 'repo_id': repo_id,
+                    'profile': profile, 'applicability': applicability}
+        size = len(BSON.encode(document))
+        if self._pending_bytes + size > REGENERATION_BATCH_BYTES:
+            self.flush()
+        self._pending.append(document)
+        self._pending_bytes += size
+        self.count += 1
+        if len(self._pending) >= REGENERATION_PAGE_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Save the pending documents. Documents for which applicability has been saved
+        concurrently by another regeneration are skipped.
+        """
+        if not self._pending:
+            return
+        try:
+            RepoProfileApplicability.get_collection().insert(
+                self._pending, safe=True, continue_on_error=True)
+        except DuplicateKeyError:
+            pass
+        self._pending = []
+        self._pending_bytes = 0
+
+
+class _PhaseTimer(object):
+    """
+    Records the time spent in each phase of a regeneration.
+
+    :ivar timings: The time in seconds spent in each phase, keyed by phase name.
+    :type timings: dict
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._names = []
+        self._started = time.time()
+
+    def phase(self, name):
+        """
+        Mark the end of the named phase, which started when the previous phase ended.
+
+        :param name: The phase name.
+        :type  name: str
+        """
+        now = time.time()
+        self.timings[name] = now - self._started
+        self._names.append(name)
+        self._started = now
+
+    def __str__(self):
+        return ', '.join('%s: %.3fs' % (n, self.timings[n]) for n in self._names)
+
+
 regenerate_applicability_for_consumers = task(
     ApplicabilityRegenerationManager.regenerate_applicability_for_consumers, base=Task,
     ignore_result=True)
 regenerate_applicability_for_repos = task(
     ApplicabilityRegenerationManager.regenerate_applicability_for_repos, base=Task,
     ignore_result=True)
+# The results of the chunks are collected by the aggregating task, so they cannot be ignored.
+regenerate_applicability_for_repo_chunk = task(
+    ApplicabilityRegenerationManager.regenerate_applicability_for_repo_chunk, base=Task)
+aggregate_applicability_regeneration = task(
+    ApplicabilityRegenerationManager.aggregate_applicability_regeneration, base=Task,
+    ignore_result=True)
 
 
 class DoesNotExist(Exception):
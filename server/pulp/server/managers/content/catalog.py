@@ -13,6 +13,7 @@ from logging import getLogger
 
 from pymongo import ASCENDING
 
+from pulp.plugins.util.misc import paginate
 from pulp.server.db.model.content import ContentCatalog
 
 
@@ -24,6 +25,12 @@ log = getLogger(__name__)
 # in the catalog after it has expired.
 GRACE_PERIOD = 3600  # 1 hour.
 
+# The number of locators included in each query made by find_all().
+FIND_PAGE_SIZE = 1000
+
+# The number of entries written by each insert made by add_entries().
+ADD_PAGE_SIZE = 1000
+
 
 class ContentCatalogManager(object):
     """
@@ -42,7 +49,7 @@ class ContentCatalogManager(object):
          included for each source in the result set.
     """
 
-    def add_entry(self, source_id, expires, type_id, unit_key, url):
+    def add_entry(self, source_id, expires, type_id, unit_key, url, generation=None):
         """
         Add an entry to the content catalog.
         :param source_id: A content source ID.
@@ -55,11 +62,42 @@ class ContentCatalogManager(object):
         :type unit_key: dict
         :param url: The download URL.
         :type url: str
+        :param generation: The (optional) refresh generation.
+        :type generation: str
         """
         collection = ContentCatalog.get_collection()
-        entry = ContentCatalog(source_id, expires, type_id, unit_key, url)
+        entry = ContentCatalog(source_id, expires, type_id, unit_key, url, generation)
         collection.insert(entry, safe=True)
 
+    def add_entries(self, source_id, expires, entries, generation=None):
+        """
+        Add many entries to the content catalog.
+        This is the bulk equivalent of add_entry().  The entries are consumed
+        from the iterable in pages and each page is written using a single
+        insert that continues past errors, so the entries need not be held
+        in memory all at once.
+        :param source_id: A content source ID.
+        :type source_id: str
+        :param expires: The entry expiration in seconds.
+        :type expires: int
+        :param entries: An iterable of: (type_id, unit_key, url).
+        :type entries: iterable
+        :param generation: The (optional) refresh generation.
+        :type generation: str
+        :return: The number of entries added.
+        :rtype: int
+        """
+        added = 0
+        collection = ContentCatalog.get_collection()
+        for page in paginate(entries, ADD_PAGE_SIZE):
+            documents = [
+                ContentCatalog(source_id, expires, type_id, unit_key, url, generation)
+                for type_id, unit_key, url in page
+            ]
+            collection.insert(documents, safe=True, continue_on_error=True)
+            added += len(documents)
+        return added
+
     def delete_entry(self, source_id, type_id, unit_key):
         """
         Delete an entry from the content catalog.
@@ -89,6 +127,25 @@ class ContentCatalogManager(object):
         result = collection.remove(query, safe=True)
         return result['n']
 
+    def purge_stale(self, source_id, generation):
+        """
+        Purge (delete) entries from the content catalog belonging to the
+        specified content source by ID that were not added as part of the
+        specified refresh generation.  Used to replace the entries contributed
+        by a content source only once a refresh has completed so that readers
+        never see a partially populated catalog.
+        :param source_id: A content source ID.
+        :type source_id: str
+        :param generation: The current refresh generation.
+        :type generation: str
+        :return: The number of entries purged.
+        :rtype: int
+        """
+        collection = ContentCatalog.get_collection()
+        query = {'source_id': source_id, 'generation': {'$ne': generation}}
+        result = collection.remove(query, safe=True)
+        return result['n']
+
     def purge_expired(self, grace_period=GRACE_PERIOD):
         """
         Purge (delete) expired entries from the content catalog belonging
@@ -148,6 +205,31 @@ class ContentCatalogManager(object):
             newest_by_source[entry['source_id']] = entry
         return newest_by_source.values()
 
+    def find_all(self, units):
+        """
+        Find entries in the content catalog for many units at once.
+        This is the bulk equivalent of find().  Entries are fetched using one
+        query per page of distinct locators instead of one query per unit.  As
+        with find(), only the newest entry for each source is included.
+        :param units: A list of: (type_id, unit_key).
+        :type units: list
+        :return: A list of matching entry lists, in the same order as units.
+        :rtype: list
+        """
+        collection = ContentCatalog.get_collection()
+        locators = [ContentCatalog.get_locator(type_id, unit_key) for type_id, unit_key in units]
+        now = ContentCatalog.get_expiration(0)
+        newest_by_locator = {}
+        for page in paginate(set(locators), FIND_PAGE_SIZE):
+            query = {
+                'locator': {'$in': list(page)},
+                'expiration': {'$gte': now}
+            }
+            for entry in collection.find(query, sort=[('_id', ASCENDING)]):
+                newest_by_source = newest_by_locator.setdefault(entry['locator'], {})
+                newest_by_source[entry['source_id']] = entry
+        return [newest_by_locator.get(locator, {}).values() for locator in locators]
+
     def has_entries(self, source_id):
         """
         Get whether the specified content source has entries in the catalog.
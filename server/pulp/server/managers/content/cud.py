@@ -1,5 +1,7 @@
 import uuid
 
+from pymongo.errors import DuplicateKeyError
+
 from pulp.common import dateutils
 from pulp.plugins.types import database as content_types_db
 from pulp.server.exceptions import InvalidValue
@@ -35,6 +37,43 @@ class ContentManager(object):
         collection.insert(unit_doc, safe=True)
         return unit_id
 
+    def add_content_units(self, content_type, units_metadata):
+        """
+        Add several content units of the same type with a single database call.
+        Units whose unit key collides with a unit already in the database are
+        not added, but do not prevent the remaining units from being added.
+        @param content_type: unique id of content collection
+        @type content_type: str
+        @param units_metadata: metadata of each content unit to add
+        @type units_metadata: list of dict
+        @return: generated ids of the added units, in the same order as the given
+                 metadata; the id is None for each unit that could not be added
+                 because it already exists
+        @rtype: list of str or None
+        """
+        collection = content_types_db.type_units_collection(content_type)
+        last_updated = dateutils.now_utc_timestamp()
+        unit_docs = []
+        for unit_metadata in units_metadata:
+            unit_doc = {
+                '_id': str(uuid.uuid4()),
+                '_content_type_id': content_type,
+                '_last_updated': last_updated
+            }
+            unit_doc.update(unit_metadata)
+            unit_docs.append(unit_doc)
+        unit_ids = [doc['_id'] for doc in unit_docs]
+        if not unit_docs:
+            return unit_ids
+        try:
+            collection.insert(unit_docs, safe=True, continue_on_error=True)
+        except DuplicateKeyError:
+            # everything that could be inserted was; find out which units those were
+            spec = {'_id': {'$in': unit_ids}}
+            inserted = set(unit['_id'] for unit in collection.find(spec, fields=['_id']))
+            unit_ids = [unit_id if unit_id in inserted else None for unit_id in unit_ids]
+        return unit_ids
+
     def update_content_unit(self, content_type, unit_id, unit_metadata_delta):
         """
         Update a content unit's stored metadata.
@@ -7,6 +7,7 @@ import shutil
 from celery import task
 
 from pulp.plugins.types import database as content_types_db
+from pulp.plugins.util.misc import paginate
 from pulp.server import config as pulp_config, exceptions as pulp_exceptions
 from pulp.server.async.tasks import Task
 from pulp.server.db.model.repository import RepoContentUnit
@@ -14,6 +15,9 @@ from pulp.server.db.model.repository import RepoContentUnit
 
 _logger = logging.getLogger(__name__)
 
+# Number of content units checked for repository associations with a single query
+ORPHAN_PAGE_SIZE = 1000
+
 
 class OrphanManager(object):
 
@@ -95,15 +99,24 @@ class OrphanManager(object):
         content_units_collection = content_types_db.type_units_collection(content_type_id)
         repo_content_units_collection = RepoContentUnit.get_collection()
 
-        for content_unit in content_units_collection.find({}, fields=fields):
+        content_units = content_units_collection.find({}, fields=fields)
 
-            repo_content_units_cursor = repo_content_units_collection.find(
-                {'unit_id': content_unit['_id']})
+        # Rather than asking mongo about each unit individually, check a whole page of
+        # units with a single query against the unit_id index and anti-join the results
+        # in memory. This keeps the memory footprint bounded by the page size.
+        for content_units_page in paginate(content_units, ORPHAN_PAGE_SIZE):
+            content_unit_ids = [content_unit['_id'] for content_unit in content_units_page]
 
-            if repo_content_units_cursor.count() > 0:
-                continue
+            spec = {'unit_id': {'$in': content_unit_ids}}
+            associated_unit_ids = set(
+                repo_content_unit['unit_id'] for repo_content_unit in
+                repo_content_units_collection.find(spec, fields=['unit_id']))
 
-            yield content_unit
+            for content_unit in content_units_page:
+                if content_unit['_id'] in associated_unit_ids:
+                    continue
+
+                yield content_unit
 
     @staticmethod
     def generate_orphans_by_type_with_unit_keys(content_type_id):
@@ -202,19 +215,28 @@ class OrphanManager(object):
         :type content_unit_ids: iterable or None
         """
 
+        if content_unit_ids is not None:
+            content_unit_ids = set(content_unit_ids)
+
         content_units_collection = content_types_db.type_units_collection(content_type_id)
+        orphans = OrphanManager.generate_orphans_by_type(content_type_id,
+                                                         fields=['_id', '_storage_path'])
 
-        for content_unit in OrphanManager.generate_orphans_by_type(content_type_id,
-                                                                   fields=['_id', '_storage_path']):
+        for orphans_page in paginate(orphans, ORPHAN_PAGE_SIZE):
 
-            if content_unit_ids is not None and content_unit['_id'] not in content_unit_ids:
-                continue
+            if content_unit_ids is not None:
+                orphans_page = [content_unit for content_unit in orphans_page
+                                if content_unit['_id'] in content_unit_ids]
+                if not orphans_page:
+                    continue
 
-            content_units_collection.remove(content_unit['_id'], safe=False)
+            spec = {'_id': {'$in': [content_unit['_id'] for content_unit in orphans_page]}}
+            content_units_collection.remove(spec, safe=False)
 
-            storage_path = content_unit.get('_storage_path', None)
-            if storage_path is not None:
-                OrphanManager.delete_orphaned_file(storage_path)
+            for content_unit in orphans_page:
+                storage_path = content_unit.get('_storage_path', None)
+                if storage_path is not None:
+                    OrphanManager.delete_orphaned_file(storage_path)
 
     @staticmethod
     def delete_orphaned_file(path):
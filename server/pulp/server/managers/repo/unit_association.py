@@ -7,11 +7,13 @@ import logging
 import sys
 
 from celery import task
+from pymongo.errors import DuplicateKeyError
 import pymongo
 
 from pulp.plugins.conduits.unit_import import ImportUnitConduit
 from pulp.plugins.config import PluginCallConfiguration
 from pulp.plugins.loader import api as plugin_api
+from pulp.plugins.util.misc import paginate
 from pulp.server.async.tasks import Task
 from pulp.server.db.model.criteria import UnitAssociationCriteria
 from pulp.server.db.model.repository import RepoContentUnit
@@ -43,6 +45,9 @@ SORT_DESCENDING = pymongo.DESCENDING
 
 _VALID_DIRECTIONS = (SORT_ASCENDING, SORT_DESCENDING)
 
+# Number of unit IDs checked and associated with a single database call during bulk association
+ASSOCIATE_PAGE_SIZE = 1000
+
 logger = logging.getLogger(__name__)
 
 
@@ -127,7 +132,9 @@ class RepoUnitAssociationManager(object):
         """
         Creates multiple associations between the given repo and content units.
 
-        See associate_unit_by_id for semantics.
+        See associate_unit_by_id for semantics. Existing associations are looked up
+        and new ones inserted a page of IDs at a time, and the repository's unit
+        counts and last unit added timestamp are updated once for the whole call.
 
         @param repo_id: identifies the repo
         @type  repo_id: str
@@ -152,15 +159,41 @@ class RepoUnitAssociationManager(object):
         @raise InvalidType: if the given owner type is not of the valid enumeration
         """
 
-        # There may be a way to batch this in mongo which would be ideal for a
-        # bulk operation like this. But for deadline purposes, this call will
-        # simply loop and call the single method.
+        if owner_type not in _OWNER_TYPES:
+            raise exceptions.InvalidValue(['owner_type'])
+
+        collection = RepoContentUnit.get_collection()
 
         unique_count = 0
-        for unit_id in unit_id_list:
-            if not RepoUnitAssociationManager.association_exists(repo_id, unit_id, unit_type_id):
-                unique_count += 1
-            self.associate_unit_by_id(repo_id, unit_type_id, unit_id, owner_type, owner_id, False)
+        for unit_id_page in paginate(unit_id_list, ASSOCIATE_PAGE_SIZE):
+            # As with associate_unit_by_id, an association made by any owner is
+            # enough to leave the unit alone
+            spec = {'repo_id': repo_id,
+                    'unit_type_id': unit_type_id,
+                    'unit_id': {'$in': list(unit_id_page)}}
+            existing_unit_ids = set(association['unit_id'] for association in
+                                    collection.find(spec, fields=['unit_id']))
+
+            associations = []
+            for unit_id in unit_id_page:
+                if unit_id in existing_unit_ids:
+                    continue
+                # guards against the same ID appearing more than once in the page
+                existing_unit_ids.add(unit_id)
+                associations.append(
+                    RepoContentUnit(repo_id, unit_id, unit_type_id, owner_type, owner_id))
+
+            if not associations:
+                continue
+
+            try:
+                collection.insert(associations, safe=True, continue_on_error=True)
+                unique_count += len(associations)
+            except DuplicateKeyError:
+                # Another caller created some of these associations since they were
+                # looked up; only count the ones this call actually inserted.
+                spec = {'_id': {'$in': [association['_id'] for association in associations]}}
+                unique_count += collection.find(spec).count()
 
         # update the count of associated units on the repo object
         if unique_count:
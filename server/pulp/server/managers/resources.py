@@ -3,12 +3,21 @@ This module contains management functions for the models found in the
 pulp.server.db.model.resources module.
 """
 
+from fnmatch import fnmatch
+from gettext import gettext as _
+import logging
+import time
+
 from pulp.common.constants import SCHEDULER_WORKER_NAME
 from pulp.server.async.celery_instance import RESOURCE_MANAGER_QUEUE
+from pulp.server.config import config
 from pulp.server.db.model import criteria, resources
 from pulp.server.exceptions import NoWorkers
 
 
+_logger = logging.getLogger(__name__)
+
+
 def filter_workers(criteria):
     """
     Return Worker objects that match the given criteria
@@ -86,3 +95,304 @@ def get_unreserved_worker():
     except KeyError:
         # All workers are reserved
         raise NoWorkers()
+
+
+class WorkerSelection(object):
+    """
+    A policy for choosing the worker that is given a reservation for a resource that no worker
+    holds. A worker may hold reservations for up to max_reservations distinct resources; its tasks
+    are queued and run back to back.
+
+    :ivar max_reservations: The maximum number of distinct resources reserved by a worker
+    :type max_reservations: int
+    """
+
+    def __init__(self, max_reservations=1):
+        self.max_reservations = max(max_reservations, 1)
+
+    def limit(self, worker_name):
+        """
+        :param worker_name: The name of a worker
+        :type  worker_name: basestring
+        :return:            The maximum number of distinct resources the worker may reserve
+        :rtype:             int
+        """
+        return self.max_reservations
+
+    def select(self, candidates, table):
+        """
+        Choose one of the workers that may take another reservation.
+
+        :param candidates: The names of the workers below their limit, sorted
+        :type  candidates: list
+        :param table:      The reservations
+        :type  table:      ReservationTable
+        :return:           The chosen worker name
+        :rtype:            basestring
+        """
+        raise NotImplementedError()
+
+
+class LeastQueued(WorkerSelection):
+    """
+    Choose the worker with the fewest outstanding reservations.
+    """
+
+    def select(self, candidates, table):
+        return min(candidates, key=lambda name: table.worker_load.get(name, 0))
+
+
+class RoundRobin(WorkerSelection):
+    """
+    Choose the workers in turn.
+    """
+
+    def __init__(self, max_reservations=1):
+        super(RoundRobin, self).__init__(max_reservations)
+        self.last = None
+
+    def select(self, candidates, table):
+        chosen = candidates[0]
+        if self.last is not None:
+            for name in candidates:
+                if name > self.last:
+                    chosen = name
+                    break
+        self.last = chosen
+        return chosen
+
+
+class CapacityWeighted(WorkerSelection):
+    """
+    Choose the worker with the fewest outstanding reservations relative to its weight. A worker's
+    limit is also scaled by its weight.
+
+    :ivar weights: (pattern, weight) tuples. The first fnmatch pattern that matches the worker name
+                   gives its weight. The weight of other workers is 1.
+    :type weights: list
+    """
+
+    def __init__(self, max_reservations=1, weights=None):
+        super(CapacityWeighted, self).__init__(max_reservations)
+        self.weights = weights or []
+
+    def weight(self, worker_name):
+        for pattern, weight in self.weights:
+            if fnmatch(worker_name, pattern):
+                return weight
+        return 1.0
+
+    def limit(self, worker_name):
+        return max(int(round(self.max_reservations * self.weight(worker_name))), 1)
+
+    def select(self, candidates, table):
+        return min(candidates,
+                   key=lambda name: table.worker_load.get(name, 0) / self.weight(name))
+
+
+WORKER_SELECTION_POLICIES = {
+    'least-queued': LeastQueued,
+    'round-robin': RoundRobin,
+    'capacity-weighted': CapacityWeighted,
+}
+
+
+def parse_worker_weights(value):
+    """
+    Parse worker weights.
+
+    :param value: comma separated <pattern>=<weight> entries
+    :type  value: basestring
+    :return:      (pattern, weight) tuples
+    :rtype:       list
+    :raises ValueError: if an entry is not valid
+    """
+    weights = []
+    for entry in value.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        pattern, weight = entry.rsplit('=', 1)
+        weight = float(weight)
+        if weight <= 0:
+            raise ValueError(entry)
+        weights.append((pattern.strip(), weight))
+    return weights
+
+
+def get_worker_selection():
+    """
+    Build the worker selection policy configured in the [tasks] section of the server
+    configuration. An invalid configuration is logged and the defaults are used.
+
+    :return: The worker selection policy
+    :rtype:  WorkerSelection
+    """
+    try:
+        name = config.get('tasks', 'worker_selection')
+        max_reservations = config.getint('tasks', 'max_reservations_per_worker')
+        if name == 'capacity-weighted':
+            weights = parse_worker_weights(config.get('tasks', 'worker_weights'))
+            return CapacityWeighted(max_reservations, weights)
+        return WORKER_SELECTION_POLICIES[name](max_reservations)
+    except (KeyError, ValueError), e:
+        _logger.error(_('Invalid worker selection configuration: %(e)s') % {'e': e})
+        return LeastQueued()
+
+
+class ReservationTable(object):
+    """
+    An in-memory view of the Workers and the ReservedResource entries held by the resource
+    manager, so that finding a worker for a reserved task does not load every Worker and every
+    ReservedResource from the database. The resource manager creates every reservation and
+    records it with reserved(). Reservations are removed by the workers, and the resource
+    manager applies those with released(). The view is reloaded from the database with load()
+    when workers come or go.
+
+    :ivar workers:      Workers that may be assigned work, keyed by name
+    :type workers:      dict
+    :ivar reservations: The resource_id of each reservation, keyed by task_id
+    :type reservations: dict
+    :ivar resources:    The worker name and the number of reservations for each reserved
+                        resource_id. All reservations of a resource are held by the same worker.
+    :type resources:    dict
+    :ivar worker_load:  The number of reservations held by each worker name
+    :type worker_load:  dict
+    :ivar worker_resources: The number of distinct resources reserved by each worker name
+    :type worker_resources: dict
+    :ivar selection:    The policy choosing workers for resources no worker holds
+    :type selection:    WorkerSelection
+    :ivar loaded:       True when the view reflects the database
+    :type loaded:       bool
+    :ivar loaded_at:    The time.time() the view was last loaded, or None
+    :type loaded_at:    float
+    """
+
+    def __init__(self, selection=None):
+        """
+        :param selection: The worker selection policy. Defaults to the configured policy.
+        :type  selection: WorkerSelection
+        """
+        self.workers = {}
+        self.reservations = {}
+        self.resources = {}
+        self.worker_load = {}
+        self.worker_resources = {}
+        self.selection = selection or get_worker_selection()
+        self.loaded = False
+        self.loaded_at = None
+
+    def load(self):
+        """
+        Load the view from the Worker and ReservedResource collections. Pending ReloadRequests
+        are removed first, so a request saved while loading causes another load.
+        """
+        resources.ReloadRequest.get_collection().remove()
+        self.workers = dict((worker.name, worker) for worker in filter_workers(criteria.Criteria())
+                            if _is_worker(worker.name))
+        self.reservations = {}
+        self.resources = {}
+        self.worker_load = {}
+        self.worker_resources = {}
+        for reservation in resources.ReservedResource.get_collection().find():
+            self.reserved(reservation['_id'], reservation['worker_name'],
+                          reservation['resource_id'])
+        self.loaded = True
+        self.loaded_at = time.time()
+
+    def expired(self, max_age):
+        """
+        :param max_age: The number of seconds a loaded view may be used
+        :type  max_age: float
+        :return:        True if the view is not loaded or was loaded more than max_age seconds ago
+        :rtype:         bool
+        """
+        if not self.loaded or self.loaded_at is None:
+            return True
+        return time.time() - self.loaded_at >= max_age
+
+    @staticmethod
+    def reload_requested():
+        """
+        :return: True if a ReloadRequest was saved since the view was last loaded
+        :rtype:  bool
+        """
+        return resources.ReloadRequest.get_collection().find_one() is not None
+
+    def reserved(self, task_id, worker_name, resource_id):
+        """
+        Record a reservation.
+
+        :param task_id:     The UUID of the task holding the reservation
+        :type  task_id:     basestring
+        :param worker_name: The name of the worker holding the reservation
+        :type  worker_name: basestring
+        :param resource_id: The reserved resource
+        :type  resource_id: basestring
+        """
+        self.reservations[task_id] = resource_id
+        entry = self.resources.get(resource_id)
+        if entry is None:
+            entry = self.resources[resource_id] = [worker_name, 0]
+            self.worker_resources[worker_name] = self.worker_resources.get(worker_name, 0) + 1
+        entry[1] += 1
+        self.worker_load[worker_name] = self.worker_load.get(worker_name, 0) + 1
+
+    def released(self, task_id):
+        """
+        Remove a released reservation. Unknown reservations are ignored.
+
+        :param task_id: The UUID of the task that held the reservation
+        :type  task_id: basestring
+        :return:        True if the reservation was known
+        :rtype:         bool
+        """
+        resource_id = self.reservations.pop(task_id, None)
+        if resource_id is None:
+            return False
+        entry = self.resources[resource_id]
+        worker_name = entry[0]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self.resources[resource_id]
+            self.worker_resources[worker_name] -= 1
+            if self.worker_resources[worker_name] == 0:
+                del self.worker_resources[worker_name]
+        self.worker_load[worker_name] -= 1
+        if self.worker_load[worker_name] == 0:
+            del self.worker_load[worker_name]
+        return True
+
+    def find_worker(self, resource_id):
+        """
+        Find the worker that should run a task reserving resource_id. That is the worker already
+        holding a reservation for the resource, or else a worker chosen by the selection policy
+        among the workers holding fewer distinct reservations than their limit.
+
+        :param resource_id: The resource to be reserved
+        :type  resource_id: basestring
+        :return:            The worker, or None if the task must wait for a reservation to be
+                            released
+        :rtype:             pulp.server.db.model.resources.Worker
+        """
+        entry = self.resources.get(resource_id)
+        if entry is not None:
+            # None if the worker is gone and its reservations are yet to be removed
+            return self.workers.get(entry[0])
+        candidates = sorted(name for name in self.workers
+                            if self.worker_resources.get(name, 0) < self.selection.limit(name))
+        if not candidates:
+            return None
+        return self.workers[self.selection.select(candidates, self)]
+
+
+def request_reload(event, name):
+    """
+    Ask the resource manager to reload its ReservationTable from the database.
+
+    :param event:   The change that could not be announced to the resource manager
+    :type  event:   basestring
+    :param name:    The task_id of the released reservation or the name of the worker
+    :type  name:    basestring
+    """
+    resources.ReloadRequest(event, name).save()
@@ -67,6 +67,18 @@ def get_enabled():
     return ScheduledCall.get_collection().query(criteria)
 
 
+def get_enabled_ids():
+    """
+    Get the IDs of schedules that are enabled. Only the IDs are loaded from the
+    database.
+
+    :return:    set of schedule IDs
+    :rtype:     set
+    """
+    criteria = Criteria(filters={'enabled': True}, fields=['_id'])
+    return set(str(call['_id']) for call in ScheduledCall.get_collection().query(criteria))
+
+
 def get_updated_since(seconds):
     """
     Get schedules that are enabled, that is, their "enabled" attribute is True,
@@ -281,6 +293,9 @@ def validate_updated_schedule_options(options):
     if 'enabled' in options and not _is_valid_enabled_flag(options['enabled']):
         invalid_options.append('enabled')
 
+    if 'jitter' in options and not _is_valid_jitter(options['jitter']):
+        invalid_options.append('jitter')
+
     if not invalid_options:
         return
 
@@ -365,6 +380,25 @@ def _is_valid_remaining_runs(remaining_runs):
     return False
 
 
+def _is_valid_jitter(jitter):
+    """
+    Test that a jitter is either None or a non-negative integer.
+
+    :param jitter: jitter to test
+    :type  jitter: int or None
+    :return: True if the jitter is valid, False otherwise
+    :rtype:  bool
+    """
+
+    if jitter is None:
+        return True
+
+    if isinstance(jitter, int) and not isinstance(jitter, bool) and jitter >= 0:
+        return True
+
+    return False
+
+
 def _is_valid_enabled_flag(enabled_flag):
     """
     Test that the enabled flag is a boolean.
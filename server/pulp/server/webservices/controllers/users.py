@@ -14,7 +14,7 @@
 import web
 
 from pulp.server.auth.authorization import READ, CREATE, UPDATE, DELETE
-from pulp.server.db.model.auth import Permission
+from pulp.server.db.model.auth import AuthorizationVersion, Permission
 from pulp.server.webservices.controllers.base import JSONController
 from pulp.server.webservices.controllers.decorators import auth_required
 from pulp.server.webservices.controllers.search import SearchController
@@ -121,6 +121,7 @@ class UserResource(JSONController):
         user_link = serialization.link.current_link_obj()['_href']
         if Permission.get_collection().find_one({'resource': user_link}):
             Permission.get_collection().remove({'resource': user_link}, safe=True)
+            AuthorizationVersion.bump()
 
         return self.ok(result)
 
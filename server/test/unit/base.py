@@ -19,6 +19,7 @@ import mock
 import web
 
 from pulp.common.compat import json
+from pulp.plugins.types import database as types_database
 from pulp.server import config
 from pulp.server.async import celery_instance
 from pulp.server.db import connection
@@ -28,6 +29,7 @@ from pulp.server.db.model.resources import Worker, ReservedResource
 from pulp.server.logs import start_logging, stop_logging
 from pulp.server.managers import factory as manager_factory
 from pulp.server.managers.auth.cert.cert_generator import SerialNumber
+from pulp.server.managers.auth.permission import index as permission_index
 from pulp.server.managers.auth.role.cud import SUPER_USER_ROLE
 from pulp.server.webservices import http
 from pulp.server.webservices.middleware.exception import ExceptionHandlerMiddleware
@@ -73,6 +75,10 @@ class PulpServerTests(unittest.TestCase):
         super(PulpServerTests, self).setUp()
         self._mocks = {}
         self.config = PulpServerTests.CONFIG # shadow for simplicity
+        # tests remove users and permissions without going through the managers
+        permission_index.cache.clear()
+        # tests add and remove content types without going through update_database()
+        types_database.cache.clear()
         self.clean()
 
     def tearDown(self):
@@ -15,7 +15,8 @@ from pulp.common.error_codes import PLP1005
 from pulp.devel.unit.server.util import assert_validation_exception
 from pulp.plugins.util.metadata_writer import MetadataFileContext, JSONArrayFileContext
 from pulp.plugins.util.metadata_writer import XmlFileContext
-from pulp.plugins.util.metadata_writer import FastForwardXmlFileContext
+from pulp.plugins.util.parallel_gzip import ParallelGzipFile
+from pulp.plugins.util.metadata_writer import FastForwardXmlFileContext, HashingFileWrapper
 from pulp.plugins.util.verification import TYPE_SHA1
 
 DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'data'))
@@ -248,6 +249,70 @@ class MetadataWriterTests(unittest.TestCase):
                                                    expected_metadata_file_name)
         self.assertEquals(expected_metadata_file_path, context.metadata_file_path)
 
+    def test_finalize_with_checksum_types(self):
+        path = os.path.join(self.metadata_file_dir, 'test.xml')
+        context = JSONArrayFileContext(path, 'sha256', checksum_types=['md5', 'sha256'])
+
+        context.initialize()
+        context.add_unit_metadata('foo')
+        context.metadata_file_handle.write('"foo"')
+        context.finalize()
+
+        with open(context.metadata_file_path, 'rb') as h:
+            content = h.read()
+        self.assertEqual(content, '["foo"]')
+        self.assertEqual(context.checksums, {'md5': hashlib.md5(content).hexdigest(),
+                                             'sha256': hashlib.sha256(content).hexdigest()})
+        self.assertEqual(context.checksum, context.checksums['sha256'])
+        self.assertEqual(os.path.basename(context.metadata_file_path),
+                         context.checksum + '-test.xml')
+
+    def test_finalize_checksum_gzip(self):
+        path = os.path.join(self.metadata_file_dir, 'test.xml.gz')
+        context = XmlFileContext(path, 'metadata', checksum_type='sha1')
+
+        context.initialize()
+        with patch('__builtin__.open') as mock_open:
+            context.finalize()
+        # the checksum is known without reading the file back
+        self.assertFalse(mock_open.called)
+
+        with open(context.metadata_file_path, 'rb') as h:
+            self.assertEqual(context.checksum, hashlib.sha1(h.read()).hexdigest())
+        h = gzip.open(context.metadata_file_path)
+        self.assertEqual(h.read(), '<?xml version="1.0" encoding="UTF-8"?>\n<metadata></metadata>')
+        h.close()
+
+    def test_finalize_checksum_parallel_gzip(self):
+        path = os.path.join(self.metadata_file_dir, 'test.xml.gz')
+        context = MetadataFileContext(path, 'sha256', compression_workers=2)
+
+        context.initialize()
+        self.assertTrue(isinstance(context.metadata_file_handle, ParallelGzipFile))
+        context.metadata_file_handle.write('foo' * 1000)
+        context.finalize()
+
+        with open(context.metadata_file_path, 'rb') as h:
+            self.assertEqual(context.checksum, hashlib.sha256(h.read()).hexdigest())
+        h = gzip.open(context.metadata_file_path)
+        self.assertEqual(h.read(), 'foo' * 1000)
+        h.close()
+
+    def test_finalize_checksum_external_handle(self):
+        path = os.path.join(self.metadata_file_dir, 'test.xml')
+        context = MetadataFileContext(path, checksum_type='md5')
+        context.metadata_file_handle = open(path, 'w')
+        context.metadata_file_handle.write('foo')
+
+        context.finalize()
+
+        self.assertEqual(context.checksum, hashlib.md5('foo').hexdigest())
+
+    def test_init_invalid_additional_checksum(self):
+        path = os.path.join(self.metadata_file_dir, 'test.xml')
+        assert_validation_exception(MetadataFileContext, [PLP1005], path,
+                                    checksum_types=['sha1', 'invalid'])
+
     @patch('pulp.plugins.util.metadata_writer._LOG.exception')
     def test_finalize_error_on_footer(self, mock_logger):
 
@@ -295,6 +360,22 @@ class MetadataWriterTests(unittest.TestCase):
         context.initialize.assert_called_once_with()
 
 
+class TestHashingFileWrapper(unittest.TestCase):
+
+    def test_write(self):
+        file_object = Mock()
+        wrapper = HashingFileWrapper(file_object, ['md5', 'sha1'])
+
+        wrapper.write('foo')
+        wrapper.writelines(['bar', 'baz'])
+        wrapper.close()
+
+        self.assertEqual(file_object.write.call_count, 3)
+        file_object.close.assert_called_once_with()
+        self.assertEqual(wrapper.hexdigests(), {'md5': hashlib.md5('foobarbaz').hexdigest(),
+                                                'sha1': hashlib.sha1('foobarbaz').hexdigest()})
+
+
 class TestJSONArrayFileContext(unittest.TestCase):
 
     def setUp(self):
@@ -0,0 +1,131 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from mock import patch
+
+from pulp.plugins.util import parallel_gzip
+from pulp.plugins.util.parallel_gzip import ParallelGzipFile
+
+
+class TestParallelGzipFile(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.working_dir, 'test.xml.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def read(self, path=None):
+        h = gzip.open(path or self.path)
+        try:
+            return h.read()
+        finally:
+            h.close()
+
+    def test_write(self):
+        lines = ['<package name="p%d" release="%d"/>\n' % (n, n * 7) for n in range(5000)]
+        gzip_file = ParallelGzipFile(self.path, workers=4, block_size=1024)
+
+        for line in lines:
+            gzip_file.write(line)
+        gzip_file.close()
+
+        self.assertTrue(gzip_file.closed)
+        self.assertEqual(self.read(), ''.join(lines))
+        self.assertEqual(gzip_file.crc, zlib.crc32(''.join(lines)) & 0xffffffffL)
+        self.assertEqual(gzip_file._threads, [])
+
+    def test_write_single_thread(self):
+        gzip_file = ParallelGzipFile(self.path, workers=1, block_size=4)
+        gzip_file.writelines(['foo', 'bar', 'baz'])
+        gzip_file.close()
+
+        self.assertEqual(self.read(), 'foobarbaz')
+        self.assertEqual(gzip_file._threads, [])
+
+    def test_empty(self):
+        ParallelGzipFile(self.path).close()
+        self.assertEqual(self.read(), '')
+
+    def test_header_file_name(self):
+        ParallelGzipFile(self.path).close()
+
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        self.assertTrue(content.startswith('\037\213\010\010'))
+        self.assertTrue('test.xml\000' in content)
+
+    def test_flush(self):
+        gzip_file = ParallelGzipFile(self.path, workers=2)
+        gzip_file.write('foo')
+        gzip_file.flush()
+        gzip_file.write('bar')
+        gzip_file.close()
+
+        self.assertEqual(self.read(), 'foobar')
+
+    def test_close_idempotent(self):
+        gzip_file = ParallelGzipFile(self.path)
+        gzip_file.write('foo')
+        gzip_file.close()
+        gzip_file.close()
+
+        self.assertEqual(self.read(), 'foo')
+        self.assertRaises(IOError, gzip_file.write, 'bar')
+
+    def test_fileobj_not_closed(self):
+        fileobj = open(self.path, 'wb')
+        gzip_file = ParallelGzipFile(self.path, fileobj=fileobj)
+        gzip_file.write('foo')
+        gzip_file.close()
+
+        self.assertFalse(fileobj.closed)
+        fileobj.close()
+        self.assertEqual(self.read(), 'foo')
+
+    def test_read_mode(self):
+        self.assertRaises(ValueError, ParallelGzipFile, self.path, 'rb')
+
+    @patch('pulp.plugins.util.parallel_gzip.zlib.compressobj')
+    def test_compression_error(self, mock_compressobj):
+        mock_compressobj.side_effect = zlib.error('broken')
+        gzip_file = ParallelGzipFile(self.path, workers=2, block_size=1)
+
+        # the error is raised when the block is written to the file
+        gzip_file.write('foo')
+        self.assertRaises(zlib.error, gzip_file.close)
+        self.assertTrue(gzip_file.closed)
+        self.assertEqual(gzip_file._threads, [])
+
+
+class TestOpenGzip(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.working_dir, 'test.xml.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_parallel(self):
+        fileobj = open(self.path, 'wb')
+        gzip_file = parallel_gzip.open_gzip(self.path, fileobj=fileobj, workers=2)
+        gzip_file.write('foo')
+        gzip_file.close()
+
+        self.assertTrue(isinstance(gzip_file, ParallelGzipFile))
+        self.assertTrue(fileobj.closed)
+
+    @patch('pulp.plugins.util.parallel_gzip.config')
+    def test_configured(self, mock_config):
+        mock_config.getint.return_value = 1
+        gzip_file = parallel_gzip.open_gzip(self.path)
+        gzip_file.close()
+
+        self.assertTrue(isinstance(gzip_file, gzip.GzipFile))
+        mock_config.getint.assert_called_once_with('tasks', 'compression_workers')
@@ -117,6 +117,40 @@ class StepTests(PublisherBase):
         step.parent.get_status_conduit.return_value = 'foo'
         self.assertEquals('foo', step.get_status_conduit())
 
+    @patch('pulp.plugins.util.publish_step.time.time')
+    def test_report_progress_throttled(self, mock_time):
+        step = Step('foo_step', status_conduit=Mock())
+        child = Step('child_step')
+        step.add_child(child)
+        step.progress_report_interval = 5
+
+        mock_time.return_value = 100.0
+        child.report_progress()
+        mock_time.return_value = 101.0
+        child.report_progress()
+        child.report_progress()
+        mock_time.return_value = 105.0
+        child.report_progress()
+
+        self.assertEquals(2, step.status_conduit.set_progress.call_count)
+        self.assertEquals(2, step.progress_reports_written)
+        self.assertEquals(2, step.progress_reports_suppressed)
+
+    @patch('pulp.plugins.util.publish_step.time.time')
+    def test_report_progress_forced(self, mock_time):
+        step = Step('foo_step', status_conduit=Mock())
+        child = Step('child_step')
+        step.add_child(child)
+        mock_time.return_value = 100.0
+
+        child.report_progress()
+        child.report_progress(force=True)
+        child.state = reporting_constants.STATE_RUNNING
+        child.report_progress()
+
+        self.assertEquals(3, step.status_conduit.set_progress.call_count)
+        self.assertEquals(0, step.progress_reports_suppressed)
+
 
 class PluginStepTests(PluginBase):
     """
@@ -0,0 +1,276 @@
+"""
+This module contains tests for the pulp.server.async.reservations module.
+"""
+from datetime import datetime
+from Queue import Empty
+import time
+import unittest
+
+import mock
+
+from pulp.server.async import reservations
+from pulp.server.db.model.resources import Worker
+from pulp.server.managers import resources
+
+
+class Message(object):
+
+    def __init__(self, event, name):
+        self.payload = {'event': event, 'name': name}
+        self.ack = mock.Mock()
+
+
+class FakeTable(resources.ReservationTable):
+    """
+    A ReservationTable with a fixed set of workers that does not use the database.
+    """
+
+    def __init__(self, workers):
+        super(FakeTable, self).__init__()
+        self.fixed_workers = workers
+        self.loads = 0
+        self.on_load = None
+        self.requested = False
+
+    def load(self):
+        self.loads += 1
+        self.requested = False
+        self.workers = dict((w.name, w) for w in self.fixed_workers)
+        if self.on_load:
+            self.on_load()
+        self.loaded = True
+        self.loaded_at = time.time()
+
+    def reload_requested(self):
+        return self.requested
+
+
+@mock.patch('pulp.server.async.reservations.celery')
+class TestNotify(unittest.TestCase):
+
+    def test_notify(self, mock_celery):
+        mock_celery.conf.CELERY_ALWAYS_EAGER = False
+        connection = mock_celery.pool.acquire.return_value.__enter__.return_value
+
+        reservations.notify(reservations.RESERVATION_RELEASED, 'task-1')
+
+        connection.SimpleQueue.assert_called_once_with(reservations.RESOURCE_EVENTS_QUEUE)
+        queue = connection.SimpleQueue.return_value
+        queue.put.assert_called_once_with({'event': reservations.RESERVATION_RELEASED,
+                                           'name': 'task-1'})
+        queue.close.assert_called_once_with()
+
+    @mock.patch('pulp.server.async.reservations.resources.request_reload')
+    @mock.patch('pulp.server.async.reservations._logger')
+    def test_notify_error_requests_reload(self, mock_logger, mock_request_reload, mock_celery):
+        mock_celery.conf.CELERY_ALWAYS_EAGER = False
+        mock_celery.pool.acquire.side_effect = IOError()
+
+        reservations.notify(reservations.WORKERS_CHANGED, 'worker-1')
+
+        self.assertEqual(mock_logger.exception.call_count, 1)
+        mock_request_reload.assert_called_once_with(reservations.WORKERS_CHANGED, 'worker-1')
+
+    @mock.patch('pulp.server.async.reservations.resources.request_reload')
+    @mock.patch('pulp.server.async.reservations._logger')
+    def test_notify_reload_request_error_logged(self, mock_logger, mock_request_reload,
+                                                mock_celery):
+        mock_celery.conf.CELERY_ALWAYS_EAGER = False
+        mock_celery.pool.acquire.side_effect = IOError()
+        mock_request_reload.side_effect = IOError()
+
+        reservations.notify(reservations.RESERVATION_RELEASED, 'task-1')
+
+        self.assertEqual(mock_logger.exception.call_count, 2)
+
+    def test_notify_eager(self, mock_celery):
+        mock_celery.conf.CELERY_ALWAYS_EAGER = True
+        reservations.notify(reservations.RESERVATION_RELEASED, 'task-1')
+        self.assertFalse(mock_celery.pool.acquire.called)
+
+
+class TestWaitStats(unittest.TestCase):
+
+    def test_add(self):
+        stats = reservations.WaitStats()
+        self.assertEqual(stats.dict()['average_wait'], 0.0)
+        stats.add(0.5, False)
+        stats.add(1.5, True)
+        self.assertEqual(stats.dict(), {'dispatched': 2, 'waited': 1, 'average_wait': 1.0,
+                                        'max_wait': 1.5})
+
+
+@mock.patch('pulp.server.async.reservations.celery')
+class TestReservationDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        now = datetime.utcnow()
+        self.worker_1 = Worker('worker-1', now)
+        self.worker_2 = Worker('worker-2', now)
+        self.dispatcher = reservations.ReservationDispatcher()
+        self.dispatcher.table = FakeTable([self.worker_1, self.worker_2])
+
+    def events(self, mock_celery, messages):
+        mock_celery.conf.CELERY_ALWAYS_EAGER = False
+        queue = mock_celery.connection.return_value.SimpleQueue.return_value
+        pending = list(messages)
+
+        def get(block=True, timeout=None):
+            if not pending:
+                raise Empty()
+            message = pending.pop(0)
+            if message is None:
+                raise Empty()
+            return message
+
+        queue.get.side_effect = get
+        queue.get_nowait.side_effect = lambda: get(block=False)
+        return queue
+
+    def test_unreserved_worker(self, mock_celery):
+        self.events(mock_celery, [])
+
+        worker = self.dispatcher.find_worker('resource-1')
+
+        self.assertTrue(worker in (self.worker_1, self.worker_2))
+        self.assertEqual(self.dispatcher.table.loads, 1)
+        self.assertEqual(self.dispatcher.stats.dispatched, 1)
+        self.assertEqual(self.dispatcher.stats.waited, 0)
+
+    def test_worker_for_reservation(self, mock_celery):
+        self.events(mock_celery, [])
+        self.dispatcher.find_worker('resource-1')
+        self.dispatcher.reserved('task-1', 'worker-2', 'resource-1')
+
+        # test
+        worker = self.dispatcher.find_worker('resource-1')
+
+        # validation
+        self.assertTrue(worker is self.worker_2)
+        # the view is not reloaded from the database
+        self.assertEqual(self.dispatcher.table.loads, 1)
+
+    def test_waits_for_release(self, mock_celery):
+        # the first wait times out, then the release is announced
+        queue = self.events(mock_celery, [
+            None, None, Message(reservations.RESERVATION_RELEASED, 'task-2')])
+        self.dispatcher.find_worker('resource-1')
+        self.dispatcher.reserved('task-1', 'worker-1', 'resource-1')
+        self.dispatcher.reserved('task-2', 'worker-2', 'resource-2')
+
+        # test
+        worker = self.dispatcher.find_worker('resource-3')
+
+        # validation
+        self.assertTrue(worker is self.worker_2)
+        queue.get.assert_called_with(block=True, timeout=reservations.WAIT_TIMEOUT)
+        self.assertEqual(self.dispatcher.stats.waited, 1)
+        self.assertEqual(self.dispatcher.table.reservations, {'task-1': 'resource-1'})
+
+    def test_released_while_busy(self, mock_celery):
+        self.events(mock_celery, [None, Message(reservations.RESERVATION_RELEASED, 'task-1')])
+        self.dispatcher.find_worker('resource-1')
+        self.dispatcher.reserved('task-1', 'worker-1', 'resource-1')
+
+        # test
+        self.dispatcher.find_worker('resource-2')
+
+        # validation
+        self.assertEqual(self.dispatcher.table.reservations, {})
+        self.assertEqual(self.dispatcher.table.worker_load, {})
+
+    def test_workers_changed_reloads(self, mock_celery):
+        self.events(mock_celery, [None, Message(reservations.WORKERS_CHANGED, 'worker-3')])
+        self.dispatcher.find_worker('resource-1')
+
+        # test
+        self.dispatcher.find_worker('resource-1')
+
+        # validation
+        self.assertEqual(self.dispatcher.table.loads, 2)
+
+    def test_timeout_reloads(self, mock_celery):
+        self.events(mock_celery, [])
+        self.dispatcher.find_worker('resource-1')
+        self.dispatcher.reserved('task-1', 'worker-1', 'resource-1')
+        self.dispatcher.reserved('task-2', 'worker-2', 'resource-2')
+        table = self.dispatcher.table
+
+        def on_load():
+            # the reservations were released while no one was listening
+            table.reservations = {}
+            table.resources = {}
+            table.worker_load = {}
+            table.worker_resources = {}
+
+        table.on_load = on_load
+
+        # test
+        worker = self.dispatcher.find_worker('resource-3')
+
+        # validation
+        self.assertTrue(worker in (self.worker_1, self.worker_2))
+        self.assertEqual(table.loads, 2)
+
+    @mock.patch('pulp.server.async.reservations.time')
+    @mock.patch('pulp.server.async.reservations._logger')
+    def test_broker_error(self, mock_logger, mock_time, mock_celery):
+        mock_celery.conf.CELERY_ALWAYS_EAGER = False
+        mock_time.time.return_value = 0
+        queue = mock_celery.connection.return_value.SimpleQueue.return_value
+        queue.get_nowait.side_effect = Empty()
+        queue.get.side_effect = IOError()
+        self.dispatcher.find_worker('resource-1')
+        self.dispatcher.reserved('task-1', 'worker-1', 'resource-1')
+        self.dispatcher.reserved('task-2', 'worker-2', 'resource-2')
+        mock_time.sleep.side_effect = lambda seconds: self.dispatcher.table.released('task-1')
+
+        # test
+        worker = self.dispatcher.find_worker('resource-3')
+
+        # validation
+        self.assertTrue(worker is self.worker_1)
+        mock_time.sleep.assert_called_once_with(reservations.WAIT_TIMEOUT)
+        self.assertTrue(mock_logger.exception.called)
+        queue.close.assert_called_once_with()
+
+    def test_reload_interval(self, mock_celery):
+        self.events(mock_celery, [])
+        self.dispatcher.find_worker('resource-1')
+        self.dispatcher.find_worker('resource-1')
+        self.assertEqual(self.dispatcher.table.loads, 1)
+
+        # test
+        self.dispatcher.table.loaded_at -= reservations.RELOAD_INTERVAL
+        self.dispatcher.find_worker('resource-1')
+
+        # validation
+        self.assertEqual(self.dispatcher.table.loads, 2)
+
+    def test_reload_requested(self, mock_celery):
+        self.events(mock_celery, [])
+        self.dispatcher.find_worker('resource-1')
+
+        # test
+        self.dispatcher.table.requested = True
+        self.dispatcher.find_worker('resource-1')
+        self.dispatcher.find_worker('resource-1')
+
+        # validation
+        self.assertEqual(self.dispatcher.table.loads, 2)
+
+    def test_eager(self, mock_celery):
+        mock_celery.conf.CELERY_ALWAYS_EAGER = True
+        self.dispatcher.find_worker('resource-1')
+        self.dispatcher.find_worker('resource-1')
+        self.assertEqual(self.dispatcher.table.loads, 2)
+        self.assertFalse(mock_celery.connection.called)
+
+
+class TestGetDispatcher(unittest.TestCase):
+
+    @mock.patch('pulp.server.async.reservations._dispatcher', None)
+    def test_get_dispatcher(self):
+        dispatcher = reservations.get_dispatcher()
+        self.assertTrue(isinstance(dispatcher, reservations.ReservationDispatcher))
+        self.assertTrue(reservations.get_dispatcher() is dispatcher)
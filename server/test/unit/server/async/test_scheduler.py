@@ -253,33 +253,116 @@ class TestSchedulerSpawnPulpMonitorThreads(unittest.TestCase):
 
 class TestSchedulerTick(unittest.TestCase):
     @mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock())
-    @mock.patch('celery.beat.Scheduler.tick')
-    def test_calls_superclass(self, mock_tick):
-        sched_instance = scheduler.Scheduler()
-
-        sched_instance.tick()
-
-        mock_tick.assert_called_once_with()
+    def setUp(self):
+        patcher = mock.patch('pulp.server.async.scheduler.worker_watcher.handle_worker_heartbeat')
+        self.mock_heartbeat = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sched_instance = scheduler.Scheduler()
+        self.sched_instance._schedule = {}
+        self.sched_instance.update_schedule = mock.Mock(return_value=0)
+        self.sched_instance.maybe_due = mock.Mock(return_value=30)
+        self.sched_instance.publisher = mock.Mock()
+
+    def test_updates_schedule(self):
+        self.sched_instance.tick()
+
+        self.sched_instance.update_schedule.assert_called_once_with()
+
+    @mock.patch('time.time')
+    def test_checks_due_entries_only(self, mock_time):
+        mock_time.return_value = 1000
+        entry_1 = mock.Mock()
+        entry_2 = mock.Mock()
+        self.sched_instance._set_entry('entry_1', entry_1)
+        self.sched_instance._set_entry('entry_2', entry_2)
+        self.sched_instance._push('entry_2', 1060)
+
+        ret = self.sched_instance.tick()
+
+        self.sched_instance.maybe_due.assert_called_once_with(
+            entry_1, self.sched_instance.publisher)
+        # entry_1 is checked again after the number of seconds maybe_due() returned
+        self.assertEqual(self.sched_instance._due, {'entry_1': 1030, 'entry_2': 1060})
+        self.assertEqual(ret, 30)
+
+    @mock.patch('time.time')
+    def test_skips_stale_items(self, mock_time):
+        mock_time.return_value = 1000
+        self.sched_instance._set_entry('entry_1', mock.Mock())
+        self.sched_instance._set_entry('entry_2', mock.Mock())
+        self.sched_instance._push('entry_1', 1060)
+        self.sched_instance._remove_entry('entry_2')
+
+        ret = self.sched_instance.tick()
+
+        self.assertFalse(self.sched_instance.maybe_due.called)
+        self.assertEqual(self.sched_instance._heap, [(1060, 'entry_1')])
+        self.assertEqual(ret, 60)
+
+    @mock.patch('time.time')
+    def test_not_rescheduled_when_removed(self, mock_time):
+        mock_time.return_value = 1000
+        self.sched_instance._set_entry('entry_1', mock.Mock())
+        self.sched_instance.maybe_due.side_effect = \
+            lambda entry, publisher: self.sched_instance._remove_entry('entry_1')
+
+        ret = self.sched_instance.tick()
+
+        self.assertEqual(self.sched_instance._due, {})
+        self.assertEqual(ret, self.sched_instance.max_interval)
+
+    @mock.patch('time.time')
+    def test_rescheduled_on_error(self, mock_time):
+        mock_time.return_value = 1000
+        self.sched_instance._set_entry('entry_1', mock.Mock())
+        self.sched_instance.maybe_due.side_effect = ValueError()
+
+        self.assertRaises(ValueError, self.sched_instance.tick)
+
+        self.assertEqual(self.sched_instance._due,
+                         {'entry_1': 1000 + self.sched_instance.max_interval})
+
+    @mock.patch('time.time')
+    def test_dispatch_limit(self, mock_time):
+        mock_time.return_value = 1000
+        self.sched_instance.max_dispatch_per_tick = 2
+
+        def maybe_due(entry, publisher):
+            self.sched_instance._dispatched += 1
+            return 30
+
+        self.sched_instance.maybe_due.side_effect = maybe_due
+        entries = [mock.Mock() for n in range(3)]
+        for n, entry in enumerate(entries):
+            self.sched_instance._set_entry('entry_%d' % n, entry)
+            self.sched_instance._push('entry_%d' % n, 990 + n)
+
+        ret = self.sched_instance.tick()
+
+        self.assertEqual(self.sched_instance.maybe_due.call_count, 2)
+        self.assertEqual(self.sched_instance.maybe_due.call_args_list[0][0][0], entries[0])
+        self.assertEqual(ret, self.sched_instance.spill_interval)
+        # the entry that spilled over is checked first on the next tick
+        self.assertEqual(self.sched_instance._heap[0], (992, 'entry_2'))
+
+        mock_time.return_value = 1001
+
+        self.sched_instance.tick()
+
+        self.assertEqual(self.sched_instance.maybe_due.call_args[0][0], entries[2])
+        # it is known to have been due since it spilled over
+        self.assertEqual(self.sched_instance._pending['entry_2'], 992)
 
-    @mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock())
     @mock.patch.object(scheduler.FailureWatcher, 'trim')
-    @mock.patch('celery.beat.Scheduler.tick')
-    def test_calls_trim(self, mock_tick, mock_trim):
-        sched_instance = scheduler.Scheduler()
-
-        sched_instance.tick()
+    def test_calls_trim(self, mock_trim):
+        self.sched_instance.tick()
 
         mock_trim.assert_called_once_with()
 
-    @mock.patch('celery.beat.Scheduler.__init__', new=mock.Mock())
-    @mock.patch('celery.beat.Scheduler.tick')
-    @mock.patch('pulp.server.async.scheduler.worker_watcher.handle_worker_heartbeat')
-    def test_calls_handle_heartbeat(self, mock_heartbeat, mock_tick):
-        sched_instance = scheduler.Scheduler()
-
-        sched_instance.tick()
+    def test_calls_handle_heartbeat(self):
+        self.sched_instance.tick()
 
-        mock_heartbeat.assert_called_once()
+        self.assertEqual(self.mock_heartbeat.call_count, 1)
 
 
 class TestSchedulerSetupSchedule(unittest.TestCase):
@@ -340,46 +423,120 @@ class TestSchedulerSetupSchedule(unittest.TestCase):
         self.assertTrue('529f4bd93de3a31d0ec77340' not in sched_instance._schedule)
 
 
-class TestSchedulerScheduleChanged(unittest.TestCase):
+class TestSchedulerUpdateSchedule(unittest.TestCase):
     @mock.patch('threading.Thread', new=mock.MagicMock())
     @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
+    def setUp(self, mock_get_enabled):
+        mock_get_enabled.return_value = [dict(schedule) for schedule in SCHEDULES]
+        self.sched_instance = scheduler.Scheduler()
+
+    @mock.patch('pulp.server.managers.schedule.utils.get_enabled_ids')
+    @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
     @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_count_changed(self, mock_updated_since, mock_get_enabled):
-        mock_updated_since.return_value.count.return_value = 0
-        mock_get_enabled.return_value = SCHEDULES
-        sched_instance = scheduler.Scheduler()
+    def test_no_changes(self, mock_updated_since, mock_get_enabled, mock_get_enabled_ids):
+        mock_updated_since.return_value = []
+        # the schedule with 0 remaining runs is enabled, but not in the schedule
+        mock_get_enabled.return_value.count.return_value = len(SCHEDULES)
+        schedule = dict(self.sched_instance._schedule)
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        mock_get_enabled.return_value.count.return_value = sched_instance._loaded_from_db_count + 1
+        ret = self.sched_instance.update_schedule()
 
-        self.assertTrue(sched_instance.schedule_changed is True)
+        self.assertEqual(ret, 0)
+        mock_updated_since.assert_called_once_with(1387218569.811224)
+        self.assertFalse(mock_get_enabled_ids.called)
+        self.assertEqual(self.sched_instance._schedule, schedule)
 
-    @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch('pulp.server.managers.schedule.utils.get_enabled_ids')
     @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
     @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_new_updated(self, mock_updated_since, mock_get_enabled):
-        mock_get_enabled.return_value = SCHEDULES
-        sched_instance = scheduler.Scheduler()
+    def test_updated(self, mock_updated_since, mock_get_enabled, mock_get_enabled_ids):
+        updated = dict(SCHEDULES[1], iso_schedule=u'PT2M', last_updated=1387218570.0)
+        added = dict(SCHEDULES[1], _id=u'529f4bd93de3a31d0ec77341', last_updated=1387218571.0)
+        mock_updated_since.return_value = [updated, added]
+        mock_get_enabled.return_value.count.return_value = len(SCHEDULES) + 1
+        unchanged = self.sched_instance._schedule['529f4bd93de3a31d0ec77338']
+
+        ret = self.sched_instance.update_schedule()
+
+        self.assertEqual(ret, 2)
+        self.assertFalse(mock_get_enabled_ids.called)
+        # only the updated entries are replaced
+        self.assertTrue(self.sched_instance._schedule['529f4bd93de3a31d0ec77338'] is unchanged)
+        self.assertEqual(
+            self.sched_instance._schedule['529f4bd93de3a31d0ec77339']._scheduled_call.iso_schedule,
+            'PT2M')
+        self.assertTrue('529f4bd93de3a31d0ec77341' in self.sched_instance._schedule)
+        self.assertTrue('529f4bd93de3a31d0ec77341' in self.sched_instance._due)
+        self.assertEqual(self.sched_instance._loaded_from_db_count, 3)
+        self.assertEqual(self.sched_instance._most_recent_timestamp, 1387218571.0)
+
+    @mock.patch('pulp.server.managers.schedule.utils.get_enabled_ids')
+    @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
+    @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
+    def test_removed(self, mock_updated_since, mock_get_enabled, mock_get_enabled_ids):
+        mock_updated_since.return_value = []
+        mock_get_enabled.return_value.count.return_value = len(SCHEDULES) - 1
+        mock_get_enabled_ids.return_value = set(['529f4bd93de3a31d0ec77339',
+                                                 '529f4bd93de3a31d0ec77340'])
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        mock_get_enabled.return_value.count.return_value = sched_instance._loaded_from_db_count
-        mock_updated_since.return_value.count.return_value = 1
+        ret = self.sched_instance.update_schedule()
 
-        self.assertTrue(sched_instance.schedule_changed is True)
+        self.assertEqual(ret, 1)
+        self.assertTrue('529f4bd93de3a31d0ec77338' not in self.sched_instance._schedule)
+        self.assertTrue('529f4bd93de3a31d0ec77338' not in self.sched_instance._due)
+        self.assertTrue('529f4bd93de3a31d0ec77339' in self.sched_instance._schedule)
+        self.assertEqual(self.sched_instance._loaded_from_db_count, 1)
+        self.assertEqual(self.sched_instance._enabled_ids, mock_get_enabled_ids.return_value)
 
-    @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch('pulp.server.managers.schedule.utils.get')
+    @mock.patch('pulp.server.managers.schedule.utils.get_enabled_ids')
     @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
     @mock.patch('pulp.server.managers.schedule.utils.get_updated_since')
-    def test_no_changes(self, mock_updated_since, mock_get_enabled):
-        mock_updated_since.return_value.count.return_value = 0
-        mock_get_enabled.return_value = SCHEDULES
-        sched_instance = scheduler.Scheduler()
+    def test_missed_update(self, mock_updated_since, mock_get_enabled, mock_get_enabled_ids,
+                           mock_get):
+        missed = dict(SCHEDULES[1], _id=u'529f4bd93de3a31d0ec77341')
+        mock_updated_since.return_value = []
+        mock_get_enabled.return_value.count.return_value = len(SCHEDULES) + 1
+        mock_get_enabled_ids.return_value = set(['529f4bd93de3a31d0ec77338',
+                                                 '529f4bd93de3a31d0ec77339',
+                                                 '529f4bd93de3a31d0ec77340',
+                                                 '529f4bd93de3a31d0ec77341'])
+        mock_get.return_value = [dispatch.ScheduledCall.from_db(missed)]
 
-        mock_get_enabled.return_value = mock.MagicMock()
-        # -1 because there is an ignored schedule that has 0 remaining runs
-        mock_get_enabled.return_value.count.return_value = len(SCHEDULES) - 1
+        ret = self.sched_instance.update_schedule()
+
+        self.assertEqual(ret, 1)
+        mock_get.assert_called_once_with([u'529f4bd93de3a31d0ec77341'])
+        self.assertTrue('529f4bd93de3a31d0ec77341' in self.sched_instance._schedule)
+
+
+class TestSchedulerReserve(unittest.TestCase):
+    @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch('pulp.server.managers.schedule.utils.get_enabled')
+    def setUp(self, mock_get_enabled):
+        mock_get_enabled.return_value = [dict(schedule) for schedule in SCHEDULES]
+        self.sched_instance = scheduler.Scheduler()
 
-        self.assertTrue(sched_instance.schedule_changed is False)
+    def test_replaces_entry(self):
+        entry = ScheduleEntry('entry_1', 'fake.task', schedule=timedelta(seconds=30), app=app)
+
+        ret = self.sched_instance.reserve(entry)
+
+        self.assertEqual(ret.total_run_count, 1)
+        self.assertTrue(self.sched_instance._schedule['entry_1'] is ret)
+
+    @mock.patch('pulp.server.db.model.dispatch.ScheduledCall.save', new=mock.Mock())
+    def test_removes_disabled_entry(self):
+        call = dispatch.ScheduledCall.from_db(dict(SCHEDULES[0], remaining_runs=1))
+        entry = call.as_schedule_entry()
+
+        ret = self.sched_instance.reserve(entry)
+
+        self.assertFalse(ret._scheduled_call.enabled)
+        self.assertTrue(call.id not in self.sched_instance._schedule)
+        self.assertTrue(call.id not in self.sched_instance._due)
+        self.assertTrue(call.id not in self.sched_instance._enabled_ids)
+        self.assertEqual(self.sched_instance._loaded_from_db_count, 1)
 
 
 class TestSchedulerSchedule(unittest.TestCase):
@@ -395,20 +552,22 @@ class TestSchedulerSchedule(unittest.TestCase):
         mock_get_schedule.assert_called_once_with()
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch.object(scheduler.Scheduler, 'update_schedule')
     @mock.patch.object(scheduler.Scheduler, 'setup_schedule')
-    @mock.patch.object(scheduler.Scheduler, 'schedule_changed', new=True)
-    def test_schedule_changed(self, mock_setup_schedule):
+    def test_schedule_updated(self, mock_setup_schedule, mock_update_schedule):
         sched_instance = scheduler.Scheduler()
+        sched_instance._schedule = {}
 
         sched_instance.schedule
 
-        # make sure it called the setup_schedule() method
-        mock_setup_schedule.assert_called_once_with()
+        # make sure it applied the changes instead of reloading the schedule
+        mock_update_schedule.assert_called_once_with()
+        self.assertEqual(mock_setup_schedule.call_count, 1)
 
     @mock.patch('threading.Thread', new=mock.MagicMock())
-    @mock.patch.object(scheduler.Scheduler, 'schedule_changed', return_value=False)
+    @mock.patch.object(scheduler.Scheduler, 'update_schedule')
     @mock.patch.object(scheduler.Scheduler, 'setup_schedule')
-    def test_schedule_returns_value(self, mock_setup_schedule, mock_schedule_changed):
+    def test_schedule_returns_value(self, mock_setup_schedule, mock_update_schedule):
         sched_instance = scheduler.Scheduler()
         sched_instance._schedule = mock.Mock()
 
@@ -417,6 +576,138 @@ class TestSchedulerSchedule(unittest.TestCase):
         self.assertTrue(ret is sched_instance._schedule)
 
 
+class TestScheduleLag(unittest.TestCase):
+    def test_add(self):
+        lag = scheduler.ScheduleLag()
+        self.assertEqual(lag.dict()['average_lag'], 0.0)
+        lag.add(1.0)
+        lag.add(3.0)
+        self.assertEqual(lag.dict(), {'dispatched': 2, 'average_lag': 2.0, 'max_lag': 3.0})
+
+
+class TestSchedulerJitterFor(unittest.TestCase):
+    @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch.object(scheduler.Scheduler, 'setup_schedule')
+    def setUp(self, mock_setup_schedule):
+        self.sched_instance = scheduler.Scheduler()
+        self.call = dispatch.ScheduledCall.from_db(dict(SCHEDULES[0]))
+
+    def test_default(self):
+        self.assertEqual(self.sched_instance.jitter, 0)
+        self.assertEqual(self.sched_instance.jitter_for(self.call.as_schedule_entry()), 0)
+
+    def test_celery_entry(self):
+        self.sched_instance.jitter = 60
+        entry = ScheduleEntry('entry_1', 'fake.task', schedule=timedelta(seconds=30), app=app)
+
+        self.assertEqual(self.sched_instance.jitter_for(entry), 0)
+
+    def test_global(self):
+        self.sched_instance.jitter = 60
+
+        jitter = self.sched_instance.jitter_for(self.call.as_schedule_entry())
+
+        self.assertTrue(0 <= jitter <= 60)
+        # the same schedule is always delayed by the same offset
+        self.assertEqual(self.sched_instance.jitter_for(self.call.as_schedule_entry()), jitter)
+
+    def test_spread(self):
+        self.sched_instance.jitter = 60
+        offsets = set()
+        for n in range(20):
+            self.call.name = '529f4bd93de3a31d0ec773%02d' % n
+            offsets.add(self.sched_instance.jitter_for(self.call.as_schedule_entry()))
+
+        self.assertEqual(len(offsets), 20)
+
+    def test_per_schedule(self):
+        self.sched_instance.jitter = 60
+        self.call.jitter = 0
+
+        self.assertEqual(self.sched_instance.jitter_for(self.call.as_schedule_entry()), 0)
+
+        self.sched_instance.jitter = 0
+        self.call.jitter = 60
+
+        self.assertTrue(self.sched_instance.jitter_for(self.call.as_schedule_entry()) > 0)
+
+
+class TestSchedulerMaybeDue(unittest.TestCase):
+    @mock.patch('threading.Thread', new=mock.MagicMock())
+    @mock.patch.object(scheduler.Scheduler, 'setup_schedule')
+    def setUp(self, mock_setup_schedule):
+        self.sched_instance = scheduler.Scheduler()
+        self.sched_instance.apply_async = mock.Mock()
+        self.sched_instance.jitter_for = mock.Mock(return_value=0)
+        self.entry = mock.Mock()
+        self.entry.name = 'entry_1'
+        self.entry.is_due.return_value = True, 30
+
+    def test_not_due(self):
+        self.entry.is_due.return_value = False, 30
+        self.sched_instance._pending['entry_1'] = 1000
+
+        ret = self.sched_instance.maybe_due(self.entry)
+
+        self.assertEqual(ret, 30)
+        self.assertFalse(self.sched_instance.apply_async.called)
+        self.assertEqual(self.sched_instance._pending, {})
+
+    @mock.patch('time.time')
+    def test_due(self, mock_time):
+        mock_time.return_value = 1010
+        self.sched_instance._pending['entry_1'] = 1000
+
+        ret = self.sched_instance.maybe_due(self.entry, 'publisher')
+
+        self.assertEqual(ret, 30)
+        self.sched_instance.apply_async.assert_called_once_with(self.entry, publisher='publisher')
+        self.assertEqual(self.sched_instance._pending, {})
+        self.assertEqual(self.sched_instance._dispatched, 1)
+        self.assertEqual(self.sched_instance.lag.dict()['max_lag'], 10)
+
+    @mock.patch('time.time')
+    def test_jitter(self, mock_time):
+        mock_time.return_value = 1010
+        self.sched_instance._pending['entry_1'] = 1000
+        self.sched_instance.jitter_for.return_value = 25
+
+        ret = self.sched_instance.maybe_due(self.entry)
+
+        # checked again when the jitter has elapsed
+        self.assertEqual(ret, 15)
+        self.assertFalse(self.sched_instance.apply_async.called)
+        self.assertEqual(self.sched_instance._pending, {'entry_1': 1000})
+
+        mock_time.return_value = 1025
+
+        self.sched_instance.maybe_due(self.entry)
+
+        self.assertEqual(self.sched_instance.apply_async.call_count, 1)
+        self.assertEqual(self.sched_instance.lag.dict()['max_lag'], 25)
+
+    @mock.patch('pulp.server.async.scheduler._logger')
+    def test_error(self, mock_logger):
+        self.sched_instance.apply_async.side_effect = ValueError()
+
+        ret = self.sched_instance.maybe_due(self.entry)
+
+        self.assertEqual(ret, 30)
+        self.assertTrue(mock_logger.exception.called)
+
+    @mock.patch('time.time', return_value=1000)
+    @mock.patch('celery.beat.Scheduler.apply_async')
+    def test_watches_failures(self, mock_apply_async, mock_time):
+        del self.sched_instance.apply_async
+        entry = dispatch.ScheduledCall.from_db(dict(SCHEDULES[0])).as_schedule_entry()
+        entry.is_due = mock.Mock(return_value=(True, 30))
+
+        self.sched_instance.maybe_due(entry)
+
+        self.assertEqual(self.sched_instance._failure_watcher.pop(
+            mock_apply_async.return_value.id), (entry.name, False))
+
+
 class TestSchedulerAdd(unittest.TestCase):
     @mock.patch('threading.Thread', new=mock.MagicMock())
     @mock.patch.object(scheduler.Scheduler, 'setup_schedule')
@@ -16,11 +16,11 @@ from pulp.common import dateutils
 from pulp.common.constants import CALL_CANCELED_STATE, CALL_FINISHED_STATE
 from pulp.common.tags import action_tag
 from pulp.devel.unit.util import compare_dict
-from pulp.server.async import tasks
+from pulp.server.async import reservations, tasks
 from pulp.server.db.model.dispatch import TaskStatus
 from pulp.server.db.model.resources import Worker, ReservedResource
 from pulp.server.db.reaper import queue_reap_expired_documents
-from pulp.server.exceptions import NoWorkers, PulpException
+from pulp.server.exceptions import PulpException
 from pulp.server.maintenance.monthly import queue_monthly_maintenance
 
 
@@ -33,16 +33,10 @@ WORKER_3 = 'worker-3'
 class TestQueueReservedTask(ResourceReservationTests):
 
     def setUp(self):
-        self.patch_a = mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation',
+        self.patch_a = mock.patch('pulp.server.async.tasks.reservations.get_dispatcher',
                                   autospec=True)
-        self.mock_get_worker_for_reservation = self.patch_a.start()
-
-        self.patch_b = mock.patch('pulp.server.async.tasks.resources.get_unreserved_worker',
-                                  autospec=True)
-        self.mock_get_unreserved_worker = self.patch_b.start()
-
-        self.patch_c = mock.patch('pulp.server.async.tasks.time', autospec=True)
-        self.mock_time = self.patch_c.start()
+        self.mock_get_dispatcher = self.patch_a.start()
+        self.mock_dispatcher = self.mock_get_dispatcher.return_value
 
         self.patch_d = mock.patch('pulp.server.async.tasks.ReservedResource', autospec=True)
         self.mock_reserved_resource = self.patch_d.start()
@@ -58,71 +52,39 @@ class TestQueueReservedTask(ResourceReservationTests):
 
     def tearDown(self):
         self.patch_a.stop()
-        self.patch_b.stop()
-        self.patch_c.stop()
         self.patch_d.stop()
         self.patch_e.stop()
         self.patch_f.stop()
         super(TestQueueReservedTask, self).tearDown()
 
     def test_creates_and_saves_reserved_resource(self):
-        self.mock_get_worker_for_reservation.return_value = Worker('worker1', datetime.utcnow())
+        self.mock_dispatcher.find_worker.return_value = Worker('worker1', datetime.utcnow())
         tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
         self.mock_reserved_resource.assert_called_once_with('my_task_id', 'worker1',
                                                             'my_resource_id')
         self.mock_reserved_resource.return_value.save.assert_called_once_with()
 
+    def test_finds_worker_and_records_reservation(self):
+        self.mock_dispatcher.find_worker.return_value = Worker('worker1', datetime.utcnow())
+        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
+        self.mock_dispatcher.find_worker.assert_called_once_with('my_resource_id')
+        self.mock_dispatcher.reserved.assert_called_once_with('my_task_id', 'worker1',
+                                                              'my_resource_id')
+
     def test_dispatches_inner_task(self):
-        self.mock_get_worker_for_reservation.return_value = Worker('worker1', datetime.utcnow())
+        self.mock_dispatcher.find_worker.return_value = Worker('worker1', datetime.utcnow())
         tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
         apply_async = self.mock_celery.tasks['task_name'].apply_async
         apply_async.assert_called_once_with(1, 2, a=2, routing_key='worker1', task_id='my_task_id',
                                             exchange='C.dq')
 
     def test_dispatches__release_resource(self):
-        self.mock_get_worker_for_reservation.return_value = Worker('worker1', datetime.utcnow())
+        self.mock_dispatcher.find_worker.return_value = Worker('worker1', datetime.utcnow())
         tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
         self.mock__release_resource.apply_async.assert_called_once_with(('my_task_id',),
                                                                         routing_key='worker1',
                                                                         exchange='C.dq')
 
-    def test_get_worker_for_reservation_breaks_out_of_loop(self):
-        self.mock_get_worker_for_reservation.return_value = Worker('worker1', datetime.utcnow())
-        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
-        self.assertTrue(not self.mock_get_unreserved_worker.called)
-        self.assertTrue(not self.mock_time.sleep.called)
-
-    def test_get_unreserved_worker_breaks_out_of_loop(self):
-        self.mock_get_worker_for_reservation.side_effect = NoWorkers()
-        self.mock_get_unreserved_worker.return_value = Worker('worker1', datetime.utcnow())
-        tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2], {'a': 2})
-        self.assertTrue(not self.mock_time.sleep.called)
-
-    def test_loops_and_sleeps_waiting_for_available_worker(self):
-        self.mock_get_worker_for_reservation.side_effect = NoWorkers()
-        self.mock_get_unreserved_worker.side_effect = NoWorkers()
-
-        class BreakOutException(Exception):
-            pass
-
-        def side_effect(*args):
-            def second_call(*args):
-                raise BreakOutException()
-            self.mock_time.sleep.side_effect = second_call
-            return None
-
-        self.mock_time.sleep.side_effect = side_effect
-
-        try:
-            tasks._queue_reserved_task('task_name', 'my_task_id', 'my_resource_id', [1, 2],
-                                       {'a': 2})
-        except BreakOutException:
-            pass
-        else:
-            self.fail('_queue_reserved_task should have raised a BreakOutException')
-
-        self.mock_time.sleep.assert_has_calls([mock.call(0.25), mock.call(0.25)])
-
 
 class TestDeleteWorker(ResourceReservationTests):
 
@@ -154,6 +116,9 @@ class TestDeleteWorker(ResourceReservationTests):
         self.patch_i = mock.patch('pulp.server.async.tasks.constants', autospec=True)
         self.mock_constants = self.patch_i.start()
 
+        self.patch_j = mock.patch('pulp.server.async.tasks.reservations.notify', autospec=True)
+        self.mock_notify = self.patch_j.start()
+
         super(TestDeleteWorker, self).setUp()
 
     def tearDown(self):
@@ -166,6 +131,7 @@ class TestDeleteWorker(ResourceReservationTests):
         self.patch_g.stop()
         self.patch_h.stop()
         self.patch_i.stop()
+        self.patch_j.stop()
         super(TestDeleteWorker, self).tearDown()
 
     def test_normal_shutdown_true_logs_correctly(self):
@@ -186,6 +152,10 @@ class TestDeleteWorker(ResourceReservationTests):
         remove = self.mock_reserved_resource.get_collection.return_value.remove
         remove.assert_called_once_with({'worker_name': 'worker1'})
 
+    def test_notifies_resource_manager(self):
+        tasks._delete_worker('worker1')
+        self.mock_notify.assert_called_once_with(reservations.WORKERS_CHANGED, 'worker1')
+
     def test_criteria_to_find_all_worker_is_correct(self):
         tasks._delete_worker('worker1')
         self.assertEqual(self.mock_criteria.mock_calls[0], mock.call(filters={'_id': 'worker1'}))
@@ -281,7 +251,10 @@ class TestReleaseResource(ResourceReservationTests):
         reserved_resource_2.save()
 
         # This should remove resource_2 from the _resource_map.
-        tasks._release_resource(reserved_resource_2.task_id)
+        with mock.patch('pulp.server.async.tasks.reservations.notify') as mock_notify:
+            tasks._release_resource(reserved_resource_2.task_id)
+            mock_notify.assert_called_once_with(reservations.RESERVATION_RELEASED,
+                                                reserved_resource_2.task_id)
 
         # resource_2 should have been removed from the database
         rrc = ReservedResource.get_collection()
@@ -45,6 +45,7 @@ class TestLogEvent(unittest.TestCase):
 
 class TestHandleWorkerHeartbeat(unittest.TestCase):
     @mock.patch('__builtin__.list', return_value=False)
+    @mock.patch('pulp.server.async.worker_watcher.reservations')
     @mock.patch('pulp.server.async.worker_watcher._parse_and_log_event')
     @mock.patch('pulp.server.async.worker_watcher.Criteria')
     @mock.patch('pulp.server.async.worker_watcher.resources')
@@ -53,7 +54,8 @@ class TestHandleWorkerHeartbeat(unittest.TestCase):
     @mock.patch('pulp.server.async.worker_watcher._logger')
     def test_handle_worker_heartbeat_new(self, mock__logger, mock_gettext, mock_worker,
                                          mock_resources, mock_criteria,
-                                         mock__parse_and_log_event, mock_list):
+                                         mock__parse_and_log_event, mock_reservations,
+                                         mock_list):
         mock_event = mock.Mock()
 
         worker_watcher.handle_worker_heartbeat(mock_event)
@@ -67,6 +69,8 @@ class TestHandleWorkerHeartbeat(unittest.TestCase):
         mock_gettext.assert_called_once_with("New worker '%(worker_name)s' discovered")
         mock__logger.assert_called_once()
         mock_worker.return_value.save.assert_called_once_with()
+        mock_reservations.notify.assert_called_once_with(mock_reservations.WORKERS_CHANGED,
+                                                         event_info['worker_name'])
 
     @mock.patch('__builtin__.list', return_value=True)
     @mock.patch('pulp.server.async.worker_watcher._parse_and_log_event')
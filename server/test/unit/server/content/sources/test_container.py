@@ -10,6 +10,8 @@
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
 import inspect
+import threading
+import time
 
 from unittest import TestCase
 
@@ -105,6 +107,46 @@ class TestContainer(TestCase):
 
         self.assertEqual(sorted(report), [0, 1, 2])
 
+    @patch('pulp.server.content.sources.container.ContentSource.load_all')
+    @patch('pulp.server.content.sources.container.managers.content_catalog_manager')
+    def test_refresh_concurrent(self, fake_manager, fake_load):
+        sources = {}
+        canceled = Mock()
+        canceled.is_set.return_value = False
+        running = []
+        concurrency = []
+        lock = threading.Lock()
+
+        def refresh(source_id):
+            def _refresh(unused):
+                with lock:
+                    running.append(source_id)
+                    concurrency.append(len(running))
+                time.sleep(0.05)
+                with lock:
+                    running.remove(source_id)
+                return [source_id]
+            return _refresh
+
+        for n in range(6):
+            s = ContentSource('s-%d' % n, {})
+            s.refresh = Mock(side_effect=refresh(s.id))
+            sources[s.id] = s
+
+        fake_manager().has_entries.return_value = False
+        fake_load.return_value = sources
+
+        # test
+        container = ContentContainer('')
+        report = container.refresh(canceled, threads=3)
+
+        # validation
+        for s in sources.values():
+            s.refresh.assert_called_with(canceled)
+
+        self.assertEqual(max(concurrency), 3)
+        self.assertEqual(report, list(sources.keys()))
+
     @patch('pulp.server.content.sources.container.ContentSource.load_all')
     @patch('pulp.server.content.sources.container.managers.content_catalog_manager')
     def test_refresh_raised(self, fake_manager, fake_load):
@@ -539,9 +581,10 @@ class TestBatch(TestCase):
         self.assertEqual(batch.queues[fake_source.id], fake_queue())
         self.assertEqual(queue, fake_queue())
 
+    @patch('pulp.server.content.sources.container.Request.find_all_sources')
     @patch('pulp.server.content.sources.container.Tracker.wait')
     @patch('pulp.server.content.sources.container.Batch.dispatch')
-    def test_download(self, fake_dispatch, fake_wait):
+    def test_download(self, fake_dispatch, fake_wait, fake_find):
         primary = Mock()
         sources = [Mock(), Mock()]
         requests = [Mock(), Mock(), Mock()]
@@ -566,8 +609,7 @@ class TestBatch(TestCase):
 
         # validation
         # initial dispatch
-        for request in requests:
-            request.find_sources.assert_called_with(primary, sources)
+        fake_find.assert_called_once_with(tuple(requests), primary, sources)
         calls = fake_dispatch.call_args_list
         self.assertEqual(len(calls), len(requests))
         for i, request in enumerate(requests):
@@ -587,6 +629,29 @@ class TestBatch(TestCase):
         self.assertEqual(report.downloads['source-2'].total_succeeded, 200)
         self.assertEqual(report.downloads['source-2'].total_failed, 10)
 
+    @patch('pulp.server.content.sources.container.FIND_SOURCES_PAGE_SIZE', 2)
+    @patch('pulp.server.content.sources.container.Request.find_all_sources')
+    @patch('pulp.server.content.sources.container.Tracker.wait')
+    @patch('pulp.server.content.sources.container.Batch.dispatch')
+    def test_download_paged(self, fake_dispatch, fake_wait, fake_find):
+        primary = Mock()
+        sources = [Mock(), Mock()]
+        requests = [Mock(), Mock(), Mock()]
+
+        # test
+        canceled = Mock()
+        canceled.is_set.return_value = False
+        batch = Batch(canceled, primary, sources, iter(requests), None)
+        batch.download()
+
+        # validation
+        calls = fake_find.call_args_list
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[0][0], (tuple(requests[:2]), primary, sources))
+        self.assertEqual(calls[1][0], (tuple(requests[2:]), primary, sources))
+        self.assertEqual(fake_dispatch.call_count, len(requests))
+        fake_wait.assert_called_with(len(requests))
+
     @patch('pulp.server.content.sources.container.Tracker.wait')
     @patch('pulp.server.content.sources.container.Batch.dispatch')
     def test_download_nothing(self, fake_dispatch, fake_wait):
@@ -646,6 +711,7 @@ class TestBatch(TestCase):
         self.assertEqual(report.downloads['source-2'].total_succeeded, 200)
         self.assertEqual(report.downloads['source-2'].total_failed, 10)
 
+    @patch('pulp.server.content.sources.container.Request.find_all_sources', Mock())
     @patch('pulp.server.content.sources.container.Tracker.wait')
     @patch('pulp.server.content.sources.container.Batch.dispatch')
     def test_download_with_exception(self, fake_dispatch, fake_wait):
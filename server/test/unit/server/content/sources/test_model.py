@@ -1,5 +1,7 @@
 import os
 import sys
+import threading
+import time
 from unittest import TestCase
 
 from mock import patch, Mock
@@ -147,6 +149,28 @@ class TestRequest(TestCase):
         self.assertEqual(request.sources[4][0].id, primary.id)
         self.assertEqual(request.sources[4][1], url)
 
+    @patch('pulp.server.content.sources.container.managers.content_catalog_manager')
+    def test_find_all_sources(self, fake_manager):
+        url = 'http://redhat.com/repository'
+        primary = PrimarySource(None)
+        alternatives = dict([(s, ContentSource(s, d)) for s, d in DESCRIPTOR])
+        fake_manager().find.return_value = CATALOG
+        fake_manager().find_all.return_value = [CATALOG, []]
+
+        # test
+
+        requests = [Request('test_1', n, url, '/tmp/%d' % n) for n in range(2)]
+        Request.find_all_sources(requests, primary, alternatives)
+
+        # validation
+
+        fake_manager().find_all.assert_called_once_with([('test_1', 0), ('test_1', 1)])
+        single = Request('test_1', 0, url, '/tmp/0')
+        single.find_sources(primary, alternatives)
+        expected = [(s.id, u) for s, u in single.sources]
+        self.assertEqual([(s.id, u) for s, u in requests[0].sources], expected)
+        self.assertEqual([(s.id, u) for s, u in requests[1].sources], [(primary.id, url)])
+
     def test_next_source(self):
         sources = [1, 2, 3]
         request = Request('', {}, '', '')
@@ -340,8 +364,17 @@ class TestContentSource(TestCase):
 
         self.assertEqual(conduit.source_id, source.id)
         self.assertEqual(conduit.expires, 3600)
+        self.assertEqual(conduit.generation, None)
         self.assertTrue(isinstance(conduit, CatalogerConduit))
 
+    def test_conduit_generation(self):
+        source = ContentSource('s-1', {constants.EXPIRES: '1h'})
+
+        conduit = source.get_conduit('g-1')
+
+        self.assertEqual(conduit.source_id, source.id)
+        self.assertEqual(conduit.generation, 'g-1')
+
     @patch('pulp.server.content.sources.model.plugins')
     def test_cataloger(self, fake_plugins):
         plugin = Mock()
@@ -385,10 +418,12 @@ class TestContentSource(TestCase):
         canceled = Mock()
         canceled.isSet = Mock(return_value=False)
         conduit = Mock()
+        conduit.purge_stale.return_value = 0
         cataloger = Mock()
         cataloger.refresh.side_effect = FakeRefresh()
 
-        source = ContentSource('s-1', {constants.BASE_URL: url})
+        descriptor = {constants.BASE_URL: url, constants.MAX_CONCURRENT: '1'}
+        source = ContentSource('s-1', descriptor)
         source.get_conduit = Mock(return_value=conduit)
         source.get_cataloger = Mock(return_value=cataloger)
 
@@ -399,8 +434,12 @@ class TestContentSource(TestCase):
         # validation
 
         self.assertEqual(canceled.isSet.call_count, len(urls))
-        self.assertEqual(conduit.reset.call_count, len(urls))
+        self.assertEqual(source.get_conduit.call_count, len(urls) + 1)
         self.assertEqual(cataloger.refresh.call_count, len(urls))
+        generations = set(c[0][0] for c in source.get_conduit.call_args_list)
+        self.assertEqual(len(generations), 1)
+        self.assertTrue(None not in generations)
+        conduit.purge_stale.assert_called_once_with()
 
         n = 0
         added = 10
@@ -439,11 +478,54 @@ class TestContentSource(TestCase):
 
         # validation
 
-        self.assertEqual(canceled.isSet.call_count, 1)
-        self.assertEqual(conduit.reset.call_count, 0)
+        self.assertEqual(canceled.isSet.call_count, len(urls))
+        self.assertFalse(source.get_conduit.called)
         self.assertEqual(cataloger.refresh.call_count, 0)
+        self.assertFalse(conduit.purge_stale.called)
         self.assertEqual(report, [])
 
+    @patch('pulp.server.content.sources.model.ContentSource.urls')
+    def test_refresh_concurrent(self, fake_urls):
+        url = 'http://xyz.com'
+        urls = ['url-1', 'url-2', 'url-3', 'url-4', 'url-5']
+        fake_urls.__get__ = Mock(return_value=urls)
+
+        canceled = Mock()
+        canceled.isSet = Mock(return_value=False)
+        conduit = Mock(added_count=0, deleted_count=0)
+        conduit.purge_stale.return_value = 0
+        cataloger = Mock()
+        running = []
+        concurrency = []
+        lock = threading.Lock()
+
+        def refresh(_conduit, _descriptor, _url):
+            with lock:
+                running.append(_url)
+                concurrency.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(_url)
+
+        cataloger.refresh.side_effect = refresh
+
+        descriptor = {constants.BASE_URL: url, constants.MAX_CONCURRENT: '2'}
+        source = ContentSource('s-1', descriptor)
+        source.get_conduit = Mock(return_value=conduit)
+        source.get_cataloger = Mock(return_value=cataloger)
+
+        # test
+
+        report = source.refresh(canceled)
+
+        # validation
+
+        self.assertEqual(cataloger.refresh.call_count, len(urls))
+        self.assertEqual(max(concurrency), 2)
+        self.assertEqual([r.url for r in report], urls)
+        self.assertTrue(all(r.succeeded for r in report))
+        conduit.purge_stale.assert_called_once_with()
+
     @patch('pulp.server.content.sources.model.ContentSource.urls')
     def test_refresh_raised(self, fake_urls):
         url = 'http://xyz.com'
@@ -467,8 +549,9 @@ class TestContentSource(TestCase):
         # validation
 
         self.assertEqual(canceled.isSet.call_count, len(urls))
-        self.assertEqual(conduit.reset.call_count, len(urls))
+        self.assertEqual(source.get_conduit.call_count, len(urls))
         self.assertEqual(cataloger.refresh.call_count, len(urls))
+        self.assertFalse(conduit.purge_stale.called)
 
         n = 0
         for _url in source.urls:
@@ -0,0 +1,121 @@
+"""
+This module contains tests for the pulp.server.managers.auth.permission.index module.
+"""
+import unittest
+
+import mock
+
+from pulp.server.auth.authorization import CREATE, READ, UPDATE
+from pulp.server.exceptions import MissingResource
+from pulp.server.managers.auth.permission import index
+from pulp.server.managers.auth.role.cud import SUPER_USER_ROLE
+
+
+USERS = [
+    {'login': 'admin', 'roles': [SUPER_USER_ROLE]},
+    {'login': 'alice', 'roles': []},
+    {'login': 'bob', 'roles': ['readers']},
+]
+
+PERMISSIONS = [
+    {'resource': '/v2/repositories/', 'users': [{'username': 'alice', 'permissions': [READ]}]},
+    {'resource': '/v2/repositories/zoo/',
+     'users': [{'username': 'bob', 'permissions': [READ, UPDATE]}]},
+    {'resource': '/v2/consumers', 'users': [{'username': 'bob', 'permissions': [READ]}]},
+]
+
+
+class TestPermissionIndex(unittest.TestCase):
+
+    def test_is_superuser(self):
+        permission_index = index.PermissionIndex(1, USERS, PERMISSIONS)
+        self.assertTrue(permission_index.is_superuser('admin'))
+        self.assertFalse(permission_index.is_superuser('alice'))
+        self.assertRaises(MissingResource, permission_index.is_superuser, 'nobody')
+
+    def test_is_authorized(self):
+        permission_index = index.PermissionIndex(1, USERS, PERMISSIONS)
+        self.assertTrue(permission_index.is_authorized('/v2/repositories/', 'alice', READ))
+        # granted on a parent resource
+        self.assertTrue(permission_index.is_authorized('/v2/repositories/zoo/search/units/',
+                                                       'alice', READ))
+        self.assertFalse(permission_index.is_authorized('/v2/repositories/zoo/', 'alice', UPDATE))
+        self.assertTrue(permission_index.is_authorized('/v2/repositories/zoo/', 'bob', UPDATE))
+        self.assertFalse(permission_index.is_authorized('/v2/repositories/', 'bob', READ))
+        self.assertFalse(permission_index.is_authorized('/v2/repositories/zoo2/', 'bob', READ))
+
+    def test_is_authorized_root(self):
+        permissions = [{'resource': '/', 'users': [{'username': 'alice', 'permissions': [CREATE]}]}]
+        permission_index = index.PermissionIndex(1, USERS, permissions)
+        self.assertTrue(permission_index.is_authorized('/v2/tasks/', 'alice', CREATE))
+        self.assertFalse(permission_index.is_authorized('/v2/tasks/', 'bob', CREATE))
+
+    def test_non_canonical_resource_ignored(self):
+        """
+        Resources without a trailing slash never matched a lookup in the database.
+        """
+        permission_index = index.PermissionIndex(1, USERS, PERMISSIONS)
+        self.assertEqual(permission_index.resource_count, 2)
+        self.assertFalse(permission_index.is_authorized('/v2/consumers/', 'bob', READ))
+
+
+@mock.patch('pulp.server.managers.auth.permission.index.User.get_collection')
+@mock.patch('pulp.server.managers.auth.permission.index.Permission.get_collection')
+@mock.patch('pulp.server.db.model.auth.AuthorizationVersion.current')
+class TestPermissionCache(unittest.TestCase):
+
+    def _collections(self, mock_permissions, mock_users):
+        mock_users.return_value.find.return_value = USERS
+        mock_permissions.return_value.find.return_value = PERMISSIONS
+        mock_permissions.return_value.count.return_value = len(PERMISSIONS)
+
+    def test_hit(self, mock_current, mock_permissions, mock_users):
+        self._collections(mock_permissions, mock_users)
+        mock_current.return_value = 3
+        cache = index.PermissionCache()
+
+        first = cache.get()
+        second = cache.get()
+
+        self.assertTrue(first is second)
+        self.assertEqual(first.version, 3)
+        self.assertEqual(mock_permissions.return_value.find.call_count, 1)
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'rebuilds': 1, 'hit_rate': 0.5})
+
+    def test_version_changed(self, mock_current, mock_permissions, mock_users):
+        self._collections(mock_permissions, mock_users)
+        mock_current.return_value = 3
+        cache = index.PermissionCache()
+        first = cache.get()
+
+        mock_current.return_value = 4
+        second = cache.get()
+
+        self.assertFalse(first is second)
+        self.assertEqual(second.version, 4)
+        self.assertEqual(cache.rebuilds, 2)
+        self.assertEqual(cache.hit_rate(), 0.0)
+
+    def test_too_many_permissions(self, mock_current, mock_permissions, mock_users):
+        self._collections(mock_permissions, mock_users)
+        mock_current.return_value = 3
+        cache = index.PermissionCache(max_resources=2)
+
+        self.assertTrue(cache.get() is None)
+        self.assertTrue(cache.get() is None)
+
+        # the collection is only counted once per version
+        self.assertEqual(mock_permissions.return_value.count.call_count, 1)
+        self.assertEqual(mock_permissions.return_value.find.call_count, 0)
+        self.assertEqual(cache.misses, 2)
+
+    def test_clear(self, mock_current, mock_permissions, mock_users):
+        self._collections(mock_permissions, mock_users)
+        mock_current.return_value = 3
+        cache = index.PermissionCache()
+        cache.get()
+
+        cache.clear()
+        cache.get()
+
+        self.assertEqual(cache.rebuilds, 2)
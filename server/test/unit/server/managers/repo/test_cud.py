@@ -451,14 +451,15 @@ class RepoManagerTests(base.ResourceReservationTests):
         except exceptions.MissingResource, e:
             self.assertTrue('not-there' == e.resources['resource_id'])
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
     @mock.patch('pulp.server.tasks.repository.distributor_update.apply_async_with_reservation',
                 side_effect=repository.distributor_update.apply_async_with_reservation)
-    def test_update_repo_and_plugins(self, distributor_update, mock_get_worker_for_reservation):
+    def test_update_repo_and_plugins(self, distributor_update, mock_get_dispatcher):
         """
         Tests the aggregate call to update a repo and its plugins.
         """
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         self.manager.create_repo('repo-1', 'Original', 'Original Description')
 
         importer_manager = manager_factory.repo_importer_manager()
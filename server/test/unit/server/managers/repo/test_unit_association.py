@@ -142,6 +142,47 @@ class RepoUnitAssociationManagerTests(base.PulpServerTests):
         for unit in repo_units:
             self.assertTrue(unit['unit_id'] in ids)
 
+    @mock.patch('pulp.server.managers.repo.unit_association.ASSOCIATE_PAGE_SIZE', 2)
+    @mock.patch('pulp.server.managers.repo.cud.RepoManager.update_last_unit_added')
+    @mock.patch('pulp.server.managers.repo.cud.RepoManager.update_unit_count')
+    def test_associate_all_existing_and_repeated(self, mock_update_count, mock_last_added):
+        """
+        Tests that units already associated by any owner, and IDs repeated in the
+        list, are only associated and counted once, across several pages.
+        """
+        self.manager.associate_unit_by_id(self.repo_id, 'type-1', 'bar', OWNER_TYPE_IMPORTER,
+                                          'test-importer', update_repo_metadata=False)
+
+        # Test
+        ids = ['foo', 'bar', 'baz', 'foo', 'qux', 'baz']
+        ret = self.manager.associate_all_by_ids(self.repo_id, 'type-1', iter(ids),
+                                                OWNER_TYPE_USER, 'admin')
+
+        # Verify
+        repo_units = list(RepoContentUnit.get_collection().find({'repo_id': self.repo_id}))
+        self.assertEqual(4, len(repo_units))
+        self.assertEqual(set(ids), set(u['unit_id'] for u in repo_units))
+        self.assertEqual(3, ret)
+        mock_update_count.assert_called_once_with(self.repo_id, 'type-1', 3)
+        mock_last_added.assert_called_once_with(self.repo_id)
+
+    @mock.patch('pulp.server.managers.repo.cud.RepoManager.update_last_unit_added')
+    @mock.patch('pulp.server.managers.repo.cud.RepoManager.update_unit_count')
+    def test_associate_all_nothing_new(self, mock_update_count, mock_last_added):
+        self.manager.associate_unit_by_id(self.repo_id, 'type-1', 'foo', OWNER_TYPE_USER,
+                                          'admin', update_repo_metadata=False)
+
+        ret = self.manager.associate_all_by_ids(self.repo_id, 'type-1', ['foo'],
+                                                OWNER_TYPE_USER, 'admin')
+
+        self.assertEqual(0, ret)
+        self.assertEqual(0, mock_update_count.call_count)
+        self.assertEqual(0, mock_last_added.call_count)
+
+    def test_associate_all_invalid_owner_type(self):
+        self.assertRaises(exceptions.InvalidValue, self.manager.associate_all_by_ids,
+                          self.repo_id, 'type-1', ['unit-1'], 'bad-owner', 'irrelevant')
+
     def test_unassociate_by_id(self):
         """
         Tests removing an association that exists by its unit ID.
@@ -180,6 +180,23 @@ class TestGetEnabled(unittest.TestCase):
         mock_get_collection.assert_called_once_with()
 
 
+class TestGetEnabledIds(unittest.TestCase):
+    @mock.patch('pulp.server.db.connection.PulpCollection.query')
+    def test_query(self, mock_query):
+        mock_query.return_value = SCHEDULES
+
+        ret = utils.get_enabled_ids()
+
+        self.assertEqual(mock_query.call_count, 1)
+        criteria = mock_query.call_args[0][0]
+        self.assertTrue(isinstance(criteria, Criteria))
+        self.assertEqual(criteria.filters, {'enabled': True})
+        # only the IDs are loaded
+        self.assertEqual(criteria.fields, ['_id'])
+
+        self.assertEqual(ret, set(str(schedule['_id']) for schedule in SCHEDULES))
+
+
 class TestDelete(unittest.TestCase):
     schedule_id = str(ObjectId())
 
@@ -296,6 +313,22 @@ class TestUpdate(unittest.TestCase):
         self.assertRaises(exceptions.InvalidValue, utils.update, 'notavalidid', {'enabled': True})
 
 
+class TestValidateUpdatedScheduleOptions(unittest.TestCase):
+    def test_valid_jitter(self):
+        utils.validate_updated_schedule_options({'jitter': 300})
+        utils.validate_updated_schedule_options({'jitter': 0})
+        utils.validate_updated_schedule_options({'jitter': None})
+
+    def test_invalid_jitter(self):
+        for jitter in (-1, '300', True):
+            try:
+                utils.validate_updated_schedule_options({'jitter': jitter})
+            except exceptions.InvalidValue, e:
+                self.assertEqual(e.property_names, ['jitter'])
+            else:
+                self.fail('%r is not a valid jitter' % jitter)
+
+
 class TestResetFailureCount(unittest.TestCase):
     schedule_id = str(ObjectId())
 
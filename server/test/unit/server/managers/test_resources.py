@@ -3,6 +3,7 @@ This module contains tests for the pulp.server.managers.resources module.
 """
 from datetime import datetime
 import types
+import unittest
 
 import mock
 import pymongo
@@ -182,3 +183,194 @@ class TestGetUnreservedWorker(ResourceReservationTests):
 
     def test_is_not_worker_is_resource_mgr(self):
         self.assertEquals(resources._is_worker("resource_manager@some.hostname"), False)
+
+
+class TestReservationTable(unittest.TestCase):
+
+    def setUp(self):
+        now = datetime.utcnow()
+        self.workers = [Worker('worker_1', now), Worker('worker_2', now),
+                        Worker('resource_manager@host', now)]
+        self.reservations = [
+            {'_id': 'task_1', 'worker_name': 'worker_1', 'resource_id': 'resource_1'},
+            {'_id': 'task_2', 'worker_name': 'worker_1', 'resource_id': 'resource_1'},
+        ]
+
+    @mock.patch('pulp.server.managers.resources.resources', autospec=True)
+    @mock.patch('pulp.server.managers.resources.filter_workers')
+    def load(self, mock_filter_workers, mock_resources):
+        mock_filter_workers.return_value = self.workers
+        find = mock_resources.ReservedResource.get_collection.return_value.find
+        find.return_value = self.reservations
+        table = resources.ReservationTable()
+        table.load()
+        return table
+
+    def test_load(self):
+        table = self.load()
+        self.assertTrue(table.loaded)
+        self.assertEqual(sorted(table.workers), ['worker_1', 'worker_2'])
+        self.assertEqual(table.reservations, {'task_1': 'resource_1', 'task_2': 'resource_1'})
+        self.assertEqual(table.resources, {'resource_1': ['worker_1', 2]})
+        self.assertEqual(table.worker_load, {'worker_1': 2})
+
+    def test_find_worker_for_reservation(self):
+        table = self.load()
+        self.assertEqual(table.find_worker('resource_1').name, 'worker_1')
+
+    def test_find_unreserved_worker(self):
+        table = self.load()
+        self.assertEqual(table.find_worker('resource_2').name, 'worker_2')
+
+    def test_find_worker_none_available(self):
+        table = self.load()
+        table.reserved('task_3', 'worker_2', 'resource_2')
+        self.assertEqual(table.find_worker('resource_3'), None)
+
+    def test_find_worker_missing_worker(self):
+        self.reservations.append(
+            {'_id': 'task_3', 'worker_name': 'gone', 'resource_id': 'resource_2'})
+        table = self.load()
+        self.assertEqual(table.find_worker('resource_2'), None)
+
+    def test_released(self):
+        table = self.load()
+        self.assertTrue(table.released('task_1'))
+        self.assertEqual(table.resources, {'resource_1': ['worker_1', 1]})
+        self.assertTrue(table.released('task_2'))
+        self.assertEqual(table.reservations, {})
+        self.assertEqual(table.resources, {})
+        self.assertEqual(table.worker_load, {})
+        self.assertFalse(table.released('task_2'))
+        self.assertEqual(table.find_worker('resource_2').name in ('worker_1', 'worker_2'), True)
+
+    def test_find_worker_with_reservations(self):
+        self.workers.append(Worker('worker_3', datetime.utcnow()))
+        table = self.load()
+        table.selection = resources.LeastQueued(max_reservations=2)
+        table.reserved('task_3', 'worker_2', 'resource_2')
+        table.reserved('task_4', 'worker_3', 'resource_3')
+        # worker_2 and worker_3 hold the fewest reservations
+        self.assertEqual(table.find_worker('resource_4').name, 'worker_2')
+        table.reserved('task_5', 'worker_2', 'resource_4')
+        self.assertEqual(table.find_worker('resource_5').name, 'worker_3')
+        table.reserved('task_6', 'worker_3', 'resource_5')
+        # each worker holds two distinct resources except worker_1
+        self.assertEqual(table.find_worker('resource_6').name, 'worker_1')
+        table.reserved('task_7', 'worker_1', 'resource_6')
+        self.assertEqual(table.find_worker('resource_7'), None)
+        self.assertEqual(table.worker_resources, {'worker_1': 2, 'worker_2': 2, 'worker_3': 2})
+        table.released('task_1')
+        self.assertEqual(table.find_worker('resource_7'), None)
+        table.released('task_2')
+        self.assertEqual(table.find_worker('resource_7').name, 'worker_1')
+
+    @mock.patch('pulp.server.managers.resources.resources', autospec=True)
+    @mock.patch('pulp.server.managers.resources.filter_workers')
+    def test_load_removes_reload_requests(self, mock_filter_workers, mock_resources):
+        mock_filter_workers.return_value = self.workers
+        mock_resources.ReservedResource.get_collection.return_value.find.return_value = []
+
+        resources.ReservationTable().load()
+
+        collection = mock_resources.ReloadRequest.get_collection.return_value
+        collection.remove.assert_called_once_with()
+
+    @mock.patch('pulp.server.managers.resources.time')
+    def test_expired(self, mock_time):
+        mock_time.time.return_value = 100.0
+        table = self.load()
+        self.assertFalse(table.expired(10))
+        mock_time.time.return_value = 110.0
+        self.assertTrue(table.expired(10))
+        table.loaded = False
+        mock_time.time.return_value = 100.0
+        self.assertTrue(table.expired(10))
+        self.assertTrue(resources.ReservationTable().expired(10))
+
+    @mock.patch('pulp.server.managers.resources.resources', autospec=True)
+    def test_reload_requested(self, mock_resources):
+        find_one = mock_resources.ReloadRequest.get_collection.return_value.find_one
+        find_one.return_value = None
+        self.assertFalse(resources.ReservationTable.reload_requested())
+        find_one.return_value = {'_id': 'x', 'event': 'workers-changed', 'name': 'worker_1'}
+        self.assertTrue(resources.ReservationTable.reload_requested())
+
+
+class TestWorkerSelection(unittest.TestCase):
+
+    def setUp(self):
+        self.table = resources.ReservationTable(selection=resources.LeastQueued())
+        self.table.worker_load = {'a': 3, 'b': 1, 'c': 2}
+
+    def test_least_queued(self):
+        selection = resources.LeastQueued()
+        self.assertEqual(selection.select(['a', 'b', 'c'], self.table), 'b')
+        self.assertEqual(selection.select(['a', 'c'], self.table), 'c')
+        self.assertEqual(selection.limit('a'), 1)
+
+    def test_round_robin(self):
+        selection = resources.RoundRobin(3)
+        chosen = [selection.select(['a', 'b', 'c'], self.table) for n in range(4)]
+        self.assertEqual(chosen, ['a', 'b', 'c', 'a'])
+        self.assertEqual(selection.select(['a', 'c'], self.table), 'c')
+        self.assertEqual(selection.limit('a'), 3)
+
+    def test_capacity_weighted(self):
+        selection = resources.CapacityWeighted(2, [('a*', 4.0), ('*@small', 0.5)])
+        self.assertEqual(selection.select(['a', 'b', 'c'], self.table), 'a')
+        self.assertEqual(selection.limit('a@big'), 8)
+        self.assertEqual(selection.limit('b@small'), 1)
+        self.assertEqual(selection.limit('b@other'), 2)
+
+    def test_max_reservations_at_least_one(self):
+        self.assertEqual(resources.LeastQueued(0).limit('a'), 1)
+
+    def test_parse_worker_weights(self):
+        self.assertEqual(resources.parse_worker_weights(' a*=2, *@b=0.5 ,'),
+                         [('a*', 2.0), ('*@b', 0.5)])
+        self.assertEqual(resources.parse_worker_weights(''), [])
+        self.assertRaises(ValueError, resources.parse_worker_weights, 'a')
+        self.assertRaises(ValueError, resources.parse_worker_weights, 'a=0')
+
+    @mock.patch('pulp.server.managers.resources.config')
+    def test_get_worker_selection(self, mock_config):
+        values = {'worker_selection': 'capacity-weighted', 'worker_weights': 'a*=2'}
+        mock_config.get.side_effect = lambda section, name: values[name]
+        mock_config.getint.return_value = 3
+
+        selection = resources.get_worker_selection()
+
+        self.assertTrue(isinstance(selection, resources.CapacityWeighted))
+        self.assertEqual(selection.max_reservations, 3)
+        self.assertEqual(selection.weights, [('a*', 2.0)])
+
+        values['worker_selection'] = 'round-robin'
+        self.assertTrue(isinstance(resources.get_worker_selection(), resources.RoundRobin))
+
+    @mock.patch('pulp.server.managers.resources._logger')
+    @mock.patch('pulp.server.managers.resources.config')
+    def test_get_worker_selection_invalid(self, mock_config, mock_logger):
+        mock_config.get.return_value = 'fastest'
+        mock_config.getint.return_value = 3
+
+        selection = resources.get_worker_selection()
+
+        self.assertTrue(isinstance(selection, resources.LeastQueued))
+        self.assertEqual(selection.max_reservations, 1)
+        self.assertTrue(mock_logger.error.called)
+
+    def test_default_configuration(self):
+        selection = resources.get_worker_selection()
+        self.assertTrue(isinstance(selection, resources.LeastQueued))
+        self.assertEqual(selection.max_reservations, 1)
+
+
+class TestRequestReload(unittest.TestCase):
+
+    @mock.patch('pulp.server.managers.resources.resources', autospec=True)
+    def test_request_reload(self, mock_resources):
+        resources.request_reload('reservation-released', 'task_1')
+
+        mock_resources.ReloadRequest.assert_called_once_with('reservation-released', 'task_1')
+        mock_resources.ReloadRequest.return_value.save.assert_called_once_with()
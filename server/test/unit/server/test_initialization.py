@@ -32,6 +32,9 @@ class TestInitialize(unittest.TestCase):
         self.patch_manager_factory = patch(INITIALIZATION_MODULE + '.manager_factory')
         self.mock_manager_factory = self.patch_manager_factory.start()
 
+        self.patch_types_database = patch(INITIALIZATION_MODULE + '.types_database')
+        self.mock_types_database = self.patch_types_database.start()
+
         self.patch__IS_INITIALIZED = patch(INITIALIZATION_MODULE + '._IS_INITIALIZED', False)
         self.mock__IS_INITIALIZED = self.patch__IS_INITIALIZED.start()
 
@@ -39,6 +42,7 @@ class TestInitialize(unittest.TestCase):
         self.patch_db_connection.stop()
         self.patch_plugin_api.stop()
         self.patch_manager_factory.stop()
+        self.patch_types_database.stop()
         self.patch__IS_INITIALIZED.stop()
 
     def test_initialize_only_does_nothing_if__IS_INITIALIZED_is_True(self):
@@ -58,6 +62,10 @@ class TestInitialize(unittest.TestCase):
             pass
         self.assertTrue(not self.mock_manager_factory.called)
 
+    def test_initialize_loads_type_definitions(self):
+        initialize()
+        self.mock_types_database.cache.load.assert_called_once_with()
+
     def test_initialize_calls_manager_factory(self):
         initialize()
         self.mock_manager_factory.initialize.assert_called_once_with()
@@ -1592,9 +1592,10 @@ class TestConsumerApplicabilityRegeneration(base.PulpWebserviceTests):
         for consumer_id in self.CONSUMER_IDS:
             manager.create(consumer_id, 'rpm', self.PROFILE)
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_regenerate_applicability(self, mock_get_worker_for_reservation):
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_regenerate_applicability(self, mock_get_dispatcher):
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         self.populate()
         self.populate_bindings()
         request_body = dict(consumer_criteria={'filters': self.FILTER})
@@ -1604,9 +1605,10 @@ class TestConsumerApplicabilityRegeneration(base.PulpWebserviceTests):
         self.assertEquals(status, 202)
         self.assertTrue('task_id' in body.get('spawned_tasks')[0])
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_regenerate_applicability_no_consumers(self, mock_get_worker_for_reservation):
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_regenerate_applicability_no_consumers(self, mock_get_dispatcher):
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         # Test
         request_body = dict(consumer_criteria={'filters': self.FILTER})
         status, body = self.post(self.PATH, request_body)
@@ -1614,9 +1616,10 @@ class TestConsumerApplicabilityRegeneration(base.PulpWebserviceTests):
         self.assertEquals(status, 202)
         self.assertTrue('task_id' in body.get('spawned_tasks')[0])
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_regenerate_applicability_no_bindings(self, mock_get_worker_for_reservation):
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_regenerate_applicability_no_bindings(self, mock_get_dispatcher):
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         # Setup
         self.populate()
         # Test
@@ -1649,9 +1652,10 @@ class TestConsumerApplicabilityRegeneration(base.PulpWebserviceTests):
         self.assertTrue('property_names' in body)
         self.assertTrue(body['property_names'] == ['consumer_criteria'])
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_consumer_regenerate_applicability(self, mock_get_worker_for_reservation):
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_consumer_regenerate_applicability(self, mock_get_dispatcher):
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         self.populate()
         self.populate_bindings()
 
@@ -1661,9 +1665,10 @@ class TestConsumerApplicabilityRegeneration(base.PulpWebserviceTests):
         self.assertEquals(status, 202)
         self.assertTrue('task_id' in body.get('spawned_tasks')[0])
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_consumer_regenerate_applicability_no_bindings(self, mock_get_worker_for_reservation):
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_consumer_regenerate_applicability_no_bindings(self, mock_get_dispatcher):
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         self.populate()
 
         consumer_path = '/v2/consumers/%s/actions/content/regenerate_applicability/'
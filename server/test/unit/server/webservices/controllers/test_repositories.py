@@ -87,9 +87,9 @@ class RepoImportUploadTests(RepoControllersTests):
 
     @mock.patch('celery.Task.apply_async')
     @mock.patch('pulp.server.async.tasks.uuid', autospec=True)
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
     @mock.patch('pulp.server.managers.content.upload.ContentUploadManager.import_uploaded_unit')
-    def test_POST_returns_report(self, import_uploaded_unit, mock_get_worker_for_reservation,
+    def test_POST_returns_report(self, import_uploaded_unit, mock_get_dispatcher,
                                  mock_uuid, mock_apply_async):
         """
         Assert that the POST() method returns the appropriate report dictionary, based on the return
@@ -103,7 +103,8 @@ class RepoImportUploadTests(RepoControllersTests):
         uuid_list = [uuid.uuid4() for i in range(10)]
         mock_uuid.uuid4.side_effect = copy.deepcopy(uuid_list)
         expected_async_result = AsyncResult(str(uuid_list[0]))
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         params = {'upload_id': 'upload_id', 'unit_type_id': 'unit_type_id', 'unit_key': 'unit_key'}
 
         status, body = self.post(self.URL % 'repo_id', params)
@@ -635,8 +636,8 @@ class RepoImportersTests(RepoPluginsTests):
 
     @mock.patch('celery.Task.apply_async')
     @mock.patch('pulp.server.async.tasks.uuid', autospec=True)
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_post(self, mock_get_worker_for_reservation, mock_uuid, mock_apply_async):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_post(self, mock_get_dispatcher, mock_uuid, mock_apply_async):
         """
         Tests adding an importer to a repo.
         """
@@ -645,7 +646,8 @@ class RepoImportersTests(RepoPluginsTests):
         uuid_list = [uuid.uuid4() for i in range(10)]
         mock_uuid.uuid4.side_effect = copy.deepcopy(uuid_list)
         expected_async_result = AsyncResult(str(uuid_list[0]))
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
 
         # Test
         req_body = {
@@ -661,12 +663,13 @@ class RepoImportersTests(RepoPluginsTests):
         self.assertEqual(call_args, ['gravy', 'dummy-importer'])
         self.assertEqual(call_kwargs, {'repo_plugin_config': {'foo': 'bar'}})
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_post_missing_repo(self, mock_get_worker_for_reservation):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_post_missing_repo(self, mock_get_dispatcher):
         """
         Tests adding an importer to a repo that doesn't exist.
         """
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         # Test
         req_body = {
             'importer_type_id': 'dummy-importer',
@@ -687,8 +690,8 @@ class RepoImportersTests(RepoPluginsTests):
         # Verify
         self.assertEqual(400, status)
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_post_bad_request_invalid_data(self, mock_get_worker_for_reservation):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_post_bad_request_invalid_data(self, mock_get_dispatcher):
         """
         Tests adding an importer but specifying incorrect metadata.
         """
@@ -697,7 +700,8 @@ class RepoImportersTests(RepoPluginsTests):
         req_body = {
             'importer_type_id': 'not-a-real-importer'
         }
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         # Test
         status, body = self.post('/v2/repositories/walnuts/importers/', params=req_body)
         # Verify
@@ -705,8 +709,8 @@ class RepoImportersTests(RepoPluginsTests):
 
     @mock.patch('pulp.server.managers.repo.importer.RepoImporterManager.validate_importer_config',
                 side_effect=PulpCodedValidationException())
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_post_bad_request_invalid_config(self, mock_get_worker_for_reservation, mock_validator):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_post_bad_request_invalid_config(self, mock_get_dispatcher, mock_validator):
         """
         Tests adding an importer but specifying incorrect metadata.
         """
@@ -716,7 +720,8 @@ class RepoImportersTests(RepoPluginsTests):
             'importer_type_id': 'beads',
             'importer_config': {'max_speed': -2}
         }
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         # Test
         status, body = self.post('/v2/repositories/bees/importers/', params=req_body)
         # Verify
@@ -761,8 +766,8 @@ class RepoImporterTests(RepoPluginsTests):
 
     @mock.patch('celery.Task.apply_async')
     @mock.patch('pulp.server.async.tasks.uuid', autospec=True)
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_delete(self, mock_get_worker_for_reservation, mock_uuid, mock_apply_async):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_delete(self, mock_get_dispatcher, mock_uuid, mock_apply_async):
         """
         Tests removing an importer from a repo.
         """
@@ -772,7 +777,8 @@ class RepoImporterTests(RepoPluginsTests):
         self.importer_manager.set_importer(repo_id, 'dummy-importer', {})
         uuid_list = [uuid.uuid4() for i in range(10)]
         mock_uuid.uuid4.side_effect = copy.deepcopy(uuid_list)
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
 
         # Test
         status, body = self.delete('/v2/repositories/blueberry_pie/importers/dummy-importer/')
@@ -783,25 +789,27 @@ class RepoImporterTests(RepoPluginsTests):
         call_args = mock_apply_async.call_args[0]
         self.assertTrue([repo_id] in call_args)
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_delete_missing_repo(self, mock_get_worker_for_reservation):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_delete_missing_repo(self, mock_get_dispatcher):
         """
         Tests deleting the importer from a repo that doesn't exist.
         """
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         # Test
         status, body = self.delete('/v2/repositories/bad_pie/importers/dummy-importer/')
         # Verify
         self.assertEqual(404, status)
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_delete_missing_importer(self, mock_get_worker_for_reservation):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_delete_missing_importer(self, mock_get_dispatcher):
         """
         Tests deleting an importer from a repo that doesn't have one.
         """
         # Setup
         self.repo_manager.create_repo('apple_pie')
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         # Test
         status, body = self.delete('/v2/repositories/apple_pie/importers/dummy-importer/')
         # Verify
@@ -809,8 +817,8 @@ class RepoImporterTests(RepoPluginsTests):
 
     @mock.patch('celery.Task.apply_async')
     @mock.patch('pulp.server.async.tasks.uuid', autospec=True)
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_update_importer_config(self, mock_get_worker_for_reservation, mock_uuid,
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_update_importer_config(self, mock_get_dispatcher, mock_uuid,
                                     mock_apply_async):
         """
         Tests successfully updating an importer's config.
@@ -821,7 +829,8 @@ class RepoImporterTests(RepoPluginsTests):
         self.importer_manager.set_importer(repo_id, 'dummy-importer', {})
         uuid_list = [uuid.uuid4() for i in range(10)]
         mock_uuid.uuid4.side_effect = copy.deepcopy(uuid_list)
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         # Test
         new_config = {'importer_config': {'ice_cream': True}}
         status, body = self.put('/v2/repositories/pumpkin_pie/importers/dummy-importer/',
@@ -833,26 +842,28 @@ class RepoImporterTests(RepoPluginsTests):
         self.assertTrue(repo_id in call_args)
         self.assertEqual(call_kwargs['importer_config'], {'ice_cream': True})
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_update_missing_repo(self, mock_get_worker_for_reservation):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_update_missing_repo(self, mock_get_dispatcher):
         """
         Tests updating an importer config on a repo that doesn't exist.
         """
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         # Test
         status, body = self.put('/v2/repositories/foo/importers/dummy-importer/',
                                 params={'importer_config': {}})
         # Verify
         self.assertEqual(404, status)
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_update_missing_importer(self, mock_get_worker_for_reservation):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_update_missing_importer(self, mock_get_dispatcher):
         """
         Tests updating a repo that doesn't have an importer.
         """
         # Setup
         self.repo_manager.create_repo('pie')
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         # Test
         status, body = self.put('/v2/repositories/pie/importers/dummy-importer/',
                                 params={'importer_config': {}})
@@ -1697,10 +1708,11 @@ class TestRepoApplicabilityRegeneration(base.PulpWebserviceTests):
         for consumer_id in self.CONSUMER_IDS:
             manager.create(consumer_id, 'rpm', self.PROFILE)
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_regenerate_applicability(self, mock_get_worker_for_reservation):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_regenerate_applicability(self, mock_get_dispatcher):
         # Setup
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         self.populate()
         self.populate_bindings()
         # Test
@@ -1710,20 +1722,22 @@ class TestRepoApplicabilityRegeneration(base.PulpWebserviceTests):
         self.assertEquals(status, 202)
         self.assertTrue('task_id' in body['spawned_tasks'][0])
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_regenerate_applicability_no_consumer(self, mock_get_worker_for_reservation):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_regenerate_applicability_no_consumer(self, mock_get_dispatcher):
         # Test
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         request_body = dict(repo_criteria={'filters': self.REPO_FILTER})
         status, body = self.post(self.PATH, request_body)
         # Verify
         self.assertEquals(status, 202)
         self.assertTrue('task_id' in body['spawned_tasks'][0])
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_regenerate_applicability_no_bindings(self, mock_get_worker_for_reservation):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_regenerate_applicability_no_bindings(self, mock_get_dispatcher):
         # Setup
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         self.populate()
         # Test
         request_body = dict(repo_criteria={'filters': self.REPO_FILTER})
@@ -83,6 +83,32 @@ class TestCatalogerConduit(PulpServerTests):
         entry = collection.find_one({'locator': locator})
         self.assertTrue(entry is None)
 
+    def test_add_entries(self):
+        units = self.units(0, 10)
+        conduit = CatalogerConduit(SOURCE_ID, EXPIRES, 'g-1')
+        conduit.add_entries((TYPE_ID, unit_key, url) for unit_key, url in units)
+        collection = ContentCatalog.get_collection()
+        self.assertEqual(len(units), collection.find().count())
+        self.assertEqual(conduit.added_count, len(units))
+        for unit_key, url in units:
+            locator = ContentCatalog.get_locator(TYPE_ID, unit_key)
+            entry = collection.find_one({'locator': locator})
+            self.assertEqual(entry['unit_key'], unit_key)
+            self.assertEqual(entry['url'], url)
+            self.assertEqual(entry['generation'], 'g-1')
+
+    def test_purge_stale(self):
+        collection = ContentCatalog.get_collection()
+        conduit = CatalogerConduit(SOURCE_ID, EXPIRES, 'g-1')
+        conduit.add_entries((TYPE_ID, k, u) for k, u in self.units(0, 10))
+        conduit = CatalogerConduit(SOURCE_ID, EXPIRES, 'g-2')
+        conduit.add_entries((TYPE_ID, k, u) for k, u in self.units(10, 5))
+        self.assertEqual(collection.find().count(), 15)
+        purged = conduit.purge_stale()
+        self.assertEqual(purged, 10)
+        self.assertEqual(collection.find({'generation': 'g-2'}).count(), 5)
+        self.assertEqual(collection.find().count(), 5)
+
     def test_reset(self):
         conduit = CatalogerConduit(SOURCE_ID, EXPIRES)
         conduit.added_count = 10
@@ -597,6 +597,73 @@ class AddUnitMixinTests(unittest.TestCase):
         # Test
         self.assertRaises(mixins.ImporterConduitException, self.mixin.save_unit, None)
 
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.'
+                'get_content_unit_by_keys_dict')
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.'
+                'get_multiple_units_by_keys_dicts')
+    @mock.patch('pulp.server.managers.content.cud.ContentManager.update_content_unit')
+    @mock.patch('pulp.server.managers.content.cud.ContentManager.add_content_units')
+    @mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager.'
+                'associate_all_by_ids')
+    def test_save_units(self, mock_associate, mock_add, mock_update, mock_get_multiple,
+                        mock_get):
+        # Setup
+        units = [self.mixin.init_unit('t', {'k': v}, {'m': 'm1'}, None)
+                 for v in ('new', 'existing', 'raced', 'new')]
+        mock_get_multiple.return_value = ({'_id': 'existing-id', 'k': 'existing'},)
+        mock_add.return_value = ['new-id', None]
+        mock_get.side_effect = _create_mock_side_effect([{'_id': 'raced-id'},
+                                                         {'_id': 'new-id'}])
+
+        # Test
+        saved = self.mixin.save_units(iter(units))
+
+        # Verify
+        self.assertEqual(saved, units)
+        self.assertEqual(['new-id', 'existing-id', 'raced-id', 'new-id'],
+                         [u.id for u in saved])
+        self.assertEqual(1, mock_get_multiple.call_count)
+        self.assertEqual(1, mock_add.call_count)
+        self.assertEqual(['new', 'raced'], [u['k'] for u in mock_add.call_args[0][1]])
+        self.assertEqual(3, mock_update.call_count)
+        mock_associate.assert_called_once_with(
+            self.repo_id, 't', ['new-id', 'existing-id', 'raced-id', 'new-id'],
+            self.association_owner_type, self.association_owner_id)
+        self.assertEqual(1, self.mixin._added_count)
+        self.assertEqual(3, self.mixin._updated_count)
+
+    @mock.patch('pulp.plugins.conduits.mixins.SAVE_UNITS_PAGE_SIZE', 2)
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.'
+                'get_multiple_units_by_keys_dicts')
+    @mock.patch('pulp.server.managers.content.cud.ContentManager.add_content_units')
+    @mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager.'
+                'associate_all_by_ids')
+    def test_save_units_pages_and_types(self, mock_associate, mock_add, mock_get_multiple):
+        # Setup
+        units = [self.mixin.init_unit(t, {'k': str(i)}, {}, None)
+                 for i, t in enumerate(('a', 'b', 'a'))]
+        mock_get_multiple.return_value = ()
+        mock_add.side_effect = lambda type_id, metadata: ['id-%s' % m['k'] for m in metadata]
+
+        # Test
+        saved = self.mixin.save_units(units)
+
+        # Verify
+        self.assertEqual(['id-0', 'id-1', 'id-2'], [u.id for u in saved])
+        self.assertEqual(3, mock_add.call_count)
+        self.assertEqual(3, mock_associate.call_count)
+        self.assertEqual(3, self.mixin._added_count)
+
+    @mock.patch('pulp.server.managers.content.query.ContentQueryManager.'
+                'get_multiple_units_by_keys_dicts')
+    def test_save_units_with_error(self, mock_get_multiple):
+        # Setup
+        unit = self.mixin.init_unit('t', {'k': 'v'}, {}, None)
+        mock_get_multiple.side_effect = Exception()
+
+        # Test
+        self.assertRaises(mixins.ImporterConduitException, self.mixin.save_units, [unit])
+
     @mock.patch('pulp.server.managers.content.cud.ContentManager.link_referenced_content_units')
     def test_link_unit(self, mock_link):
         # Setup
@@ -674,7 +741,44 @@ class StatusMixinTests(unittest.TestCase):
         mock_task_status_objects.assert_called_with(task_id=task_id)
         self.assertEqual(1, test_task_documents.update_one.call_count)
         test_task_documents.update_one.assert_called_with(
-            set__progress_report={'test-report': 'status'})
+            **{'set__progress_report__test-report': 'status'})
+
+    @mock.patch('pulp.server.db.model.dispatch.TaskStatus.objects')
+    @mock.patch('pulp.plugins.conduits.mixins.get_current_task_id')
+    def test_set_progress_unchanged(self, mock_get_task_id, mock_task_status_objects):
+        # Setup
+        mock_get_task_id.return_value = 'test-id'
+        test_task_documents = mock.Mock()
+        mock_task_status_objects.return_value = test_task_documents
+        self.mixin = mixins.StatusMixin('test_report', mixins.ImporterConduitException)
+
+        # Test
+        status = {'state': 'running', 'count': 1}
+        self.mixin.set_progress(status)
+        self.mixin.set_progress(dict(status))
+        status['count'] = 2
+        self.mixin.set_progress(status)
+
+        # Verify
+        self.assertEqual(2, test_task_documents.update_one.call_count)
+        test_task_documents.update_one.assert_called_with(
+            set__progress_report__test_report={'state': 'running', 'count': 2})
+
+    @mock.patch('pulp.server.db.model.dispatch.TaskStatus.objects')
+    @mock.patch('pulp.plugins.conduits.mixins.get_current_task_id')
+    def test_set_progress_report_id_not_field_name(self, mock_get_task_id,
+                                                   mock_task_status_objects):
+        mock_get_task_id.return_value = 'test-id'
+        test_task_documents = mock.Mock()
+        mock_task_status_objects.return_value = test_task_documents
+
+        for report_id in ('test.report', 'test__report', '$test', ''):
+            self.mixin = mixins.StatusMixin(report_id, mixins.ImporterConduitException)
+            self.mixin.set_progress('status')
+
+            # the whole report is written rather than a nested field path
+            test_task_documents.update_one.assert_called_with(
+                set__progress_report={report_id: 'status'})
 
     @mock.patch('pulp.server.db.model.dispatch.TaskStatus.objects')
     @mock.patch('pulp.plugins.conduits.mixins.get_current_task_id')
@@ -11,6 +11,8 @@
 
 from uuid import uuid4
 
+from mock import patch
+
 from base import PulpServerTests
 
 from pulp.server.db.model.content import ContentCatalog
@@ -74,6 +76,24 @@ class TestCatalogManager(PulpServerTests):
             self.assertEqual(entry['unit_key'], unit_key)
             self.assertEqual(entry['url'], url)
 
+    @patch('pulp.server.managers.content.catalog.ADD_PAGE_SIZE', 3)
+    def test_add_entries(self):
+        units = self.units(0, 10)
+        manager = ContentCatalogManager()
+        entries = ((TYPE_ID, unit_key, url) for unit_key, url in units)
+        added = manager.add_entries(SOURCE_ID, EXPIRATION, entries, 'g-1')
+        collection = ContentCatalog.get_collection()
+        self.assertEqual(added, len(units))
+        self.assertEqual(len(units), collection.find().count())
+        for unit_key, url in units:
+            locator = ContentCatalog.get_locator(TYPE_ID, unit_key)
+            entry = collection.find_one({'locator': locator})
+            self.assertEqual(entry['source_id'], SOURCE_ID)
+            self.assertEqual(entry['type_id'], TYPE_ID)
+            self.assertEqual(entry['unit_key'], unit_key)
+            self.assertEqual(entry['url'], url)
+            self.assertEqual(entry['generation'], 'g-1')
+
     def test_delete(self):
         units = self.units(0, 10)
         manager = ContentCatalogManager()
@@ -92,6 +112,31 @@ class TestCatalogManager(PulpServerTests):
         entry = collection.find_one({'locator': locator})
         self.assertTrue(entry is None)
 
+    def test_purge_stale(self):
+        source_a = 'A'
+        source_b = 'B'
+        units = self.units(0, 10)
+        manager = ContentCatalogManager()
+        for unit_key, url in units:
+            manager.add_entry(source_a, EXPIRATION, TYPE_ID, unit_key, url)
+            manager.add_entry(source_b, EXPIRATION, TYPE_ID, unit_key, url)
+        entries = [(TYPE_ID, unit_key, url) for unit_key, url in units[:5]]
+        manager.add_entries(source_a, EXPIRATION, entries, 'g-1')
+        # old entries remain visible until purged
+        for unit_key, url in units:
+            self.assertEqual(len(manager.find(TYPE_ID, unit_key)), 2)
+        purged = manager.purge_stale(source_a, 'g-1')
+        self.assertEqual(purged, 10)
+        collection = ContentCatalog.get_collection()
+        self.assertEqual(collection.find({'source_id': source_a}).count(), 5)
+        self.assertEqual(collection.find({'source_id': source_b}).count(), 10)
+        for unit_key, url in units[:5]:
+            entries = manager.find(TYPE_ID, unit_key)
+            self.assertEqual(len(entries), 2)
+        for unit_key, url in units[5:]:
+            entries = manager.find(TYPE_ID, unit_key)
+            self.assertEqual([e['source_id'] for e in entries], [source_b])
+
     def test_purge(self):
         source_a = 'A'
         source_b = 'B'
@@ -183,6 +228,30 @@ class TestCatalogManager(PulpServerTests):
             self.assertEqual(entry['unit_key'], unit_key)
             self.assertEqual(entry['url'], url)
 
+    @patch('pulp.server.managers.content.catalog.FIND_PAGE_SIZE', 3)
+    def test_find_all(self):
+        units = self.units(0, 10)
+        manager = ContentCatalogManager()
+        for unit_key, url in units:
+            manager.add_entry(SOURCE_ID, EXPIRATION, TYPE_ID, unit_key, url)
+        # newer entries for the same source replace older ones
+        newer_url = 'http://redhat.com/newer'
+        manager.add_entry(SOURCE_ID, EXPIRATION, TYPE_ID, units[4][0], newer_url)
+        manager.add_entry('other-source', EXPIRATION, TYPE_ID, units[4][0], newer_url)
+        manager.add_entry(SOURCE_ID, -1, TYPE_ID, {'expired': True}, newer_url)
+        wanted = [(TYPE_ID, unit_key) for unit_key, url in units]
+        wanted.append((TYPE_ID, units[0][0]))
+        wanted.append((TYPE_ID, {'expired': True}))
+        wanted.append((TYPE_ID, {'not': 'found'}))
+        found = manager.find_all(wanted)
+        self.assertEqual(len(found), len(wanted))
+        for (type_id, unit_key), entries in zip(wanted, found):
+            expected = sorted((e['source_id'], e['url']) for e in manager.find(type_id, unit_key))
+            self.assertEqual(sorted((e['source_id'], e['url']) for e in entries), expected)
+        self.assertEqual(len(found[4]), 2)
+        self.assertEqual(found[-2], [])
+        self.assertEqual(found[-1], [])
+
     def test_expired(self):
         units = self.units(0, 10)
         manager = ContentCatalogManager()
@@ -75,6 +75,20 @@ class PulpContentCUDTests(PulpContentTests):
         self.assertEqual(len(units), 1)
         self.assertTrue('_last_updated' in units[0])
 
+    def test_add_content_units(self):
+        existing_id = self.cud_manager.add_content_unit(TYPE_1_DEF.id, None, TYPE_1_UNITS[0])
+        unit_ids = self.cud_manager.add_content_units(TYPE_1_DEF.id, TYPE_1_UNITS)
+        self.assertEqual(len(unit_ids), len(TYPE_1_UNITS))
+        self.assertEqual(unit_ids[0], None)
+        self.assertTrue(None not in unit_ids[1:])
+        units = self.query_manager.list_content_units(TYPE_1_DEF.id)
+        self.assertEqual(len(units), len(TYPE_1_UNITS))
+        self.assertEqual(set(u['_id'] for u in units), set([existing_id] + unit_ids[1:]))
+        self.assertTrue(all('_last_updated' in u for u in units))
+
+    def test_add_content_units_empty(self):
+        self.assertEqual(self.cud_manager.add_content_units(TYPE_1_DEF.id, []), [])
+
     def test_update_content_unit(self):
         unit_id = self.cud_manager.add_content_unit(TYPE_1_DEF.id, None, TYPE_1_UNITS[0])
         unit = self.query_manager.get_content_unit_by_id(TYPE_1_DEF.id, unit_id)
@@ -187,7 +201,7 @@ class PulpContentQueryTests(PulpContentTests):
         self.assertEqual(len(units), 2)
 
 
-@mock.patch('pulp.plugins.types.database.type_units_unit_key', return_value=['a'])
+@mock.patch('pulp.plugins.types.database.type_units_unit_key_fields', return_value=('a',))
 @mock.patch('pulp.plugins.types.database.type_units_collection')
 class TestGetContentUnitIDs(unittest.TestCase):
     def setUp(self):
@@ -221,6 +221,17 @@ class OrphanManagerGeneratorTests(OrphanManagerTests):
         orphans = list(self.orphan_manager.generate_all_orphans())
         self.assertEqual(len(orphans), 1)
 
+    @patch('pulp.server.managers.content.orphan.ORPHAN_PAGE_SIZE', 2)
+    def test_associated_units_across_pages_using_generators(self):
+        units = [gen_content_unit(PHONY_TYPE_1.id, self.content_root) for i in range(5)]
+        associate_content_unit_with_repo(units[1])
+        associate_content_unit_with_repo(units[4])
+
+        orphans = list(self.orphan_manager.generate_orphans_by_type(PHONY_TYPE_1.id))
+        orphan_ids = set(orphan['_id'] for orphan in orphans)
+        self.assertEqual(orphan_ids, set([units[0]['_id'], units[2]['_id'], units[3]['_id']]))
+        self.assertEqual(self.orphan_manager.orphans_count_by_type(PHONY_TYPE_1.id), 3)
+
     # delete with generator test methods ---------------------------------------
 
     def test_delete_one_orphan_using_generators(self):
@@ -288,6 +299,20 @@ class OrphanManagerGeneratorTests(OrphanManagerTests):
         self.assertEqual(len(orphans), 0)
         self.assertEqual(self.number_of_files_in_content_root(), 0)
 
+    @patch('pulp.server.managers.content.orphan.ORPHAN_PAGE_SIZE', 2)
+    def test_delete_by_type_with_ids_across_pages_using_generators(self):
+        units = [gen_content_unit(PHONY_TYPE_1.id, self.content_root) for i in range(5)]
+        associate_content_unit_with_repo(units[0])
+
+        self.orphan_manager.delete_orphans_by_type(PHONY_TYPE_1.id,
+                                                   [units[0]['_id'], units[3]['_id']])
+
+        orphans = list(self.orphan_manager.generate_orphans_by_type(PHONY_TYPE_1.id))
+        orphan_ids = set(orphan['_id'] for orphan in orphans)
+        self.assertEqual(orphan_ids, set([units[1]['_id'], units[2]['_id'], units[4]['_id']]))
+        self.assertTrue(os.path.exists(units[0]['_storage_path']))
+        self.assertFalse(os.path.exists(units[3]['_storage_path']))
+
 
 class TestDelete(TestCase):
 
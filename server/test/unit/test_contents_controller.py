@@ -305,13 +305,14 @@ class ImportUnitTests(BaseUploadTest):
 
     @mock.patch('celery.Task.apply_async')
     @mock.patch('pulp.server.async.tasks.uuid', autospec=True)
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_post(self, mock_get_worker_for_reservation, mock_uuid, mock_apply_async):
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_post(self, mock_get_dispatcher, mock_uuid, mock_apply_async):
         # Setup
         uuid_list = [uuid.uuid4() for i in range(10)]
         mock_uuid.uuid4.side_effect = copy.deepcopy(uuid_list)
         expected_async_result = AsyncResult(str(uuid_list[0]))
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         upload_id = self.upload_manager.initialize_upload()
         self.upload_manager.save_data(upload_id, 0, 'string data')
 
@@ -339,14 +340,15 @@ class ImportUnitTests(BaseUploadTest):
 
     @mock.patch('celery.Task.apply_async')
     @mock.patch('pulp.server.async.tasks.uuid', autospec=True)
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
-    def test_post_with_override_config(self, mock_get_worker_for_reservation, mock_uuid,
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
+    def test_post_with_override_config(self, mock_get_dispatcher, mock_uuid,
                                        mock_apply_async):
         # Setup
         uuid_list = [uuid.uuid4() for i in range(10)]
         mock_uuid.uuid4.side_effect = copy.deepcopy(uuid_list)
         expected_async_result = AsyncResult(str(uuid_list[0]))
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
         upload_id = self.upload_manager.initialize_upload()
         self.upload_manager.save_data(upload_id, 0, 'string data')
 
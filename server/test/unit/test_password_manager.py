@@ -12,14 +12,22 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+from hashlib import sha256
+from hmac import HMAC
+import unittest
+
+import mock
+
 import base
 
 from pulp.server.managers import factory as manager_factory
+from pulp.server.managers.auth import password as password_module
 
 class PasswordManagerTests(base.PulpServerTests):
     def setUp(self):
         super(PasswordManagerTests, self).setUp()
         self.password_manager = manager_factory.password_manager()
+        password_module._verified.clear()
 
     def test_unicode_password(self):
         password = u"some password"
@@ -35,3 +43,109 @@ class PasswordManagerTests(base.PulpServerTests):
         password = "some password"
         hashed = self.password_manager.hash_password(password)
         self.assertTrue(self.password_manager.check_password(hashed, password))
+
+    def test_check_legacy_password(self):
+        password = "some password"
+        salt = self.password_manager.random_bytes(8)
+        hashed = password
+        for i in xrange(password_module.NUM_ITERATIONS):
+            hashed = HMAC(hashed, salt, sha256).digest()
+        entry = salt.encode("base64").strip() + "," + hashed.encode("base64").strip()
+        self.assertTrue(self.password_manager.check_password(entry, password))
+        self.assertFalse(self.password_manager.check_password(entry, "wrong password"))
+
+    def test_pbkdf_sha256_matches_hmac(self):
+        salt = self.password_manager.random_bytes(8)
+        for password in ("", "short", "x" * 100):
+            expected = password
+            for i in xrange(3):
+                expected = HMAC(expected, salt, sha256).digest()
+            self.assertEqual(self.password_manager.pbkdf_sha256(password, salt, 3), expected)
+
+    @mock.patch('pulp.server.managers.auth.password._pbkdf2_hmac', None)
+    def test_hash_password_without_pbkdf2(self):
+        hashed = self.password_manager.hash_password("some password")
+        self.assertEqual(len(hashed.split(",")), 2)
+        self.assertFalse(self.password_manager.needs_upgrade(hashed))
+        self.assertTrue(self.password_manager.check_password(hashed, "some password"))
+
+    def test_needs_upgrade(self):
+        if password_module._pbkdf2_hmac is None:
+            return
+        with mock.patch('pulp.server.managers.auth.password._pbkdf2_hmac', None):
+            legacy = self.password_manager.hash_password("some password")
+        hashed = self.password_manager.hash_password("some password")
+        self.assertTrue(hashed.startswith(password_module.PBKDF2_PREFIX + '$'))
+        self.assertTrue(self.password_manager.needs_upgrade(legacy))
+        self.assertFalse(self.password_manager.needs_upgrade(hashed))
+
+    def test_check_password_cached(self):
+        hashed = self.password_manager.hash_password("some password")
+        self.assertTrue(self.password_manager.check_password(hashed, "some password", "user"))
+        with mock.patch.object(self.password_manager, 'pbkdf_sha256') as legacy:
+            with mock.patch.object(self.password_manager, 'pbkdf2_sha256') as pbkdf2:
+                self.assertTrue(self.password_manager.check_password(hashed, "some password",
+                                                                     "user"))
+                self.assertEqual(legacy.call_count + pbkdf2.call_count, 0)
+
+    def test_check_password_cache_invalidated(self):
+        hashed = self.password_manager.hash_password("some password")
+        self.assertTrue(self.password_manager.check_password(hashed, "some password", "user"))
+        changed = self.password_manager.hash_password("new password")
+        self.assertFalse(self.password_manager.check_password(changed, "some password", "user"))
+        self.password_manager.invalidate("user")
+        self.assertEqual(len(password_module._verified), 0)
+
+
+class VerificationCacheTests(unittest.TestCase):
+
+    def test_contains(self):
+        cache = password_module.VerificationCache()
+        cache.add('user', 'entry', 'password')
+        self.assertTrue(cache.contains('user', 'entry', 'password'))
+        self.assertFalse(cache.contains('user', 'entry', 'other'))
+        self.assertFalse(cache.contains('other', 'entry', 'password'))
+        self.assertFalse(cache.contains('user', 'changed', 'password'))
+        # the changed entry drops the verification
+        self.assertFalse(cache.contains('user', 'entry', 'password'))
+
+    @mock.patch('time.time')
+    def test_expired(self, mock_time):
+        cache = password_module.VerificationCache(ttl=10)
+        mock_time.return_value = 100
+        cache.add('user', 'entry', 'password')
+        mock_time.return_value = 109
+        self.assertTrue(cache.contains('user', 'entry', 'password'))
+        mock_time.return_value = 110
+        self.assertFalse(cache.contains('user', 'entry', 'password'))
+        self.assertEqual(len(cache), 0)
+
+    @mock.patch('time.time')
+    def test_evict_least_recently_used(self, mock_time):
+        cache = password_module.VerificationCache(size=2)
+        mock_time.return_value = 1
+        cache.add('a', 'entry', 'password')
+        mock_time.return_value = 2
+        cache.add('b', 'entry', 'password')
+        mock_time.return_value = 3
+        self.assertTrue(cache.contains('a', 'entry', 'password'))
+        mock_time.return_value = 4
+        cache.add('c', 'entry', 'password')
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.contains('a', 'entry', 'password'))
+        self.assertFalse(cache.contains('b', 'entry', 'password'))
+        self.assertTrue(cache.contains('c', 'entry', 'password'))
+
+    def test_invalidate(self):
+        cache = password_module.VerificationCache()
+        cache.add('a', 'entry', 'password')
+        cache.add('a', 'entry', 'other')
+        cache.add('b', 'entry', 'password')
+        cache.invalidate('a')
+        self.assertEqual(len(cache), 1)
+        self.assertTrue(cache.contains('b', 'entry', 'password'))
+
+    def test_disabled(self):
+        cache = password_module.VerificationCache(size=0)
+        cache.add('a', 'entry', 'password')
+        self.assertFalse(cache.contains('a', 'entry', 'password'))
@@ -569,9 +569,9 @@ class PublishActionTests(base.PulpWebserviceTests):
         RepoGroup.get_collection().remove()
         RepoGroupDistributor.get_collection().remove()
 
-    @mock.patch('pulp.server.async.tasks.resources.get_worker_for_reservation')
+    @mock.patch('pulp.server.async.tasks.reservations.get_dispatcher')
     @mock.patch('pulp.server.webservices.controllers.repo_groups.publish')
-    def test_post(self, mock_publish, mock_get_worker_for_reservation):
+    def test_post(self, mock_publish, mock_get_dispatcher):
         """
         Test that publish repo group creates a task for a worker.
         """
@@ -584,7 +584,8 @@ class PublishActionTests(base.PulpWebserviceTests):
         self.distributor_manager.add_distributor(
             group_id, 'dummy-group-distributor', {}, distributor_id=distributor_id
         )
-        mock_get_worker_for_reservation.return_value = Worker('some_queue', datetime.datetime.now())
+        worker = Worker('some_queue', datetime.datetime.now())
+        mock_get_dispatcher.return_value.find_worker.return_value = worker
 
         # Test
         data = {'id': distributor_id}
@@ -11,6 +11,8 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import unittest
+
 import mock
 
 from pulp.plugins.conduits.profiler import ProfilerConduit
@@ -24,7 +26,9 @@ from pulp.server.managers.consumer.applicability import (
     _add_consumers_to_applicability_map, _add_profiles_to_consumer_map_and_get_hashes,
     _add_repo_ids_to_consumer_map, _format_report, _get_applicability_map,
     _get_consumer_applicability_map, DoesNotExist, MultipleObjectsReturned,
-    retrieve_consumer_applicability, ApplicabilityRegenerationManager)
+    retrieve_consumer_applicability, ApplicabilityRegenerationManager,
+    aggregate_applicability_regeneration, regenerate_applicability_for_repo_chunk,
+    _ApplicabilityWriter)
 from pulp.server.managers.consumer.bind import BindManager
 from pulp.server.managers.consumer.cud import ConsumerManager
 from pulp.server.managers.consumer.profile import ProfileManager
@@ -164,6 +168,42 @@ class ApplicabilityRegenerationManagerTests(base.PulpServerTests):
             self.assertEqual(applicability['profile'], self.PROFILE1)
             self.assertEqual(applicability['applicability'], expected_applicability)
 
+    @mock.patch('pulp.server.managers.consumer.applicability.REGENERATION_PAGE_SIZE', 1)
+    def test_regenerate_applicability_for_consumers_skips_existing(self):
+        # Setup
+        self.populate_consumers_different_profiles()
+        self.populate_bindings()
+        profile_hash = UnitProfile.get_collection().find_one(
+            {'consumer_id': self.CONSUMER_IDS[0]})['profile_hash']
+        RepoProfileApplicability.objects.create(profile_hash, self.REPO_IDS[0], self.PROFILE1,
+                                                {'rpm': ['rpm-0']})
+        # Test
+        manager = factory.applicability_regeneration_manager()
+        timings = manager.regenerate_applicability_for_consumers(self.CONSUMER_CRITERIA)
+        # Verify
+        self.assertEqual(set(timings), set(['consumers', 'existing', 'load', 'regenerate']))
+        applicability_list = list(RepoProfileApplicability.get_collection().find())
+        self.assertEqual(len(applicability_list), 4)
+        expected_applicability = {'rpm': ['rpm-1', 'rpm-2'], 'erratum': ['errata-1', u'errata-2']}
+        for applicability in applicability_list:
+            if (applicability['repo_id'], applicability['profile_hash']) == \
+                    (self.REPO_IDS[0], profile_hash):
+                self.assertEqual(applicability['applicability'], {'rpm': ['rpm-0']})
+            else:
+                self.assertEqual(applicability['applicability'], expected_applicability)
+        profiler, cfg = plugins.get_profiler_by_type('rpm')
+        self.assertEqual(profiler.calculate_applicable_units.call_count, 3)
+
+    def test_get_existing_applicability_keys(self):
+        RepoProfileApplicability.objects.create('hash-1', 'repo-1', self.PROFILE1, {})
+        RepoProfileApplicability.objects.create('hash-2', 'repo-2', self.PROFILE2, {})
+        # Test
+        existing = ApplicabilityRegenerationManager._get_existing_applicability_keys(
+            [('repo-1', 'hash-1'), ('repo-1', 'hash-2'), ('repo-2', 'hash-2'),
+             ('repo-3', 'hash-1')])
+        # Verify
+        self.assertEqual(existing, set([('repo-1', 'hash-1'), ('repo-2', 'hash-2')]))
+
     def test_regenerate_applicability_for_empty_consumer_criteria(self):
         # Setup
         self.populate_consumers()
@@ -275,6 +315,71 @@ class ApplicabilityRegenerationManagerTests(base.PulpServerTests):
         applicability_list = list(RepoProfileApplicability.get_collection().find())
         self.assertEqual(len(applicability_list), 0)
 
+    @mock.patch('pulp.server.managers.consumer.applicability.chord')
+    @mock.patch('pulp.server.managers.consumer.applicability.config')
+    def test_regenerate_applicability_for_repos_partitioned(self, mock_config, mock_chord):
+        # Setup
+        self.populate_consumers()
+        self.populate_bindings()
+        manager = factory.applicability_regeneration_manager()
+        manager.regenerate_applicability_for_consumers(self.CONSUMER_CRITERIA)
+        mock_config.getint.return_value = 1
+        # Test
+        result = manager.regenerate_applicability_for_repos(self.REPO_CRITERIA)
+        # Verify
+        mock_config.getint.assert_called_once_with('tasks', 'applicability_chunk_size')
+        header = mock_chord.call_args[0][0]
+        # Both consumers share a profile, so there is one chunk per repository
+        profile_hash = UnitProfile.get_collection().find_one()['profile_hash']
+        self.assertEqual(sorted(s.args for s in header),
+                         [(repo_id, [profile_hash]) for repo_id in self.REPO_IDS])
+        for signature in header:
+            self.assertEqual(signature.task, regenerate_applicability_for_repo_chunk.name)
+        body = mock_chord.return_value.call_args[0][0]
+        self.assertEqual(body.task, aggregate_applicability_regeneration.name)
+        self.assertEqual(len(result.spawned_tasks), 1)
+
+    @mock.patch('pulp.server.managers.consumer.applicability.chord')
+    @mock.patch('pulp.server.managers.consumer.applicability.config')
+    def test_regenerate_applicability_for_repos_partitioned_nothing(self, mock_config,
+                                                                    mock_chord):
+        # Setup
+        self.populate_bindings()
+        mock_config.getint.return_value = 1
+        # Test
+        manager = factory.applicability_regeneration_manager()
+        result = manager.regenerate_applicability_for_repos(self.REPO_CRITERIA)
+        # Verify
+        self.assertFalse(mock_chord.called)
+        self.assertEqual(result, None)
+
+    def test_regenerate_applicability_for_repo_chunk(self):
+        # Setup
+        self.populate_consumers_different_profiles()
+        self.populate_bindings()
+        manager = factory.applicability_regeneration_manager()
+        manager.regenerate_applicability_for_consumers(self.CONSUMER_CRITERIA)
+        profile_hash = UnitProfile.get_collection().find_one(
+            {'consumer_id': self.CONSUMER_IDS[0]})['profile_hash']
+        profiler, cfg = plugins.get_profiler_by_type('rpm')
+        profiler.calculate_applicable_units = mock.Mock(return_value={'rpm': ['rpm-3']})
+        # Test
+        regenerated = manager.regenerate_applicability_for_repo_chunk(self.REPO_IDS[0],
+                                                                      [profile_hash])
+        # Verify
+        self.assertEqual(regenerated, 1)
+        for applicability in RepoProfileApplicability.get_collection().find():
+            if (applicability['repo_id'], applicability['profile_hash']) == \
+                    (self.REPO_IDS[0], profile_hash):
+                self.assertEqual(applicability['applicability'], {'rpm': ['rpm-3']})
+            else:
+                self.assertNotEqual(applicability['applicability'], {'rpm': ['rpm-3']})
+
+    def test_aggregate_applicability_regeneration(self):
+        manager = factory.applicability_regeneration_manager()
+        summary = manager.aggregate_applicability_regeneration([2, 0, 3])
+        self.assertEqual(summary, {'chunks': 3, 'regenerated': 5})
+
     def test_regenerate_applicability_for_repos_consumer_profile_updated(self):
         # Setup
         factory.consumer_manager().register(self.CONSUMER_IDS[0])
@@ -1404,3 +1509,88 @@ class TestGetConsumerApplicabilityMap(base.PulpServerTests,
             frozenset(['c_1', 'c_2']): {'type_1': ['a_1', 'a_3'], 'type_2': ['a_4']},
             frozenset(['c_2', 'c_3']): {'type_1': ['a_2']}}
         self.assert_equal_ignoring_list_order(c_a_map, expected_c_a_map)
+
+
+@mock.patch('pulp.server.managers.consumer.applicability.chord')
+@mock.patch('pulp.server.managers.consumer.applicability.RepoProfileApplicability.get_collection')
+class TestQueueRegenerateApplicabilityForRepos(unittest.TestCase):
+
+    @mock.patch('pulp.server.async.tasks.Task.apply_async_with_reservation')
+    def test_chunks_not_reserved(self, mock_apply_async_with_reservation, mock_get_collection,
+                                 mock_chord):
+        mock_get_collection.return_value.find.side_effect = lambda query, fields: [
+            {'profile_hash': h} for h in ('a', 'b', 'c')]
+
+        result = ApplicabilityRegenerationManager._queue_regenerate_applicability_for_repos(
+            ['repo-1', 'repo-2'], 2)
+
+        header = mock_chord.call_args[0][0]
+        self.assertEqual([signature.args for signature in header],
+                         [(repo_id, chunk) for repo_id in ('repo-1', 'repo-2')
+                          for chunk in (['a', 'b'], ['c'])])
+        for signature in header:
+            # plain tasks that any worker may run, rather than tasks queued for the worker
+            # holding a reservation
+            self.assertEqual(signature.task, regenerate_applicability_for_repo_chunk.name)
+            self.assertFalse('routing_key' in signature.options)
+        self.assertFalse(mock_apply_async_with_reservation.called)
+        body = mock_chord.return_value.call_args[0][0]
+        self.assertEqual(body.task, aggregate_applicability_regeneration.name)
+        # a mock is not an AsyncResult, so it is recorded as the task_id
+        self.assertEqual(result.spawned_tasks,
+                         [{'task_id': mock_chord.return_value.return_value}])
+
+    def test_nothing_to_regenerate(self, mock_get_collection, mock_chord):
+        mock_get_collection.return_value.find.return_value = []
+
+        result = ApplicabilityRegenerationManager._queue_regenerate_applicability_for_repos(
+            ['repo-1'], 2)
+
+        self.assertEqual(result, None)
+        self.assertFalse(mock_chord.called)
+
+
+@mock.patch('pulp.server.managers.consumer.applicability.RepoProfileApplicability.get_collection')
+class TestApplicabilityWriter(unittest.TestCase):
+
+    def test_flush_by_count(self, mock_get_collection):
+        writer = _ApplicabilityWriter()
+
+        with mock.patch('pulp.server.managers.consumer.applicability.REGENERATION_PAGE_SIZE', 2):
+            for i in range(5):
+                writer.add('hash-%d' % i, 'repo-1', {}, {})
+            writer.flush()
+
+        insert = mock_get_collection.return_value.insert
+        self.assertEqual([len(c[0][0]) for c in insert.call_args_list], [2, 2, 1])
+        self.assertEqual(writer.count, 5)
+
+    @mock.patch('pulp.server.managers.consumer.applicability.REGENERATION_BATCH_BYTES', 1024)
+    def test_flush_by_size(self, mock_get_collection):
+        writer = _ApplicabilityWriter()
+        # each document encodes to a little more than 400 bytes
+        profile = ['x' * 400]
+
+        for i in range(5):
+            writer.add('hash-%d' % i, 'repo-1', profile, {})
+        writer.flush()
+
+        insert = mock_get_collection.return_value.insert
+        self.assertEqual([len(c[0][0]) for c in insert.call_args_list], [2, 2, 1])
+        self.assertEqual(writer.count, 5)
+
+    @mock.patch('pulp.server.managers.consumer.applicability.REGENERATION_BATCH_BYTES', 100)
+    def test_oversized_document_inserted_alone(self, mock_get_collection):
+        writer = _ApplicabilityWriter()
+
+        writer.add('hash-1', 'repo-1', ['x' * 400], {})
+        writer.add('hash-2', 'repo-1', ['x' * 400], {})
+        writer.flush()
+
+        insert = mock_get_collection.return_value.insert
+        self.assertEqual([len(c[0][0]) for c in insert.call_args_list], [1, 1])
+
+    def test_flush_nothing_pending(self, mock_get_collection):
+        _ApplicabilityWriter().flush()
+
+        self.assertFalse(mock_get_collection.called)
@@ -12,6 +12,10 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import unittest
+
+import mock
+
 import base
 
 import pulp.plugins.types.database as types_db
@@ -450,3 +454,160 @@ class TypesDatabaseTests(base.PulpServerTests):
         index_dict = collection.index_information()
 
         self.assertEqual(2, len(index_dict)) # default (_id) + new one
+
+
+# -- cache tests ---------------------------------------------------------------
+
+CACHED_TYPE_DEFS = [
+    {'id': 'rpm', 'unit_key': ['name', 'epoch', 'version', 'release', 'arch']},
+    {'id': 'iso', 'unit_key': [['name', 'checksum'], 'size']},
+    {'id': 'old', 'unit_key': 'name'},
+]
+
+
+@mock.patch('pulp.plugins.types.database.ContentType.get_collection')
+class TestTypeDefinitionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = types_db.TypeDefinitionCache()
+
+    def types(self, mock_get_collection):
+        collection = mock_get_collection.return_value
+        collection.find.side_effect = lambda *args, **kwargs: [dict(t) for t in CACHED_TYPE_DEFS]
+        return collection
+
+    def test_load(self, mock_get_collection):
+        self.types(mock_get_collection)
+
+        self.cache.load()
+
+        self.assertEqual(self.cache.type_ids(), ['rpm', 'iso', 'old'])
+        self.assertEqual(self.cache.definition('iso'), CACHED_TYPE_DEFS[1])
+        self.assertEqual(self.cache.unit_key_fields('iso'), ('name', 'checksum', 'size'))
+        self.assertEqual(self.cache.unit_key_fields('old'), ('name',))
+        self.assertEqual(self.cache.loads, 1)
+
+    def test_loaded_on_first_lookup(self, mock_get_collection):
+        collection = self.types(mock_get_collection)
+
+        self.assertEqual(self.cache.definition('rpm'), CACHED_TYPE_DEFS[0])
+        self.assertEqual(self.cache.definition('rpm'), CACHED_TYPE_DEFS[0])
+
+        self.assertEqual(collection.find.call_count, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    @mock.patch('pulp.plugins.types.database.time')
+    def test_unknown_type_reloads(self, mock_time, mock_get_collection):
+        collection = self.types(mock_get_collection)
+        mock_time.time.return_value = 100
+        self.cache.load()
+
+        # not reloaded for MISS_RELOAD_INTERVAL seconds after a load
+        mock_time.time.return_value = 100 + types_db.MISS_RELOAD_INTERVAL - 1
+        self.assertTrue(self.cache.definition('deb') is None)
+        self.assertTrue(self.cache.unit_key_fields('deb') is None)
+        self.assertEqual(collection.find.call_count, 1)
+
+        mock_time.time.return_value = 100 + types_db.MISS_RELOAD_INTERVAL
+        self.assertTrue(self.cache.definition('deb') is None)
+        self.assertTrue(self.cache.unit_key_fields('deb') is None)
+        self.assertEqual(collection.find.call_count, 2)
+        self.assertEqual(self.cache.misses, 4)
+
+    @mock.patch('pulp.plugins.types.database.time')
+    def test_added_type_found(self, mock_time, mock_get_collection):
+        collection = self.types(mock_get_collection)
+        mock_time.time.return_value = 100
+        self.cache.load()
+        added = {'id': 'deb', 'unit_key': ['name']}
+        collection.find.side_effect = lambda *args, **kwargs: [dict(added)]
+
+        mock_time.time.return_value = 100 + types_db.MISS_RELOAD_INTERVAL
+        self.assertEqual(self.cache.definition('deb'), added)
+        self.assertEqual(self.cache.unit_key_fields('deb'), ('name',))
+
+    def test_clear(self, mock_get_collection):
+        collection = self.types(mock_get_collection)
+        self.cache.load()
+
+        self.cache.clear()
+        self.cache.definition('rpm')
+
+        self.assertEqual(collection.find.call_count, 2)
+
+    @mock.patch('pulp.plugins.types.database.pulp_db')
+    def test_collection(self, mock_pulp_db, mock_get_collection):
+        mock_pulp_db.get_collection.return_value.database = mock_pulp_db.get_database.return_value
+
+        collection = self.cache.collection('rpm')
+
+        self.assertTrue(self.cache.collection('rpm') is collection)
+        mock_pulp_db.get_collection.assert_called_once_with('units_rpm', create=False)
+
+    @mock.patch('pulp.plugins.types.database.pulp_db')
+    def test_collection_reconnected(self, mock_pulp_db, mock_get_collection):
+        self.cache.collection('rpm')
+
+        # the collection belongs to another database
+        mock_pulp_db.get_database.return_value = mock.Mock()
+        self.cache.collection('rpm')
+
+        self.assertEqual(mock_pulp_db.get_collection.call_count, 2)
+
+
+@mock.patch('pulp.plugins.types.database.ContentType.get_collection')
+class TestLookups(unittest.TestCase):
+
+    def setUp(self):
+        types_db.cache.clear()
+
+    def tearDown(self):
+        types_db.cache.clear()
+
+    def test_unit_key_lookups_do_not_query(self, mock_get_collection):
+        collection = mock_get_collection.return_value
+        collection.find.return_value = [dict(t) for t in CACHED_TYPE_DEFS]
+        types_db.cache.load()
+        mock_get_collection.reset_mock()
+
+        for i in range(10):
+            self.assertEqual(types_db.type_units_unit_key('rpm'), CACHED_TYPE_DEFS[0]['unit_key'])
+            self.assertEqual(types_db.type_units_unit_key_fields('iso'),
+                             ('name', 'checksum', 'size'))
+            self.assertEqual(types_db.type_definition('rpm'), CACHED_TYPE_DEFS[0])
+            self.assertEqual(types_db.all_type_ids(), ['rpm', 'iso', 'old'])
+
+        self.assertEqual(mock_get_collection.return_value.method_calls, [])
+        self.assertFalse(mock_get_collection.called)
+
+    def test_copies_returned(self, mock_get_collection):
+        mock_get_collection.return_value.find.return_value = [dict(t) for t in CACHED_TYPE_DEFS]
+
+        types_db.type_units_unit_key('rpm').append('foo')
+        types_db.type_definition('rpm')['unit_key'] = []
+        types_db.all_type_definitions()[0]['id'] = 'foo'
+
+        self.assertEqual(types_db.type_definition('rpm'), CACHED_TYPE_DEFS[0])
+
+    @mock.patch('pulp.plugins.types.database.pulp_db')
+    @mock.patch('pulp.plugins.types.database._create_or_update_type', new=mock.Mock())
+    @mock.patch('pulp.plugins.types.database._drop_indexes', new=mock.Mock())
+    @mock.patch('pulp.plugins.types.database._update_unit_key', new=mock.Mock())
+    @mock.patch('pulp.plugins.types.database._update_search_indexes', new=mock.Mock())
+    def test_update_database_clears(self, mock_pulp_db, mock_get_collection):
+        mock_get_collection.return_value.find.return_value = [dict(t) for t in CACHED_TYPE_DEFS]
+        types_db.cache.load()
+
+        types_db.update_database([mock.Mock(id='rpm')])
+
+        self.assertTrue(types_db.cache._definitions is None)
+
+    @mock.patch('pulp.plugins.types.database.pulp_db')
+    def test_create_or_update_type_clears(self, mock_pulp_db, mock_get_collection):
+        mock_get_collection.return_value.find.return_value = [dict(t) for t in CACHED_TYPE_DEFS]
+        mock_get_collection.return_value.find_one.return_value = None
+        types_db.cache.load()
+
+        types_db._create_or_update_type(TypeDefinition('deb', 'DEB', 'DEB', ['name'], [], []))
+
+        self.assertTrue(types_db.cache._definitions is None)
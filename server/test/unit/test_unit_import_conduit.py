@@ -15,6 +15,7 @@ import mock
 import base
 from pulp.plugins.conduits import mixins, unit_import
 from pulp.plugins.conduits.mixins import ImporterConduitException
+from pulp.plugins.model import Unit
 from pulp.server.db.model.criteria import UnitAssociationCriteria
 
 
@@ -60,3 +61,30 @@ class ImportUnitConduitTests(base.PulpServerTests):
 
         # Verify the correct propagation to the mixin method
         mock_get.assert_called_once_with(self.dest_repo_id, criteria, ImporterConduitException)
+
+    @mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager.'
+                'associate_all_by_ids')
+    def test_associate_units(self, mock_associate):
+        units = [Unit('type-1', {'k': 'a'}, {}, None), Unit('type-2', {'k': 'b'}, {}, None),
+                 Unit('type-1', {'k': 'c'}, {}, None)]
+        for i, unit in enumerate(units):
+            unit.id = 'unit-%d' % i
+
+        # Test
+        returned = self.conduit.associate_units(units)
+
+        # Verify
+        self.assertEqual(returned, units)
+        self.assertEqual(2, mock_associate.call_count)
+        mock_associate.assert_any_call(self.dest_repo_id, 'type-1', ['unit-0', 'unit-2'],
+                                       self.association_owner_type, self.association_owner_id)
+        mock_associate.assert_any_call(self.dest_repo_id, 'type-2', ['unit-1'],
+                                       self.association_owner_type, self.association_owner_id)
+
+    @mock.patch('pulp.server.managers.repo.unit_association.RepoUnitAssociationManager.'
+                'associate_all_by_ids', side_effect=Exception())
+    def test_associate_units_error(self, mock_associate):
+        unit = Unit('type-1', {'k': 'a'}, {}, None)
+        unit.id = 'unit-0'
+
+        self.assertRaises(ImporterConduitException, self.conduit.associate_units, [unit])